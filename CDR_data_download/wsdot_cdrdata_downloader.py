@@ -1,12 +1,32 @@
 import os
+import sys
+import json
+import time
+import hashlib
+import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
-BASE_URL = "https://data.wsdot.wa.gov/traffic/NW/FreewayData/5minute/DATA2025"
-OUTPUT_DIR = r"I:\Modeling and Analysis Group\03_Data\TrafficData\WSDOT\Freeways\2025\Data2025"
-TIMEOUT = 60
+## Download WSDOT 5-minute freeway loop data (one .DAT file per day).
+## Files are downloaded in parallel over one pooled session. A file is written to <name>.part and renamed when it is
+## complete, so an existing .DAT is always whole; an interrupted .part is resumed with an HTTP Range request.
+## manifest.json in the output folder records the size and sha256 of every downloaded file.
+##
+##   python wsdot_cdrdata_downloader.py --year 2025
+##   python wsdot_cdrdata_downloader.py --start 2025-10-01 --end 2025-10-31 --output-dir D:\Data2025
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+### configuration
+BASE_URL = "https://data.wsdot.wa.gov/traffic/NW/FreewayData/5minute/DATA{year}"
+OUTPUT_DIR = r"I:\Modeling and Analysis Group\03_Data\TrafficData\WSDOT\Freeways\{year}\Data{year}"
+TIMEOUT = 60
+MAX_WORKERS = 8 # files downloaded at the same time
+RETRIES = 4 # attempts after the first one, for connection errors, 5xx and incomplete files
+BACKOFF = 2.0 # seconds before the first retry, doubled for every following retry
+CHUNK_SIZE = 1 << 16
+MANIFEST_FILE = 'manifest.json'
+### end configuration
 
 def daterange(start_date, end_date):
     current = start_date
@@ -14,35 +34,207 @@ def daterange(start_date, end_date):
         yield current
         current += timedelta(days=1)
 
-def download_file(url, filepath):
+def make_session(pool_size = MAX_WORKERS) -> requests.Session:
+    '''a session whose connection pool keeps one keep-alive connection per worker'''
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def file_sha256(filepath) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class IncompleteDownload(Exception):
+    pass
+
+def _fetch(session, url, part_path, timeout):
+    '''
+    one attempt: download url into part_path, resuming from its current size.
+    returns the response status ('downloaded', 'resumed' or 'missing')
+    '''
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    # no content encoding, so Content-Length and the range offset count the bytes written to the file
+    headers = {'Accept-Encoding': 'identity'}
+    if offset > 0:
+        headers['Range'] = f'bytes={offset}-'
+    with session.get(url, headers = headers, stream = True, timeout = timeout) as r:
+        if r.status_code == 404:
+            return 'missing'
+        if r.status_code == 416 and offset > 0:
+            # nothing left to send: the partial file is whole if it has the size in Content-Range (bytes */size)
+            total = r.headers.get('Content-Range', '').rpartition('/')[2]
+            if total.isdigit() and int(total) == offset:
+                return 'resumed'
+            os.remove(part_path)
+            raise IncompleteDownload(f'{url}: partial file of {offset} bytes does not match the server, restarting')
+        r.raise_for_status()
+
+        resumed = r.status_code == 206
+        if not resumed:
+            offset = 0 # the server ignored the range, start over
+        expected = r.headers.get('Content-Length')
+        expected = offset + int(expected) if expected is not None else None
+        with open(part_path, 'ab' if resumed else 'wb') as f:
+            for chunk in r.iter_content(chunk_size = CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+    size = os.path.getsize(part_path)
+    if expected is not None and size != expected:
+        raise IncompleteDownload(f'{url}: {size} of {expected} bytes received')
+    return 'resumed' if resumed else 'downloaded'
+
+def download_file(session, url, filepath, retries = RETRIES, backoff = BACKOFF, timeout = TIMEOUT) -> dict:
+    '''
+    download url to filepath through filepath.part, resuming a partial download and retrying with exponential backoff.
+
+    :return: a manifest entry: file, url, status ('downloaded', 'resumed', 'missing' or 'error'), size, sha256, time
+    '''
+    part_path = filepath + '.part'
+    entry = {'file': os.path.basename(filepath), 'url': url}
+    for attempt in range(retries + 1):
+        try:
+            status = _fetch(session, url, part_path, timeout)
+            break
+        except (requests.RequestException, IncompleteDownload) as e:
+            response = getattr(e, 'response', None)
+            if response is not None and response.status_code < 500:
+                status = 'error' # client errors other than 404 do not get better with retries
+                entry['error'] = str(e)
+                break
+            if attempt == retries:
+                status = 'error'
+                entry['error'] = str(e)
+                break
+            time.sleep(backoff * 2 ** attempt)
+
+    entry['status'] = status
+    if status in ('downloaded', 'resumed'):
+        os.replace(part_path, filepath)
+        entry['size'] = os.path.getsize(filepath)
+        entry['sha256'] = file_sha256(filepath)
+        entry['time'] = datetime.now().isoformat(timespec = 'seconds')
+        print(f"Downloaded: {filepath}")
+    elif status == 'missing':
+        print(f"Missing: {url} (status 404)")
+    else:
+        print(f"Error downloading {url}: {entry.get('error')}")
+    return entry
+
+def load_manifest(output_dir) -> dict:
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(output_dir, manifest: dict):
+    '''write the manifest atomically, so an interrupted run never leaves a truncated manifest'''
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent = 1, sort_keys = True)
+    os.replace(path + '.tmp', path)
+
+def _is_complete(session, url, filepath, manifest, timeout) -> bool:
+    '''
+    a downloaded file is complete when the manifest has its size. A file from before the manifest is compared with
+    the size the server reports; a shorter file is turned back into a partial download.
+    '''
+    name = os.path.basename(filepath)
+    size = os.path.getsize(filepath)
+    if name in manifest and manifest[name].get('size') == size:
+        return True
     try:
-        with requests.get(url, stream=True, timeout=TIMEOUT) as r:
-            if r.status_code == 200:
-                with open(filepath, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                print(f"Downloaded: {filepath}")
-            else:
-                print(f"Missing: {url} (status {r.status_code})")
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
-
-def main():
-    start_date = datetime(2025, 10, 1)
-    end_date = datetime(2025, 10, 31)
-
-    for single_date in daterange(start_date, end_date):
+        r = session.head(url, headers = {'Accept-Encoding': 'identity'}, timeout = timeout, allow_redirects = True)
+        expected = int(r.headers['Content-Length']) if r.status_code == 200 and 'Content-Length' in r.headers else None
+    except requests.RequestException:
+        expected = None
+    if expected is None or expected == size:
+        manifest[name] = {'file': name, 'url': url, 'status': 'existing', 'size': size, 'sha256': file_sha256(filepath),
+                          'time': datetime.now().isoformat(timespec = 'seconds')}
+        return True
+    if size < expected:
+        os.replace(filepath, filepath + '.part')
+    return False
+
+def download_dates(dates, base_url = BASE_URL, output_dir = OUTPUT_DIR, max_workers = MAX_WORKERS, session = None,
+                   retries = RETRIES, backoff = BACKOFF, timeout = TIMEOUT) -> list:
+    '''
+    download the .DAT file of every date in parallel.
+
+    :param dates: dates to download
+    :param base_url: url of the data folder. {year} is replaced by the year of each date.
+    :param output_dir: output folder. {year} is replaced by the year of each date.
+    :param session: requests session to use, e.g. pointed at a local test server. None makes a pooled session.
+    :return: manifest entries of the files handled in this run
+    '''
+    session = session or make_session(max_workers)
+    jobs = {} # output folder -> list of (url, filepath)
+    for single_date in dates:
         date_str = single_date.strftime("%Y%m%d")
         filename = f"{date_str}.DAT"
-        url = f"{BASE_URL}/{filename}"
-        filepath = os.path.join(OUTPUT_DIR, filename)
+        folder = output_dir.format(year = single_date.year)
+        jobs.setdefault(folder, []).append((f"{base_url.format(year = single_date.year)}/{filename}", os.path.join(folder, filename)))
+
+    results = []
+    for folder, files in jobs.items():
+        os.makedirs(folder, exist_ok = True)
+        manifest = load_manifest(folder)
+        todo = []
+        for url, filepath in files:
+            if os.path.exists(filepath) and _is_complete(session, url, filepath, manifest, timeout):
+                print(f"Skip (complete): {os.path.basename(filepath)}")
+                continue
+            todo.append((url, filepath))
+
+        try:
+            with ThreadPoolExecutor(max_workers = max_workers) as pool:
+                futures = [pool.submit(download_file, session, url, filepath, retries, backoff, timeout) for url, filepath in todo]
+                for future in as_completed(futures):
+                    entry = future.result()
+                    results.append(entry)
+                    if entry['status'] in ('downloaded', 'resumed'):
+                        manifest[entry['file']] = entry
+        finally:
+            # the files finished before an error or an interruption stay in the manifest
+            save_manifest(folder, manifest)
+    return results
+
+def download_years(years, **kwargs) -> list:
+    '''download every day of the given years'''
+    dates = [d for year in years for d in daterange(datetime(year, 1, 1), datetime(year, 12, 31))]
+    return download_dates(dates, **kwargs)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Download WSDOT 5-minute freeway data (.DAT files).')
+    parser.add_argument('--year', type = int, nargs = '*', default = [], help = 'download every day of these years')
+    parser.add_argument('--start', help = 'first date, YYYY-MM-DD')
+    parser.add_argument('--end', help = 'last date, YYYY-MM-DD (default: start)')
+    parser.add_argument('--base-url', default = BASE_URL, help = 'data folder url, {year} is replaced')
+    parser.add_argument('--output-dir', default = OUTPUT_DIR, help = 'output folder, {year} is replaced')
+    parser.add_argument('--workers', type = int, default = MAX_WORKERS)
+    parser.add_argument('--retries', type = int, default = RETRIES)
+    args = parser.parse_args(argv)
 
-        if os.path.exists(filepath):
-            print(f"Skip (exists): {filename}")
-            continue
+    dates = [d for year in args.year for d in daterange(datetime(year, 1, 1), datetime(year, 12, 31))]
+    if args.start:
+        start_date = datetime.strptime(args.start, '%Y-%m-%d')
+        end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else start_date
+        dates += list(daterange(start_date, end_date))
+    if not dates:
+        parser.error('give --year or --start')
 
-        download_file(url, filepath)
+    results = download_dates(sorted(set(dates)), base_url = args.base_url, output_dir = args.output_dir,
+                             max_workers = args.workers, retries = args.retries)
+    counts = {}
+    for entry in results:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    print(f"Done: {counts}")
+    return 0 if counts.get('error', 0) == 0 else 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+## Columnar store of WSDOT 5-minute freeway loop data, built from the daily .DAT files of wsdot_cdrdata_downloader.py.
+## Every day becomes one file in a month partition of the store:
+##     <store>/month=2025-10/20251001.parquet
+## so newly downloaded days are appended by adding files, and reads only open the months of the requested date range.
+## Columns: date (date32), minute (minute of the day, int16), station (dictionary), lane (int8), volume (int32),
+## occupancy (float32), speed (float32).
+##
+##   python wsdot_cdrdata_store.py ingest "I:\...\Freeways\2025\Data2025" D:\cdr_store
+##   python wsdot_cdrdata_store.py aggregate D:\cdr_store --start 2025-10-01 --end 2025-10-31 --output periods.csv
+
+### configuration
+## layout of a record in a .DAT file. The date of a record comes from the file name (YYYYMMDD.DAT).
+DAT_COLUMNS = ['station', 'lane', 'time', 'volume', 'occupancy', 'speed']
+DAT_SEPARATOR = ','
+DAT_HEADER_ROWS = 0
+DAT_TIME_FORMAT = '%H:%M'
+DAT_CHUNK_SIZE = 500000 # rows parsed at a time
+MAX_DROPPED_SHARE = 0.05 # a file that loses a larger share of its records in parsing is not ingested
+MAX_WORKERS = None # processes used to parse files, None uses every core
+STORE_FORMAT = 'parquet' # parquet or feather
+### end configuration
+
+## time periods of the day, the same as Eco_data_processor: AM (6-9), MD (9-15:30), PM (15:30-18:30), NI (18:30-6)
+TIME_PERIODS = ['AM', 'MD', 'PM', 'NI']
+_PERIOD_BREAKS = np.array([0, 360, 540, 930, 1110]) # minute of the day each of _PERIOD_CODES starts
+_PERIOD_CODES = np.array([3, 0, 1, 2, 3], dtype = np.int8) # index into TIME_PERIODS
+_AGGREGATED = ('volume', 'occupancy', 'speed')
+
+SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('minute', pa.int16()),
+    ('station', pa.dictionary(pa.int32(), pa.string())),
+    ('lane', pa.int8()),
+    ('volume', pa.int32()),
+    ('occupancy', pa.float32()),
+    ('speed', pa.float32()),
+])
+_FILE_DATE = re.compile(r'(\d{8})\.DAT$', re.IGNORECASE)
+
+def file_date(dat_file):
+    '''date of a daily .DAT file from its name (YYYYMMDD.DAT)'''
+    m = _FILE_DATE.search(os.path.basename(dat_file))
+    if m is None:
+        raise ValueError(f'{dat_file} is not named YYYYMMDD.DAT')
+    return datetime.strptime(m.group(1), '%Y%m%d').date()
+
+def _typed_chunk(chunk: pd.DataFrame, day) -> pa.Table:
+    time = pd.to_datetime(chunk['time'], format = DAT_TIME_FORMAT, errors = 'coerce')
+    minute = (time.dt.hour * 60 + time.dt.minute).to_numpy(dtype = float)
+    valid = ~np.isnan(minute)
+    number = lambda col: pd.to_numeric(chunk[col], errors = 'coerce').to_numpy(dtype = float)[valid]
+    volume, occupancy, speed = number('volume'), number('occupancy'), number('speed')
+    return pa.table({
+        'date': pa.array(np.full(valid.sum(), np.datetime64(day, 'D')), pa.date32()),
+        'minute': pa.array(minute[valid].astype(np.int16)),
+        'station': pa.array(chunk['station'].astype(str).str.strip().to_numpy()[valid]).dictionary_encode(),
+        'lane': pa.array(pd.to_numeric(chunk['lane'], errors = 'coerce').fillna(-1).to_numpy()[valid].astype(np.int8)),
+        # missing readings are null rather than 0 or NaN, so the sums and counts of aggregate_periods skip them
+        'volume': pa.array(np.nan_to_num(volume, nan = 0).astype(np.int32), mask = np.isnan(volume)),
+        'occupancy': pa.array(occupancy.astype(np.float32), mask = np.isnan(occupancy)),
+        'speed': pa.array(speed.astype(np.float32), mask = np.isnan(speed)),
+    }, schema = SCHEMA)
+
+def parse_dat_file(dat_file, max_dropped_share = MAX_DROPPED_SHARE) -> pa.Table:
+    '''
+    parse a daily .DAT file into a table with SCHEMA. The file is read DAT_CHUNK_SIZE rows at a time and every chunk is
+    converted to typed columns right away, so the raw text of the whole day is never held in memory.
+    Records whose time cannot be parsed are dropped. A file without records, or one that loses more than
+    max_dropped_share of them (e.g. a file of another layout), raises ValueError instead of returning a short table.
+    '''
+    day = file_date(dat_file)
+    reader = pd.read_csv(dat_file, sep = DAT_SEPARATOR, header = None, names = DAT_COLUMNS, skiprows = DAT_HEADER_ROWS,
+                         dtype = str, chunksize = DAT_CHUNK_SIZE, skipinitialspace = True)
+    records = 0
+    tables = []
+    for chunk in reader:
+        records += len(chunk)
+        tables.append(_typed_chunk(chunk, day))
+    if records == 0:
+        raise ValueError(f'{dat_file} has no records')
+    table = pa.concat_tables(tables).unify_dictionaries().combine_chunks()
+    dropped = records - table.num_rows
+    if dropped > max_dropped_share * records:
+        raise ValueError(f'{dat_file}: {dropped} of {records} records could not be parsed, check DAT_COLUMNS and DAT_TIME_FORMAT')
+    if dropped > 0:
+        print(f'Warning: {os.path.basename(dat_file)}: {dropped} of {records} records could not be parsed and were dropped')
+    return table
+
+def day_path(store_dir, day, store_format = STORE_FORMAT):
+    return os.path.join(store_dir, f'month={day:%Y-%m}', f'{day:%Y%m%d}.{store_format}')
+
+def _ingest_file(dat_file, store_dir, store_format):
+    day = file_date(dat_file)
+    table = parse_dat_file(dat_file)
+    path = day_path(store_dir, day, store_format)
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    # written under a temporary name, so a day is either in the store completely or not at all
+    tmp_path = path + '.tmp'
+    if store_format == 'feather':
+        feather.write_feather(table, tmp_path)
+    else:
+        pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return dat_file, table.num_rows
+
+def ingest(dat_files, store_dir, max_workers = MAX_WORKERS, store_format = STORE_FORMAT, overwrite = False) -> pd.DataFrame:
+    '''
+    parse .DAT files into the store in parallel processes. Days already in the store are skipped unless overwrite,
+    so ingesting a download folder again only adds the newly downloaded days. A file that fails to parse is reported
+    and not written, so it is tried again by the next run.
+
+    :param dat_files: .DAT files, or a folder of .DAT files
+    :return: the files ingested in this run with their record counts, and the error of the files that failed
+    '''
+    if isinstance(dat_files, str) and os.path.isdir(dat_files):
+        dat_files = sorted(os.path.join(dat_files, name) for name in os.listdir(dat_files) if _FILE_DATE.search(name))
+    todo = [f for f in dat_files if overwrite or not os.path.exists(day_path(store_dir, file_date(f), store_format))]
+    print(f'{len(todo)} of {len(dat_files)} files to ingest')
+
+    done = []
+    with ProcessPoolExecutor(max_workers = max_workers) as pool:
+        futures = {pool.submit(_ingest_file, f, store_dir, store_format): f for f in todo}
+        for future in as_completed(futures):
+            try:
+                dat_file, rows = future.result()
+            except Exception as e:
+                print(f'Failed {os.path.basename(futures[future])}: {e}')
+                done.append({'file': futures[future], 'records': 0, 'error': str(e)})
+                continue
+            print(f'Ingested {os.path.basename(dat_file)}: {rows} records')
+            done.append({'file': dat_file, 'records': rows, 'error': None})
+    return pd.DataFrame(done, columns = ['file', 'records', 'error'])
+
+def open_store(store_dir, store_format = STORE_FORMAT) -> ds.Dataset:
+    month = pa.field('month', pa.string())
+    return ds.dataset(store_dir, format = 'ipc' if store_format == 'feather' else 'parquet', schema = SCHEMA.append(month),
+                      partitioning = ds.partitioning(pa.schema([month]), flavor = 'hive'))
+
+def _filter(start = None, end = None, stations = None):
+    '''
+    filter expression of a date range and stations. The month bounds let the dataset skip whole partitions;
+    the date and station conditions are pushed down to the row groups of the remaining files.
+    '''
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start).date()
+        conditions += [ds.field('month') >= f'{start:%Y-%m}', ds.field('date') >= start]
+    if end is not None:
+        end = pd.Timestamp(end).date()
+        conditions += [ds.field('month') <= f'{end:%Y-%m}', ds.field('date') <= end]
+    if stations is not None:
+        conditions.append(ds.field('station').isin([str(s) for s in stations]))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def read_store(store_dir, start = None, end = None, stations = None, columns = None, store_format = STORE_FORMAT) -> pd.DataFrame:
+    '''
+    records of the store between start and end (inclusive dates) for the given stations.
+
+    :param stations: station ids, None reads every station
+    :param columns: columns to read, None reads every column of SCHEMA
+    '''
+    dataset = open_store(store_dir, store_format)
+    columns = columns or SCHEMA.names
+    return dataset.to_table(columns = columns, filter = _filter(start, end, stations)).to_pandas()
+
+def time_period_codes(minute) -> np.ndarray:
+    '''index into TIME_PERIODS of every minute of the day'''
+    return _PERIOD_CODES[np.searchsorted(_PERIOD_BREAKS, np.asarray(minute), side = 'right') - 1]
+
+def aggregate_periods(store_dir, start = None, end = None, stations = None, by_lane = False, store_format = STORE_FORMAT) -> pd.DataFrame:
+    '''
+    volume (sum), occupancy and speed (mean) by date, time period (AM/MD/PM/NI) and station (and lane).
+    The store is scanned one batch at a time and every batch is grouped by pyarrow, so memory is bounded by the
+    groups rather than by the records.
+
+    :return: date, TimePeriod, station, [lane,] volume, occupancy, speed, intervals
+    '''
+    dataset = open_store(store_dir, store_format)
+    keys = ['date', 'period', 'station'] + (['lane'] if by_lane else [])
+    columns = ['date', 'minute', 'station', 'volume', 'occupancy', 'speed'] + (['lane'] if by_lane else [])
+    partials = []
+    for batch in dataset.to_batches(columns = columns, filter = _filter(start, end, stations)):
+        if batch.num_rows == 0:
+            continue
+        table = pa.Table.from_batches([batch])
+        period = time_period_codes(table['minute'].to_numpy(zero_copy_only = False))
+        table = table.append_column('period', pa.array(period)).set_column(2, 'station', table['station'].cast(pa.string()))
+        partials.append(table.group_by(keys).aggregate([(col, stat) for col in _AGGREGATED for stat in ('sum', 'count')]))
+    if not partials:
+        return pd.DataFrame(columns = ['date', 'TimePeriod', 'station'] + (['lane'] if by_lane else []) + list(_AGGREGATED) + ['intervals'])
+
+    # batches of the same day can share groups, so the partial sums and counts are added up before the means are taken
+    merged = pa.concat_tables(partials, promote_options = 'permissive')
+    df = merged.group_by(keys).aggregate([(f'{col}_{stat}', 'sum') for col in _AGGREGATED for stat in ('sum', 'count')]).to_pandas()
+    total = lambda col, stat: df[f'{col}_{stat}_sum']
+
+    out = df[keys].copy()
+    out.insert(1, 'TimePeriod', pd.Categorical.from_codes(out.pop('period'), TIME_PERIODS))
+    out['volume'] = total('volume', 'sum').astype(np.int64)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        out['occupancy'] = total('occupancy', 'sum') / total('occupancy', 'count')
+        out['speed'] = total('speed', 'sum') / total('speed', 'count')
+    out['intervals'] = total('volume', 'count').astype(np.int64)
+    return out.sort_values(['date', 'TimePeriod', 'station'] + (['lane'] if by_lane else []), kind = 'stable').reset_index(drop = True)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Columnar store of WSDOT 5-minute freeway data.')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    ingest_parser = commands.add_parser('ingest', help = 'add the .DAT files of a folder to the store')
+    ingest_parser.add_argument('dat_folder')
+    ingest_parser.add_argument('store')
+    ingest_parser.add_argument('--workers', type = int, default = MAX_WORKERS)
+    ingest_parser.add_argument('--format', choices = ['parquet', 'feather'], default = STORE_FORMAT)
+    ingest_parser.add_argument('--overwrite', action = 'store_true', help = 'parse days that are already in the store again')
+    aggregate_parser = commands.add_parser('aggregate', help = 'aggregate the store to AM/MD/PM/NI periods')
+    aggregate_parser.add_argument('store')
+    aggregate_parser.add_argument('--start', help = 'first date, YYYY-MM-DD')
+    aggregate_parser.add_argument('--end', help = 'last date, YYYY-MM-DD')
+    aggregate_parser.add_argument('--station', nargs = '*', help = 'station ids, default every station')
+    aggregate_parser.add_argument('--by-lane', action = 'store_true')
+    aggregate_parser.add_argument('--format', choices = ['parquet', 'feather'], default = STORE_FORMAT)
+    aggregate_parser.add_argument('--output', required = True, help = 'csv file')
+    args = parser.parse_args(argv)
+
+    if args.command == 'ingest':
+        done = ingest(args.dat_folder, args.store, max_workers = args.workers, store_format = args.format, overwrite = args.overwrite)
+        return 1 if done['error'].notna().any() else 0
+    else:
+        df = aggregate_periods(args.store, args.start, args.end, args.station, args.by_lane, args.format)
+        df.to_csv(args.output, index = False)
+        print(f'{len(df)} rows written to {args.output}')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
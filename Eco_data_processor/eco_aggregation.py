@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pandas.tseries.api import guess_datetime_format
+
+## Aggregation of Eco-Counter csv exports to the four sheets of the EastRail aggregator (eco_data_processor.py), without Qt.
+## A folder of counter files can be aggregated headless, one file per process, into one combined table per sheet:
+##
+##   python eco_aggregation.py "I:\...\Eco counters" D:\eco_output --format parquet --excel
+
+SHEETS = ['Avg_by_TOD_Month', 'Avg_Daily_by_Month', 'Daily_Totals', 'Midweek_Avg_Daily']
+
+MONTHS = ['Jan','Feb','Mar','Apr','May','Jun', 'Jul','Aug','Sep','Oct','Nov','Dec']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MID_WEEKDAYS = ['Tuesday', 'Wednesday', 'Thursday']
+
+## Time of Day: AM (6-9), MD (9-15:30), PM (15:30-18:30), NI (18:30-6)
+TIME_PERIODS = ['AM', 'MD', 'PM', 'NI']
+_PERIOD_BREAKS = np.array([0, 6, 9, 15.5, 18.5]) # hour each of _PERIOD_CODES starts
+_PERIOD_CODES = np.array([3, 0, 1, 2, 3]) # index into TIME_PERIODS
+
+## datetime format guessed for a shape of time string (digits replaced by 0) and dayfirst, e.g. ('00/00/0000 00:00', False)
+_format_cache = {}
+
+def _time_format(sample, dayfirst):
+    key = (re.sub(r'\d', '0', sample), dayfirst)
+    if key not in _format_cache:
+        _format_cache[key] = guess_datetime_format(sample, dayfirst = dayfirst)
+    return _format_cache[key]
+
+def parse_times(values: pd.Series) -> pd.Series:
+    '''
+    parse a column of time strings that may mix month-first and day-first dates. The format is guessed from the first
+    values and applied to the whole column at once; values that do not fit it are parsed with the day-first format
+    guessed from the first of them. Values that fit neither are NaT.
+    '''
+    values = values.astype(str)
+    parsed = pd.Series(pd.NaT, index = values.index, dtype = 'datetime64[ns]')
+    remaining = np.ones(len(values), dtype = bool)
+    for dayfirst in (False, True):
+        if not remaining.any():
+            break
+        todo = values[remaining]
+        # the first values that give a format, so a stray bad value does not force per-value parsing
+        fmt = next((f for f in (_time_format(sample, dayfirst) for sample in todo.iloc[:100].unique()) if f), None)
+        if fmt is None:
+            result = pd.to_datetime(todo, dayfirst = dayfirst, errors = 'coerce')
+        else:
+            result = pd.to_datetime(todo, format = fmt, errors = 'coerce')
+        parsed[remaining] = result
+        remaining = parsed.isna().to_numpy()
+    return parsed
+
+def time_period_codes(hours) -> np.ndarray:
+    '''index into TIME_PERIODS of every fractional hour of the day'''
+    return _PERIOD_CODES[np.searchsorted(_PERIOD_BREAKS, np.asarray(hours), side = 'right') - 1]
+
+def load_counts(file_path) -> pd.DataFrame:
+    '''read an Eco-Counter csv export, with Time parsed and the fractional Hour of every record'''
+    df = pd.read_csv(file_path)
+    df['Time'] = parse_times(df['Time'])
+    df = df.dropna(subset=['Time'])
+    df['Hour'] = df['Time'].dt.hour + df['Time'].dt.minute / 60
+    return df
+
+def aggregate(df: pd.DataFrame) -> dict:
+    '''
+    the aggregations of the Excel output, keyed by sheet name. Records are grouped on integer month, weekday and time
+    period codes; the names are put back on the (small) aggregated frames.
+    '''
+    numeric_cols = df.select_dtypes(include='number').columns
+    values = df[numeric_cols]
+    time = df['Time']
+    date = time.dt.normalize().rename('Date')
+    month = time.dt.month.rename('Month') - 1
+    weekday = time.dt.dayofweek.rename('Weekday')
+    period = pd.Series(time_period_codes(df['Hour'].to_numpy()), index = df.index, name = 'TimePeriod')
+
+    # --- 1. Average by Time of Day by Month ---
+    tod_month = values.groupby([month, date, weekday, period]).sum().reset_index()
+    tod_month['Month'] = np.array(MONTHS)[tod_month['Month']]
+    tod_month['Weekday'] = np.array(WEEKDAYS)[tod_month['Weekday']]
+    tod_month['TimePeriod'] = np.array(TIME_PERIODS)[tod_month['TimePeriod']]
+    tod_month['Date'] = tod_month['Date'].dt.date
+
+    # --- 2. Average Daily Total by Month ---
+    daily = values.groupby([date, weekday]).sum().reset_index()
+    daily_month = daily['Date'].dt.month.to_numpy() - 1
+    mid_week = daily['Weekday'].isin([WEEKDAYS.index(day) for day in MID_WEEKDAYS]).to_numpy()
+    daily['Weekday'] = np.array(WEEKDAYS)[daily['Weekday']]
+    daily['Date'] = daily['Date'].dt.date
+    daily['Month'] = np.array(MONTHS)[daily_month]
+
+    def monthly_average(rows):
+        avg = daily.loc[rows, numeric_cols].groupby(daily_month[rows]).mean()
+        avg.index = pd.CategoricalIndex(np.array(MONTHS)[avg.index], categories=MONTHS, ordered=True, name='Month')
+        avg = avg.reset_index()
+        for col in numeric_cols:
+            avg[col] = avg[col].fillna(0).astype('int')
+        return avg
+
+    return {
+        'Avg_by_TOD_Month': tod_month,
+        'Avg_Daily_by_Month': monthly_average(np.ones(len(daily), dtype = bool)),
+        'Daily_Totals': daily,
+        'Midweek_Avg_Daily': monthly_average(mid_week),
+    }
+
+def write_excel(sheets: dict, save_path):
+    with pd.ExcelWriter(save_path) as writer:
+        readme = writer.book.add_worksheet('README')
+        readme.write(0, 0, datetime.datetime.now().strftime("Generated on %Y-%m-%d %H:%M:%S"))
+        readme.write(2, 0, save_path)
+        readme.write(4, 0, "Description")
+        readme.write(5, 0, "Average values by Time of Day (AM/MD/PM/NI) by Month")
+        readme.write(6, 0, "Average daily totals aggregated by Month")  
+        readme.write(8, 0, "Notes")
+        readme.write(9, 0, "Time of Day is categorized as: AM (6-9), MD (9-15:30), PM (15:30-18:30), NI (18:30-6)")
+        readme.write(10, 0, "Daily totals are calculated by summing all records for each date, then averaged by month")
+        readme.write(11, 0, f'Midweek average is calculated by filtering for {MID_WEEKDAYS} and then averaging daily totals by month')
+
+        for sheet, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet, index=False)
+
+
+def aggregate_file(file_path) -> dict:
+    '''the sheets of one counter file, with the counter (file name without extension) in a first Counter column'''
+    counter = os.path.splitext(os.path.basename(file_path))[0]
+    sheets = aggregate(load_counts(file_path))
+    for df in sheets.values():
+        df.insert(0, 'Counter', counter)
+    return sheets
+
+def aggregate_files(files, max_workers = None) -> dict:
+    '''
+    aggregate counter files in parallel processes and combine every sheet over the files. Counters with different
+    count columns are combined on the union of the columns.
+    '''
+    files = list(files)
+    with ProcessPoolExecutor(max_workers = max_workers) as pool:
+        results = list(pool.map(aggregate_file, files))
+    return {sheet: pd.concat([result[sheet] for result in results], ignore_index = True) for sheet in SHEETS}
+
+def save_sheets(sheets: dict, output_dir, output_format = 'parquet') -> list:
+    '''write every sheet to <output_dir>/<sheet>.parquet or .csv'''
+    os.makedirs(output_dir, exist_ok = True)
+    paths = []
+    for sheet, df in sheets.items():
+        path = os.path.join(output_dir, f'{sheet}.{output_format}')
+        if output_format == 'parquet':
+            df.to_parquet(path, index = False)
+        else:
+            df.to_csv(path, index = False)
+        paths.append(path)
+    return paths
+
+def aggregate_folder(input_dir, output_dir, output_format = 'parquet', excel = False, max_workers = None) -> dict:
+    '''
+    aggregate every csv file of input_dir and write the combined sheets to output_dir.
+
+    :param output_format: parquet or csv
+    :param excel: also write the combined sheets to <output_dir>/eco_aggregation.xlsx. Writing Excel is the slowest
+                  part of a run, so it is optional.
+    :return: the combined sheets
+    '''
+    files = sorted(os.path.join(input_dir, name) for name in os.listdir(input_dir) if name.lower().endswith('.csv'))
+    print(f'Aggregating {len(files)} counter files')
+    sheets = aggregate_files(files, max_workers)
+    for path in save_sheets(sheets, output_dir, output_format):
+        print(f'Saved {path}')
+    if excel:
+        excel_path = os.path.join(output_dir, 'eco_aggregation.xlsx')
+        write_excel(sheets, excel_path)
+        print(f'Saved {excel_path}')
+    return sheets
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Aggregate a folder of Eco-Counter csv exports.')
+    parser.add_argument('input_dir', help = 'folder of counter csv files')
+    parser.add_argument('output_dir')
+    parser.add_argument('--format', choices = ['parquet', 'csv'], default = 'parquet')
+    parser.add_argument('--excel', action = 'store_true', help = 'also write a combined Excel workbook')
+    parser.add_argument('--workers', type = int, default = None)
+    args = parser.parse_args(argv)
+    aggregate_folder(args.input_dir, args.output_dir, args.format, args.excel, args.workers)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,17 @@
 from PyQt6.QtWidgets import (
     QApplication, QMessageBox, QMenu, QStatusBar, QLabel, QTableWidget, QTableWidgetItem, QComboBox, QListWidgetItem, 
-    QSizePolicy, QWidget, QVBoxLayout, QListWidget, QPushButton, QDialog, QTabWidget, QHBoxLayout, QFileDialog, QDialogButtonBox
+    QSizePolicy, QWidget, QVBoxLayout, QListWidget, QPushButton, QDialog, QTabWidget, QHBoxLayout, QFileDialog, QDialogButtonBox,
+    QTableView
     )
 
 from PyQt6.QtGui import QAction, QBrush, QColor
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+import numpy as np
 import pandas as pd
 import logging
 
 from utility import ThreadWrapper, dialog_level, IndentAdapter
-from LandUseUtilities.Parcels import Parcels
-from LandUseUtilities.parcel_interpolation import LinearParcelInterpolator
+# LandUseUtilities (and h5py with it) is imported when a parcel file is opened, not when the GUI starts
 
 
 class Shared_GUI_Widgets:
@@ -71,7 +72,23 @@ class Shared_GUI_Widgets:
         menu.addAction(delete_action)
         menu.exec(table.viewport().mapToGlobal(pos))
     
+    def create_dataframe_table(self, df: pd.DataFrame = None) -> QTableView:
+        '''a sortable QTableView backed by a DataFrameTableModel, with the shared context menu and selection sum'''
+        table = QTableView()
+        table.setModel(DataFrameTableModel(df, table))
+        table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder) # keep the original order until a header is clicked
+        table.setSortingEnabled(True)
+        table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        table.customContextMenuRequested.connect(lambda pos, t=table: self.create_context_menu(t, pos))
+        table.selectionModel().selectionChanged.connect(lambda sel, des, t=table: self.on_table_selection_changed(t))
+        return table
+
     def copy_result_to_clipboard(self, table):
+        if isinstance(table.model(), DataFrameTableModel):
+            QApplication.clipboard().setText(table.model().to_text())
+            QMessageBox.information(table, "Copied", "All data copied to clipboard including headers.")
+            return
+
         rows = table.rowCount()
         cols = table.columnCount()
 
@@ -89,6 +106,10 @@ class Shared_GUI_Widgets:
         QMessageBox.information(table, "Copied", "All data copied to clipboard including headers.")
 
     def delete_selected(self, table):
+        if isinstance(table.model(), DataFrameTableModel):
+            table.model().remove_rows({index.row() for index in table.selectionModel().selectedIndexes()})
+            return
+
         selected_rows = sorted({item.row() for item in table.selectedItems()}, reverse = True)
 
         for row in selected_rows:
@@ -107,6 +128,17 @@ class Shared_GUI_Widgets:
 
     def on_table_selection_changed(self, table):
         """compute sum of selected numeric cells from  a table"""
+        if isinstance(table.model(), DataFrameTableModel):
+            indexes = table.selectionModel().selectedIndexes()
+            total, found = table.model().sum_of(indexes)
+            if found:
+                self.status_sections[1].setText(f"Sum: {total}")
+                self.status_sections[2].setText(f"{len(indexes)} selected")
+            else:
+                self.status_sections[1].setText("")
+                self.status_sections[2].setText("")
+            return
+
         items = table.selectedItems()
         total = 0.0
         found = False
@@ -179,6 +211,101 @@ class NumericTableWidgetItem(QTableWidgetItem):
         return super().__lt__(other)
     
 
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Read-only table model backed by the numpy arrays of a DataFrame. Cells are formatted only when the view asks for them,
+    sorting works on the raw arrays, and nothing is copied per cell.
+    """
+    def __init__(self, df: pd.DataFrame = None, parent = None):
+        super().__init__(parent)
+        self.set_dataframe(df)
+
+    def set_dataframe(self, df: pd.DataFrame = None):
+        self.beginResetModel()
+        if df is None:
+            df = pd.DataFrame()
+        self._headers = [str(col) for col in df.columns]
+        self._columns = [df.iloc[:, i].to_numpy() for i in range(df.shape[1])]
+        self._numeric = [pd.api.types.is_numeric_dtype(df.iloc[:, i]) and not pd.api.types.is_bool_dtype(df.iloc[:, i]) for i in range(df.shape[1])]
+        self._order = np.arange(df.shape[0]) # view row -> array row
+        self.endResetModel()
+
+    def dataframe(self) -> pd.DataFrame:
+        '''the data in the current view order'''
+        return pd.DataFrame({header: values[self._order] for header, values in zip(self._headers, self._columns)}, columns = self._headers)
+
+    def rowCount(self, parent = QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent = QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def raw_value(self, row, col):
+        return self._columns[col][self._order[row]]
+
+    def data(self, index, role = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self.raw_value(index.row(), index.column())
+            if pd.isna(value):
+                return ""
+            return str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and self._numeric[index.column()]:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return str(section + 1)
+
+    def sort(self, column, order = Qt.SortOrder.AscendingOrder):
+        if column < 0 or column >= len(self._columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        values = pd.Series(self._columns[column][self._order])
+        if not self._numeric[column]:
+            values = values.astype(str).where(values.notna())
+        ascending = (order == Qt.SortOrder.AscendingOrder)
+        positions = values.sort_values(ascending = ascending, kind = 'stable', na_position = 'last').index.to_numpy()
+        self._order = self._order[positions]
+        self.layoutChanged.emit()
+
+    def remove_rows(self, rows):
+        if not rows:
+            return
+        self.beginResetModel()
+        keep = np.ones(len(self._order), dtype = bool)
+        keep[list(rows)] = False
+        self._order = self._order[keep]
+        self.endResetModel()
+
+    def sum_of(self, indexes) -> tuple:
+        '''sum of the numeric cells in indexes, and whether any numeric cell was selected'''
+        rows_by_col = {}
+        for index in indexes:
+            rows_by_col.setdefault(index.column(), []).append(index.row())
+
+        total = 0.0
+        found = False
+        for col, rows in rows_by_col.items():
+            if not self._numeric[col]:
+                continue
+            values = self._columns[col][self._order[rows]].astype(float)
+            if np.isnan(values).all():
+                continue
+            total += float(np.nansum(values))
+            found = True
+        return total, found
+
+    def to_text(self) -> str:
+        '''tab delimited text of the whole table, with headers, in view order'''
+        return self.dataframe().to_csv(sep = '\t', index = False)
+
+
 class ValidationAndSummary(QDialog, Shared_GUI_Widgets):
     def __init__(self, parent=None, msg=None, data_dict=None):
         # data_dict: dictionary containing data to be displayed in the tables
@@ -204,27 +331,8 @@ class ValidationAndSummary(QDialog, Shared_GUI_Widgets):
         self.tabs = QTabWidget()
         
         for key, value in self.data_dict.items():
-            self.tab_pages[key] = QTableWidget() 
-            self.tab_pages[key].setSortingEnabled(False)
-            self.tab_pages[key].setRowCount(value.shape[0])
-            self.tab_pages[key].setColumnCount(len(value.columns))
-            self.tab_pages[key].setHorizontalHeaderLabels(value.columns)
-            self.tab_pages[key].setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-            self.tab_pages[key].customContextMenuRequested.connect( 
-                lambda pos, t=self.tab_pages[key]: self.create_context_menu(t, pos)
-            )
-            self.tab_pages[key].selectionModel().selectionChanged.connect(
-                lambda sel, des, t=self.tab_pages[key]: self.on_table_selection_changed(t)
-            )
-
-            # load data into tab. value is a dataframe
-            for row in range(value.shape[0]):
-                for col in range(len(value.columns)):
-                    val = value.iat[row, col]
-                    item = NumericTableWidgetItem(val)
-                    self.tab_pages[key].setItem(row, col, item)
-
-            self.tab_pages[key].setSortingEnabled(True)
+            # value is a dataframe. the view reads it through the model, no per-cell items.
+            self.tab_pages[key] = self.create_dataframe_table(value)
             self.tabs.addTab(self.tab_pages[key], key)
 
         self.main_layout.addWidget(self.tabs)
@@ -325,6 +433,7 @@ class BaseDataGenerator(QDialog, Shared_GUI_Widgets):
             self.sel2_btn.setEnabled(False)
             self.interpolate_btn.setEnabled(False)
             indent = dialog_level(self)
+            from LandUseUtilities.Parcels import Parcels
             self.base_parcel = Parcels(self.parent().project_settings['subarea_file'], self.parent().project_settings['lookup_file'], path, self.parent().horizon_year, indent + 1)
             self.status_sections[0].setText("Base parcel selected.")
             self.valid_btn.setEnabled(True)
@@ -362,7 +471,7 @@ class BaseDataGenerator(QDialog, Shared_GUI_Widgets):
         self.worker.error.connect(lambda eobj: self._on_interpolation_error(eobj))
         self.worker.start()
 
-    def interpolate_two_parcel_files(self, lower_path, upper_path, lower_year, upper_year, horizon_year) -> Parcels:
+    def interpolate_two_parcel_files(self, lower_path, upper_path, lower_year, upper_year, horizon_year) -> 'Parcels':
         '''
         create a parcel data by interpolating two parcels.
     
@@ -374,8 +483,8 @@ class BaseDataGenerator(QDialog, Shared_GUI_Widgets):
         :return: interpolated parcel data
         :rtype: Parcels
         '''
-        import debugpy
-        debugpy.breakpoint()
+        from LandUseUtilities.Parcels import Parcels
+        from LandUseUtilities.parcel_interpolation import LinearParcelInterpolator
         indent = dialog_level(self)
         left_parcels = Parcels(self.parent().project_settings['subarea_file'], self.parent().project_settings['lookup_file'], lower_path, lower_year, indent + 1)
         right_parcels = Parcels(self.parent().project_settings['subarea_file'], self.parent().project_settings['lookup_file'], upper_path, upper_year, indent + 1)
@@ -390,7 +499,7 @@ class BaseDataGenerator(QDialog, Shared_GUI_Widgets):
         interpolated_parcels = interpolation.interpolate(left_parcels, right_parcels, horizon_year)
         return interpolated_parcels
 
-    def _on_interpolation_finished(self, parcels : Parcels):
+    def _on_interpolation_finished(self, parcels : 'Parcels'):
         self.base_parcel = parcels
         self.enableAllButtons()
         self.status_sections[0].setText('Done')
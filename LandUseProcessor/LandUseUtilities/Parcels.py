@@ -2,9 +2,11 @@ import os, sys
 sys.path.append(os.getcwd())
 import h5py
 import logging
+import numpy as np
 import pandas as pd
-from utility import (IndentAdapter, Summary_Categories, validate_dataframe_file, h5_to_df
-        )
+from utility import (IndentAdapter, Summary_Categories, validate_dataframe_file, h5_to_df,
+        normalize_geography, JurisdictionMasks, sum_households_by_parcel)
+from LandUseUtilities.validation_rules import RuleEngine
 
 if not sys.warnoptions:
     import warnings
@@ -18,8 +20,9 @@ class Parcels:
         self.data_year = data_year # year of the parcel data
         self.filename = filename # original parcel data filename
 
-        self.lookup_df = pd.read_csv(lookup_file, sep = ',', low_memory = False)
-        self.subarea_df = pd.read_csv(subarea_file, sep = ',', low_memory = False)
+        self.lookup_df = normalize_geography(pd.read_csv(lookup_file, sep = ',', low_memory = False))
+        self.subarea_df = normalize_geography(pd.read_csv(subarea_file, sep = ',', low_memory = False))
+        self.jurisdiction_masks = JurisdictionMasks(self.lookup_df['Jurisdiction']) # by row of lookup_df
 
         self.original_parcels_df = pd.read_csv(filename, sep = ' ', low_memory = False)
 
@@ -38,10 +41,12 @@ class Parcels:
         obj.original_parcels_df = df.copy()
         obj.data_year = data_year
         obj.filename = filename
-        obj.lookup_df = lookup_df.copy()
-        obj.subarea_df = subarea_df.copy()
+        obj.lookup_df = normalize_geography(lookup_df.copy())
+        obj.subarea_df = normalize_geography(subarea_df.copy())
+        obj.jurisdiction_masks = JurisdictionMasks(obj.lookup_df['Jurisdiction'])
         base_logger = logging.getLogger(__name__)
         obj.logger = IndentAdapter(base_logger, log_indent)
+        obj.indent = log_indent
         return obj
 
 
@@ -59,9 +64,9 @@ class Parcels:
             }
         '''
         parcel_df = self.original_parcels_df.merge(self.subarea_df[['BKRCastTAZ', 'Jurisdiction', 'Subarea']], left_on="TAZ_P", right_on = "BKRCastTAZ", how="left")
-        summary_jurisdictions = parcel_df.groupby('Jurisdiction')[Summary_Categories].sum().reset_index()
+        summary_jurisdictions = parcel_df.groupby('Jurisdiction', observed = True)[Summary_Categories].sum().reset_index()
         summary_taz = parcel_df.groupby('TAZ_P')[Summary_Categories].sum().reset_index()
-        summary_subarea = parcel_df.groupby('Subarea')[Summary_Categories].sum().reset_index()
+        summary_subarea = parcel_df.groupby('Subarea', observed = True)[Summary_Categories].sum().reset_index()
         summary_subarea = summary_subarea.merge(self.subarea_df[['Subarea', 'SubareaName']].drop_duplicates(), on='Subarea', how='left')
 
         if output_dir is None:
@@ -92,11 +97,17 @@ class Parcels:
 
         return summary_dict
 
-    def validate_parcel_file(self) -> dict:
-        import debugpy
-        debugpy.breakpoint()
+    def validate_parcel_file(self, hhs_df = None, fail_fast = False) -> dict:
+        '''
+        per column statistics of the parcel file, plus the validation rules that apply to it.
 
+        :param hhs_df: optional synthetic households, to check HH_P against the households on each parcel
+        :param fail_fast: stop the rules at the first failure
+        :return: a dict of dataframes for ValidationAndSummary
+        '''
         validation_dict = validate_dataframe_file(self.original_parcels_df)
+        frames = {'parcels': self.original_parcels_df, 'lookup': self.lookup_df, 'households': hhs_df}
+        validation_dict = validation_dict | RuleEngine(log_indent = self.indent).run(frames, fail_fast = fail_fast)
 
         return validation_dict
 
@@ -107,27 +118,23 @@ class Parcels:
         :param popsim_filename: synthetic population filename
         :return: a parcel dataframe with the updated number of households, consistent with the synthetic population.
         '''
-        with h5py.File(popsim_filename, "r") as hdf_file:
-            hh_df = h5_to_df(hdf_file, 'Household')
-
         output_dir = os.path.dirname(self.filename)
         name, ext = os.path.splitext(os.path.basename(self.filename))
         output_parcel_file = f'{name}_sync_with_synpop{ext}'
 
-        hhs = hh_df.groupby('hhparcel')[['hhexpfac', 'hhsize']].sum().reset_index()
-        parcel_df = self.original_parcels_df.copy()
-        parcel_df = parcel_df.merge(hhs, how = 'left', left_on = 'PARCELID', right_on = 'hhparcel')
+        # only hhparcel and hhexpfac are read, in chunks
+        hhexpfac, _, unmatched = sum_households_by_parcel(popsim_filename, self.original_parcels_df['PARCELID'].to_numpy())
+        if len(unmatched) > 0:
+            self.logger.warning(f'{int(unmatched["households"].sum())} households are on {len(unmatched)} parcels not in the parcel file {self.filename}')
 
-        parcel_df['HH_P']  = 0
-        parcel_df['HH_P'] = parcel_df['hhexpfac']
+        parcel_df = self.original_parcels_df
+        parcel_df['HH_P'] = np.round(hhexpfac).astype(int)
         parcel_df.fillna(0, inplace = True)
-        parcel_df.drop(['hhexpfac', 'hhsize', 'hhparcel'], axis = 1, inplace = True)
-        parcel_df['HH_P'] = parcel_df['HH_P'].round(0).astype(int)
 
         parcel_df.to_csv(os.path.join(output_dir, output_parcel_file), sep = ' ', index = False) 
         self.logger.info(f'Synthetic population file {popsim_filename} synced with the parcel file {self.filename}')
         self.logger.info(f'The final parcel file is saved in {output_parcel_file}.')
 
-        self.original_parcels_df = parcel_df # update the original_parcels_df with the synced one, so that later steps can use the synced parcel data.
+        # original_parcels_df is updated in place with the synced HH_P, so that later steps can use the synced parcel data.
 
         return parcel_df
\ No newline at end of file
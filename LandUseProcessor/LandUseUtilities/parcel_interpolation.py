@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-import logging, copy, os
+import logging, os
+import numpy as np
 import pandas as pd
 from LandUseUtilities.Parcels import Parcels
-from utility import Job_Categories, IndentAdapter, backupScripts, dialog_level
+from utility import (Job_Categories, IndentAdapter, backupScripts, dialog_level, interpolate_columns, round_columns,
+        id_positions)
 
 class ParcelInterpolator(ABC):
     def __init__(self, indent):
@@ -32,7 +34,7 @@ class LinearParcelInterpolator(ParcelInterpolator):
         self.output_folder = output_folder
 
 
-    def interpolate(self, left_Parcels, right_Parcels, horizon_year) -> Parcels:
+    def interpolate(self, left_Parcels, right_Parcels, horizon_year, clip = False, rounding = 'round') -> Parcels:
         """
         Step 3: Interpolate_parcel_files2.py
             Interpolate parcel files between what PSRC provided and the parcel data in the horizon year
@@ -40,46 +42,40 @@ class LinearParcelInterpolator(ParcelInterpolator):
             interpolated parcel file for outside of King County or outside of BKR area. Inside BKR area, we always have our own local estimates of jobs.
             Create a new parcel file by interpolating employment bewteen two parcel files. The newly created parcel file has other non-job values
             from parcel_file_name_ealier.
+
+        :param clip: set negative interpolated values to 0
+        :param rounding: 'round' or 'controlled', see utility.interpolate_columns. Controlled rounding keeps the
+            interpolated total jobs and total students of every parcel.
         """
         self.logger.info('Linear interpolating...')
         self.logger.info(f"Left Parcel Year: {left_Parcels.data_year}, Right Parcel Year: {right_Parcels.data_year}, Horizon Year: {horizon_year}")
         self.logger.info(f"Left Parcel File: {left_Parcels.filename}")
         self.logger.info(f"Right Parcel File: {right_Parcels.filename}")
 
-        columns = copy.copy(Job_Categories)
-        columns.append('PARCELID')
-        job_std = copy.copy(Job_Categories)
-        job_std.extend(['STUGRD_P', 'STUHGH_P', 'STUUNI_P'])
-
-        parcel_earlier_df = left_Parcels.original_parcels_df.copy()
-        parcel_latter_df = right_Parcels.original_parcels_df.copy()
-        parcel_latter_df.set_index('PARCELID', inplace = True)
-        parcels_from_latter_df = parcel_latter_df.loc[:, job_std].copy(deep=True)
-        parcels_from_latter_df.columns = [i + '_L' for i in parcels_from_latter_df.columns]
-        parcels_from_latter_df['EMPTOT_L'] = 0
-        for cat in Job_Categories:
-            parcels_from_latter_df['EMPTOT_L'] = parcels_from_latter_df[cat + '_L'] + parcels_from_latter_df['EMPTOT_L']
-
-        self.logger.info(f"Total jobs in year {right_Parcels.data_year} are {parcels_from_latter_df['EMPTOT_L'].sum():,.0f}")
-        parcel_horizon_df = parcel_earlier_df.merge(parcels_from_latter_df.reset_index(), how = 'inner', left_on = 'PARCELID', right_on = 'PARCELID')
-
-        parcel_horizon_df['EMPTOT_E'] = 0
-        for cat in Job_Categories:
-            parcel_horizon_df['EMPTOT_E'] = parcel_horizon_df['EMPTOT_E'] + parcel_horizon_df[cat]
-        parcel_horizon_df['EMPTOT_P'] = parcel_horizon_df['EMPTOT_E']
-        self.logger.info(f"Total jobs in year {left_Parcels.data_year} are {parcel_horizon_df['EMPTOT_P'].sum():,.0f}")
-
-        # interpolate number of jobs, and round to integer.
-        for cat in job_std:
-            parcel_horizon_df[cat] = parcel_horizon_df[cat] + ((horizon_year - left_Parcels.data_year) * 1.0 / (right_Parcels.data_year - left_Parcels.data_year) * (parcel_horizon_df[cat + '_L'] - parcel_horizon_df[cat])) 
-            parcel_horizon_df[cat] = parcel_horizon_df[cat].round(0).astype(int)
-
-        parcel_horizon_df['EMPTOT_P'] = 0
-        for cat in Job_Categories:
-            parcel_horizon_df['EMPTOT_P'] = parcel_horizon_df['EMPTOT_P'] + parcel_horizon_df[cat]
-
-        parcel_horizon_df = parcel_horizon_df.drop([i + '_L' for i in job_std], axis = 1)
-        parcel_horizon_df = parcel_horizon_df.drop(['EMPTOT_L', 'EMPTOT_E'], axis = 1)
+        students = ['STUGRD_P', 'STUHGH_P', 'STUUNI_P']
+        job_std = Job_Categories + students
+
+        # parcels in both files, in the order of the earlier file
+        parcel_latter_df = right_Parcels.original_parcels_df
+        latter_pos = id_positions(parcel_latter_df['PARCELID'], left_Parcels.original_parcels_df['PARCELID'], right_Parcels.filename)
+        in_both = latter_pos >= 0
+        parcel_horizon_df = left_Parcels.original_parcels_df.loc[in_both].reset_index(drop = True)
+        latter_block = parcel_latter_df[job_std].to_numpy()[latter_pos[in_both]]
+        earlier_block = parcel_horizon_df[job_std].to_numpy()
+
+        n_jobs = len(Job_Categories)
+        self.logger.info(f"Total jobs in year {right_Parcels.data_year} are {parcel_latter_df[Job_Categories].to_numpy().sum():,.0f}")
+        self.logger.info(f"Total jobs in year {left_Parcels.data_year} are {earlier_block[:, :n_jobs].sum():,.0f}")
+
+        # interpolate jobs and students in one block, and round to integer. jobs and students are rounded separately so
+        # controlled rounding keeps each total.
+        fraction = (horizon_year - left_Parcels.data_year) * 1.0 / (right_Parcels.data_year - left_Parcels.data_year)
+        horizon_block = np.empty(earlier_block.shape, dtype = np.int64)
+        interpolate_columns(earlier_block[:, :n_jobs], latter_block[:, :n_jobs], fraction, out = horizon_block[:, :n_jobs], clip = clip, rounding = rounding)
+        interpolate_columns(earlier_block[:, n_jobs:], latter_block[:, n_jobs:], fraction, out = horizon_block[:, n_jobs:], clip = clip, rounding = rounding)
+
+        parcel_horizon_df[job_std] = horizon_block
+        parcel_horizon_df['EMPTOT_P'] = horizon_block[:, :n_jobs].sum(axis = 1)
 
         self.logger.info(f"After interpolation, total jobs are {parcel_horizon_df['EMPTOT_P'].sum():,.0f}")
         self.interpolated_df = parcel_horizon_df
@@ -91,3 +87,243 @@ class LinearParcelInterpolator(ParcelInterpolator):
         
         return out
 
+
+Student_Categories = ['STUGRD_P', 'STUHGH_P', 'STUUNI_P']
+BOOKEND_CACHE_VERSION = 1
+
+class ParcelBookends:
+    '''
+    any number of bookend parcel files aligned once: the interpolated fields of every bookend are kept in a
+    year x parcel x field array, over the parcels found in every bookend (in the order of the earliest bookend).
+
+    The aligned store can be cached on disk; a later from_files call with the same files and fields loads the cache
+    instead of parsing the parcel files.
+    '''
+    def __init__(self, years, parcel_ids, values, fields, frames, sources = None):
+        self.years = np.asarray(years, dtype = float) # sorted bookend years
+        self.parcel_ids = parcel_ids
+        self.values = values # years x parcels x fields, float64
+        self.fields = list(fields)
+        self.frames = frames # parcel dataframe of every bookend, aligned with parcel_ids, for the fields not interpolated
+        self.sources = sources # parcel file of every bookend year, None when built from dataframes
+        self._slopes = None
+
+    @classmethod
+    def from_frames(cls, frames: dict, fields = None, sources = None) -> "ParcelBookends":
+        '''
+        :param frames: dict of bookend year -> parcel dataframe
+        :param fields: fields to interpolate. None interpolates the job and student fields.
+        :param sources: dict of bookend year -> parcel file, named in errors and kept in sources
+        :raises ValueError: PARCELID is duplicated in a bookend
+        '''
+        fields = Job_Categories + Student_Categories if fields is None else list(fields)
+        years = sorted(frames)
+        source = lambda year: sources[year] if sources is not None else f'the {year} bookend'
+
+        # every bookend is checked for duplicated PARCELIDs before any alignment
+        parcel_ids = pd.Index(frames[years[0]]['PARCELID'])
+        in_all = np.ones(len(parcel_ids), dtype = bool)
+        for year in years:
+            in_all &= id_positions(frames[year]['PARCELID'], parcel_ids, source(year)) >= 0
+        parcel_ids = parcel_ids[in_all]
+
+        values = np.empty((len(years), len(parcel_ids), len(fields)))
+        aligned = {}
+        for i, year in enumerate(years):
+            df = frames[year]
+            pos = pd.Index(df['PARCELID']).get_indexer(parcel_ids)
+            aligned[year] = df.iloc[pos].reset_index(drop = True)
+            values[i] = aligned[year][fields].to_numpy(dtype = float)
+        return cls(years, parcel_ids, values, fields, aligned, sources)
+
+    @classmethod
+    def from_parcels(cls, bookends, fields = None) -> "ParcelBookends":
+        return cls.from_frames({parcels.data_year: parcels.original_parcels_df for parcels in bookends}, fields,
+                               {parcels.data_year: parcels.filename for parcels in bookends})
+
+    def covers(self, bookends) -> bool:
+        '''
+        True when the years of the bookend Parcels are all aligned here, from the same files if the files are known.
+        '''
+        return all(parcels.data_year in self.years and (self.sources is None or self.sources.get(parcels.data_year) == parcels.filename)
+                   for parcels in bookends)
+
+    @classmethod
+    def from_files(cls, files: dict, fields = None, cache_file = None) -> "ParcelBookends":
+        '''
+        :param files: dict of bookend year -> parcel file
+        :param fields: see from_frames
+        :param cache_file: aligned store on disk. Used when it was made from the same files (path, size and time)
+            and fields, otherwise rebuilt and saved there.
+        '''
+        fields = Job_Categories + Student_Categories if fields is None else list(fields)
+        key = (BOOKEND_CACHE_VERSION, tuple(fields),
+               tuple((year, os.path.abspath(fn), os.path.getsize(fn), os.path.getmtime(fn)) for year, fn in sorted(files.items())))
+        if cache_file is not None and os.path.exists(cache_file):
+            cached = pd.read_pickle(cache_file)
+            if cached.get('key') == key:
+                return cls(cached['years'], cached['parcel_ids'], cached['values'], cached['fields'], cached['frames'], dict(files))
+
+        bookends = cls.from_frames({year: pd.read_csv(fn, sep = ' ', low_memory = False) for year, fn in files.items()}, fields, dict(files))
+        if cache_file is not None:
+            pd.to_pickle({'key': key, 'years': bookends.years, 'parcel_ids': bookends.parcel_ids, 'values': bookends.values,
+                          'fields': bookends.fields, 'frames': bookends.frames}, cache_file)
+        return bookends
+
+    def segments(self, horizon_years):
+        '''
+        bookend segment (index of its left bookend) and position within it (0 at the left bookend, 1 at the right) of
+        every horizon year. Years outside the bookends extend the first or last segment.
+        '''
+        horizon_years = np.asarray(horizon_years, dtype = float)
+        left = np.clip(np.searchsorted(self.years, horizon_years, side = 'right') - 1, 0, len(self.years) - 2)
+        fraction = (horizon_years - self.years[left]) / (self.years[left + 1] - self.years[left])
+        return left, fraction
+
+    def slopes(self) -> np.ndarray:
+        '''
+        derivatives by year at every bookend for monotone cubic (Fritsch-Carlson, PCHIP) interpolation, computed once.
+        '''
+        if self._slopes is None:
+            h = np.diff(self.years)[:, None, None]
+            delta = np.diff(self.values, axis = 0) / h
+            d = np.zeros_like(self.values)
+            if len(self.years) == 2:
+                d[0] = d[1] = delta[0]
+            else:
+                # interior: weighted harmonic mean of the neighbouring secants, 0 at local extremes
+                w1 = 2 * h[1:] + h[:-1]
+                w2 = h[1:] + 2 * h[:-1]
+                same_sign = delta[:-1] * delta[1:] > 0
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    d[1:-1] = np.where(same_sign, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0)
+                d[0] = self._edge_slope(h[0], h[1], delta[0], delta[1])
+                d[-1] = self._edge_slope(h[-1], h[-2], delta[-1], delta[-2])
+            self._slopes = d
+        return self._slopes
+
+    @staticmethod
+    def _edge_slope(h0, h1, delta0, delta1):
+        d = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+        d = np.where(np.sign(d) != np.sign(delta0), 0, d)
+        return np.where((np.sign(delta0) != np.sign(delta1)) & (np.abs(d) > np.abs(3 * delta0)), 3 * delta0, d)
+
+    def evaluate(self, horizon_year, method = 'linear') -> np.ndarray:
+        '''
+        interpolated fields (parcels x fields, float) for one horizon year.
+
+        :param method: 'linear' for piecewise linear between neighbouring bookends, 'monotone' for monotone cubic
+            spline through all bookends. Outside the bookends both extend the first or last segment linearly.
+        '''
+        left, fraction = self.segments([horizon_year])
+        i, t = int(left[0]), float(fraction[0])
+        lower, upper = self.values[i], self.values[i + 1]
+        if method == 'linear' or t < 0 or t > 1:
+            out = np.subtract(upper, lower)
+            out *= t
+            out += lower
+            return out
+        if method != 'monotone':
+            raise ValueError(f"Unknown interpolation method {method}. Use 'linear' or 'monotone'.")
+
+        d = self.slopes()
+        h = self.years[i + 1] - self.years[i]
+        t2, t3 = t * t, t * t * t
+        out = (2 * t3 - 3 * t2 + 1) * lower
+        out += (-2 * t3 + 3 * t2) * upper
+        out += ((t3 - 2 * t2 + t) * h) * d[i]
+        out += ((t3 - t2) * h) * d[i + 1]
+        return out
+
+
+class BookendParcelInterpolator(ParcelInterpolator):
+    '''
+    interpolate parcel data for any horizon years from any number of bookend parcel files.
+    Fields that are not interpolated are taken from the bookend at or before the horizon year.
+    '''
+    method = 'linear'
+
+    def __init__(self, output_folder: str, indent, bookends: ParcelBookends = None, subarea_df = None, lookup_df = None,
+                 clip = False, rounding = 'round'):
+        '''
+        :param bookends: aligned bookend parcels. interpolate() builds them from its two Parcels when None or when they
+            do not cover those Parcels, and keeps them for later calls.
+        :param subarea_df, lookup_df: given to the interpolated Parcels
+        :param clip: set negative interpolated values to 0
+        :param rounding: 'round' or 'controlled', see utility.interpolate_columns. Controlled rounding keeps the
+            interpolated total jobs and total students of every parcel.
+        '''
+        super().__init__(indent)
+        self.output_folder = output_folder
+        self.bookends = bookends
+        self.subarea_df = subarea_df
+        self.lookup_df = lookup_df
+        self.clip = clip
+        self.rounding = rounding
+
+    def interpolate(self, left_Parcels, right_Parcels, horizon_year) -> Parcels:
+        if self.bookends is None or not self.bookends.covers([left_Parcels, right_Parcels]):
+            self.bookends = ParcelBookends.from_parcels([left_Parcels, right_Parcels], self.bookends.fields if self.bookends else None)
+        self.subarea_df = left_Parcels.subarea_df
+        self.lookup_df = left_Parcels.lookup_df
+        return self.interpolate_years([horizon_year])[horizon_year]
+
+    def _round_groups(self) -> list:
+        # controlled rounding keeps the total of jobs and of students; other fields are rounded on their own
+        fields = self.bookends.fields
+        groups = [[f for f in fields if f in Job_Categories], [f for f in fields if f in Student_Categories]]
+        groups += [[f] for f in fields if f not in Job_Categories and f not in Student_Categories]
+        return [[fields.index(f) for f in group] for group in groups if group]
+
+    def interpolate_years(self, horizon_years, export = True) -> dict:
+        '''
+        interpolate several horizon years from the aligned bookends.
+
+        :param horizon_years: list of horizon years
+        :param export: save every interpolated parcel file in output_folder
+        :return: dict of horizon year -> interpolated Parcels
+        '''
+        bookends = self.bookends
+        years = [int(year) for year in bookends.years]
+        self.logger.info(f'{self.method.capitalize()} interpolating from bookends {years} to {list(horizon_years)}...')
+        if any(year < years[0] or year > years[-1] for year in horizon_years):
+            self.logger.warning(f'Horizon years outside the bookends {years[0]}-{years[-1]} are extrapolated linearly.')
+
+        groups = self._round_groups()
+        # fields that are not interpolated come from the latest bookend at or before the horizon year
+        templates = np.clip(np.searchsorted(bookends.years, np.asarray(horizon_years, dtype = float), side = 'right') - 1, 0, None)
+        out = {}
+        for horizon_year, template in zip(horizon_years, templates):
+            values = bookends.evaluate(horizon_year, self.method)
+            block = np.empty(values.shape, dtype = np.int64)
+            for cols in groups:
+                block[:, cols] = round_columns(values[:, cols], clip = self.clip, rounding = self.rounding)
+
+            parcel_horizon_df = bookends.frames[years[template]].copy()
+            parcel_horizon_df[bookends.fields] = block
+            if all(cat in bookends.fields for cat in Job_Categories):
+                parcel_horizon_df['EMPTOT_P'] = parcel_horizon_df[Job_Categories].to_numpy().sum(axis = 1)
+                self.logger.info(f"{horizon_year}: total jobs are {parcel_horizon_df['EMPTOT_P'].sum():,.0f}")
+
+            self.interpolated_df = parcel_horizon_df
+            interpolated_fn = f'Interpolated_{horizon_year}_parcels_urbansim_{self.method}_from_{"_".join(map(str, years))}.txt'
+            if export:
+                self.export_interpolated_parcels(interpolated_fn)
+            if self.subarea_df is not None and self.lookup_df is not None:
+                out[horizon_year] = Parcels.from_dataframe(parcel_horizon_df, horizon_year, interpolated_fn, self.subarea_df, self.lookup_df, self.indent + 1)
+            else:
+                out[horizon_year] = parcel_horizon_df
+        return out
+
+
+class PiecewiseLinearParcelInterpolator(BookendParcelInterpolator):
+    '''linear interpolation between the two bookends around each horizon year.'''
+    method = 'linear'
+
+
+class MonotoneSplineParcelInterpolator(BookendParcelInterpolator):
+    '''
+    monotone cubic (PCHIP) interpolation through all bookends. Between two bookends values stay within their range,
+    so growth follows the trend of the neighbouring bookends without overshooting.
+    '''
+    method = 'monotone'
@@ -0,0 +1,117 @@
+import os, sys
+sys.path.append(os.getcwd())
+import logging
+import numpy as np
+import pandas as pd
+from utility import IndentAdapter
+
+_ensemble_cache = {}
+
+def read_parking_ensembles(gz_file) -> pd.DataFrame:
+    '''
+    parking ensemble of every BKRCastTAZ from an Emme ensemble file (ga.txt), as ensemble (gzXX) and BKRCastTAZ.
+    The file is parsed once per process; later calls return the cached frame as long as the file is unchanged.
+    '''
+    key = (os.path.abspath(gz_file), os.path.getmtime(gz_file))
+    if key not in _ensemble_cache:
+        gz_df = pd.read_csv(gz_file, skiprows=5, header=None)
+
+        gz_df = gz_df[[1, 2]].copy()
+        gz_df.columns = ["ensemble", "BKRCastTAZ"]
+
+        gz_df["ensemble"] = gz_df["ensemble"].astype(str).str.replace(":", "", regex=False).str.strip().str.lower().str[:4]   # enforce fixed 4-char format
+        gz_df["BKRCastTAZ"] = pd.to_numeric(gz_df["BKRCastTAZ"], errors="coerce")
+        gz_df = gz_df.dropna()
+        gz_df["BKRCastTAZ"] = gz_df["BKRCastTAZ"].astype(int)
+
+        _ensemble_cache.clear()
+        _ensemble_cache[key] = gz_df.reset_index(drop = True)
+    return _ensemble_cache[key]
+
+def read_parking_costs(parking_cost_file) -> pd.DataFrame:
+    '''
+    hourly (HR_COST) and daily (DAY_COST) parking cost by ensemble and year, with ensembles normalized to gzXX.
+    '''
+    parking_cost_df = pd.read_csv(parking_cost_file)
+    parking_cost_df.rename(columns= {'ENS': 'ensemble'}, inplace=True)
+
+    parking_cost_df["ensemble"] = parking_cost_df["ensemble"].astype(str).str.strip().str.lower()
+
+    # normalize to gzXX format
+    parking_cost_df["ensemble"] = parking_cost_df["ensemble"].str.replace(
+        r"gz(\d+)",
+        lambda x: f"gz{int(x.group(1)):02d}",
+        regex=True
+    )
+    return parking_cost_df
+
+class ParkingCostEngine:
+    '''
+    parking cost by parcel from the parking ensembles (ga.txt) and the parking cost by ensemble and year (parking_costs.csv).
+
+    Both files are parsed once. For a horizon year the costs are laid out in dense arrays indexed by TAZ number, so
+    assigning them to parcels is a single gather on TAZ_P. Arrays are kept by cost year, so several horizon years can
+    be assigned from one parse.
+    '''
+    def __init__(self, gz_file, parking_cost_file, log_indent = 0):
+        base_logger = logging.getLogger(__name__)
+        self.logger = IndentAdapter(base_logger, log_indent)
+        self.logger.info(f"Parking ensemble data: {gz_file}")
+        self.logger.info(f"Parking cost data: {parking_cost_file}")
+
+        gz_df = read_parking_ensembles(gz_file)
+        self.parking_cost_df = read_parking_costs(parking_cost_file)
+        self.available_years = np.sort(self.parking_cost_df["year"].unique())
+        self.logger.info(f"Available years in parking cost data: {self.available_years}")
+
+        duplicated = gz_df["BKRCastTAZ"].duplicated(keep = 'last')
+        if duplicated.any():
+            self.logger.warning(f"TAZs in more than one parking ensemble, the last ensemble is used: {gz_df.loc[duplicated, 'BKRCastTAZ'].unique()}")
+        self.taz = gz_df["BKRCastTAZ"].to_numpy()
+        self.ensembles = gz_df["ensemble"].to_numpy()
+        self._cost_by_taz = {} # cost year -> (hourly, daily) arrays indexed by TAZ
+
+    def cost_year(self, horizon_year) -> int:
+        '''the latest year of the parking cost data that is not after horizon_year'''
+        valid_years = self.available_years[self.available_years <= horizon_year]
+        if len(valid_years) == 0:
+            raise ValueError("No valid year <= horizon year found")
+        return int(valid_years.max())
+
+    def cost_by_taz(self, horizon_year):
+        '''
+        hourly and daily parking cost arrays indexed by TAZ number, for the cost year of horizon_year. TAZs without an
+        ensemble, or whose ensemble has no cost, get 0.
+        '''
+        selected_year = self.cost_year(horizon_year)
+        if selected_year not in self._cost_by_taz:
+            year_df = self.parking_cost_df.loc[self.parking_cost_df["year"] == selected_year].drop_duplicates("ensemble", keep = 'last')
+            year_index = pd.Index(year_df["ensemble"])
+            pos = year_index.get_indexer(self.ensembles)
+            found = pos >= 0
+
+            costs = []
+            for col, name in [("HR_COST", 'hourly'), ("DAY_COST", 'daily')]:
+                ensemble_cost = year_df[col].to_numpy(dtype = float)[pos]
+                missing = ~found | np.isnan(ensemble_cost)
+                if missing.any():
+                    self.logger.warning(f"Missing {name} parking cost for ensembles: {np.unique(self.ensembles[missing])}")
+                by_taz = np.zeros(self.taz.max(initial = 0) + 1)
+                by_taz[self.taz] = np.where(missing, 0, ensemble_cost)
+                costs.append(by_taz)
+            self._cost_by_taz[selected_year] = tuple(costs)
+        return self._cost_by_taz[selected_year]
+
+    def assign(self, parcels_df: pd.DataFrame, horizon_year) -> pd.DataFrame:
+        '''
+        set PPRICHRP (hourly) and PPRICDYP (daily) parking cost of every parcel by its TAZ_P, in place.
+        Parcels in TAZs without a parking ensemble get 0.
+        '''
+        self.logger.info(f"Parking cost data for the year {self.cost_year(horizon_year)} is used for {horizon_year}.")
+        hr_by_taz, day_by_taz = self.cost_by_taz(horizon_year)
+        taz_p = parcels_df["TAZ_P"].to_numpy(dtype = np.int64)
+        valid = (taz_p >= 0) & (taz_p < len(hr_by_taz))
+        taz_p = np.where(valid, taz_p, 0)
+        parcels_df["PPRICHRP"] = np.where(valid, hr_by_taz[taz_p], 0)
+        parcels_df["PPRICDYP"] = np.where(valid, day_by_taz[taz_p], 0)
+        return parcels_df
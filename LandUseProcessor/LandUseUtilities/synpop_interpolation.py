@@ -94,7 +94,9 @@ class LinearSynPopInterpolator(synpop_interpolation):
         target_hhs_by_parcel.drop(['base_total_hhs', 'base_total_persons', 'future_total_hhs', 'future_total_persons'], axis = 1, inplace = True)
         target_hhs_by_parcel.reset_index(inplace = True)
         target_hhs_by_parcel = parcel_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ', 'GEOID10']].merge(target_hhs_by_parcel[['PSRC_ID', 'total_hhs_by_parcel', 'total_persons_by_parcel']], on = 'PSRC_ID', how = 'left')
-        target_hhs_by_parcel.fillna(0, inplace= True)
+        # Jurisdiction is categorical and cannot take 0
+        numeric_cols = target_hhs_by_parcel.columns.drop('Jurisdiction')
+        target_hhs_by_parcel[numeric_cols] = target_hhs_by_parcel[numeric_cols].fillna(0)
         hhs_by_parcel_filename = f'{horizon_year}_hhs_by_parcels_interpolated_from_{left_synpop.data_year}_{right_synpop.data_year}.csv'
         target_hhs_by_parcel.to_csv(os.path.join(self.output_folder, hhs_by_parcel_filename), index = False)
         self.logger.info(f'interpolation by parcel is saved in {hhs_by_parcel_filename}')
@@ -159,7 +161,7 @@ class LinearSynPopInterpolator(synpop_interpolation):
         self.logger.info(f"total hhs after interpolation: {target_hhs_df['hhexpfac'].sum()}")
         self.logger.info(f"total persons after interpolation: {target_persons_df['psexpfac'].sum()}")
 
-        avg_person_per_hhs_df = target_hhs_by_parcel[['Jurisdiction', 'total_hhs_by_parcel', 'total_persons_by_parcel']].groupby('Jurisdiction').sum()
+        avg_person_per_hhs_df = target_hhs_by_parcel[['Jurisdiction', 'total_hhs_by_parcel', 'total_persons_by_parcel']].groupby('Jurisdiction', observed = True).sum()
         avg_person_per_hhs_df['avg_persons_per_hh'] = avg_person_per_hhs_df['total_persons_by_parcel'] / avg_person_per_hhs_df['total_hhs_by_parcel']
 
         fn_avg_hhsize = f'{horizon_year}_interpolation_average_hhsize_by_jurisdiction.csv'
@@ -176,4 +178,187 @@ class LinearSynPopInterpolator(synpop_interpolation):
 
         out = SyntheticPopulation.from_dataframe(left_synpop.subarea_df, left_synpop.lookup_df, final_output_pop_file, self.interpolated_hhs_df, self.interpolated_persons_df, horizon_year, self.indent)
         
-        return out
\ No newline at end of file
+        return out
+
+class BookendSynPopInterpolator(synpop_interpolation):
+    '''
+    interpolate synthetic populations for several horizon years from any number of bookend populations.
+
+    Households and persons of every bookend are aggregated once, by parcel and by GEOID10, into arrays indexed by the
+    position of the parcel in the lookup. The household pools by TAZ of every bookend are also built once. Each horizon
+    year then interpolates between the two bookends around it (the first or last two outside the bookends), and samples
+    households from the pool of the later one.
+    '''
+    def __init__(self, output_folder: str, block_group_file: str, indent, bookends: list = None, seed = 1):
+        '''
+        :param bookends: list of SyntheticPopulation, one per bookend year. interpolate() sets them from its two populations.
+        :param seed: seed of the household sampling. Every horizon year uses its own stream, so a year gives the
+            same population whatever other years are generated in the same call.
+        '''
+        super().__init__(block_group_file, indent)
+        self.output_folder = output_folder
+        self.seed = seed
+        self.block_groups_df = pd.read_csv(block_group_file)
+        self._aggregates = {} # bookend year -> (hhs by lookup position, persons by lookup position)
+        self._pools = {} # bookend year -> household pool, see _pool
+        self.set_bookends(bookends or [])
+
+    def set_bookends(self, bookends: list):
+        self.bookends = sorted(bookends, key = lambda synpop: synpop.data_year)
+        self.years = np.array([synpop.data_year for synpop in self.bookends], dtype = float)
+        self._aggregates.clear()
+        self._pools.clear()
+        if not self.bookends:
+            return
+        lookup = self.bookends[0].lookup_df.drop_duplicates('PSRC_ID').reset_index(drop = True)
+        self.lookup_df = lookup
+        self._parcel_index = pd.Index(lookup['PSRC_ID'])
+        self._geoid_codes, self._geoids = pd.factorize(lookup['GEOID10'])
+        self._taz_codes, self._tazs = pd.factorize(lookup['BKRCastTAZ'])
+
+    def interpolate(self, left_synpop : SyntheticPopulation, right_synpop : SyntheticPopulation, horizon_year) -> SyntheticPopulation:
+        self.set_bookends([left_synpop, right_synpop])
+        return self.interpolate_years([horizon_year])[horizon_year]
+
+    def _aggregate(self, i):
+        '''total households and persons by lookup position of bookend i, computed once.'''
+        year = self.bookends[i].data_year
+        if year not in self._aggregates:
+            hh_df = self.bookends[i].hhs_df
+            pos = self._parcel_index.get_indexer(hh_df['hhparcel'])
+            found = pos >= 0
+            hhexpfac = hh_df['hhexpfac'].to_numpy(dtype = float)
+            persons = hhexpfac * hh_df['hhsize'].to_numpy(dtype = float)
+            n = len(self._parcel_index)
+            self._aggregates[year] = (np.bincount(pos[found], weights = hhexpfac[found], minlength = n),
+                                      np.bincount(pos[found], weights = persons[found], minlength = n))
+            self.logger.info(f'{year} total hhs: {hhexpfac.sum()}, total persons: {persons.sum()}')
+        return self._aggregates[year]
+
+    def _pool(self, i) -> dict:
+        '''
+        households of bookend i by TAZ (row positions), and the rows of the persons of every household, computed once.
+        '''
+        year = self.bookends[i].data_year
+        if year not in self._pools:
+            synpop = self.bookends[i]
+            hhtaz = synpop.hhs_df['hhtaz'].to_numpy()
+            order = np.argsort(hhtaz, kind = 'stable')
+            tazs, starts = np.unique(hhtaz[order], return_index = True)
+            by_taz = dict(zip(tazs.tolist(), np.split(order, starts[1:])))
+
+            person_hhno = synpop.persons_df['hhno'].to_numpy()
+            person_order = np.argsort(person_hhno, kind = 'stable')
+            sorted_hhno = person_hhno[person_order]
+            hhno = synpop.hhs_df['hhno'].to_numpy()
+            person_start = np.searchsorted(sorted_hhno, hhno, side = 'left')
+            person_count = np.searchsorted(sorted_hhno, hhno, side = 'right') - person_start
+            self._pools[year] = {'by_taz': by_taz, 'person_order': person_order, 'person_start': person_start,
+                                 'person_count': person_count, 'next_hhno': int(hhno.max()) + 1}
+        return self._pools[year]
+
+    def _by_geoid10(self, values):
+        valid = self._geoid_codes >= 0
+        return pd.Series(np.bincount(self._geoid_codes[valid], weights = values[valid], minlength = len(self._geoids)), index = self._geoids)
+
+    def _sample(self, i, targets_by_taz, rng):
+        '''
+        sample households of bookend i to meet the target households by TAZ: fewer households than the pool are
+        sampled without replacement, more households duplicate sampled households under new hhno.
+        '''
+        synpop = self.bookends[i]
+        pool = self._pool(i)
+        parts, copies = [], []
+        for taz, target in targets_by_taz.items():
+            hhs_in_taz = pool['by_taz'].get(taz)
+            if hhs_in_taz is None:
+                continue
+            if len(hhs_in_taz) >= target:
+                parts.append(rng.choice(hhs_in_taz, size = target, replace = False))
+                copies.append(np.zeros(target, dtype = bool))
+            else:
+                parts.append(hhs_in_taz)
+                parts.append(rng.choice(hhs_in_taz, size = target - len(hhs_in_taz), replace = True))
+                copies.append(np.zeros(len(hhs_in_taz), dtype = bool))
+                copies.append(np.ones(target - len(hhs_in_taz), dtype = bool))
+        hh_pos = np.concatenate(parts) if parts else np.zeros(0, dtype = np.int64)
+        is_copy = np.concatenate(copies) if copies else np.zeros(0, dtype = bool)
+
+        hhno = synpop.hhs_df['hhno'].to_numpy()[hh_pos]
+        hhno[is_copy] = pool['next_hhno'] + np.arange(is_copy.sum())
+        target_hhs_df = synpop.hhs_df.iloc[hh_pos].reset_index(drop = True)
+        target_hhs_df['hhno'] = hhno
+
+        # persons of every sampled household, in household order
+        counts = pool['person_count'][hh_pos]
+        starts = pool['person_start'][hh_pos]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        person_rows = pool['person_order'][np.repeat(starts, counts) + offsets]
+        target_persons_df = synpop.persons_df.iloc[person_rows].reset_index(drop = True)
+        target_persons_df['hhno'] = np.repeat(hhno, counts)
+        return target_hhs_df, target_persons_df
+
+    def interpolate_years(self, horizon_years, export = True) -> dict:
+        '''
+        interpolate several horizon years in one call.
+
+        :param horizon_years: list of horizon years
+        :param export: save the interpolated populations and their summaries in output_folder
+        :return: dict of horizon year -> interpolated SyntheticPopulation
+        '''
+        years = [int(year) for year in self.years]
+        year_tag = '_'.join(map(str, years))
+        lookup = self.lookup_df
+        out = {}
+        for horizon_year in horizon_years:
+            i = int(np.clip(np.searchsorted(self.years, horizon_year, side = 'right') - 1, 0, len(self.years) - 2))
+            base_year, future_year = years[i], years[i + 1]
+            if base_year <= horizon_year <= future_year:
+                self.logger.info(f'{horizon_year}: interpolating between {base_year} and {future_year}...')
+            else:
+                self.logger.info(f'{horizon_year}: extropolating from {base_year} and {future_year}...')
+            ratio = (horizon_year - base_year) * 1.0 / (future_year - base_year)
+
+            base_hhs, base_persons = self._aggregate(i)
+            future_hhs, future_persons = self._aggregate(i + 1)
+            hhs_by_parcel = base_hhs + (future_hhs - base_hhs) * ratio
+            persons_by_parcel = base_persons + (future_persons - base_persons) * ratio
+
+            ofm_df = self.block_groups_df[['GEOID10']].copy()
+            for col, values in [('OFM_hhs', hhs_by_parcel), ('OFM_persons', persons_by_parcel)]:
+                ofm_df[col] = np.rint(self._by_geoid10(values).reindex(ofm_df['GEOID10'], fill_value = 0).to_numpy())
+            ofm_df.insert(1, 'OFM_groupquarters', 0)
+            self.logger.info(f"Interpolated total hhs: {ofm_df['OFM_hhs'].sum()}, total persons: {ofm_df['OFM_persons'].sum()}")
+
+            target_hhs_by_parcel = lookup[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ', 'GEOID10']].copy()
+            target_hhs_by_parcel['total_hhs_by_parcel'] = hhs_by_parcel
+            target_hhs_by_parcel['total_persons_by_parcel'] = persons_by_parcel
+
+            valid = self._taz_codes >= 0
+            hhs_by_taz = np.rint(np.bincount(self._taz_codes[valid], weights = hhs_by_parcel[valid], minlength = len(self._tazs)))
+            targets_by_taz = {taz: int(target) for taz, target in zip(self._tazs, hhs_by_taz) if target > 0}
+            rng = np.random.default_rng([self.seed, int(horizon_year)])
+            target_hhs_df, target_persons_df = self._sample(i + 1, targets_by_taz, rng)
+            self.logger.info(f"total hhs after interpolation: {target_hhs_df['hhexpfac'].sum()}")
+            self.logger.info(f"total persons after interpolation: {target_persons_df['psexpfac'].sum()}")
+
+            final_output_pop_file = f'{horizon_year}_interpolated_hh_and_persons_from_{year_tag}.h5'
+            self.interpolated_hhs_df = target_hhs_df
+            self.interpolated_persons_df = target_persons_df
+            if export:
+                fn_total_by_geoid10 = f'{horizon_year}_interpolation_from_{year_tag}_by_GEOID.csv'
+                ofm_df.to_csv(os.path.join(self.output_folder, fn_total_by_geoid10), index = False)
+                hhs_by_parcel_filename = f'{horizon_year}_hhs_by_parcels_interpolated_from_{year_tag}.csv'
+                target_hhs_by_parcel.to_csv(os.path.join(self.output_folder, hhs_by_parcel_filename), index = False)
+
+                avg_person_per_hhs_df = target_hhs_by_parcel[['Jurisdiction', 'total_hhs_by_parcel', 'total_persons_by_parcel']].groupby('Jurisdiction', observed = True).sum()
+                avg_person_per_hhs_df['avg_persons_per_hh'] = avg_person_per_hhs_df['total_persons_by_parcel'] / avg_person_per_hhs_df['total_hhs_by_parcel']
+                avg_person_per_hhs_df.to_csv(os.path.join(self.output_folder, f'{horizon_year}_interpolation_average_hhsize_by_jurisdiction.csv'))
+
+                self.export_interpolated_synpop(final_output_pop_file)
+                self.logger.info(f'interpolated synthetic population is saved in {final_output_pop_file}')
+
+            left_synpop = self.bookends[0]
+            out[horizon_year] = SyntheticPopulation.from_dataframe(left_synpop.subarea_df, left_synpop.lookup_df, final_output_pop_file,
+                                                                   target_hhs_df, target_persons_df, horizon_year, self.indent)
+        return out
@@ -1,20 +1,25 @@
 import pandas as pd
 import h5py, logging
-import os, sys
+import os, sys, shutil
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from utility import (
-    IndentAdapter, h5_to_df, validate_dataframe_file, df_to_h5
+    IndentAdapter, h5_to_df, validate_dataframe_file, df_to_h5, normalize_geography, save_h5_delta, write_h5_delta,
+    is_h5_delta, H5Delta
 )
+from LandUseUtilities.validation_rules import RuleEngine
 
 sys.path.append(os.getcwd())
 
+WFH_Converted_Person_Types = [1, 2] # full and part time workers become non-workers (pptyp 0) when converted
+
 class SyntheticPopulation:
     def __init__(self, subarea_file, lookup_file, filename, data_year, log_indent = 0):
         self.data_year = data_year # year of the parcel data
         self.filename = filename # original parcel data filename
 
-        self.lookup_df = pd.read_csv(lookup_file, sep = ',', low_memory = False)
-        self.subarea_df = pd.read_csv(subarea_file, sep = ',', low_memory = False)
+        self.lookup_df = normalize_geography(pd.read_csv(lookup_file, sep = ',', low_memory = False))
+        self.subarea_df = normalize_geography(pd.read_csv(subarea_file, sep = ',', low_memory = False))
 
         base_logger = logging.getLogger(__name__)
         self.logger = IndentAdapter(base_logger, log_indent)
@@ -27,8 +32,8 @@ class SyntheticPopulation:
         obj = cls.__new__(cls) # Create an uninitialized instance
         obj.data_year = data_year
         obj.filename = filename
-        obj.lookup_df = lookup_df
-        obj.subarea_df = subarea_df
+        obj.lookup_df = normalize_geography(lookup_df)
+        obj.subarea_df = normalize_geography(subarea_df)
         obj.hhs_df = hhs_df
         obj.persons_df = persons_df
         obj.indent = log_indent
@@ -38,10 +43,26 @@ class SyntheticPopulation:
 
         return obj
         
+    def _source_delta(self):
+        '''
+        H5Delta of the source h5 if it is a delta h5, otherwise None.
+        '''
+        if not os.path.exists(self.filename):
+            return None
+        with h5py.File(self.filename, "r") as hdf_file:
+            if not is_h5_delta(hdf_file):
+                return None
+        return H5Delta(self.filename)
+
     def load_synpop(self):
-        with h5py.File(self.filename, "r") as hdf_file: 
-            hhs_df = h5_to_df(hdf_file, 'Household')
-            persons_df = h5_to_df(hdf_file, 'Person')
+        source = self._source_delta()
+        if source is not None:
+            hhs_df = source.dataframe('Household')
+            persons_df = source.dataframe('Person')
+        else:
+            with h5py.File(self.filename, "r") as hdf_file: 
+                hhs_df = h5_to_df(hdf_file, 'Household')
+                persons_df = h5_to_df(hdf_file, 'Person')
 
         self.logger.info(f"Syntheic population {self.filename} loaded")
         return hhs_df, persons_df
@@ -54,12 +75,22 @@ class SyntheticPopulation:
         validate_dict = validate_dataframe_file(self.persons_df)
         return validate_dict
     
-    def validate_hhs_persons(self) -> dict:
+    def validate_hhs_persons(self, parcels_df = None, controls_df = None, fail_fast = False) -> dict:
+        '''
+        per column statistics of households and persons, plus the validation rules that apply to them.
+
+        :param parcels_df: optional parcel data, to check HH_P against the households on each parcel
+        :param controls_df: optional popsim control totals by block group
+        :param fail_fast: stop the rules at the first failure
+        :return: a dict of dataframes for ValidationAndSummary
+        '''
         hhs_dict = self.validate_hhs()
         persons_dict = self.validate_persons()
         hhs_dict = {f"hhs_{k}": v for k, v in hhs_dict.items()}
         persons_dict = {f'persons_{k}': v for k, v in persons_dict.items()}
-        out = hhs_dict | persons_dict
+        frames = {'households': self.hhs_df, 'persons': self.persons_df, 'lookup': self.lookup_df, 'parcels': parcels_df, 'block_group_controls': controls_df}
+        rules_dict = RuleEngine(log_indent = self.indent).run(frames, fail_fast = fail_fast)
+        out = hhs_dict | persons_dict | rules_dict
         return out
 
     def summarize_synpop(self, output_dir, output_fn_prefix = '', export_parcel_level_summary = False, export_parcel_level_dataset = False) -> dict:        
@@ -94,8 +125,8 @@ class SyntheticPopulation:
         hh_taz['total_persons'] = hh_taz['hhexpfac'] * hh_taz['hhsize']
         hh_taz['total_hhs'] = hh_taz['hhexpfac']
 
-        summary_by_jurisdiction = hh_taz.groupby('Jurisdiction')[['total_hhs', 'total_persons', 'ft_w', 'pt_w']].sum()   
-        summary_by_mma = hh_taz.groupby('Subarea')[['total_hhs', 'total_persons',  'ft_w', 'pt_w']].sum()
+        summary_by_jurisdiction = hh_taz.groupby('Jurisdiction', observed = True)[['total_hhs', 'total_persons', 'ft_w', 'pt_w']].sum()   
+        summary_by_mma = hh_taz.groupby('Subarea', observed = True)[['total_hhs', 'total_persons',  'ft_w', 'pt_w']].sum()
 
         subarea_def = taz_subarea[['Subarea', 'SubareaName']]
         subarea_def = subarea_def.drop_duplicates(keep = 'first')
@@ -137,7 +168,9 @@ class SyntheticPopulation:
         agg_dict = {'total_hhs': 'sum', 'total_persons': 'sum'}
         summary_by_parcels = hh_taz.groupby('hhparcel').agg(agg_dict)
         summary_by_parcels = summary_by_parcels.merge(parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'Jurisdiction']], how = 'right', left_on = 'hhparcel', right_on = 'PSRC_ID')
-        summary_by_parcels.fillna(0, inplace = True)
+        # Jurisdiction is categorical and cannot take 0
+        numeric_cols = summary_by_parcels.columns.drop('Jurisdiction')
+        summary_by_parcels[numeric_cols] = summary_by_parcels[numeric_cols].fillna(0)
         summary_by_parcels.rename(columns = {'total_hhs': 'total_hhs_by_parcel', 'total_persons': 'total_persons_by_parcel'}, inplace = True)
         
         if export_parcel_level_summary == True:
@@ -160,60 +193,246 @@ class SyntheticPopulation:
 
         return summary_outputs
             
-    def adjust_worker_status_for_WFH(self, wfh_rate_file, output_h5_file):
+    def _household_positions(self) -> np.ndarray:
+        '''
+        row position in hhs_df of every person's household, -1 if the household is missing.
+        '''
+        return pd.Index(self.hhs_df['hhno']).get_indexer(self.persons_df['hhno'])
+
+    def _wfh_rate_by_taz(self, wfh_rate_file, max_taz) -> np.ndarray:
+        '''
+        dense array of WFH rate indexed by TAZ number. TAZs not in the rate file get 0.
+
+        :param wfh_rate_file: csv with BKRCastTAZ and WorkerAdjFactor
+        :param max_taz: largest TAZ the array has to cover
+        '''
+        rate_df = pd.read_csv(wfh_rate_file, usecols = ['BKRCastTAZ', 'WorkerAdjFactor']).dropna()
+        taz = rate_df['BKRCastTAZ'].to_numpy(dtype = np.int64)
+        rate_by_taz = np.zeros(max(int(max_taz), int(taz.max(initial = 0))) + 1)
+        rate_by_taz[taz] = rate_df['WorkerAdjFactor'].to_numpy(dtype = float)
+        return rate_by_taz
+
+    @staticmethod
+    def _wfh_convert_mask(person_taz, person_rate, workers_mask, rand, method = 'probability') -> np.ndarray:
+        '''
+        select the workers converted to non-workers.
+
+        :param person_taz: household TAZ of every person
+        :param person_rate: WFH rate of every person
+        :param workers_mask: True for workers
+        :param rand: uniform random number of every person
+        :param method: 'probability' converts every worker with rand < rate.
+            'quota' converts exactly round(rate * workers) workers per TAZ, those with the smallest rand in the TAZ.
+        '''
+        if method == 'probability':
+            return workers_mask & (rand < person_rate)
+        if method != 'quota':
+            raise ValueError(f"Unknown WFH method {method}. Use 'probability' or 'quota'.")
+
+        worker_idx = np.flatnonzero(workers_mask)
+        taz = person_taz[worker_idx]
+        # workers sorted by TAZ, then by their random number. rank is the position within the TAZ.
+        order = np.lexsort((rand[worker_idx], taz))
+        sorted_taz = taz[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_taz[1:] != sorted_taz[:-1]])
+        group_size = np.diff(np.r_[group_start, len(order)])
+        rank = np.arange(len(order)) - np.repeat(group_start, group_size)
+        # quota rounds halves up, so a TAZ with 1 worker and rate 0.5 converts that worker
+        quota = np.floor(person_rate[worker_idx][order][group_start] * group_size + 0.5).astype(np.int64)
+
+        convert_mask = np.zeros(len(workers_mask), dtype = bool)
+        convert_mask[worker_idx[order[rank < np.repeat(quota, group_size)]]] = True
+        return convert_mask
+
+    def _wfh_households(self):
+        '''
+        household TAZ and parcel of every person, through the household row positions. 0 for persons whose household is missing.
+        '''
+        hh_pos = self._household_positions()
+        found = hh_pos >= 0
+        person_taz = np.where(found, self.hhs_df['hhtaz'].to_numpy(dtype = np.int64)[hh_pos], 0)
+        person_parcel = np.where(found, self.hhs_df['hhparcel'].to_numpy(dtype = np.int64)[hh_pos], 0)
+        return person_taz, person_parcel, found
+
+    def _wfh_selection(self, wfh_rate_file, method, rand, person_taz, found) -> np.ndarray:
+        '''
+        workers converted to non-workers under one rate file, as a mask over persons_df.
+        '''
+        # attach rate to every person
+        rate_by_taz = self._wfh_rate_by_taz(wfh_rate_file, person_taz.max(initial = 0))
+        person_rate = np.where(found, rate_by_taz[person_taz], 0.0)
+        workers_mask = self.persons_df['pwtyp'].to_numpy() > 0
+        return self._wfh_convert_mask(person_taz, person_rate, workers_mask, rand, method)
+
+    def _wfh_person_columns(self, convert_mask) -> dict:
+        '''
+        pwtyp and pptyp after the converted workers become non-workers.
+        '''
+        pwtyp = self.persons_df['pwtyp'].to_numpy()
+        pptyp = self.persons_df['pptyp'].to_numpy()
+        return {'pwtyp': np.where(convert_mask, 0, pwtyp).astype(pwtyp.dtype),
+                'pptyp': np.where(convert_mask & np.isin(pptyp, WFH_Converted_Person_Types), 0, pptyp).astype(pptyp.dtype)}
+
+    def _save_wfh_population(self, output_path, convert_mask, person_columns_only):
+        columns = self._wfh_person_columns(convert_mask)
+        if person_columns_only and os.path.exists(self.filename):
+            self._write_person_columns(output_path, columns)
+        else:
+            person_df = self.persons_df.copy()
+            for col, values in columns.items():
+                person_df[col] = values
+            with h5py.File(output_path, 'w') as f:
+                df_to_h5(self.hhs_df, f, 'Household')
+                df_to_h5(person_df, f, 'Person')
+
+    def _save_wfh_delta(self, delta_path, convert_mask, wfh_rate_file, method, seed):
+        '''
+        save the Person columns that change as a delta h5 on the source h5. see utility.H5Delta.
+        A delta cannot be the base of another delta, so when the source is a delta h5 the variant is saved as a delta
+        on the base of the source instead.
+        '''
+        columns = self._wfh_person_columns(convert_mask)
+        attrs = {'wfh_rate_file': os.path.abspath(wfh_rate_file), 'method': method, 'seed': seed}
+        source = self._source_delta()
+        if source is not None:
+            person_df = self.persons_df.copy()
+            for col, values in columns.items():
+                person_df[col] = values
+            save_h5_delta({'Household': self.hhs_df, 'Person': person_df}, source.base_file, delta_path, attrs)
+            return
+
+        patches = {}
+        for col, values in columns.items():
+            rows = np.flatnonzero(values != self.persons_df[col].to_numpy())
+            patches[col] = (rows, values[rows])
+        write_h5_delta(delta_path, self.filename, {'Person': patches}, attrs = attrs)
+
+    def save_delta(self, base_file, delta_file, attrs = None):
+        '''
+        save this synthetic population as a delta h5 on base_file, storing only the cells that differ from it.
+        H5Delta(delta_file).materialize() writes the complete h5 when it is needed.
+        '''
+        save_h5_delta({'Household': self.hhs_df, 'Person': self.persons_df}, base_file, delta_file, attrs)
+        self.logger.info(f'Synthetic population saved as a delta on {base_file} in {delta_file}')
+
+    def _save_converted_persons(self, converted_path, convert_mask, person_taz, person_parcel):
+        converted_df = pd.DataFrame({'hhno': self.persons_df['hhno'].to_numpy()[convert_mask],
+                                     'pno': self.persons_df['pno'].to_numpy()[convert_mask],
+                                     'hhtaz': person_taz[convert_mask], 'hhparcel': person_parcel[convert_mask]})
+        converted_df.to_csv(converted_path, index=False)
+
+    def adjust_worker_status_for_WFH(self, wfh_rate_file, output_h5_file, method = 'probability', person_columns_only = False, seed = 1):
         '''
         create a new popsim h5 for WFH modeling in COB method, by converting an assumed % of workers to non-worker status
         
         :param wfh_rate_file: % WFH rate for each TAZ
         :param output_h5_file: output file name for the new popsim h5
+        :param method: 'probability' converts each worker with probability rate.
+            'quota' converts exactly round(rate * workers) workers in each TAZ.
+        :param person_columns_only: copy the source h5 and overwrite only the Person columns that change (pwtyp, pptyp),
+            instead of writing the whole h5. The Household group is kept as it is in the source file.
+        :param seed: seed of the random numbers. Both methods use the same draw, so results are reproducible.
         '''
         self.logger.info(f'COB WFH methodology. Convert workers from worker status to non-worker status.')
-        self.logger.info(f'WFH rate: {wfh_rate_file}')
+        self.logger.info(f'WFH rate: {wfh_rate_file}, method: {method}')
 
         output_dir = os.path.dirname(self.filename)
-
-        person_df = self.persons_df.copy()
-        hhs_df = self.hhs_df.copy()
-
-
-        person_df = person_df.merge(hhs_df[['hhno', 'hhtaz', 'hhparcel']], on='hhno', how='left')
-        rate_df = pd.read_csv(wfh_rate_file)
-        rate_df = rate_df.rename(columns={'BKRCastTAZ': 'hhtaz', 'WorkerAdjFactor': 'rate'})
-
-        # attach rate to every person
-        person_df = person_df.merge(rate_df[['hhtaz', 'rate']], on='hhtaz', how='left')
-        person_df['rate'] = person_df['rate'].fillna(0)
+        person_taz, person_parcel, found = self._wfh_households()
 
         # -------------------------------------------------
         # Vectorized selection
         # -------------------------------------------------
-        rng = np.random.default_rng(1) # generate random number 0..1 for every person
-        workers_mask = person_df['pwtyp'] > 0
-        rand = rng.random(len(person_df))
-        convert_mask = workers_mask & (rand < person_df['rate'])
-        total_adjusted = convert_mask.sum()
-
-        # adjust workers status based on selection
-        person_df.loc[convert_mask, 'pwtyp'] = 0
-        person_df.loc[convert_mask & person_df['pptyp'].isin([1, 2]),'pptyp'] = 0
-
-        total_workers_before = (person_df['pwtyp'] > 0).sum() + total_adjusted
-        total_workers_after = (person_df['pwtyp'] > 0).sum()
+        rng = np.random.default_rng(seed) # generate random number 0..1 for every person
+        rand = rng.random(len(self.persons_df))
+        convert_mask = self._wfh_selection(wfh_rate_file, method, rand, person_taz, found)
+        total_adjusted = int(convert_mask.sum())
+        total_workers_before = int((self.persons_df['pwtyp'] > 0).sum())
 
         self.logger.info(f'{total_workers_before} workers before the change.')
-        self.logger.info(f'{total_workers_after} workers after the change.')
+        self.logger.info(f'{total_workers_before - total_adjusted} workers after the change.')
         self.logger.info(f'{total_adjusted} workers changed.')
 
         # Save converted list
         converted_file = 'converted_non_workers.csv'
-        converted_df = person_df.loc[convert_mask,['hhno', 'pno', 'hhtaz', 'hhparcel']]
-        converted_df.to_csv(os.path.join(output_dir, converted_file), index=False)
+        self._save_converted_persons(os.path.join(output_dir, converted_file), convert_mask, person_taz, person_parcel)
         self.logger.info(f'workers converted to non-worker status are saved in {converted_file}')
 
-        person_df.drop(columns=['rate', 'hhtaz', 'hhparcel'], inplace=True)
+        self._save_wfh_population(os.path.join(output_dir, output_h5_file), convert_mask, person_columns_only)
+        self.logger.info(f'updated synthetic population for WFH is saved in {output_h5_file} ')
+
+    def sweep_worker_status_for_WFH(self, wfh_rate_files, output_files = None, method = 'probability', person_columns_only = False,
+                                    delta_files = False, seed = 1, max_workers = None) -> pd.DataFrame:
+        '''
+        create one WFH variant of the synthetic population per rate file, from a single load of the population.
+
+        All variants share one random number per person, so a worker converted under a lower rate is also converted under
+        every higher rate of the same TAZ: variants are nested and differ only by the rates. Variants are generated and
+        written in parallel threads.
+
+        :param wfh_rate_files: list of % WFH rate files (BKRCastTAZ, WorkerAdjFactor)
+        :param output_files: output file of each rate file, relative to the folder of the source h5. None names them after
+            the rate files, <rate file>.h5, or <rate file>_delta.h5 for delta files.
+        :param method: 'probability' or 'quota', see adjust_worker_status_for_WFH
+        :param person_columns_only: see adjust_worker_status_for_WFH
+        :param delta_files: save each variant as a delta h5 holding only the changed Person cells and a reference to the
+            source h5, instead of a full population. utility.H5Delta reads it, and its materialize() writes the population.
+        :param seed: seed of the shared random numbers
+        :param max_workers: threads used to write the variants. None uses one per rate file up to the cpu count.
+        :return: one row per variant with Rate File, Output File, Workers Before, Workers Converted, Workers After
+        '''
+        output_dir = os.path.dirname(self.filename)
+        if output_files is None:
+            suffix = '_delta.h5' if delta_files else '.h5'
+            output_files = [os.path.splitext(os.path.basename(rate_file))[0] + suffix for rate_file in wfh_rate_files]
+        if len(output_files) != len(wfh_rate_files):
+            raise ValueError(f'{len(wfh_rate_files)} rate files but {len(output_files)} output files.')
 
-        with h5py.File(os.path.join(output_dir, output_h5_file), 'w') as f:
-            df_to_h5(hhs_df, f, 'Household')
-            df_to_h5(person_df, f, 'Person')
+        self.logger.info(f'COB WFH methodology. Sweep of {len(wfh_rate_files)} WFH rate files, method: {method}')
+        person_taz, person_parcel, found = self._wfh_households()
+        rng = np.random.default_rng(seed) # one random number 0..1 for every person, shared by all variants
+        rand = rng.random(len(self.persons_df))
+        total_workers_before = int((self.persons_df['pwtyp'] > 0).sum())
+
+        def run_variant(wfh_rate_file, output_file):
+            convert_mask = self._wfh_selection(wfh_rate_file, method, rand, person_taz, found)
+            output_path = os.path.join(output_dir, output_file)
+            if delta_files:
+                self._save_wfh_delta(output_path, convert_mask, wfh_rate_file, method, seed)
+            else:
+                self._save_wfh_population(output_path, convert_mask, person_columns_only)
+                converted_path = os.path.splitext(output_path)[0] + '_converted_non_workers.csv'
+                self._save_converted_persons(converted_path, convert_mask, person_taz, person_parcel)
+            total_adjusted = int(convert_mask.sum())
+            self.logger.info(f'{wfh_rate_file}: {total_adjusted} workers changed, saved in {output_file}')
+            return [wfh_rate_file, output_file, total_workers_before, total_adjusted, total_workers_before - total_adjusted]
+
+        workers = max_workers or min(max(len(wfh_rate_files), 1), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            rows = list(pool.map(run_variant, wfh_rate_files, output_files))
+
+        self.logger.info(f'{len(rows)} WFH variants saved in {output_dir}')
+        return pd.DataFrame(rows, columns = ['Rate File', 'Output File', 'Workers Before', 'Workers Converted', 'Workers After'])
+
+    def _write_person_columns(self, output_path, columns: dict):
+        '''
+        copy the source h5 to output_path and overwrite the given Person columns in place. Datasets keep their dtype.
+        A delta source h5 is written in full (H5Delta.materialize) instead of copied.
+
+        :param output_path: the new h5 file. If it is the source file, the source is updated in place.
+        :param columns: dict of column name -> new values, in the row order of the Person group
+        '''
+        source = self._source_delta()
+        if source is not None:
+            # materialized next to the output first, since the output can be the delta itself
+            source.materialize(output_path + '.tmp')
+            os.replace(output_path + '.tmp', output_path)
+        elif not (os.path.exists(output_path) and os.path.samefile(self.filename, output_path)):
+            shutil.copyfile(self.filename, output_path)
 
-        self.logger.info(f'updated synthetic population for WFH is saved in {output_h5_file} ')
\ No newline at end of file
+        with h5py.File(output_path, 'r+') as f:
+            person_set = f['Person']
+            for col, values in columns.items():
+                if person_set[col].shape != values.shape:
+                    raise ValueError(f'Person/{col} in {self.filename} has {person_set[col].shape[0]} rows, but the synthetic population has {len(values)}.')
+                person_set[col][...] = values.astype(person_set[col].dtype)
+        self.logger.info(f'Person columns {list(columns)} updated in a copy of {self.filename}')
@@ -0,0 +1,190 @@
+import os, sys
+sys.path.append(os.getcwd())
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utility import IndentAdapter, Job_Categories
+
+# names of the shared frames the rules read. Every frame is optional; rules whose frames are missing are skipped.
+#   parcels: parcel urbansim data (PARCELID, EMP*_P, HH_P, ...)
+#   lookup: parcel to TAZ lookup (PSRC_ID, GEOID10, BKRCastTAZ, Jurisdiction, ...)
+#   households: synthetic households (hhno, hhsize, hhexpfac, hhparcel, block_group_id)
+#   persons: synthetic persons (hhno, pno, ...)
+#   block_group_controls: popsim control totals by block group
+Frame_Names = ['parcels', 'lookup', 'households', 'persons', 'block_group_controls']
+
+BLOCK_GROUP_ID = 'block_group_id'
+BLOCK_GROUP_HH_CONTROL = 'hh_bg_weight'
+MAX_FAILURE_ROWS = 1000 # offending rows kept per failed rule
+
+class ValidationRule:
+    '''
+    a named check over the shared frames.
+
+    :param name: rule name shown in the results
+    :param frames: frame names the rule needs
+    :param check: function(frames, aggregates) returning the offending rows as a dataframe. empty means passed.
+    :param aggregates: names of the shared aggregates (see Aggregates) the check reads
+    :param description: what the rule asserts
+    :param columns: dict of frame name to columns the rule needs beyond the usual ones. the rule is skipped if a frame
+                    does not have them, e.g. DaySim households without block_group_id.
+    '''
+    def __init__(self, name, frames, check, aggregates = (), description = '', columns = None):
+        self.name = name
+        self.frames = tuple(frames)
+        self.check = check
+        self.aggregates = tuple(aggregates)
+        self.description = description
+        self.columns = dict(columns or {})
+
+    def can_run(self, frames: dict) -> bool:
+        return all(name in frames for name in self.frames) and \
+               all(col in frames[name].columns for name, cols in self.columns.items() for col in cols)
+
+# aggregates shared by several rules. each is computed once per run, only if a rule needs it.
+Aggregates = {
+    'lookup_ids': (('lookup',), lambda f: pd.Index(f['lookup']['PSRC_ID']).unique()),
+    'households_by_parcel': (('households',), lambda f: f['households'].groupby('hhparcel')['hhexpfac'].sum()),
+    'persons_by_household': (('persons',), lambda f: f['persons']['hhno'].value_counts(sort = False)),
+    'households_by_block_group': (('households',), lambda f: f['households'].groupby(BLOCK_GROUP_ID)['hhexpfac'].sum()),
+}
+
+def _duplicated_ids(df, col) -> pd.DataFrame:
+    dup = df[col].duplicated(keep = False).to_numpy()
+    return df.loc[dup, [col]].value_counts(sort = False).rename('Count').reset_index()
+
+def _parcel_ids_unique(frames, aggs):
+    return _duplicated_ids(frames['parcels'], 'PARCELID')
+
+def _lookup_ids_unique(frames, aggs):
+    return _duplicated_ids(frames['lookup'], 'PSRC_ID')
+
+def _parcels_in_lookup(frames, aggs):
+    parcels = frames['parcels']
+    missing = ~parcels['PARCELID'].isin(aggs['lookup_ids']).to_numpy()
+    return parcels.loc[missing, ['PARCELID']]
+
+def _household_parcels_in_lookup(frames, aggs):
+    hhs = frames['households']
+    missing = ~hhs['hhparcel'].isin(aggs['lookup_ids']).to_numpy()
+    return hhs.loc[missing, ['hhno', 'hhparcel']]
+
+def _total_jobs(frames, aggs):
+    parcels = frames['parcels']
+    job_cols = [col for col in Job_Categories if col in parcels.columns]
+    job_sum = parcels[job_cols].to_numpy().sum(axis = 1)
+    emptot = parcels['EMPTOT_P'].to_numpy()
+    bad = ~np.isclose(emptot, job_sum)
+    return pd.DataFrame({'PARCELID': parcels['PARCELID'].to_numpy()[bad], 'EMPTOT_P': emptot[bad], 'Sum of Jobs': job_sum[bad]})
+
+def _households_per_parcel(frames, aggs):
+    parcels = frames['parcels']
+    hhs = aggs['households_by_parcel'].reindex(parcels['PARCELID'], fill_value = 0).to_numpy()
+    hh_p = parcels['HH_P'].to_numpy()
+    bad = hh_p != hhs
+    out = pd.DataFrame({'PARCELID': parcels['PARCELID'].to_numpy()[bad], 'HH_P': hh_p[bad], 'Households': hhs[bad]})
+    # households allocated to parcels that are not in the parcel file
+    orphans = aggs['households_by_parcel']
+    orphans = orphans[~orphans.index.isin(parcels['PARCELID']) & (orphans > 0)]
+    if len(orphans) > 0:
+        out = pd.concat([out, pd.DataFrame({'PARCELID': orphans.index, 'HH_P': 0, 'Households': orphans.to_numpy()})], ignore_index = True)
+    return out
+
+def _household_size(frames, aggs):
+    hhs = frames['households']
+    persons = aggs['persons_by_household'].reindex(hhs['hhno'], fill_value = 0).to_numpy()
+    hhsize = hhs['hhsize'].to_numpy()
+    bad = hhsize != persons
+    return pd.DataFrame({'hhno': hhs['hhno'].to_numpy()[bad], 'hhsize': hhsize[bad], 'Persons': persons[bad]})
+
+def _block_group_controls(frames, aggs):
+    controls = frames['block_group_controls'].groupby(BLOCK_GROUP_ID)[BLOCK_GROUP_HH_CONTROL].sum()
+    compare = pd.concat([aggs['households_by_block_group'].rename('Households'), controls.rename('Control')], axis = 1).fillna(0)
+    compare = compare.loc[compare['Households'] != compare['Control']]
+    return compare.rename_axis(BLOCK_GROUP_ID).reset_index()
+
+Default_Rules = [
+    ValidationRule('Parcel IDs unique', ['parcels'], _parcel_ids_unique, description = 'PARCELID appears once in the parcel file'),
+    ValidationRule('Lookup PSRC_IDs unique', ['lookup'], _lookup_ids_unique, description = 'PSRC_ID appears once in the lookup'),
+    ValidationRule('Parcels in lookup', ['parcels', 'lookup'], _parcels_in_lookup, ['lookup_ids'],
+                   'every PARCELID is in the lookup'),
+    ValidationRule('Household parcels in lookup', ['households', 'lookup'], _household_parcels_in_lookup, ['lookup_ids'],
+                   'every hhparcel is in the lookup'),
+    ValidationRule('EMPTOT_P equals sum of jobs', ['parcels'], _total_jobs, description = 'EMPTOT_P == sum of EMP*_P by parcel'),
+    ValidationRule('HH_P equals households', ['parcels', 'households'], _households_per_parcel, ['households_by_parcel'],
+                   'HH_P == total hhexpfac of households on the parcel'),
+    ValidationRule('hhsize equals persons', ['households', 'persons'], _household_size, ['persons_by_household'],
+                   'hhsize == number of persons in the household'),
+    ValidationRule('Block group households match controls', ['households', 'block_group_controls'], _block_group_controls,
+                   ['households_by_block_group'], f'households by {BLOCK_GROUP_ID} == {BLOCK_GROUP_HH_CONTROL}',
+                   columns = {'households': [BLOCK_GROUP_ID], 'block_group_controls': [BLOCK_GROUP_ID, BLOCK_GROUP_HH_CONTROL]}),
+]
+
+class RuleEngine:
+    '''
+    evaluate validation rules over frames that are already loaded.
+
+    Rules are compiled once: the aggregates they share (households by parcel, persons by household, ...) are computed
+    a single time for the run, then rules are evaluated in parallel threads.
+    '''
+    def __init__(self, rules = None, max_workers = None, log_indent = 0):
+        self.rules = list(Default_Rules if rules is None else rules)
+        self.max_workers = max_workers
+        base_logger = logging.getLogger(__name__)
+        self.logger = IndentAdapter(base_logger, log_indent)
+
+    def run(self, frames: dict, fail_fast = False) -> dict:
+        '''
+        run all rules.
+
+        :param frames: dict of frame name (see Frame_Names) to dataframe. None or missing frames, or frames without the
+                       columns a rule needs, skip the rule.
+        :param fail_fast: stop at the first failed rule. rules not started yet are reported as Not Run; rules already
+                          running keep their results.
+        :return: a dict
+            {
+            "Validation Rules": one row per rule with Rule, Status, Failures, Description,
+            <rule name>: offending rows of each failed rule (at most MAX_FAILURE_ROWS)
+            }
+        '''
+        frames = {name: df for name, df in frames.items() if df is not None}
+        runnable = [rule for rule in self.rules if rule.can_run(frames)]
+        for rule in self.rules:
+            if rule not in runnable and all(name in frames for name in rule.frames):
+                self.logger.info(f'Validation rule skipped: {rule.name}, columns missing: {rule.columns}')
+        status = {rule.name: ('Skipped', 0) for rule in self.rules}
+        failures = {}
+
+        needed = {name for rule in runnable for name in rule.aggregates}
+        aggs = {}
+        workers = self.max_workers or min(max(len(runnable), 1), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            futures = {pool.submit(Aggregates[name][1], frames): name for name in needed}
+            for future in as_completed(futures):
+                aggs[futures[future]] = future.result()
+
+            for rule in runnable:
+                status[rule.name] = ('Not Run', 0)
+            futures = {pool.submit(rule.check, frames, aggs): rule for rule in runnable}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue # stopped by fail_fast before it started, stays Not Run
+                rule = futures[future]
+                bad = future.result()
+                if len(bad) == 0:
+                    status[rule.name] = ('Passed', 0)
+                    continue
+                status[rule.name] = ('Failed', len(bad))
+                failures[rule.name] = bad.head(MAX_FAILURE_ROWS).reset_index(drop = True)
+                self.logger.info(f'Validation rule failed: {rule.name}, {len(bad)} records')
+                if fail_fast:
+                    # rules already running can't be stopped; their results are still collected
+                    for other in futures:
+                        other.cancel()
+
+        summary = pd.DataFrame([[rule.name, status[rule.name][0], status[rule.name][1], rule.description] for rule in self.rules],
+                               columns = ['Rule', 'Status', 'Failures', 'Description'])
+        self.logger.info(f"Validation rules: {(summary['Status'] == 'Passed').sum()} passed, {(summary['Status'] == 'Failed').sum()} failed, "
+                         f"{(summary['Status'] == 'Skipped').sum()} skipped.")
+        return {"Validation Rules": summary} | failures
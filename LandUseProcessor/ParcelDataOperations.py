@@ -3,6 +3,7 @@ import numpy as np
 from utility import Data_Scale_Method, Job_Categories, Parcel_Data_Format, dialog_level, IndentAdapter
 import logging, os, sys
 from LandUseUtilities.Parcels import Parcels
+from LandUseUtilities.parking_cost import ParkingCostEngine
  
 
 class ParcelDataOperations:
@@ -10,6 +11,7 @@ class ParcelDataOperations:
         self.base_parcel = base_parcels
         self.subarea_df = base_parcels.subarea_df.copy()
         self.lookup_df = base_parcels.lookup_df.copy()
+        self.jurisdiction_masks = base_parcels.jurisdiction_masks # rows are aligned with lookup_df
         self.output_dir = output_dir
         self.output_filename = os.path.join(output_dir, output_filename)
         self.updated_parcels_df = base_parcels.original_parcels_df.copy()
@@ -133,10 +135,7 @@ class ParcelDataOperations:
         required_cols = ['PSRC_ID'] + jobs_cat
         local_data_df = local_data_df[required_cols]
 
-        if "Fringe" not in jurisdiction:
-            full_juris_parcels_df = self.lookup_df.loc[self.lookup_df['Jurisdiction'] == jurisdiction.upper()]  #  a complete list of parcels in Jurisdiction
-        else:
-            full_juris_parcels_df = self.lookup_df.loc[self.lookup_df['Jurisdiction'] == jurisdiction]  #  a complete list of parcels in Jurisdiction
+        full_juris_parcels_df = self.lookup_df.loc[self.jurisdiction_masks.mask(jurisdiction)]  #  a complete list of parcels in Jurisdiction
 
         actual_juris_parcels_df = local_data_df.loc[local_data_df['PSRC_ID'].isin(full_juris_parcels_df['PSRC_ID'])] # parcels included in local job file
         not_in_full_juris_parcels = actual_juris_parcels_df.loc[~actual_juris_parcels_df['PSRC_ID'].isin(full_juris_parcels_df['PSRC_ID'])] # parcels in local job file but not in the complete list
@@ -367,96 +366,39 @@ class ParcelDataOperations:
         return df_dict 
     
 
-    def update_parking_cost(self, gz_file, parking_cost_file, horizon_year):       
-        # -----------------------------
-        # 1. Read ga.txt
-        # -----------------------------
-        self.logger.info(f"Parking ensemble data: {gz_file}")
-        self.logger.info(f"Parking cost data: {parking_cost_file}")
-        gz_df = pd.read_csv(gz_file, skiprows=5, header=None)
-
-        gz_df = gz_df[[1, 2]].copy()
-        gz_df.columns = ["ensemble", "BKRCastTAZ"]
-
-        gz_df["ensemble"] = gz_df["ensemble"].astype(str).str.replace(":", "", regex=False).str.strip().str.lower().str[:4]   # enforce fixed 4-char format
-    
-        gz_df["BKRCastTAZ"] = pd.to_numeric(gz_df["BKRCastTAZ"], errors="coerce")
-        gz_df = gz_df.dropna()
-        gz_df["BKRCastTAZ"] = gz_df["BKRCastTAZ"].astype(int)
-
-        # -----------------------------
-        # 2. Read parking_costs.csv
-        # -----------------------------
-        parking_cost_df = pd.read_csv(parking_cost_file)
-        parking_cost_df.rename(columns= {'ENS': 'ensemble'}, inplace=True)
-
-        parking_cost_df["ensemble"] = parking_cost_df["ensemble"].astype(str).str.strip().str.lower()
-        
-        # normalize to gzXX format
-        parking_cost_df["ensemble"] = parking_cost_df["ensemble"].str.replace(
-            r"gz(\d+)",
-            lambda x: f"gz{int(x.group(1)):02d}",
-            regex=True
-        )
-
-        # -----------------------------
-        # 3. Horizon year logic
-        # -----------------------------
-        available_years = parking_cost_df["year"].unique()
-        valid_years = [y for y in available_years if y <= horizon_year]
-        self.logger.info(f"Available years in parking cost data: {available_years}")
-       
+    def update_parking_cost(self, gz_file, parking_cost_file, horizon_year):
+        '''
+        replace PPRICHRP and PPRICDYP by the parking cost of each parcel's TAZ for the horizon year.
 
-        if not valid_years:
-            raise ValueError("No valid year <= horizon year found")
-
-        selected_year = max(valid_years)
-        self.logger.info(f"Parking cost data for the year {selected_year} is used.")
-        parking_cost_df = parking_cost_df.loc[parking_cost_df["year"] == selected_year]
-
-        # -----------------------------
-        # 4. Merge GA with parking cost
-        # -----------------------------
-        taz_cost_df = gz_df.merge(parking_cost_df, on="ensemble", how="left")
-
-        # self.updated_parcels_df = updated_parcels_df.copy()
-        # optio[nal validation
-        missing = taz_cost_df.loc[taz_cost_df["HR_COST"].isna()]
-        if not missing.empty:
-            print("Warning: Missing hourly parking cost for ensembles:")
-            print(missing["ensemble"].unique())
-
-        missing = taz_cost_df.loc[taz_cost_df["DAY_COST"].isna()]
-        if not missing.empty:
-            print("Warning: Missing daily parking cost for ensembles:")
-            print(missing["ensemble"].unique())
-
-        # -----------------------------
-        # 6. Attach costs to parcels
-        # -----------------------------
-        updated_parcels_df = self.updated_parcels_df.copy()
-        updated_parcels_df = updated_parcels_df.merge(
-            taz_cost_df[["BKRCastTAZ", "HR_COST", "DAY_COST"]],
-            left_on="TAZ_P",
-            right_on="BKRCastTAZ",
-            how="left"
-        )
-
-        # -----------------------------
-        # 7. Replace parking cost fields
-        # -----------------------------
-        updated_parcels_df["PPRICHRP"] = updated_parcels_df["HR_COST"]
-        updated_parcels_df["PPRICDYP"] = updated_parcels_df["DAY_COST"]
-        updated_parcels_df.fillna({ "PPRICHRP": 0, "PPRICDYP": 0 }, inplace=True)
-
-        # cleanup
-        updated_parcels_df = updated_parcels_df.drop(
-            columns=["BKRCastTAZ", "HR_COST", "DAY_COST"],
-            errors="ignore"
-        )
-
-        self.updated_parcels_df = updated_parcels_df.copy()
-        self.updated_parcels_df.to_csv(os.path.join(self.output_dir,  self.output_filename), sep = ' ', index=False)
+        :param gz_file: parking ensembles by TAZ (ga.txt)
+        :param parking_cost_file: hourly and daily parking cost by ensemble and year (parking_costs.csv)
+        :param horizon_year: the latest cost year not after it is used
+        '''
+        engine = ParkingCostEngine(gz_file, parking_cost_file, self.indent + 1)
+        engine.assign(self.updated_parcels_df, horizon_year)
+        self.updated_parcels_df.to_csv(self.output_filename, sep = ' ', index=False)
         self.logger.info(f"Parcel data with updated parking cost is saved to {self.output_filename}")
 
         return self.updated_parcels_df
+
+    def update_parking_cost_for_years(self, gz_file, parking_cost_file, horizon_years) -> dict:
+        '''
+        update the parking cost for several horizon years from one parse of the parking files, and save one parcel file
+        per year, named after the output file: <output name>_<year>.txt.
+
+        :param gz_file: parking ensembles by TAZ (ga.txt)
+        :param parking_cost_file: hourly and daily parking cost by ensemble and year (parking_costs.csv)
+        :param horizon_years: list of horizon years
+        :return: dict of horizon year -> parcel dataframe with the parking cost of that year. updated_parcels_df holds
+            the costs of the last year.
+        '''
+        engine = ParkingCostEngine(gz_file, parking_cost_file, self.indent + 1)
+        stem, ext = os.path.splitext(self.output_filename)
+        out = {}
+        for horizon_year in horizon_years:
+            engine.assign(self.updated_parcels_df, horizon_year)
+            fn = f'{stem}_{horizon_year}{ext}'
+            self.updated_parcels_df.to_csv(fn, sep = ' ', index=False)
+            self.logger.info(f"Parcel data with parking cost of {horizon_year} is saved to {fn}")
+            out[horizon_year] = self.updated_parcels_df.copy()
+        return out
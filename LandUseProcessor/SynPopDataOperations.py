@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np, math
-from utility import Data_Scale_Method, Job_Categories, Parcel_Data_Format, SynPop_Data_Scale_Method, dialog_level, IndentAdapter
+from utility import (Data_Scale_Method, Job_Categories, Parcel_Data_Format, SynPop_Data_Scale_Method, dialog_level, IndentAdapter,
+                     normalize_geography, JurisdictionMasks)
 import logging, os, sys
 from LandUseUtilities.synthetic_population import SyntheticPopulation
  
@@ -23,6 +24,8 @@ class SynPopDataOperations:
         base_synpop_summary = self.synpop.summarize_synpop(self.output_dir, f'{self.scen_name}_base')
         self.updated_hhs_by_parcels_df = base_synpop_summary['summary_by_parcel'].copy()
         self.updated_hhs_by_parcels_df = self.updated_hhs_by_parcels_df.rename(columns = {'total_hhs_by_parcel': 'adj_hhs_by_parcel', 'total_persons_by_parcel':'adj_persons_by_parcel'})        
+        # updated_hhs_by_parcels_df keeps its row order through update(), so the masks are built once
+        self.jurisdiction_masks = JurisdictionMasks(self.updated_hhs_by_parcels_df['Jurisdiction'])
 
     def generate_total_hhs_data_for_jurisdiction(self, process_rule):
         self.logger.info(f"processing rule: {process_rule}")
@@ -54,7 +57,7 @@ class SynPopDataOperations:
         adjusted_hhs_by_parcel_df = self.updated_hhs_by_parcels_df.copy()
 
         local_du_df = pd.read_csv(os.path.join(self.output_dir, local_housing_unit_data_file))
-        adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'].str.upper() == jurisdiction.upper()]
+        adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.loc[self.jurisdiction_masks.mask(jurisdiction)]
         local_parcels_provided = local_du_df.shape[0]
         if adjusted_hhs_by_parcel_df.shape[0] != local_parcels_provided:
             self.logger.info('COB forecast does not cover all parcels. Please cehck the missing parcel files for further investigation.')
@@ -69,8 +72,8 @@ class SynPopDataOperations:
         local_du_df['source'] = 'local_parcel'
 
         adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.merge(local_du_df[['PSRC_ID', 'source', 'sfhhs', 'mfhhs', 'sfpersons', 'mfpersons']], on = 'PSRC_ID', how = 'left')
-        # reset hhs and persons in all COB parcels to zero. Only use local forecast.
-        adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'].str.upper() == jurisdiction.upper(), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
+        # reset hhs and persons in all COB parcels to zero. Only use local forecast. all rows are already in the jurisdiction.
+        adjusted_hhs_by_parcel_df[['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
 
         # it is importand to use cobflag rather than Jurisdiction, because (hhs and persons in) parcels flagged by cobflag are provided by COB staff.
         adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['source'] == 'local_parcel', 'adj_hhs_by_parcel'] = adjusted_hhs_by_parcel_df['sfhhs'] + adjusted_hhs_by_parcel_df['mfhhs']
@@ -125,19 +128,20 @@ class SynPopDataOperations:
     def scale_selected_base_data_by_total_hhs_by_TAZ(self, jurisdiction, local_TAZ_housing_data_file, taz_attr_name) -> dict:
         self.used_taz_attribute_names.add(taz_attr_name)
 
-        hhs_control_total_by_TAZ_df = pd.read_csv(os.path.join(self.output_dir, local_TAZ_housing_data_file))
-        juris_list = hhs_control_total_by_TAZ_df['Jurisdiction'].unique()
+        hhs_control_total_by_TAZ_df = normalize_geography(pd.read_csv(os.path.join(self.output_dir, local_TAZ_housing_data_file)))
+        juris_list = hhs_control_total_by_TAZ_df['Jurisdiction'].unique().tolist()
         self.logger.info(f'The following jurisdictions are included in {local_TAZ_housing_data_file}: {juris_list}')    
 
         hhs_control_total_by_TAZ_df['total_persons'] = 0
         hhs_control_total_by_TAZ_df['total_hhs'] = 0
-        selection = hhs_control_total_by_TAZ_df['Jurisdiction'].str.upper() == jurisdiction.upper()
+        selection = JurisdictionMasks(hhs_control_total_by_TAZ_df['Jurisdiction']).mask(jurisdiction)
         hhs_control_total_by_TAZ_df.loc[selection, 'sfhhs'] = hhs_control_total_by_TAZ_df['SFUnits'] * self.hhs_assumptions[jurisdiction]["sfhh_occ"]
         hhs_control_total_by_TAZ_df.loc[selection, 'mfhhs'] = hhs_control_total_by_TAZ_df['MFUnits'] * self.hhs_assumptions[jurisdiction]["mfhh_occ"]
         hhs_control_total_by_TAZ_df.loc[selection, 'total_hhs'] = hhs_control_total_by_TAZ_df['sfhhs'] + hhs_control_total_by_TAZ_df["mfhhs"]
         hhs_control_total_by_TAZ_df.loc[selection, 'total_persons'] = hhs_control_total_by_TAZ_df['sfhhs'] * self.hhs_assumptions[jurisdiction]["sfhhsize"] + hhs_control_total_by_TAZ_df['mfhhs'] * self.hhs_assumptions[jurisdiction]["mfhhsize"]
             
-        hhs_by_parcel_df = self.updated_hhs_by_parcels_df.loc[self.updated_hhs_by_parcels_df['Jurisdiction'].str.upper() == jurisdiction.upper()].copy()
+        juris_mask = self.jurisdiction_masks.mask(jurisdiction)
+        hhs_by_parcel_df = self.updated_hhs_by_parcels_df.loc[juris_mask].copy()
         
         parcels_in_trip_model_TAZ_df = pd.merge(hhs_by_parcel_df[['PSRC_ID', 'adj_hhs_by_parcel', 'adj_persons_by_parcel']], self.lookup_df.loc[self.lookup_df[taz_attr_name].notna(), ['PSRC_ID', 'Jurisdiction', taz_attr_name]], on = 'PSRC_ID', how = 'inner')
         parcels_in_trip_model_TAZ_df = parcels_in_trip_model_TAZ_df.merge(hhs_control_total_by_TAZ_df[[taz_attr_name]], on  = taz_attr_name, how = 'inner')
@@ -148,16 +152,16 @@ class SynPopDataOperations:
         hhs_by_taz_comparison_file = f'{self.scen_name}_by_taz_comparison.csv'
         hhs_by_TAZ_df.to_csv(os.path.join(self.output_dir, hhs_by_taz_comparison_file), index = False)
 
-        adjusted_hhs_by_parcel_df = self.updated_hhs_by_parcels_df.loc[self.updated_hhs_by_parcels_df['Jurisdiction'].str.upper() == jurisdiction.upper()].copy()
+        adjusted_hhs_by_parcel_df = self.updated_hhs_by_parcels_df.loc[juris_mask].copy()
 
         right_cols = ['PSRC_ID'] 
         if taz_attr_name not in adjusted_hhs_by_parcel_df.columns:
             right_cols.append(taz_attr_name)
         adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.merge(parcels_in_trip_model_TAZ_df[right_cols], on = 'PSRC_ID', how = 'left')
 
-        for city in juris_list:
-            # reset hhs and persons to zero in Kirkland and Redmond parcels that are not included in local estimates. We will use their local forecast.
-            adjusted_hhs_by_parcel_df.loc[(adjusted_hhs_by_parcel_df['Jurisdiction'].str.upper() == city.upper()) & adjusted_hhs_by_parcel_df[taz_attr_name].isna(), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
+        # reset hhs and persons to zero in Kirkland and Redmond parcels that are not included in local estimates. We will use their local forecast.
+        local_juris_mask = JurisdictionMasks(adjusted_hhs_by_parcel_df['Jurisdiction']).mask(*juris_list)
+        adjusted_hhs_by_parcel_df.loc[local_juris_mask & adjusted_hhs_by_parcel_df[taz_attr_name].isna(), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
 
         # for a TAZ that have no hhs in PSRC erstimate but have hhs in local jurisdiction estimate, evenly distribute hhs to all parcels in that TAZ
         tazs_for_evenly_distri_df = hhs_by_TAZ_df.loc[(hhs_by_TAZ_df['adj_hhs_by_parcel'] == 0) & (hhs_by_TAZ_df['total_hhs'] > 0) ]
@@ -2,26 +2,21 @@ import sys
 import os
 import logging
 from datetime import datetime
-import pandas as pd
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton,
     QFileDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QMessageBox, QSizePolicy,
-     QMainWindow
+     QMainWindow, QProgressBar, QInputDialog
 )
 from PyQt6.QtGui import QIntValidator
 
-from parcel_data_processor import ParcelProcessor
-from land_use_data_preprocessor import LUPreprocessUserInterface
-import land_use_data_processor_utilities as LU_utility
+# the dialogs and the parcel / synthetic population classes are imported on first use, so the main window shows
+# without loading them.
 from GUI_support_utilities import (Shared_GUI_Widgets, ValidationAndSummary)
-from SynPopDataUserInterface import SynPopDataUserInterface
-from allocate_hhs_to_parcels import HouseholdAllocation
+from utility import setup_logger_file, dialog_level, _LOGGING_CONFIGURED, ThreadWrapper, read_geography_table
 
-from LandUseUtilities.synthetic_population import SyntheticPopulation
-from LandUseUtilities.Parcels import Parcels
-from ParcelDataOperations import ParcelDataOperations
-from utility import setup_logger_file, dialog_level, _LOGGING_CONFIGURED, ThreadWrapper
+Default_Subarea_File = r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv"
+Default_Lookup_File = r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\parcel_TAZ_2014_lookup.csv"
 
 
 class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
@@ -35,20 +30,60 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             'horizon_year': 2044,
             'scenario_name': 'long_range_planning',
             'output_dir': r'Z:\Modeling Group\BKRCast\LandUse\test_2044_long_range_planning',
-            'subarea_df': pd.read_csv(r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv"),
-            'lookup_df': pd.read_csv(r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\parcel_TAZ_2014_lookup.csv"),
-            'subarea_file': r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv",
-            'lookup_file': r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\parcel_TAZ_2014_lookup.csv",
+            # loaded in the background by load_geography_tables
+            'subarea_df': None,
+            'lookup_df': None,
+            'subarea_file': Default_Subarea_File,
+            'lookup_file': Default_Lookup_File,
         }
 
         self._init_ui() 
         self.create_status_bar(self, 4)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 0) # busy indicator
+        self.load_progress.setMaximumWidth(120)
+        self.load_progress.setVisible(False)
+        self.status_bar.addPermanentWidget(self.load_progress)
 
         self.year_box.setText(str(self.project_settings['horizon_year']))
         self.scen_input_editbox.setText(self.project_settings['scenario_name'])
 
         self.logger = None # to be initialized after output dir is selected.
         self.indent = 0 # for log entry
+
+        self.load_geography_tables()
+
+    def load_geography_tables(self):
+        """Load the default subarea and parcel lookup tables in a background thread."""
+        files = {'subarea_df': self.project_settings['subarea_file'], 'lookup_df': self.project_settings['lookup_file']}
+        self.load_progress.setVisible(True)
+        self.status_sections[1].setText("Loading subarea and parcel lookup files...")
+        self.table_loader = ThreadWrapper(self._read_geography_tables, files)
+        self.table_loader.status_update.connect(lambda s1, s2, s3, s4: self.status_sections[1].setText(s2))
+        self.table_loader.finished.connect(lambda tables: self._on_geography_tables_loaded(files, tables))
+        self.table_loader.error.connect(self._on_geography_tables_error)
+        self.table_loader.start()
+
+    def _read_geography_tables(self, files) -> dict:
+        tables = {}
+        for key, file_name in files.items():
+            self.table_loader.status_update.emit('', f"Loading {os.path.basename(file_name)}...", '', '')
+            tables[key] = read_geography_table(file_name)
+        return tables
+
+    def _on_geography_tables_loaded(self, files, tables):
+        self.load_progress.setVisible(False)
+        file_keys = {'subarea_df': 'subarea_file', 'lookup_df': 'lookup_file'}
+        for key, df in tables.items():
+            # a file selected while the defaults were loading is kept
+            if self.project_settings[file_keys[key]] == files[key]:
+                self.project_settings[key] = df
+        self.status_sections[1].setText("Subarea and parcel lookup files loaded.")
+
+    def _on_geography_tables_error(self, e):
+        self.load_progress.setVisible(False)
+        # not a dialog: the files are asked for when a step needs them (load_settings)
+        self.status_sections[1].setText(f"Default subarea and parcel lookup files not loaded: {e}")
         
     def _init_ui(self):
         """Initialize the user interface."""
@@ -179,7 +214,10 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             return False
         self.logger.info(f"Output directory: {self.project_settings['output_dir']}")
         if (self.project_settings['subarea_df'] is None) or (self.project_settings['lookup_df'] is None):
-            QMessageBox.warning(self, "Input Error", "Please select both subarea and parcel lookup files.")
+            if self.table_loader.isRunning():
+                QMessageBox.warning(self, "Input Error", "Subarea and parcel lookup files are still loading.")
+            else:
+                QMessageBox.warning(self, "Input Error", "Please select both subarea and parcel lookup files.")
             return False
 
         self.project_settings['horizon_year'] = horizon_year
@@ -192,8 +230,8 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
         file_name, _ = QFileDialog.getOpenFileName(self, "Select Subarea File", "", "CSV Files (*.csv);;All Files (*)")
         if file_name:
             self.logger.info(f"Selected subarea file: {file_name}")
-            self.project_settings['subarea_df'] = pd.read_csv(file_name)
             self.project_settings['subarea_file'] = file_name
+            self.project_settings['subarea_df'] = read_geography_table(file_name)
             self.status_sections[1].setText("Subarea file loaded.")
 
     def select_lookup_file(self):
@@ -201,8 +239,8 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
         file_name, _ = QFileDialog.getOpenFileName(self, "Select Parcel Lookup File", "", "CSV Files (*.csv);;All Files (*)")
         if file_name:
             self.logger.info(f"Selected parcel lookup file: {file_name}")
-            self.project_settings['lookup_df'] = pd.read_csv(file_name, low_memory=False)
             self.project_settings['lookup_file'] = file_name
+            self.project_settings['lookup_df'] = read_geography_table(file_name)
             self.status_sections[1].setText("Parcel lookup file loaded.")
 
     def browse_output_file(self):
@@ -221,21 +259,25 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             self.indent = dialog_level(self)
 
     def parcel_btn_clicked(self):
+        from parcel_data_processor import ParcelProcessor
         self.load_settings()
         parcel_processor = ParcelProcessor(self.project_settings)
         parcel_processor.exec()
 
     def popsim_button_clicked(self):
+        from SynPopDataUserInterface import SynPopDataUserInterface
         self.load_settings()
         processor = SynPopDataUserInterface(self.project_settings, self)
         processor.exec()
     
     def new_parcels_btn_clicked(self):
+        import land_use_data_processor_utilities as LU_utility
         self.load_settings()
         processor = LU_utility.ParcelDataUserInterface(self.project_settings, self)
         processor.exec()
 
     def preprocess_btn_clicked(self):
+        from land_use_data_preprocessor import LUPreprocessUserInterface
         self.load_settings()
         processor = LUPreprocessUserInterface(self.project_settings, self)
         processor.exec()
@@ -247,6 +289,7 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
         event.accept()  
 
     def allocate_parcel_button_clicked(self):
+        from allocate_hhs_to_parcels import HouseholdAllocation
         self.load_settings()
         dialog = HouseholdAllocation(self.project_settings, self)
         dialog.exec()
@@ -261,7 +304,7 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             return
         
         file_name, _ = QFileDialog.getOpenFileName(self, "Select a PopSim h5 File", "", "H5 Files (*.h5);;All Files (*)")
-        import h5py
+        from LandUseUtilities.synthetic_population import SyntheticPopulation
         if file_name == '':
             QMessageBox.critical(self, "Error", "Select a h5 file.")
             return
@@ -312,6 +355,7 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
         :return: parcel data summary by jurisdiction, subarea, and TAZ
         :rtype: dict
         '''
+        from LandUseUtilities.Parcels import Parcels
         parcels = Parcels(self.project_settings['subarea_file'], self.project_settings['lookup_file'], parcel_filename, self.project_settings['horizon_year'], self.indent + 1)
         summary_dict = parcels.summarize_parcel_data(self.project_settings['output_dir'], '')
         return summary_dict
@@ -322,31 +366,54 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             QMessageBox.critical(self, "Error", "Select the Synthetic Population File.")
             return    
 
-        wfh_rate_file_name, _ = QFileDialog.getOpenFileName(self, "Select the WFH Rate File", "", "csv File (*.csv);;All Files (*)")
-        if wfh_rate_file_name == '':
-            QMessageBox.critical(self, "Error", "Select the Synthetic Population File.")
+        wfh_rate_file_names, _ = QFileDialog.getOpenFileNames(self, "Select the WFH Rate File(s)", "", "csv File (*.csv);;All Files (*)")
+        if len(wfh_rate_file_names) == 0:
+            QMessageBox.critical(self, "Error", "Select the WFH Rate File.")
             return           
 
+        if len(wfh_rate_file_names) > 1:
+            # sweep: one variant per rate file, named after the rate files
+            output_dir = QFileDialog.getExistingDirectory(self, 'Select the Folder for the Synthetic Populations', self.project_settings['output_dir'])
+            if output_dir == '':
+                return
+            delta_files = QMessageBox.question(self, 'WFH Sweep', 'Save the variants as delta files (converted persons only)?') == QMessageBox.StandardButton.Yes
+            self.status_sections[0].setText("Generating")
+            self.disableAllButtons()
+
+            self.worker = ThreadWrapper(self.wfh_sweep_generating, wfh_rate_file_names, output_dir, h5_file_name, delta_files)
+            self.worker.finished.connect(lambda: self._on_process_thread_finished( self.status_sections[0], ''))
+            self.worker.error.connect(lambda message: self._on_process_thread_error(self.status_sections[0], message))
+            self.worker.start()
+            return
+
         out_put_h5_file, _ = QFileDialog.getSaveFileName(self, 'Save Synthetic Population', self.project_settings['output_dir'], "H5 Files (*.h5);;All Files (*)")
         if out_put_h5_file:
             self.status_sections[0].setText("Generating")
             self.disableAllButtons()
 
-            self.worker = ThreadWrapper(self.wfh_generating, wfh_rate_file_name, out_put_h5_file, h5_file_name)
+            self.worker = ThreadWrapper(self.wfh_generating, wfh_rate_file_names[0], out_put_h5_file, h5_file_name)
             self.worker.finished.connect(lambda: self._on_process_thread_finished( self.status_sections[0], ''))
             self.worker.error.connect(lambda message: self._on_process_thread_error(self.status_sections[0], message))
             self.worker.start()  
         
 
     def wfh_generating(self, wfh_rate_file_name, output_h5_file, input_popsim_file):
-        import debugpy
-        debugpy.breakpoint()
-
+        from LandUseUtilities.synthetic_population import SyntheticPopulation
         synpop = SyntheticPopulation(self.project_settings['subarea_file'], self.project_settings['lookup_file'],
                                      input_popsim_file, self.project_settings['horizon_year'], self.indent + 1)   
         synpop.adjust_worker_status_for_WFH(wfh_rate_file_name, output_h5_file)
 
+    def wfh_sweep_generating(self, wfh_rate_file_names, output_dir, input_popsim_file, delta_files):
+        from LandUseUtilities.synthetic_population import SyntheticPopulation
+        synpop = SyntheticPopulation(self.project_settings['subarea_file'], self.project_settings['lookup_file'],
+                                     input_popsim_file, self.project_settings['horizon_year'], self.indent + 1)
+        suffix = '_delta.h5' if delta_files else '.h5'
+        output_files = [os.path.join(output_dir, os.path.splitext(os.path.basename(fn))[0] + suffix) for fn in wfh_rate_file_names]
+        synpop.sweep_worker_status_for_WFH(wfh_rate_file_names, output_files, delta_files = delta_files)
+
     def update_parking_cost_btn_clicked(self):
+        from LandUseUtilities.Parcels import Parcels
+        from ParcelDataOperations import ParcelDataOperations
         self.load_settings()
         parcel_file_name, _ = QFileDialog.getOpenFileName(self, "Select the Parcel File to Update", "", "txt File (*.txt);;All Files (*)")
         if parcel_file_name == '':
@@ -363,6 +430,19 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             QMessageBox.critical(self, "Error", "Select the Parking Cost Update File.")
             return           
 
+        # several horizon years are updated from one parse of the parking files, one parcel file per year
+        years_text, ok = QInputDialog.getText(self, "Horizon Years", "Horizon years, separated by commas:", text = str(self.project_settings['horizon_year']))
+        if not ok:
+            return
+        try:
+            horizon_years = [int(year) for year in years_text.replace(' ', '').split(',') if year != '']
+        except ValueError:
+            QMessageBox.critical(self, "Error", f"Invalid horizon years: {years_text}")
+            return
+        if len(horizon_years) == 0:
+            QMessageBox.critical(self, "Error", "Enter at least one horizon year.")
+            return
+
         out_put_parcel_file, _ = QFileDialog.getSaveFileName(self, 'Save Updated Parcel File', self.project_settings['output_dir'], "txt Files (*.txt);;All Files (*)")
         if out_put_parcel_file:
             self.status_sections[0].setText("Updating Parking Cost in Parcel File")
@@ -373,14 +453,18 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
             parcels = Parcels(self.project_settings['subarea_file'], self.project_settings['lookup_file'], parcel_file_name, self.project_settings['horizon_year'], self.indent + 1)
             op = ParcelDataOperations(parcels, dir, fn, self.indent + 1)
             self.logger.info(f"parcel file: {parcel_file_name}")
-            self.logger.info(f'horizon year: {self.project_settings["horizon_year"]}')
+            self.logger.info(f'horizon years: {horizon_years}')
             self.logger.info(f'Update parking cost')
-            self.worker = ThreadWrapper(op.update_parking_cost, parking_ensemble_file_name, parking_cost_file_name, self.project_settings['horizon_year'])
+            if len(horizon_years) == 1:
+                self.worker = ThreadWrapper(op.update_parking_cost, parking_ensemble_file_name, parking_cost_file_name, horizon_years[0])
+            else:
+                self.worker = ThreadWrapper(op.update_parking_cost_for_years, parking_ensemble_file_name, parking_cost_file_name, horizon_years)
             self.worker.finished.connect(lambda: self._on_process_thread_finished( self.status_sections[0], ''))
             self.worker.error.connect(lambda message: self._on_process_thread_error(self.status_sections[0], message))
             self.worker.start()
 
     def validate_parcel_button_clicked(self):
+        from LandUseUtilities.Parcels import Parcels
         self.load_settings()
         parcel_file_name, _ = QFileDialog.getOpenFileName(self, "Select the Parcel File to Validate", "", "txt File (*.txt);;All Files (*)")
         if parcel_file_name == '':
@@ -402,6 +486,7 @@ class LandUseDataUserInterface(QMainWindow, Shared_GUI_Widgets):
         self.status_sections[0].setText("")
 
     def validate_popsim_button_clicked(self):
+        from LandUseUtilities.synthetic_population import SyntheticPopulation
         self.load_settings()
         h5_file_name, _ = QFileDialog.getOpenFileName(self, "Select the Synthetic Population File to Validate", "", "h5 File (*.h5);;All Files (*)")
         if h5_file_name == '':
@@ -0,0 +1,16 @@
+'''
+Write the complete h5 of a delta synthetic population (see utility.H5Delta), e.g. a WFH variant saved as a delta,
+so DaySim can read it.
+
+    python materialize_synpop.py variant_delta.h5 hh_and_persons.h5 [base.h5]
+'''
+import sys
+from utility import H5Delta
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    delta = H5Delta(sys.argv[1], sys.argv[3] if len(sys.argv) > 3 else None)
+    delta.materialize(sys.argv[2])
+    print(f'{sys.argv[2]} written from {delta.base_file} and {sys.argv[1]}')
@@ -30,36 +30,40 @@ summary files are also exported as CSV files in the output folder.
 
 import sys
 import os
+import numpy as np
 import pandas as pd
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QDialog, QWidget, QLabel, QPushButton,
     QFileDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QMessageBox,
-    QTableWidget, QTableWidgetItem, QTabWidget
+    QTabWidget
 )
 
 sys.path.append(os.getcwd())
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QAction
 from utility import (IndentAdapter, dialog_level, Parcel_Data_Format, Data_Scale_Method,
-                     Summary_Categories, ThreadWrapper)
+                     Summary_Categories, ThreadWrapper, JurisdictionMasks, dataframe_statistics)
 
-from GUI_support_utilities import (Shared_GUI_Widgets, NumericTableWidgetItem, FileConfigDialog)
+from GUI_support_utilities import (Shared_GUI_Widgets, FileConfigDialog)
 # -------------------------
 # Configuration section
 # -------------------------
 
 REQUIRED_COLUMNS = ["PARCELID"]
+PARCEL_READ_CHUNK_SIZE = 200000 # rows parsed at a time when reading a source parcel file
 
+# jurisdictions taken from each input file
 FILTER_RULES = {
-    "Bellevue": lambda df: df[df["Jurisdiction"] == "BELLEVUE"],
-    "Bellevue Fringe": lambda df: df[df["Jurisdiction"] == "BellevueFringe"],
-    "Kirkland": lambda df: df[df["Jurisdiction"] == "KIRKLAND"],
-    "Kirkland Fringe": lambda df: df[df["Jurisdiction"] == "KirklandFringe"],
-    "Redmond": lambda df: df[df["Jurisdiction"] == "REDMOND"],
-    "Redmond Fringe": lambda df: df[df["Jurisdiction"] == "RedmondFringe"],
-    "Outside BKR": lambda df: df[(df["Jurisdiction"] == "Rest of KC") | (df["Jurisdiction"] == "External")]
+    "Bellevue": ("BELLEVUE",),
+    "Bellevue Fringe": ("BellevueFringe",),
+    "Kirkland": ("KIRKLAND",),
+    "Kirkland Fringe": ("KirklandFringe",),
+    "Redmond": ("REDMOND",),
+    "Redmond Fringe": ("RedmondFringe",),
+    "Outside BKR": ("Rest of KC", "External")
 }
 
 class ParcelProcessor(QDialog, Shared_GUI_Widgets):
@@ -159,70 +163,23 @@ class ParcelProcessor(QDialog, Shared_GUI_Widgets):
 
         # Summary table for the assembled data
         self.tabs = QTabWidget()
-        self.summary_table = QTableWidget()
-        self.summary_table.setSortingEnabled(True)
-        self.summary_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.summary_table.customContextMenuRequested.connect(
-            lambda pos: self.create_context_menu(self.summary_table, pos)
-        )
-        self.summary_table.selectionModel().selectionChanged.connect(
-            lambda sel, des, t=self.summary_table: self.on_table_selection_changed(t)
-        )
-        self.summary_table.setColumnCount(2)
-        self.summary_table.setHorizontalHeaderLabels([
-            "Jurisdiction", "Parcel Count"
-        ])
+        self.summary_table = self.create_dataframe_table(pd.DataFrame(columns = ["Jurisdiction", "Parcel Count"]))
         self.tabs.addTab(self.summary_table, "Summary")
 
         # Raw data sample table
-        self.raw_table = QTableWidget()
-        self.raw_table.selectionModel().selectionChanged.connect(
-            lambda sel, des, t=self.raw_table: self.on_table_selection_changed(t)
-        )
+        self.raw_table = self.create_dataframe_table()
         self.tabs.addTab(self.raw_table, "Raw Data Samples")
     
         # Validation table
-        self.valid_table = QTableWidget()
-        self.valid_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.valid_table.customContextMenuRequested.connect(
-            lambda pos: self.create_context_menu(self.valid_table, pos)
-        )
-        self.valid_table.selectionModel().selectionChanged.connect(
-            lambda sel, des, t=self.valid_table: self.on_table_selection_changed(t)
-        )
+        self.valid_table = self.create_dataframe_table()
         self.tabs.addTab(self.valid_table, "Validation")
 
-        # Summary tables by jurisdiction
-        self.jurisdiction_table = QTableWidget()
-        self.jurisdiction_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.jurisdiction_table.customContextMenuRequested.connect(
-            lambda pos: self.create_context_menu(self.jurisdiction_table, pos)
-        )
-        self.jurisdiction_table.selectionModel().selectionChanged.connect(
-            lambda sel, des, t=self.jurisdiction_table: self.on_table_selection_changed(t)
-        )
+        # Summary tables by jurisdiction, TAZ and subarea
+        self.jurisdiction_table = self.create_dataframe_table()
         self.tabs.addTab(self.jurisdiction_table, "Jurisdiction")
-
-        # Summary tables by TAZ
-        self.taz_table = QTableWidget()
-        self.taz_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.taz_table.customContextMenuRequested.connect(
-            lambda pos: self.create_context_menu(self.taz_table, pos)
-        )
-        self.taz_table.selectionModel().selectionChanged.connect(
-            lambda sel, des, t=self.taz_table: self.on_table_selection_changed(t)
-        )
+        self.taz_table = self.create_dataframe_table()
         self.tabs.addTab(self.taz_table, "TAZ")
-
-        # Summary tables by Subarea
-        self.subarea_table = QTableWidget()
-        self.subarea_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu) 
-        self.subarea_table.customContextMenuRequested.connect(
-            lambda pos: self.create_context_menu(self.subarea_table, pos)
-        )
-        self.subarea_table.selectionModel().selectionChanged.connect(
-            lambda sel, des, t=self.subarea_table: self.on_table_selection_changed(t)
-        )
+        self.subarea_table = self.create_dataframe_table()
         self.tabs.addTab(self.subarea_table, "Subarea")
 
         self.main_layout.addWidget(QLabel("Aggregated Summary"))
@@ -270,61 +227,111 @@ class ParcelProcessor(QDialog, Shared_GUI_Widgets):
             path = entry['path'].strip()
             self.logger.info(f"  {name}: {path if path else '(not selected)'}")
          
-        dfs = []
-        summary_rows = []
-
         subarea_df = self.project_settings['subarea_df']
         # subarea_df = pd.read_csv(r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv")
-        
+
+        # jurisdiction code and subarea of every BKRCastTAZ; a parcel gets those of its TAZ_P. codes are those of subarea_df['Jurisdiction'].
+        subarea_masks = JurisdictionMasks(subarea_df['Jurisdiction'])
+        taz_ids = subarea_df['BKRCastTAZ'].to_numpy(dtype = np.int64)
+        juris_code_by_taz = np.full(taz_ids.max() + 1, -1, dtype = np.int64)
+        juris_code_by_taz[taz_ids] = subarea_masks.codes
+        subarea_by_taz = np.full(taz_ids.max() + 1, np.nan)
+        subarea_by_taz[taz_ids] = subarea_df['Subarea'].to_numpy(dtype = float)
+
+        # sources sharing the same file are read only once, keeping the union of their parcels
+        reads = {}
         for name, entry in self.file_inputs.items():
             path = entry['path'].strip()
             if not path:
                 continue
+            codes = [subarea_masks.code(j) for j in FILTER_RULES[name]]
+            reads.setdefault((path, entry['sep']), []).append((name, codes))
 
-            df = pd.read_csv(path, low_memory=False, sep = entry['sep'])
-            df = df.merge(subarea_df[["BKRCastTAZ", "Jurisdiction", "Subarea", "SubareaName"]], left_on="TAZ_P", right_on = "BKRCastTAZ", how="left")
-            filtered = FILTER_RULES[name](df)
-            # filtered["SOURCE"] = name
-            self.logger.info(f"{name}: {len(filtered)} records selected")
-            dfs.append(filtered)
-            summary_rows.append((name, os.path.basename(path), len(filtered)))
-
-        if not dfs:
+        if not reads:
             raise Exception("No input files selected")
 
+        def read_source(path, sep, sources):
+            all_codes = [c for _, codes in sources for c in codes]
+            return self._read_selected_parcels(path, sep, juris_code_by_taz, all_codes)
+
+        with ThreadPoolExecutor(max_workers = min(len(reads), os.cpu_count() or 1)) as pool:
+            futures = {key: pool.submit(read_source, key[0], key[1], sources) for key, sources in reads.items()}
+            source_dfs = {key: future.result() for key, future in futures.items()}
+
+        dfs = []
+        row_codes = []
+        summary_rows = []
+        for (path, sep), sources in reads.items():
+            df, codes_in_df = source_dfs[(path, sep)]
+            for name, codes in sources:
+                selected = np.isin(codes_in_df, codes)
+                filtered = df.loc[selected]
+                self.logger.info(f"{name}: {len(filtered)} records selected")
+                dfs.append(filtered)
+                row_codes.append(codes_in_df[selected])
+                summary_rows.append((name, os.path.basename(path), len(filtered)))
+
         result = pd.concat(dfs, ignore_index=True)
+        jurisdiction = pd.Series(pd.Categorical.from_codes(np.concatenate(row_codes), subarea_masks.categories), name = 'Jurisdiction')
+        subarea = pd.Series(self._gather_by_taz(subarea_by_taz, result['TAZ_P'], np.nan), name = 'Subarea')
 
-        self.summarize_parcel_data(result, subarea_df=subarea_df, output_dir=self.output_dir.strip())
+        summary_dict = self.summarize_parcel_data(result, jurisdiction, subarea, subarea_df=subarea_df, output_dir=self.output_dir.strip())
 
-        result = result.drop(columns=["BKRCastTAZ", "Jurisdiction", "Subarea", "SubareaName"], errors='ignore')
         result = result.sort_values(by="PARCELID", ascending=True)
         output_filename = os.path.join(self.output_dir, f"{self.horizon_year}_{self.scenario_name}_assembled_parcel_urbansim.txt")
 
-        if output_filename:
-            result.to_csv(output_filename, index=False, sep =" ")
-            self.logger.info(f"Assembled file saved to: {output_filename}")
-            
-            # Update UI from worker thread safely
-            self.status_sections[0].setText("Done")
-            self.status_sections[1].setText(f"Parcels: {len(result)} Cols: {len(result.columns)}")
-            self.status_sections[2].setText(f"Sources: {len(summary_rows)}")
-            self.status_sections[3].setText(f"Output: {os.path.basename(output_filename)}")
-            
-            # Update summary table
-            self.summary_table.setRowCount(len(summary_rows))
-            for row, (jur, src, cnt) in enumerate(summary_rows):
-                self.summary_table.setItem(row, 0, QTableWidgetItem(jur))
-                self.summary_table.setItem(row, 1, QTableWidgetItem(str(cnt)))
-
-        self.populate_raw_table(result)
-        self.validation_checks(result)
-
-    def summarize_parcel_data(self, df, subarea_df=None, output_dir=None):
-        
+        result.to_csv(output_filename, index=False, sep =" ")
+        self.logger.info(f"Assembled file saved to: {output_filename}")
+
+        # tables are updated in _on_assembly_finished, on the GUI thread
+        return {
+            "summary_rows": summary_rows,
+            "summary_dict": summary_dict,
+            "validation": self.validation_checks(result),
+            "raw": result.head(100),
+            "shape": result.shape,
+            "output_filename": output_filename
+        }
+
+    @staticmethod
+    def _gather_by_taz(values_by_taz, taz, fill_value):
+        '''
+        look up a TAZ-indexed array for every row. TAZs that are missing or out of range get fill_value.
+        '''
+        taz = pd.to_numeric(taz, errors='coerce').to_numpy(dtype = float)
+        valid = (taz >= 0) & (taz < len(values_by_taz))
+        positions = np.where(valid, taz, 0).astype(np.int64)
+        return np.where(valid, values_by_taz[positions], fill_value)
+
+    def _read_selected_parcels(self, path, sep, juris_code_by_taz, codes):
+        '''
+        read a parcel file in chunks and keep only rows whose TAZ_P is in one of the jurisdictions in codes.
+
+        :return: the selected rows and the jurisdiction code of each row
+        '''
+        parts = []
+        part_codes = []
+        for chunk in pd.read_csv(path, sep = sep, chunksize = PARCEL_READ_CHUNK_SIZE, low_memory = False):
+            chunk_codes = self._gather_by_taz(juris_code_by_taz, chunk['TAZ_P'], -1).astype(np.int64)
+            selected = np.isin(chunk_codes, codes)
+            parts.append(chunk.loc[selected])
+            part_codes.append(chunk_codes[selected])
+        return pd.concat(parts, ignore_index=True), np.concatenate(part_codes)
+
+    def summarize_parcel_data(self, df, jurisdiction, subarea, subarea_df=None, output_dir=None):
+        '''
+        summarize the assembled parcels by jurisdiction, TAZ and subarea.
+
+        :param df: assembled parcel data
+        :param jurisdiction: categorical series of jurisdictions, aligned with df
+        :param subarea: series of subarea ids, aligned with df
+        :return: a dict of summary by jurisdiction, TAZ, and subarea
+        '''
         cols = ['EMPEDU_P', 'EMPFOO_P', 'EMPGOV_P', 'EMPIND_P', 'EMPMED_P', 'EMPOFC_P', 'EMPOTH_P', 'EMPRET_P', 'EMPSVC_P', 'EMPTOT_P', 'STUGRD_P', 'STUHGH_P', 'STUUNI_P', 'HH_P']
-        summary_jurisdictions = df.groupby('Jurisdiction')[cols].sum().reset_index()
+        summary_jurisdictions = df[cols].groupby(jurisdiction, observed = True).sum().reset_index()
         summary_taz = df.groupby('TAZ_P')[cols].sum().reset_index()
-        summary_subarea = df.groupby('Subarea')[cols].sum().reset_index()
+        summary_subarea = df[cols].groupby(subarea).sum().reset_index()
+        summary_subarea['Subarea'] = summary_subarea['Subarea'].astype(subarea_df['Subarea'].dtype)
         summary_subarea = summary_subarea.merge(subarea_df[['Subarea', 'SubareaName']].drop_duplicates(), on='Subarea', how='left')
 
         if output_dir is None:
@@ -333,70 +340,40 @@ class ParcelProcessor(QDialog, Shared_GUI_Widgets):
         summary_taz.to_csv(os.path.join(output_dir, 'parcel_summary_by_taz.csv'), index=False)
         summary_subarea.to_csv(os.path.join(output_dir, 'parcel_summary_by_subarea.csv'), index=False)
 
-        self.add_dataframe_to_table(summary_jurisdictions, self.jurisdiction_table)
-        self.add_dataframe_to_table(summary_taz, self.taz_table)
-        self.add_dataframe_to_table(summary_subarea, self.subarea_table)
+        summary_dict = {
+            "Jurisdiction": summary_jurisdictions,
+            "Subarea": summary_subarea,
+            "TAZ": summary_taz
+        }
+        return summary_dict
 
-        
     def add_dataframe_to_table(self, df, table):
-        table.setRowCount(len(df))
-        table.setColumnCount(len(df.columns))
-        table.setHorizontalHeaderLabels(df.columns.tolist())
-
-        for row in range(len(df)):
-            for col in range(len(df.columns)):
-                val = df.iat[row, col]
-                item = NumericTableWidgetItem(str(val))
-                table.setItem(row, col, item)
-        table.setSortingEnabled(True)
-
-    def validation_checks(self, df):
-        self.valid_table.setSortingEnabled(False)
-        header = ["Column", "Data Type", "Unique Values", "Missing Values", "Duplicates", "Min", "Max", "Mean"]
-        self.valid_table.clear()
-        self.valid_table.setRowCount(len(df.columns))
-        self.valid_table.setColumnCount(len(header))
-        self.valid_table.setHorizontalHeaderLabels(header)
-
-        for row, col in enumerate(df.columns):
-            series = df[col]
-            dtype = str(series.dtype)
-            unique_vals = series.nunique()
-            missing_vals = series.isna().sum()
-            duplicate_vals = len(series) - unique_vals - missing_vals  # Total rows - unique values - missing values
-            min_val = series.min() if pd.api.types.is_numeric_dtype(series) else ""
-            max_val = series.max() if pd.api.types.is_numeric_dtype(series) else ""
-            mean_val = series.mean() if pd.api.types.is_numeric_dtype(series) else ""
-
-            self.valid_table.setItem(row, 0, QTableWidgetItem(col))
-            self.valid_table.setItem(row, 1, QTableWidgetItem(dtype))
-            self.valid_table.setItem(row, 2, NumericTableWidgetItem(str(unique_vals)))
-            self.valid_table.setItem(row, 3, NumericTableWidgetItem(str(missing_vals)))
-            self.valid_table.setItem(row, 4, NumericTableWidgetItem(str(duplicate_vals)))
-            self.valid_table.setItem(row, 5, NumericTableWidgetItem(str(min_val)))
-            self.valid_table.setItem(row, 6, NumericTableWidgetItem(str(max_val)))
-            self.valid_table.setItem(row, 7, NumericTableWidgetItem(str(mean_val)))
-
-        self.valid_table.setSortingEnabled(True)
+        table.model().set_dataframe(df)
+
+    def validation_checks(self, df) -> pd.DataFrame:
+        return dataframe_statistics(df)
 
     def populate_raw_table(self, df=None):
         """Populate the first 100 rows of the raw data table with the given DataFrame."""
         if df is None:
             return
-        
-        self.raw_table.clear()
-        self.raw_table.setRowCount(min(100, df.shape[0]))
-        self.raw_table.setColumnCount(len(df.columns))
-        self.raw_table.setHorizontalHeaderLabels(df.columns.tolist())
-
-        for row in range(min(100, df.shape[0])):
-            for col in range(len(df.columns)):
-                val = df.iat[row, col]
-                item = NumericTableWidgetItem(str(val))
-                self.raw_table.setItem(row, col, item)
-
-    def _on_assembly_finished(self):
+        self.add_dataframe_to_table(df.head(100), self.raw_table)
+
+    def _on_assembly_finished(self, ret):
         """Called when assembly thread finishes."""
+        rows, cols = ret['shape']
+        self.status_sections[0].setText("Done")
+        self.status_sections[1].setText(f"Parcels: {rows} Cols: {cols}")
+        self.status_sections[2].setText(f"Sources: {len(ret['summary_rows'])}")
+        self.status_sections[3].setText(f"Output: {os.path.basename(ret['output_filename'])}")
+
+        summary_df = pd.DataFrame([(name, count) for name, _, count in ret['summary_rows']], columns = ["Jurisdiction", "Parcel Count"])
+        self.add_dataframe_to_table(summary_df, self.summary_table)
+        self.add_dataframe_to_table(ret['summary_dict']['Jurisdiction'], self.jurisdiction_table)
+        self.add_dataframe_to_table(ret['summary_dict']['TAZ'], self.taz_table)
+        self.add_dataframe_to_table(ret['summary_dict']['Subarea'], self.subarea_table)
+        self.add_dataframe_to_table(ret['validation'], self.valid_table)
+        self.populate_raw_table(ret['raw'])
         self.enableAllButtons()
 
     def _on_assembly_error(self, error_obj):
@@ -0,0 +1,41 @@
+'''
+Time how long the land use processor takes from a cold Python process to a shown main window, and fail if the median
+of several runs is over a target. Every run is a new process with an offscreen Qt platform, so it can run without a
+display (e.g. on a build machine).
+
+    python startup_benchmark.py [runs] [target seconds]
+'''
+import os
+import sys
+import subprocess
+import statistics
+
+RUNS = 5
+TARGET_SECONDS = 2.0
+
+# run in the child process: import, build and show the main window, and report the elapsed time
+CHILD = '''
+import time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+import land_use_data_processor
+app = QApplication([])
+window = land_use_data_processor.LandUseDataUserInterface()
+window.show()
+app.processEvents()
+print(time.perf_counter() - start)
+'''
+
+def time_startup() -> float:
+    env = dict(os.environ, QT_QPA_PLATFORM = 'offscreen')
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd = os.path.dirname(os.path.abspath(__file__)), env = env,
+                            capture_output = True, text = True, check = True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_SECONDS
+    times = [time_startup() for _ in range(runs)]
+    median = statistics.median(times)
+    print(f'startup: median {median:.2f}s, min {min(times):.2f}s, max {max(times):.2f}s over {runs} runs (target {target:.2f}s)')
+    sys.exit(0 if median <= target else 1)
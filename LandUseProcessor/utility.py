@@ -1,12 +1,34 @@
-import h5py
 import sys, os
+import hashlib
+import importlib.util
 import numpy as np
 import pandas as pd
 from enum import Enum
-import logging
+import logging, warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import common_utility
+from common_utility import (SYNC_CHUNK_SIZE, _sum_households, interpolate_columns, round_columns,
+        id_positions, Jurisdiction_Names, canonical_jurisdiction)
+
+def _lazy_import(name):
+    '''
+    a module that is only loaded on first attribute access (importlib.util.LazyLoader), so importing this module
+    does not pay for dependencies that only some functions use.
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+h5py = _lazy_import('h5py')
 
 #2/3/2022
 # upgrade to python 3.7
@@ -40,8 +62,12 @@ class SynPop_Data_Scale_Method(Enum):
 
 def h5_to_df(h5_file, group_name):
     """
-    Converts the arrays in a H5 store to a Pandas DataFrame. 
+    Converts the arrays in a H5 store to a Pandas DataFrame. A delta h5 (see H5Delta) is rebuilt from its base h5.
     """
+    if is_h5_delta(h5_file):
+        with h5py.File(_delta_base_file(h5_file), 'r') as base_file:
+            return _delta_frame(h5_file, base_file, group_name)
+
     col_dict = {}
     h5_set = h5_file[group_name]
     for col in h5_set.keys():
@@ -50,6 +76,17 @@ def h5_to_df(h5_file, group_name):
     df = pd.DataFrame(col_dict)
     return df
 
+def _h5_dtype(col, data):
+    if np.issubdtype(data.dtype, np.integer):
+        if col == 'block_group_id':
+            # int64 cannot be read into daysim appropriately through hdf5dotnet interface,because the read function will read it as int32 which will
+            # generate a memory access error. But it is fine to keep it in int64 in h5.
+            return 'int64'
+        return 'int32' # must use int32 in h5 to ensure it can be read into daysim appropriately through hdf5dotnet interface, because the read function will read it as int32 which will generate a memory access error if it is int64. But it is fine to keep it in int64 in h5.
+    if np.issubdtype(data.dtype, np.floating):
+        return 'float32'
+    return None # let h5py decide
+
 def df_to_h5(df, h5_store, group_name):
     """
     Stores DataFrame series as indivdual to arrays in an h5 container. 
@@ -62,19 +99,324 @@ def df_to_h5(df, h5_store, group_name):
 
     for col in df.columns:
         data = df[col].to_numpy()
-        if np.issubdtype(data.dtype, np.integer):
-            if col == 'block_group_id':
-                # int64 cannot be read into daysim appropriately through hdf5dotnet interface,because the read function will read it as int32 which will
-                # generate a memory access error. But it is fine to keep it in int64 in h5.
-                dtype = 'int64'
-            else:
-                dtype = 'int32' # must use int32 in h5 to ensure it can be read into daysim appropriately through hdf5dotnet interface, because the read function will read it as int32 which will generate a memory access error if it is int64. But it is fine to keep it in int64 in h5.
-        elif np.issubdtype(data.dtype, np.floating):
-            dtype = 'float32'
-        else:
-            dtype = None # let h5py decide
+        my_group.create_dataset(col, data=data, dtype=_h5_dtype(col, data), compression = 'gzip')
+
+# A delta h5 stores a variant of a base h5 (e.g. a WFH scenario of a synthetic population) as the path of the base file plus,
+# for each group, the columns that differ from the base:
+#   /<group>/<column>/rows    positions of the changed rows (absent when the whole column is stored)
+#   /<group>/<column>/values  new values of those rows, in the dtype df_to_h5 would write
+# group attributes: rows (rows of the variant), base_rows (rows of the base group, to detect a changed base),
+# replaced (the group does not patch the base but replaces it, e.g. when rows are added), dropped (base columns removed)
+H5_DELTA_FORMAT = 'h5-delta-1'
+H5_DELTA_FULL_COLUMN_SHARE = 0.5 # a column that changes on more than this share of rows is stored whole
+
+def is_h5_delta(h5_file) -> bool:
+    return h5_file.attrs.get('delta_format') == H5_DELTA_FORMAT
+
+def _delta_base_file(delta_file, base_file = None):
+    return base_file or delta_file.attrs['base_file']
+
+def _group_rows(h5_set) -> int:
+    return h5_set[next(iter(h5_set.keys()))].shape[0] if len(h5_set) > 0 else 0
+
+def _write_delta_column(group, col, rows, values):
+    column = group.create_group(col)
+    column.create_dataset('values', data = values, dtype = _h5_dtype(col, values), compression = 'gzip')
+    if rows is not None:
+        column.create_dataset('rows', data = np.asarray(rows, dtype = np.int64), compression = 'gzip')
+
+def _start_delta(delta_file, base_file, attrs):
+    delta_file.attrs['delta_format'] = H5_DELTA_FORMAT
+    delta_file.attrs['base_file'] = os.path.abspath(base_file)
+    for key, value in (attrs or {}).items():
+        delta_file.attrs[key] = value
+
+def _check_full_base(base, base_file):
+    if is_h5_delta(base):
+        raise ValueError(f'{base_file} is a delta h5 and cannot be the base of another delta. Use its base file, or write it in full with H5Delta.materialize first.')
+
+def _changed_rows(base_values, values) -> np.ndarray:
+    if base_values.dtype.kind == 'f' or values.dtype.kind == 'f':
+        with np.errstate(invalid = 'ignore'):
+            same = (base_values == values) | (np.isnan(base_values.astype(float)) & np.isnan(values.astype(float)))
+    else:
+        same = base_values == values
+    return np.flatnonzero(~same)
+
+def save_h5_delta(frames: dict, base_file, delta_file, attrs = None):
+    """
+    Saves dataframes as a delta h5 on base_file: only the cells that differ from the base are stored.
+
+    :param frames: dict of group name -> dataframe of the variant. A group whose number of rows differs from the base,
+        or that is not in the base, is stored whole.
+    :param base_file: h5 the variant is compared with, a full h5 rather than a delta. It must stay in place for the
+        delta to be read.
+    :param delta_file: the delta h5 to create
+    :param attrs: extra attributes saved on the delta file, e.g. how the variant was made
+    """
+    with h5py.File(base_file, 'r') as base:
+        _check_full_base(base, base_file)
+    with h5py.File(base_file, 'r') as base, h5py.File(delta_file, 'w') as delta:
+        _start_delta(delta, base_file, attrs)
+        for group_name, df in frames.items():
+            group = delta.create_group(group_name)
+            group.attrs['rows'] = len(df)
+            if group_name not in base or _group_rows(base[group_name]) != len(df):
+                group.attrs['replaced'] = True
+                for col in df.columns:
+                    _write_delta_column(group, col, None, df[col].to_numpy())
+                continue
+
+            base_set = base[group_name]
+            group.attrs['base_rows'] = len(df)
+            group.attrs['dropped'] = np.array([col for col in base_set.keys() if col not in df.columns], dtype = h5py.string_dtype())
+            for col in df.columns:
+                values = df[col].to_numpy()
+                dtype = _h5_dtype(col, values)
+                values = values.astype(dtype) if dtype is not None else values
+                if col not in base_set:
+                    _write_delta_column(group, col, None, values)
+                    continue
+                rows = _changed_rows(np.asarray(base_set[col]), values)
+                if len(rows) > H5_DELTA_FULL_COLUMN_SHARE * len(df):
+                    _write_delta_column(group, col, None, values)
+                elif len(rows) > 0:
+                    _write_delta_column(group, col, rows, values[rows])
+
+def write_h5_delta(delta_file, base_file, patches: dict, attrs = None):
+    """
+    Writes a delta h5 from patches that are already known, without comparing with the base.
+
+    :param delta_file: the delta h5 to create
+    :param base_file: the h5 the patches apply to, a full h5 rather than a delta
+    :param patches: dict of group name -> dict of column -> (rows, values). rows None gives the whole column.
+    :param attrs: extra attributes saved on the delta file
+    """
+    with h5py.File(base_file, 'r') as base:
+        _check_full_base(base, base_file)
+    with h5py.File(base_file, 'r') as base, h5py.File(delta_file, 'w') as delta:
+        _start_delta(delta, base_file, attrs)
+        for group_name, columns in patches.items():
+            base_rows = _group_rows(base[group_name])
+            group = delta.create_group(group_name)
+            group.attrs['rows'] = base_rows
+            group.attrs['base_rows'] = base_rows
+            group.attrs['dropped'] = np.array([], dtype = h5py.string_dtype())
+            for col, (rows, values) in columns.items():
+                values = np.asarray(values)
+                if rows is None and len(values) != base_rows:
+                    raise ValueError(f'{group_name}/{col} has {len(values)} values, but {base_file} has {base_rows} rows.')
+                _write_delta_column(group, col, rows, values)
+
+def _delta_columns(delta, base, group_name) -> list:
+    if group_name not in delta:
+        return list(base[group_name].keys())
+    group = delta[group_name]
+    if group.attrs.get('replaced', False):
+        return list(group.keys())
+    dropped = set(group.attrs.get('dropped', []))
+    columns = [col for col in base[group_name].keys() if col not in dropped]
+    return columns + [col for col in group.keys() if col not in columns]
+
+def _delta_column(delta, base, group_name, col) -> np.ndarray:
+    patch = delta[group_name][col] if group_name in delta and col in delta[group_name] else None
+    if patch is None:
+        return np.asarray(base[group_name][col])
+    if 'rows' not in patch:
+        return np.asarray(patch['values'])
+    values = np.asarray(base[group_name][col])
+    values[np.asarray(patch['rows'])] = np.asarray(patch['values'])
+    return values
+
+def _check_delta_base(delta, base, group_name):
+    if group_name not in delta or delta[group_name].attrs.get('replaced', False):
+        return
+    base_rows = int(delta[group_name].attrs['base_rows'])
+    if _group_rows(base[group_name]) != base_rows:
+        raise ValueError(f'{group_name} of {base.filename} has {_group_rows(base[group_name])} rows, but the delta {delta.filename} was made from {base_rows} rows.')
+
+def _delta_frame(delta, base, group_name, columns = None) -> pd.DataFrame:
+    _check_delta_base(delta, base, group_name)
+    columns = _delta_columns(delta, base, group_name) if columns is None else columns
+    return pd.DataFrame({col: _delta_column(delta, base, group_name, col) for col in columns})
+
+class H5Delta:
+    """
+    Lazy read access to a delta h5 written by save_h5_delta or write_h5_delta. Nothing is read when it is created;
+    a column is rebuilt from the base h5 and its patch only when it is asked for.
+    """
+    def __init__(self, delta_file, base_file = None):
+        self.delta_file = delta_file
+        with h5py.File(delta_file, 'r') as delta:
+            if not is_h5_delta(delta):
+                raise ValueError(f'{delta_file} is not a delta h5.')
+            self.base_file = _delta_base_file(delta, base_file)
+            self.attrs = dict(delta.attrs)
+
+    def groups(self) -> list:
+        with h5py.File(self.delta_file, 'r') as delta, h5py.File(self.base_file, 'r') as base:
+            return list(base.keys()) + [name for name in delta.keys() if name not in base]
+
+    def columns(self, group_name) -> list:
+        with h5py.File(self.delta_file, 'r') as delta, h5py.File(self.base_file, 'r') as base:
+            return _delta_columns(delta, base, group_name)
+
+    def column(self, group_name, col) -> np.ndarray:
+        with h5py.File(self.delta_file, 'r') as delta, h5py.File(self.base_file, 'r') as base:
+            _check_delta_base(delta, base, group_name)
+            return _delta_column(delta, base, group_name, col)
+
+    def dataframe(self, group_name, columns = None) -> pd.DataFrame:
+        with h5py.File(self.delta_file, 'r') as delta, h5py.File(self.base_file, 'r') as base:
+            return _delta_frame(delta, base, group_name, columns)
+
+    def materialize(self, output_h5_file):
+        """
+        Writes the complete h5 of the variant: a copy of the base with the patches applied, readable by DaySim.
+        Patched datasets keep the dtype of the base.
+        """
+        import shutil
+        shutil.copyfile(self.base_file, output_h5_file)
+        with h5py.File(self.delta_file, 'r') as delta, h5py.File(output_h5_file, 'r+') as output:
+            for group_name, group in delta.items():
+                if group.attrs.get('replaced', False) or group_name not in output:
+                    if group_name in output:
+                        del output[group_name]
+                    out_set = output.create_group(group_name)
+                    for col, patch in group.items():
+                        out_set.create_dataset(col, data = np.asarray(patch['values']), compression = 'gzip')
+                    continue
+
+                out_set = output[group_name]
+                if _group_rows(out_set) != int(group.attrs['base_rows']):
+                    raise ValueError(f'{group_name} of {self.base_file} has {_group_rows(out_set)} rows, but the delta {self.delta_file} was made from {int(group.attrs["base_rows"])} rows.')
+                for col in group.attrs.get('dropped', []):
+                    del out_set[col]
+                for col, patch in group.items():
+                    if 'rows' in patch:
+                        values = np.asarray(out_set[col])
+                        values[np.asarray(patch['rows'])] = np.asarray(patch['values'])
+                        out_set[col][...] = values
+                    else:
+                        if col in out_set:
+                            del out_set[col]
+                        out_set.create_dataset(col, data = np.asarray(patch['values']), compression = 'gzip')
+
+def sum_households_by_parcel(h5_file_name, parcel_ids, chunk_size = SYNC_CHUNK_SIZE):
+    '''
+    common_utility.sum_households_by_parcel, which also reads a delta h5 (see H5Delta) through its base, a whole
+    column at a time.
+    '''
+    with h5py.File(h5_file_name, 'r') as h5_file:
+        if is_h5_delta(h5_file):
+            with h5py.File(_delta_base_file(h5_file), 'r') as base_file:
+                _check_delta_base(h5_file, base_file, 'Household')
+                chunks = [(_delta_column(h5_file, base_file, 'Household', 'hhparcel'),
+                           _delta_column(h5_file, base_file, 'Household', 'hhexpfac'))]
+                return _sum_households(chunks, parcel_ids)
+    return common_utility.sum_households_by_parcel(h5_file_name, parcel_ids, chunk_size)
+
+def to_categorical(series: pd.Series, mapper = None) -> pd.Series:
+    '''
+    convert a series to a pandas Categorical. The mapper is applied to the distinct values only, not to every row.
+
+    :param series: a pandas series, categorical or not
+    :param mapper: optional function applied to each distinct value. values mapped to the same label share one category.
+    :return: a categorical series with the same index and name
+    '''
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+
+    if len(uniques) == 0:
+        return series.astype('category')
+
+    labels = [mapper(value) for value in uniques] if mapper is not None else list(uniques)
+    categories = pd.Index(labels).unique()
+    remap = categories.get_indexer(labels)
+    new_codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories), index = series.index, name = series.name)
+
+def normalize_geography(df: pd.DataFrame) -> pd.DataFrame:
+    '''
+    normalize Jurisdiction, Subarea and SubareaName in place, so later filters compare category codes rather than strings.
+    Jurisdiction is mapped to the canonical names in Jurisdiction_Names. Subarea is kept as is if it is already an integer code.
+
+    :param df: lookup, subarea or any other dataframe with geography columns
+    :return: the same dataframe
+    '''
+    if 'Jurisdiction' in df.columns:
+        df['Jurisdiction'] = to_categorical(df['Jurisdiction'], canonical_jurisdiction)
+    if 'SubareaName' in df.columns:
+        df['SubareaName'] = to_categorical(df['SubareaName'], lambda x: x.strip() if isinstance(x, str) else x)
+    if ('Subarea' in df.columns) and (not pd.api.types.is_numeric_dtype(df['Subarea'])):
+        df['Subarea'] = to_categorical(df['Subarea'])
+    return df
 
-        my_group.create_dataset(col, data=data, dtype=dtype, compression = 'gzip')
+TABLE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.bkrcast_cache')
+
+def read_geography_table(file_name, cache_dir = TABLE_CACHE_DIR) -> pd.DataFrame:
+    '''
+    read a lookup or subarea csv file with normalize_geography applied. The normalized frame is pickled to cache_dir,
+    keyed by the path, size and modification time of the file, and read from there while the file is unchanged,
+    so a table on a network drive is parsed once. None cache_dir always reads the csv file.
+    '''
+    if cache_dir is None:
+        return normalize_geography(pd.read_csv(file_name, low_memory = False))
+
+    stat = os.stat(file_name)
+    key = (os.path.abspath(file_name), stat.st_size, stat.st_mtime)
+    cache_file = os.path.join(cache_dir, hashlib.sha1(key[0].encode()).hexdigest() + '.pkl')
+    if os.path.exists(cache_file):
+        try:
+            cached = pd.read_pickle(cache_file)
+            if cached['key'] == key:
+                return cached['df']
+        except Exception:
+            pass # unreadable cache, e.g. written by another pandas version: read the csv file
+
+    df = normalize_geography(pd.read_csv(file_name, low_memory = False))
+    try:
+        os.makedirs(cache_dir, exist_ok = True)
+        pd.to_pickle({'key': key, 'df': df}, cache_file + '.tmp')
+        os.replace(cache_file + '.tmp', cache_file)
+    except OSError:
+        pass # the cache is only an optimization
+    return df
+
+class JurisdictionMasks:
+    '''
+    boolean masks by jurisdiction, built from the category codes of a Jurisdiction column. Each mask is computed once
+    and reused, so every jurisdiction filter on the same rows is an integer comparison at most.
+    '''
+    def __init__(self, jurisdiction: pd.Series):
+        if not isinstance(jurisdiction.dtype, pd.CategoricalDtype):
+            jurisdiction = to_categorical(jurisdiction, canonical_jurisdiction)
+        self.categories = jurisdiction.cat.categories
+        self.codes = jurisdiction.cat.codes.to_numpy()
+        self._masks = {}
+
+    def code(self, jurisdiction) -> int:
+        '''category code of a jurisdiction, -1 if it is not in the data'''
+        return int(self.categories.get_indexer([canonical_jurisdiction(jurisdiction)])[0])
+
+    def mask(self, *jurisdictions) -> np.ndarray:
+        '''
+        a read-only boolean array, True for rows in any of the jurisdictions. Names in Jurisdiction_Names are matched
+        case-insensitively.
+        '''
+        key = tuple(sorted({canonical_jurisdiction(j) for j in jurisdictions}, key = str))
+        if key not in self._masks:
+            codes = [c for c in (self.code(j) for j in key) if c >= 0]
+            if len(codes) == 1:
+                mask = self.codes == codes[0]
+            else:
+                mask = np.isin(self.codes, codes)
+            mask.flags.writeable = False
+            self._masks[key] = mask
+        return self._masks[key]
 
 def backupScripts(source, dest):
     import os
@@ -202,40 +544,153 @@ def controlled_rounding(data_df, attr_name, control_total, index_attr_name):
     new_data_df = pd.concat([new_data_df, updated_data_df])
     
     return new_data_df
- 
-def validate_dataframe_file(dataframe: pd.DataFrame) -> dict:
-    import debugpy
-    debugpy.breakpoint()
-
-    validation_dict = {}  
-    output_list = []
-    header = ["Column", "Data Type", "Unique Values", "Missing Values", "Duplicated", "Min", "Max", "Mean"]
-
-    for col in dataframe.columns:
-        series = dataframe[col]
-        unique_non_null = series.nunique(dropna = True)
-        missing = series.isna().sum()
-        duplicates = len(series) - unique_non_null - missing
-        is_numeric = pd.api.types.is_numeric_dtype(series)
-        min = series.min() if is_numeric else ""
-        max = series.max() if is_numeric else ""
-        mean = series.mean() if is_numeric else ""
-
-        outputs = {
-            "Column": col,
-            "Data Type": str(series.dtype),
-            "Unique Values": unique_non_null,
-            "Missing Values": missing,
-            "Duplicated": duplicates,
-            "Min": min,
-            "Max": max,
-            "Mean": mean
-        }
-
-        output_list.append(outputs)
 
+Validation_Header = ["Column", "Data Type", "Unique Values", "Missing Values", "Duplicated", "Min", "Max", "Mean"]
+VALIDATION_COLUMN_GROUP_SIZE = 8 # columns handed to one validation thread at a time
+VALIDATION_SAMPLE_SIZE = 100000 # rows kept for min/max/mean in approximate mode
+HLL_PRECISION = 14 # 2**14 registers, about 0.8% standard error on distinct counts
+
+def hyperloglog_count(hashes: np.ndarray, precision = HLL_PRECISION) -> int:
+    '''
+    estimate the number of distinct values from their 64 bit hashes (HyperLogLog).
+
+    :param hashes: uint64 array, e.g. from pd.util.hash_array
+    :param precision: number of bits used to pick a register
+    :return: estimated distinct count
+    '''
+    m = 1 << precision
+    if len(hashes) == 0:
+        return 0
+    hashes = hashes.astype(np.uint64, copy = False)
+    register = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # the remaining bits are < 2**50, so float64 holds them exactly and frexp gives their bit length
+    rest = (hashes & np.uint64((1 << (64 - precision)) - 1)).astype(np.float64)
+    rank = ((64 - precision) + 1 - np.frexp(rest)[1]).astype(np.int64)
+    registers = np.zeros(m, dtype = np.int64)
+    np.maximum.at(registers, register, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.power(2.0, -registers))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros > 0:
+        estimate = m * np.log(m / zeros) # small range correction
+    return int(round(estimate))
+
+def _distinct_count(series: pd.Series, missing: int, approximate = False) -> int:
+    '''distinct count of non-null values, through a hash table (or HyperLogLog when approximate)'''
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # codes already are a dense id per distinct value
+        codes = series.cat.codes.to_numpy()
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0], minlength = 1)))
+    values = series.dropna().array if missing > 0 else series.array
+    if len(values) == 0:
+        return 0
+    if values.dtype.kind in 'iu':
+        # integers over a compact range are counted exactly with a bincount, no hashing needed
+        values = np.asarray(values)
+        lo, hi = values.min(), values.max()
+        if int(hi) - int(lo) <= 4 * len(values) + 1024:
+            return int(np.count_nonzero(np.bincount(values - lo)))
+    if approximate:
+        return hyperloglog_count(pd.util.hash_array(np.asarray(values), categorize = False))
+    return len(values.unique())
+
+def _column_group_statistics(frame: pd.DataFrame, approximate = False, sample_rows = None) -> list:
+    '''
+    statistics of columns sharing one dtype. min/max/mean of numeric columns are reduced over their 2-D numpy block.
+
+    :param frame: columns of a single dtype
+    :param approximate: use HyperLogLog distinct counts and the sampled rows for min/max/mean
+    :param sample_rows: sorted row positions of the sample, used only when approximate
+    :return: a list of rows in Validation_Header order
+    '''
+    dtype = frame.dtypes.iloc[0]
+    n_rows, n_cols = frame.shape
+    missing = frame.isna().to_numpy().sum(axis = 0)
+
+    mins = maxs = means = [""] * n_cols
+    if pd.api.types.is_numeric_dtype(dtype):
+        if isinstance(dtype, np.dtype) or pd.api.types.is_bool_dtype(dtype):
+            block = frame.to_numpy()
+        else:
+            block = frame.to_numpy(dtype = np.float64, na_value = np.nan) # nullable extension types
+        if approximate and sample_rows is not None:
+            block = block[sample_rows]
+
+        if block.shape[0] == 0:
+            mins = maxs = means = [np.nan] * n_cols
+        elif block.dtype.kind == 'f':
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category = RuntimeWarning) # all-NaN columns give NaN, like pandas
+                mins = np.nanmin(block, axis = 0)
+                maxs = np.nanmax(block, axis = 0)
+                means = np.nanmean(block, axis = 0)
+        else:
+            mins = block.min(axis = 0)
+            maxs = block.max(axis = 0)
+            means = block.mean(axis = 0)
+
+    rows = []
+    for i, col in enumerate(frame.columns):
+        missing_i = int(missing[i])
+        unique_non_null = _distinct_count(frame.iloc[:, i], missing_i, approximate)
+        rows.append([col, str(dtype), unique_non_null, missing_i, n_rows - unique_non_null - missing_i, mins[i], maxs[i], means[i]])
+    return rows
+
+def dataframe_statistics(dataframe: pd.DataFrame, approximate = False, sample_size = VALIDATION_SAMPLE_SIZE, max_workers = None, seed = 0) -> pd.DataFrame:
+    '''
+    per column data type, distinct/missing/duplicated counts, and min/max/mean of numeric columns.
+
+    Columns are grouped by dtype so each group is reduced as one numpy block, and the groups run in parallel threads.
+
+    :param dataframe: data to validate
+    :param approximate: estimate distinct counts with HyperLogLog and compute min/max/mean from a uniform sample of sample_size rows.
+        Missing counts are always exact.
+    :param sample_size: rows sampled in approximate mode
+    :param max_workers: threads used for the column groups. None uses the number of cpus.
+    :param seed: random seed of the row sample
+    :return: a dataframe with Validation_Header columns, one row per column of dataframe
+    '''
+    sample_rows = None
+    if approximate and dataframe.shape[0] > sample_size:
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(dataframe.shape[0], size = sample_size, replace = False))
+
+    # positions of columns by dtype, split into groups of at most VALIDATION_COLUMN_GROUP_SIZE columns
+    positions_by_dtype = {}
+    for pos, dtype in enumerate(dataframe.dtypes):
+        positions_by_dtype.setdefault(str(dtype), []).append(pos)
+    groups = [positions[i:i + VALIDATION_COLUMN_GROUP_SIZE] for positions in positions_by_dtype.values()
+              for i in range(0, len(positions), VALIDATION_COLUMN_GROUP_SIZE)]
+
+    def run(positions):
+        return positions, _column_group_statistics(dataframe.iloc[:, positions], approximate, sample_rows)
+
+    rows_by_position = {}
+    if len(groups) > 1:
+        with ThreadPoolExecutor(max_workers = max_workers or min(len(groups), os.cpu_count() or 1)) as pool:
+            results = list(pool.map(run, groups))
+    else:
+        results = [run(positions) for positions in groups]
+    for positions, rows in results:
+        rows_by_position.update(zip(positions, rows))
+
+    return pd.DataFrame([rows_by_position[pos] for pos in range(dataframe.shape[1])], columns = Validation_Header)
+
+def validate_dataframe_file(dataframe: pd.DataFrame, approximate = False, sample_size = VALIDATION_SAMPLE_SIZE, max_workers = None) -> dict:
+    '''
+    validation of a dataframe, for ValidationAndSummary.
+
+    :param approximate: see dataframe_statistics
+    :return: a dict
+        {
+        "Validation": per column statistics,
+        "Summary": rows and columns,
+        "Raw Data Samples": first 100 rows
+        }
+    '''
     # df: validation of data_df
-    df = pd.DataFrame(output_list, columns = header)
+    df = dataframe_statistics(dataframe, approximate = approximate, sample_size = sample_size, max_workers = max_workers)
 
     # df2: data_df shape
     df2 = pd.DataFrame([{"Rows": dataframe.shape[0], "Columns": dataframe.shape[1]}])
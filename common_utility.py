@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+## helpers used by both utility.py and LandUseProcessor/utility.py. The two modules have the same name and are imported
+## from different folders, so the code they share is kept here, under its own name, and imported by both.
+## h5py is imported by the functions that read h5 files, so importing this module stays cheap.
+
+SYNC_CHUNK_SIZE = 1000000 # households read at a time when summing households by parcel
+
+def _position_lookup(ids):
+    """
+    returns a function mapping ids to their position in ids (-1 if absent). Compact non-negative integer ids use a
+    dense array; other ids use a hash index.
+    """
+    ids = np.asarray(ids)
+    if np.issubdtype(ids.dtype, np.integer) and len(ids) > 0 and ids.min() >= 0 and ids.max() < 4 * len(ids) + 1000:
+        dense = np.full(int(ids.max()) + 1, -1, dtype = np.int64)
+        dense[ids[::-1]] = np.arange(len(ids) - 1, -1, -1) # first position wins for duplicated ids
+        def lookup(values):
+            values = np.asarray(values, dtype = np.int64)
+            inside = (values >= 0) & (values < len(dense))
+            return np.where(inside, dense[np.where(inside, values, 0)], -1)
+        return lookup
+    index = pd.Index(ids)
+    return index.get_indexer
+
+def _sum_households(chunks, parcel_ids):
+    lookup = _position_lookup(parcel_ids)
+    hhexpfac = np.zeros(len(parcel_ids))
+    households = np.zeros(len(parcel_ids), dtype = np.int64)
+    unmatched = []
+    for hhparcel, weights in chunks:
+        pos = lookup(hhparcel)
+        found = pos >= 0
+        hhexpfac += np.bincount(pos[found], weights = weights[found], minlength = len(parcel_ids))
+        households += np.bincount(pos[found], minlength = len(parcel_ids))
+        if not found.all():
+            unmatched.append(pd.DataFrame({'hhparcel': hhparcel[~found], 'hhexpfac': weights[~found], 'households': 1}))
+    if unmatched:
+        unmatched_df = pd.concat(unmatched, ignore_index = True).groupby('hhparcel', as_index = False).sum()
+    else:
+        unmatched_df = pd.DataFrame({'hhparcel': [], 'hhexpfac': [], 'households': []})
+    return hhexpfac, households, unmatched_df
+
+def sum_households_by_parcel(h5_file_name, parcel_ids, chunk_size = SYNC_CHUNK_SIZE):
+    """
+    Sums hhexpfac and households by parcel from the Household group of a synthetic population h5. Only hhparcel and
+    hhexpfac are read, chunk_size rows at a time, so memory does not grow with the population.
+
+    :param h5_file_name: synthetic population h5
+    :param parcel_ids: parcel ids, e.g. PARCELID of the parcel file
+    :return: (hhexpfac, households, unmatched)
+        hhexpfac: total hhexpfac by parcel, aligned with parcel_ids
+        households: number of households by parcel, aligned with parcel_ids
+        unmatched: hhparcel, hhexpfac and households of the parcels not in parcel_ids
+    """
+    import h5py
+    def chunks():
+        with h5py.File(h5_file_name, 'r') as h5_file:
+            hh_set = h5_file['Household']
+            for start in range(0, hh_set['hhparcel'].shape[0], chunk_size):
+                yield hh_set['hhparcel'][start:start + chunk_size], hh_set['hhexpfac'][start:start + chunk_size]
+    return _sum_households(chunks(), parcel_ids)
+
+def id_positions(ids, values, source = 'the file', name = 'PARCELID') -> np.ndarray:
+    """
+    position in ids of every value (-1 if absent), for aligning two files by id. ids must be unique, since a value
+    found in several rows has no single position.
+
+    :param source: the file ids come from, named in the error
+    :raises ValueError: ids are duplicated, with a few of the duplicated ids
+    """
+    index = pd.Index(ids)
+    if not index.is_unique:
+        duplicated = index[index.duplicated()].unique()
+        raise ValueError(f'{len(duplicated)} {name} values are duplicated in {source}, e.g. {list(duplicated[:5])}. '
+                         f'Remove or aggregate the duplicated rows first.')
+    return index.get_indexer(values)
+
+def _controlled_round(values, axis):
+    """
+    rounds values in place so that the sums along axis equal the rounded sums of the unrounded values. Every cell is
+    rounded down, then the cells with the largest remainders are rounded up until the sums are met.
+    """
+    floor = np.floor(values)
+    remainder = values - floor
+    deficit = np.rint(values.sum(axis = axis, keepdims = True)) - floor.sum(axis = axis, keepdims = True)
+    order = np.argsort(-remainder, axis = axis, kind = 'stable')
+    positions = np.expand_dims(np.arange(values.shape[axis]), 1 - axis)
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(positions, order.shape), axis)
+    np.add(floor, rank < deficit, out = values)
+
+def interpolate_columns(left, right, fraction, out = None, clip = False, rounding = 'round', total_axis = 1):
+    """
+    Linear interpolation of a 2-D block of columns (rows x columns) between two years, all columns in one pass.
+    Works for any column set: jobs, students, households, sqft.
+
+    :param left, right: 2-D arrays of the same shape with the values of the earlier and the later year
+    :param fraction: (horizon year - earlier year) / (later year - earlier year)
+    :param out: array receiving the result, e.g. a slice of a larger int block. None allocates one, int64 when
+        rounding and float64 otherwise.
+    :param clip: set negative results to 0
+    :param rounding: 'round' rounds every cell to the nearest integer. 'controlled' rounds so that the totals along
+        total_axis equal the rounded totals before rounding. None keeps the fractions.
+    :param total_axis: totals kept by controlled rounding, 1 for every row (parcel), 0 for every column
+    :return: out
+    """
+    values = np.subtract(right, left, dtype = float)
+    values *= fraction
+    values += left
+    return round_columns(values, out, clip, rounding, total_axis)
+
+def round_columns(values, out = None, clip = False, rounding = 'round', total_axis = 1):
+    """
+    Clips and rounds a 2-D float block in place, then copies it to out. See interpolate_columns for the parameters.
+    """
+    if clip:
+        np.maximum(values, 0, out = values)
+    if rounding == 'round':
+        np.rint(values, out = values)
+    elif rounding == 'controlled':
+        _controlled_round(values, total_axis)
+    elif rounding is not None:
+        raise ValueError(f"Unknown rounding {rounding}. Use 'round', 'controlled' or None.")
+
+    if out is None:
+        out = np.empty(values.shape, dtype = np.int64 if rounding is not None else float)
+    out[...] = values
+    return out
+
+# canonical jurisdiction names, keyed by the upper case spelling. The lookup, subarea and local jurisdiction files spell
+# jurisdictions inconsistently ('Redmond' vs 'REDMOND'), so they are normalized once at load.
+Jurisdiction_Names = {'BELLEVUE': 'BELLEVUE', 'KIRKLAND': 'KIRKLAND', 'REDMOND': 'REDMOND',
+    'BELLEVUEFRINGE': 'BellevueFringe', 'KIRKLANDFRINGE': 'KirklandFringe', 'REDMONDFRINGE': 'RedmondFringe',
+    'REST OF KC': 'Rest of KC', 'EXTERNAL': 'External'}
+
+def canonical_jurisdiction(name):
+    """
+    return the canonical spelling of a jurisdiction name, matched case-insensitively. Names that are not in
+    Jurisdiction_Names are returned unchanged.
+    """
+    if not isinstance(name, str):
+        return name
+    return Jurisdiction_Names.get(name.strip().upper(), name)
@@ -1,257 +1,408 @@
 import os
-import copy
-
+import json
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime
+from typing import Optional, Union
 
 """
 Land use configuration and the synthetic population configuration
-"""
-
-#####
-# Configuration for all
-#####
-
-modeller_initial = 'oa'
-timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-version = 'v2.1'
-step = 'B'  # step = 1, 2, 3, 4, 5, 'A', 'B', or 'C'. See main.py for more information
-
-# parcel vs TAZ lookup file
-lookup_file = r'I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\parcel_TAZ_2014_lookup.csv'
-# year range and target year
-base_year = 2014
-target_year = 2025
-future_year =2050
-
-#####
-# Land use configurations
-#####
-working_folder_lu = r'Z:\Modeling Group\BKRCast\LandUse\2025_baseyear'
-#=====
-# Step 1: Prepare land use data
-#=====
-
-## input paths for step 1
-kingcsqft = 'Base By PSRCID (12-31-2025).csv'  # from Bryce
-subarea_file = r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv"
-
-## output paths for step 1
-kc_job_file = f'{target_year}_COB_Jobs_new_method_{modeller_initial}_{version}.csv'
-kc_SQFT_file = f'{target_year}_COB_Sqft_{modeller_initial}_{version}.csv'
-error_parcel_file = f'parcels_not_in_2014_PSRC_parcels_{modeller_initial}_{version}.csv'
-kc_du_file = f'{target_year}_KC_housingunits_{modeller_initial}_{version}.csv'
-cob_du_file = f'{target_year}_COB_housingunits_{modeller_initial}_{version}.csv'
-
-## other configurations for step 1
-"""
-subset_area can only be these values: 
-'Rest of KC','External','BELLEVUE', 'KIRKLAND','REDMOND', 'BellevueFringe', 'KirklandFringe', 'RedmondFringe'
-if it is empty, means all parcels in kingcsqft file   
-"""
-subset_area = ['BELLEVUE', 'KIRKLAND','REDMOND', 'BellevueFringe', 'KirklandFringe', 'RedmondFringe'] 
-# subset_area = ['BELLEVUE']
-SQFT_data_available = True
-#subset_area = []
-job_rename_dict = {'JOBS_EDU':'EMPEDU_P', 'JOBS_FOOD':'EMPFOO_P', 'JOBS_GOV':'EMPGOV_P', 'JOBS_IND':'EMPIND_P',
-                   'JOBS_MED':'EMPMED_P', 'JOBS_OFF':'EMPOFC_P', 'JOBS_RET':'EMPRET_P', 'JOBS_RSV':'EMPRSC_P', 
-                   'JOBS_SERV':'EMPSVC_P', 'JOBS_OTH':'EMPOTH_P', 'JOBS_TOTAL':'EMPTOT_P'}
-
-sqft_rename_dict = {'SQFT_EDU':'SQFT_EDU', 'SQFT_FOOD':'SQFT_FOO', 'SQFT_GOV':'SQFT_GOV', 'SQFT_IND':'SQFT_IND',
-                    'SQFT_MED':'SQFT_MED', 'SQFT_OFF':'SQFT_OFC', 'SQFT_RET':'SQFT_RET', 'SQFT_RSV':'SQFT_RSV', 
-                    'SQFT_SERV':'SQFT_SVC', 'SQFT_OTH': 'SQFT_OTH', 'SQFT_NONE':'SQFT_NON', 'SQFT_TOTAL':'SQFT_TOT'}
-
-du_rename_dict = {'TOTAL_UNITS_SF':'SFUnits', 'TOTAL_UNITS_MF':'MFUnits'}
-
-jobs_columns_List = ['PSRC_ID', 'EMPEDU_P', 'EMPFOO_P', 'EMPGOV_P', 'EMPIND_P', 'EMPMED_P', 
-                     'EMPOFC_P', 'EMPRET_P', 'EMPRSC_P', 'EMPSVC_P', 'EMPOTH_P', 'EMPTOT_P']
-
-sqft_columns_list = ['PSRC_ID', 'SQFT_EDU', 'SQFT_FOO', 'SQFT_GOV', 'SQFT_IND', 'SQFT_MED', 
-                     'SQFT_OFC', 'SQFT_RET', 'SQFT_RSV', 'SQFT_SVC', 'SQFT_OTH', 'SQFT_TOT']
-
-dwellingunits_list = ['PSRC_ID', 'SFUnits', 'MFUnits']
-
-job_cat_list = ['EMPEDU_P', 'EMPFOO_P', 'EMPGOV_P', 'EMPIND_P', 'EMPMED_P', 'EMPOFC_P', 'EMPRET_P', 'EMPRSC_P', 'EMPSVC_P', 'EMPOTH_P']
-sqft_cat_list = ['SQFT_EDU', 'SQFT_FOO', 'SQFT_GOV', 'SQFT_IND', 'SQFT_MED', 'SQFT_OFC', 'SQFT_RET', 'SQFT_RSV', 'SQFT_SVC', 'SQFT_OTH']
-##
-
-#=====
-# Step 2: Validate input parcels
-#=====
-## input paths for step 2
-parcel_data_file_name = copy.copy(kc_job_file)  #r'2024_BKR_Jobs_new_method.csv'
-###
-
-## step 2 doesn't require output paths
-
-## other configurations for step 2
-year_parcel = 2014  # the year of the lookup parcel data (e.g., 2014): scroll up to find lookup_file
-"""
-# Use Jurisdiction to set which area to look into. 
-# Jurisdiction can be a list of the subset of ['Rest of KC', 'External', 'BELLEVUE', 'BellevueFringe', 'KIRKLAND', 'REDMOND', 'RedmondFridge', 'KirklandFringe']
-# Set Jurisdiction to None if you want to look into all parcels in the lookup_df.
-"""
-Jurisdiction = None
-##
-
-
-
-#####
-# Synthetic population configurations
-#####
-
-working_folder_synpop = r'I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\2025baseyear'
-#r'I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\2023baseyear_with_RedmondData'
-
-#=====
-# Step A: Interpolate household and person data from bookends
-#=====
-## input paths for step A
-base_year_synpop_file = r"I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\PSRC\2014_psrc_hh_and_persons.h5"
-future_year_synpop_file = r"I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\PSRC\2050_PSRC_hh_and_persons_bkr.h5"
-parcel_filename = copy.copy(lookup_file)
-ofm_estimate_template_file = r"I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\OFM_estimate_template.csv"
-
-## output paths for step A
-interploated_ofm_estimate_by_GEOID = os.path.join(working_folder_synpop, f"{target_year}_ofm_estimate_from_PSRC_2014_2050" + f'_{modeller_initial}_{version}' + ".csv")
-hhs_by_parcel_filename = os.path.join(working_folder_synpop, f"{target_year}_hhs_by_parcels_from_PSRC_2014_2050" + f'_{modeller_initial}_{version}' + ".csv")
-final_output_pop_file = os.path.join(working_folder_synpop, f"{target_year}_interpolated_synthetic_population_from_SC" + f'_{modeller_initial}_{version}' + ".h5")
-
-## step A doesn't require other configurations
 
-
-#=====
-# Step B: Distribute households to parcels
-#=====
-
-## inputs paths for step B
-hhs_by_parcel = copy.copy(hhs_by_parcel_filename) # output file from interpolate_hhs_and_persons_by_GEOID_btw_two_horizon_years.py
-popsim_control_file = 'acecon0403.csv'
-"""
-TAZ level control total (households) from Kirkland and Redmond. (can be any TAZ)
-if there is no local estimate from Redmond/Kirkland, set it to ''. 
-"""
-hhs_control_total_by_TAZ_K = '' #'Kirkland_2024_HousingUnits_by_BKRTMTAZ.csv'  # under working_folder_lu
-hhs_control_total_by_TAZ_R = r'Redmond Land Use\2025_Redmond_housingunits.csv'
-
-## outputs paths for step B
-hhs_by_taz_comparison_file = f"{target_year}_PSRC_hhs_and_forecast_from_kik_Red_by_trip_model_TAZ_comparison" + f'_{modeller_initial}_{version}' + ".csv"
-adjusted_hhs_by_parcel_file = f"{target_year}_final_hhs_by_parcel" + f'_{modeller_initial}_{version}' + ".csv"
-popsim_control_output_file = f"ACS2016_controls_{target_year}_Complan" + f'_{modeller_initial}_{version}' + ".csv"
-parcels_for_allocation_filename = f"{target_year}_Complan_parcels_for_allocation_local_estimate" + f'_{modeller_initial}_{version}' + ".csv"
-summary_by_jurisdiction_filename = f"{target_year}_summary_by_jurisdiction" + f'_{modeller_initial}_{version}' + ".csv"
-
-## other configurations for step B
-#==
+Settings are the fields of Config, a frozen dataclass, so a configuration can't change while a step runs and can be
+sent to worker processes. Importing this module only defines Config; nothing is read, timestamped or logged until
+load_config() is called. Settings are taken, in this order, from
+    1. the defaults below
+    2. a TOML (or YAML, if PyYAML is installed) file, given to load_config() or in BKR_CONFIG: top level keys, or
+       keys grouped in tables
+    3. environment variables named BKR_ and the setting in capitals, e.g. BKR_TARGET_YEAR=2030
+    4. keyword arguments of load_config()
+A file name setting left as None is built from target_year, modeller_initial and version (see _DERIVED).
+
+    target_year = 2030
+    step = 'B'
+
+    [landuse]
+    working_folder_lu = 'Z:\\Modeling Group\\BKRCast\\LandUse\\2030'
 """
-Occupancy rate for single family and multi family households
-"""
-avg_persons_per_sfhh_Kirkland =  2.82 
-avg_persons_per_mfhh_Kirkland =  2.08
-
-avg_persons_per_sfhh_Redmond =  2.82 
-avg_persons_per_mfhh_Redmond =  2.08
-
-sf_occupancy_rate_Kirkland = 0.952
-mf_occupancy_rate_Kirkland = 0.920
-
-sf_occupancy_rate_Redmond = 0.952
-mf_occupancy_rate_Redmond = 0.920
-
-sf_occupancy_rate = 0.952  
-mf_occupancy_rate = 0.920
-
-avg_persons_per_sfhh =  2.82 
-avg_persons_per_mfhh =  2.08 
-
-# old start==
-## avg_person_per_hh_Redmond = 2.3146
-## avg_person_per_hh_Kirkland = 2.2576
-
-# avg_persons_per_sfhh_Kirkland =  2.82 
-# avg_persons_per_mfhh_Kirkland =  2.03
-
-# avg_persons_per_sfhh_Redmond =  2.82 
-# avg_persons_per_mfhh_Redmond =  2.03
-
-# sf_occupancy_rate_Kirkland = 0.952
-# mf_occupancy_rate_Kirkland = 0.895
-
-# sf_occupancy_rate_Redmond = 0.952
-# mf_occupancy_rate_Redmond = 0.895
-
-# sf_occupancy_rate = 0.952  # from Gwen
-# mf_occupancy_rate = 0.895  # from Gwen
-
-# avg_persons_per_sfhh =  2.82 # from Gwen
-# avg_persons_per_mfhh =  2.03 # from Gwen
-# old end==
-
-#==
-
-
-#=====
-# Step C: Parcelize households and persons
-#=====
-
-## input paths for step C
-synthetic_households_file_name = f'{target_year}_baseyear_synthetic_households.csv'
-synthetic_population_file_name = f'{target_year}_baseyear_synthetic_persons.csv'
-# number of hhs per parcel
-# Note: parcels_for_allocation_filename should be the output from step B: adjusted_hhs_by_parcel_file = r"2023_final_hhs_by_parcel.csv"
-
-## output paths for step C
-updated_hhs_file_name = f'updated_{target_year}_baseyear_synthetic_households' + f'_{modeller_initial}_{version}' + ".csv"
-updated_persons_file_name = f'updated_{target_year}_baseyear_synthetic_persons' + f'_{modeller_initial}_{version}' + ".csv"
-h5_file_name = f'{target_year}_baseyear_hh_and_persons' + f'_{modeller_initial}_{version}' + ".h5"
-
-## step C doesn't require other configurations
-
-
-#####
-# Land use configurations: switch back
-#####
-
-#=====
-# Step 3: Interpolate parcel files between what PSRC provided and the parcel data in the horizon year
-#=====
-## input paths for step 3
-parcel_file_name_ealier = r'Z:\Modeling Group\BKRCast\CommonData\original_2014_parcels_urbansim.txt'
-parcel_file_name_latter = r'Z:\Modeling Group\BKRCast\SoundCast\2050_Inputs\2050_SC_parcels_bkr.txt'
-#parcel_file_name_latter = r'Z:\Modeling Group\BKRCast\Other ESD from PSRC\2020\2020_parcels_bkr.txt'
-
-
-## output paths for step 3
-new_parcel_file_name = f'interpolated_parcel_file_{target_year}_from_PSRC_2014_2050.txt'
-
-## step 3 doesn't require other configurations
-
-
-#=====
-# Step 4: Replace parcel columns with new tables
-#=====
-## input paths for step 4
-new_bellevue_parcel_data_file_name = copy.copy(kc_job_file) # r"2023_COB_Jobs_new_method.csv"
-# if have Kirkland job parcel data, put the path below, otherwise put ''
-new_kirkland_parcel_data_file_name = '' # r'Z:\Modeling Group\BKRCast\LandUse\2024baseyear\Kirkland_2024_land_use_conversion.xlsx'
-new_redmond_parcel_data_file_name = r'Redmond Land Use' + f'\{target_year}_Redmond_jobs.csv'
-original_parcel_file_name = copy.copy(new_parcel_file_name) # r"interpolated_parcel_file_2023_from_PSRC_2014_2050.txt"
-
-## output paths for step 4
-updated_parcel_file_name = f"{target_year}_baseyear_parcels_urbansim.txt"
-updated_parcel_file_kirkland_name = f'{target_year}_Kirkland_parcel_matching.csv'
-updated_parcel_file_redmond_name = f'{target_year}_Redmond_parcel_matching.csv'
-
-## other configurations for step 4
-set_Jobs_to_Zeros_All_Bel_Parcels_Not_in_New_Parcel_Data_File = True
-columns_list = jobs_columns_List[1:]
-
-
-#=====
-# Step 5: Synchronize population to parcels
-#=====
-## step 5 doesn't require input paths
-
-## output paths for step  5
-output_parcel_file = f'updated_{target_year}_baseyear_parcels_urbansim.txt'
 
-## step 5 doesn't require other configurations
\ No newline at end of file
+ENV_PREFIX = 'BKR_'
+
+class FrozenDict(dict):
+    '''a dict that can't be changed once built, for the rename settings of Config'''
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('configuration settings are read only')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+@dataclass(frozen = True)
+class Config:
+    #####
+    # Configuration for all
+    #####
+    modeller_initial: str = 'oa'
+    timestamp: str = field(default_factory = lambda: datetime.now().strftime("%Y%m%d%H%M%S"))
+    version: str = 'v2.1'
+    step: Union[int, str] = 'B'  # step = 1, 2, 3, 4, 5, 'A', 'B', or 'C'. See main.py for more information
+
+    # parcel vs TAZ lookup file
+    lookup_file: str = r'I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\parcel_TAZ_2014_lookup.csv'
+    # year range and target year
+    base_year: int = 2014
+    target_year: int = 2025
+    future_year: int = 2050
+
+    #####
+    # Land use configurations
+    #####
+    working_folder_lu: str = r'Z:\Modeling Group\BKRCast\LandUse\2025_baseyear'
+    #=====
+    # Step 1: Prepare land use data
+    #=====
+
+    ## input paths for step 1
+    kingcsqft: str = 'Base By PSRCID (12-31-2025).csv'  # from Bryce
+    subarea_file: str = r"I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv"
+
+    ## output paths for step 1
+    kc_job_file: Optional[str] = None
+    kc_SQFT_file: Optional[str] = None
+    error_parcel_file: Optional[str] = None
+    kc_du_file: Optional[str] = None
+    cob_du_file: Optional[str] = None
+
+    ## other configurations for step 1
+    """
+    subset_area can only be these values:
+    'Rest of KC','External','BELLEVUE', 'KIRKLAND','REDMOND', 'BellevueFringe', 'KirklandFringe', 'RedmondFringe'
+    if it is empty, means all parcels in kingcsqft file
+    """
+    subset_area: tuple = ('BELLEVUE', 'KIRKLAND','REDMOND', 'BellevueFringe', 'KirklandFringe', 'RedmondFringe')
+    SQFT_data_available: bool = True
+    job_rename_dict: FrozenDict = field(default_factory = lambda: FrozenDict({
+        'JOBS_EDU':'EMPEDU_P', 'JOBS_FOOD':'EMPFOO_P', 'JOBS_GOV':'EMPGOV_P', 'JOBS_IND':'EMPIND_P',
+        'JOBS_MED':'EMPMED_P', 'JOBS_OFF':'EMPOFC_P', 'JOBS_RET':'EMPRET_P', 'JOBS_RSV':'EMPRSC_P',
+        'JOBS_SERV':'EMPSVC_P', 'JOBS_OTH':'EMPOTH_P', 'JOBS_TOTAL':'EMPTOT_P'}))
+
+    sqft_rename_dict: FrozenDict = field(default_factory = lambda: FrozenDict({
+        'SQFT_EDU':'SQFT_EDU', 'SQFT_FOOD':'SQFT_FOO', 'SQFT_GOV':'SQFT_GOV', 'SQFT_IND':'SQFT_IND',
+        'SQFT_MED':'SQFT_MED', 'SQFT_OFF':'SQFT_OFC', 'SQFT_RET':'SQFT_RET', 'SQFT_RSV':'SQFT_RSV',
+        'SQFT_SERV':'SQFT_SVC', 'SQFT_OTH': 'SQFT_OTH', 'SQFT_NONE':'SQFT_NON', 'SQFT_TOTAL':'SQFT_TOT'}))
+
+    du_rename_dict: FrozenDict = field(default_factory = lambda: FrozenDict({'TOTAL_UNITS_SF':'SFUnits', 'TOTAL_UNITS_MF':'MFUnits'}))
+
+    jobs_columns_List: tuple = ('PSRC_ID', 'EMPEDU_P', 'EMPFOO_P', 'EMPGOV_P', 'EMPIND_P', 'EMPMED_P',
+                                'EMPOFC_P', 'EMPRET_P', 'EMPRSC_P', 'EMPSVC_P', 'EMPOTH_P', 'EMPTOT_P')
+
+    sqft_columns_list: tuple = ('PSRC_ID', 'SQFT_EDU', 'SQFT_FOO', 'SQFT_GOV', 'SQFT_IND', 'SQFT_MED',
+                                'SQFT_OFC', 'SQFT_RET', 'SQFT_RSV', 'SQFT_SVC', 'SQFT_OTH', 'SQFT_TOT')
+
+    dwellingunits_list: tuple = ('PSRC_ID', 'SFUnits', 'MFUnits')
+
+    job_cat_list: tuple = ('EMPEDU_P', 'EMPFOO_P', 'EMPGOV_P', 'EMPIND_P', 'EMPMED_P', 'EMPOFC_P', 'EMPRET_P', 'EMPRSC_P', 'EMPSVC_P', 'EMPOTH_P')
+    sqft_cat_list: tuple = ('SQFT_EDU', 'SQFT_FOO', 'SQFT_GOV', 'SQFT_IND', 'SQFT_MED', 'SQFT_OFC', 'SQFT_RET', 'SQFT_RSV', 'SQFT_SVC', 'SQFT_OTH')
+    ##
+
+    #=====
+    # Step 2: Validate input parcels
+    #=====
+    ## input paths for step 2
+    parcel_data_file_name: Optional[str] = None  # default: kc_job_file
+
+    ## step 2 doesn't require output paths
+
+    ## other configurations for step 2
+    year_parcel: int = 2014  # the year of the lookup parcel data (e.g., 2014): scroll up to find lookup_file
+    """
+    # Use Jurisdiction to set which area to look into.
+    # Jurisdiction can be a list of the subset of ['Rest of KC', 'External', 'BELLEVUE', 'BellevueFringe', 'KIRKLAND', 'REDMOND', 'RedmondFridge', 'KirklandFringe']
+    # Set Jurisdiction to None if you want to look into all parcels in the lookup_df.
+    """
+    Jurisdiction: Optional[tuple] = None
+    ##
+
+    #####
+    # Synthetic population configurations
+    #####
+
+    working_folder_synpop: str = r'I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\2025baseyear'
+
+    #=====
+    # Step A: Interpolate household and person data from bookends
+    #=====
+    ## input paths for step A
+    base_year_synpop_file: str = r"I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\PSRC\2014_psrc_hh_and_persons.h5"
+    future_year_synpop_file: str = r"I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\PSRC\2050_PSRC_hh_and_persons_bkr.h5"
+    parcel_filename: Optional[str] = None  # default: lookup_file
+    ofm_estimate_template_file: str = r"I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\OFM_estimate_template.csv"
+
+    ## output paths for step A
+    interploated_ofm_estimate_by_GEOID: Optional[str] = None
+    hhs_by_parcel_filename: Optional[str] = None
+    final_output_pop_file: Optional[str] = None
+
+    ## step A doesn't require other configurations
+
+    #=====
+    # Step B: Distribute households to parcels
+    #=====
+
+    ## inputs paths for step B
+    hhs_by_parcel: Optional[str] = None  # default: hhs_by_parcel_filename, the output of step A
+    popsim_control_file: str = 'acecon0403.csv'
+    """
+    TAZ level control total (households) from Kirkland and Redmond. (can be any TAZ)
+    if there is no local estimate from Redmond/Kirkland, set it to ''.
+    """
+    hhs_control_total_by_TAZ_K: str = '' #'Kirkland_2024_HousingUnits_by_BKRTMTAZ.csv'  # under working_folder_lu
+    hhs_control_total_by_TAZ_R: str = r'Redmond Land Use\2025_Redmond_housingunits.csv'
+
+    ## outputs paths for step B
+    hhs_by_taz_comparison_file: Optional[str] = None
+    adjusted_hhs_by_parcel_file: Optional[str] = None
+    popsim_control_output_file: Optional[str] = None
+    parcels_for_allocation_filename: Optional[str] = None
+    summary_by_jurisdiction_filename: Optional[str] = None
+
+    ## other configurations for step B
+    #==
+    """
+    Occupancy rate for single family and multi family households
+    """
+    avg_persons_per_sfhh_Kirkland: float = 2.82
+    avg_persons_per_mfhh_Kirkland: float = 2.08
+
+    avg_persons_per_sfhh_Redmond: float = 2.82
+    avg_persons_per_mfhh_Redmond: float = 2.08
+
+    sf_occupancy_rate_Kirkland: float = 0.952
+    mf_occupancy_rate_Kirkland: float = 0.920
+
+    sf_occupancy_rate_Redmond: float = 0.952
+    mf_occupancy_rate_Redmond: float = 0.920
+
+    sf_occupancy_rate: float = 0.952
+    mf_occupancy_rate: float = 0.920
+
+    avg_persons_per_sfhh: float = 2.82
+    avg_persons_per_mfhh: float = 2.08
+
+    # old start==
+    ## avg_person_per_hh_Redmond = 2.3146
+    ## avg_person_per_hh_Kirkland = 2.2576
+
+    # avg_persons_per_sfhh_Kirkland =  2.82
+    # avg_persons_per_mfhh_Kirkland =  2.03
+
+    # avg_persons_per_sfhh_Redmond =  2.82
+    # avg_persons_per_mfhh_Redmond =  2.03
+
+    # sf_occupancy_rate_Kirkland = 0.952
+    # mf_occupancy_rate_Kirkland = 0.895
+
+    # sf_occupancy_rate_Redmond = 0.952
+    # mf_occupancy_rate_Redmond = 0.895
+
+    # sf_occupancy_rate = 0.952  # from Gwen
+    # mf_occupancy_rate = 0.895  # from Gwen
+
+    # avg_persons_per_sfhh =  2.82 # from Gwen
+    # avg_persons_per_mfhh =  2.03 # from Gwen
+    # old end==
+
+    #==
+
+    #=====
+    # Step C: Parcelize households and persons
+    #=====
+
+    ## input paths for step C
+    synthetic_households_file_name: Optional[str] = None
+    synthetic_population_file_name: Optional[str] = None
+    # number of hhs per parcel
+    # Note: parcels_for_allocation_filename should be the output from step B: adjusted_hhs_by_parcel_file = r"2023_final_hhs_by_parcel.csv"
+
+    ## output paths for step C
+    updated_hhs_file_name: Optional[str] = None
+    updated_persons_file_name: Optional[str] = None
+    h5_file_name: Optional[str] = None
+
+    ## step C doesn't require other configurations
+
+    #####
+    # Land use configurations: switch back
+    #####
+
+    #=====
+    # Step 3: Interpolate parcel files between what PSRC provided and the parcel data in the horizon year
+    #=====
+    ## input paths for step 3
+    parcel_file_name_ealier: str = r'Z:\Modeling Group\BKRCast\CommonData\original_2014_parcels_urbansim.txt'
+    parcel_file_name_latter: str = r'Z:\Modeling Group\BKRCast\SoundCast\2050_Inputs\2050_SC_parcels_bkr.txt'
+
+    ## output paths for step 3
+    new_parcel_file_name: Optional[str] = None
+
+    ## step 3 doesn't require other configurations
+
+    #=====
+    # Step 4: Replace parcel columns with new tables
+    #=====
+    ## input paths for step 4
+    new_bellevue_parcel_data_file_name: Optional[str] = None # default: kc_job_file
+    # if have Kirkland job parcel data, put the path below, otherwise put ''
+    new_kirkland_parcel_data_file_name: str = '' # r'Z:\Modeling Group\BKRCast\LandUse\2024baseyear\Kirkland_2024_land_use_conversion.xlsx'
+    new_redmond_parcel_data_file_name: Optional[str] = None
+    original_parcel_file_name: Optional[str] = None # default: new_parcel_file_name
+
+    ## output paths for step 4
+    updated_parcel_file_name: Optional[str] = None
+    updated_parcel_file_kirkland_name: Optional[str] = None
+    updated_parcel_file_redmond_name: Optional[str] = None
+
+    ## other configurations for step 4
+    set_Jobs_to_Zeros_All_Bel_Parcels_Not_in_New_Parcel_Data_File: bool = True
+    columns_list: Optional[tuple] = None # default: jobs_columns_List without PSRC_ID
+
+    #=====
+    # Step 5: Synchronize population to parcels
+    #=====
+    ## step 5 doesn't require input paths
+
+    ## output paths for step  5
+    output_parcel_file: Optional[str] = None
+
+    ## step 5 doesn't require other configurations
+
+    def __post_init__(self):
+        # the dataclass is frozen, so settings are normalized with object.__setattr__
+        for f in fields(self):
+            object.__setattr__(self, f.name, _freeze(getattr(self, f.name)))
+        for name, default in _DERIVED.items():
+            if getattr(self, name) is None:
+                object.__setattr__(self, name, _freeze(default(self)))
+
+    def to_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+# defaults of the settings built from other settings, in the order they are built
+_DERIVED = {
+    'kc_job_file': lambda c: f'{c.target_year}_COB_Jobs_new_method_{c.modeller_initial}_{c.version}.csv',
+    'kc_SQFT_file': lambda c: f'{c.target_year}_COB_Sqft_{c.modeller_initial}_{c.version}.csv',
+    'error_parcel_file': lambda c: f'parcels_not_in_2014_PSRC_parcels_{c.modeller_initial}_{c.version}.csv',
+    'kc_du_file': lambda c: f'{c.target_year}_KC_housingunits_{c.modeller_initial}_{c.version}.csv',
+    'cob_du_file': lambda c: f'{c.target_year}_COB_housingunits_{c.modeller_initial}_{c.version}.csv',
+    'parcel_data_file_name': lambda c: c.kc_job_file,
+    'parcel_filename': lambda c: c.lookup_file,
+    'interploated_ofm_estimate_by_GEOID': lambda c: os.path.join(c.working_folder_synpop, f"{c.target_year}_ofm_estimate_from_PSRC_2014_2050_{c.modeller_initial}_{c.version}.csv"),
+    'hhs_by_parcel_filename': lambda c: os.path.join(c.working_folder_synpop, f"{c.target_year}_hhs_by_parcels_from_PSRC_2014_2050_{c.modeller_initial}_{c.version}.csv"),
+    'final_output_pop_file': lambda c: os.path.join(c.working_folder_synpop, f"{c.target_year}_interpolated_synthetic_population_from_SC_{c.modeller_initial}_{c.version}.h5"),
+    'hhs_by_parcel': lambda c: c.hhs_by_parcel_filename,
+    'hhs_by_taz_comparison_file': lambda c: f"{c.target_year}_PSRC_hhs_and_forecast_from_kik_Red_by_trip_model_TAZ_comparison_{c.modeller_initial}_{c.version}.csv",
+    'adjusted_hhs_by_parcel_file': lambda c: f"{c.target_year}_final_hhs_by_parcel_{c.modeller_initial}_{c.version}.csv",
+    'popsim_control_output_file': lambda c: f"ACS2016_controls_{c.target_year}_Complan_{c.modeller_initial}_{c.version}.csv",
+    'parcels_for_allocation_filename': lambda c: f"{c.target_year}_Complan_parcels_for_allocation_local_estimate_{c.modeller_initial}_{c.version}.csv",
+    'summary_by_jurisdiction_filename': lambda c: f"{c.target_year}_summary_by_jurisdiction_{c.modeller_initial}_{c.version}.csv",
+    'synthetic_households_file_name': lambda c: f'{c.target_year}_baseyear_synthetic_households.csv',
+    'synthetic_population_file_name': lambda c: f'{c.target_year}_baseyear_synthetic_persons.csv',
+    'updated_hhs_file_name': lambda c: f'updated_{c.target_year}_baseyear_synthetic_households_{c.modeller_initial}_{c.version}.csv',
+    'updated_persons_file_name': lambda c: f'updated_{c.target_year}_baseyear_synthetic_persons_{c.modeller_initial}_{c.version}.csv',
+    'h5_file_name': lambda c: f'{c.target_year}_baseyear_hh_and_persons_{c.modeller_initial}_{c.version}.h5',
+    'new_parcel_file_name': lambda c: f'interpolated_parcel_file_{c.target_year}_from_PSRC_2014_2050.txt',
+    'new_bellevue_parcel_data_file_name': lambda c: c.kc_job_file,
+    'new_redmond_parcel_data_file_name': lambda c: f'Redmond Land Use\\{c.target_year}_Redmond_jobs.csv',
+    'original_parcel_file_name': lambda c: c.new_parcel_file_name,
+    'updated_parcel_file_name': lambda c: f"{c.target_year}_baseyear_parcels_urbansim.txt",
+    'updated_parcel_file_kirkland_name': lambda c: f'{c.target_year}_Kirkland_parcel_matching.csv',
+    'updated_parcel_file_redmond_name': lambda c: f'{c.target_year}_Redmond_parcel_matching.csv',
+    'columns_list': lambda c: c.jobs_columns_List[1:],
+    'output_parcel_file': lambda c: f'updated_{c.target_year}_baseyear_parcels_urbansim.txt',
+}
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict) and not isinstance(value, FrozenDict):
+        return FrozenDict({k: _freeze(v) for k, v in value.items()})
+    return value
+
+def _from_text(kind, text):
+    '''value of a setting of type kind from the text of an environment variable'''
+    if kind in (Optional[tuple], Optional[str]) and text == '':
+        return None
+    if kind is bool:
+        return text.strip().lower() in ('1', 'true', 'yes', 'on')
+    if kind in (int, float):
+        return kind(text)
+    if kind in (tuple, Optional[tuple]):
+        return tuple(item.strip() for item in text.split(',') if item.strip())
+    if kind is FrozenDict:
+        return json.loads(text)
+    if kind == Union[int, str]:
+        return int(text) if text.strip().isdigit() else text.strip()
+    return text
+
+def read_settings_file(path) -> dict:
+    '''
+    settings of a TOML or YAML file. Tables (sections) only group settings, their keys are read as top level keys.
+
+    :param path: .toml, .yaml or .yml file
+    :return: dict of setting name -> value
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    elif extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError('PyYAML is required to read a yaml configuration file, or use a toml file instead.')
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+    else:
+        raise ValueError(f'Unknown configuration file type: {path}. Use a .toml, .yaml or .yml file.')
+
+    settings = {}
+    names = {f.name for f in fields(Config)}
+    for key, value in data.items():
+        if isinstance(value, dict) and key not in names:
+            settings.update(value)
+        else:
+            settings[key] = value
+    return settings
+
+def load_config(path = None, environ = None, **overrides) -> Config:
+    '''
+    build the configuration from the defaults, a settings file, BKR_ environment variables and keyword arguments.
+
+    :param path: TOML or YAML settings file. None reads the file in the BKR_CONFIG environment variable, if set.
+    :param environ: environment variables, default os.environ. Pass {} to ignore the environment.
+    :param overrides: settings that override everything else, e.g. step = 'C'
+    :return: Config
+    '''
+    environ = os.environ if environ is None else environ
+    path = path or environ.get(ENV_PREFIX + 'CONFIG')
+    settings = read_settings_file(path) if path else {}
+    kinds = {f.name: f.type for f in fields(Config)}
+    for key, text in environ.items():
+        if key.startswith(ENV_PREFIX):
+            name = next((name for name in kinds if name.upper() == key[len(ENV_PREFIX):].upper()), None)
+            if name is not None:
+                settings[name] = _from_text(kinds[name], text)
+    settings.update(overrides)
+
+    unknown = sorted(set(settings) - set(kinds))
+    if unknown:
+        raise ValueError(f'Unknown configuration settings: {", ".join(unknown)}')
+    return Config(**settings)
+
+def with_settings(config: Config, **changes) -> Config:
+    '''a copy of config with some settings changed. File names built from changed settings are rebuilt.'''
+    rebuilt = {name: None for name in _DERIVED if name not in changes and getattr(config, name) == _DERIVED[name](config)}
+    return replace(config, **{**rebuilt, **changes})
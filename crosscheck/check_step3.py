@@ -1,17 +1,19 @@
 import os
 import pandas as pd
-from config import *
+from config import load_config
+
+config = load_config() # settings file in BKR_CONFIG, if any
 
 #####
 # Check the outputs from step 3 is okay
 #####
-parcel_data_output = pd.read_csv(os.path.join(working_folder_lu, original_parcel_file_name), sep = ' ', low_memory = False)
-lookup_df = pd.read_csv(lookup_file, sep = ',', low_memory = False)
-kc_job = pd.read_csv(os.path.join(working_folder_lu, kc_job_file))
+parcel_data_output = pd.read_csv(os.path.join(config.working_folder_lu, config.original_parcel_file_name), sep = ' ', low_memory = False)
+lookup_df = pd.read_csv(config.lookup_file, sep = ',', low_memory = False)
+kc_job = pd.read_csv(os.path.join(config.working_folder_lu, config.kc_job_file))
 
-parcel_earlier_df = pd.read_csv(parcel_file_name_ealier, sep = ' ')
+parcel_earlier_df = pd.read_csv(config.parcel_file_name_ealier, sep = ' ')
 parcel_earlier_df.columns = [i.upper() for i in parcel_earlier_df.columns]
-parcel_latter_df = pd.read_csv(parcel_file_name_latter, sep = ' ')
+parcel_latter_df = pd.read_csv(config.parcel_file_name_latter, sep = ' ')
 parcel_latter_df.columns = [i.upper() for i in parcel_latter_df.columns]
 
 target_year = 2025
@@ -35,7 +37,7 @@ for city in ['BELLEVUE', 'KIRKLAND', 'REDMOND']:
     city_parcel_manual = city_parcel_manual.merge(city_parcel_output[['EMPTOT_P', 'PARCELID']], on='PARCELID', how='left')
     city_parcel_manual.rename(columns={'EMPTOT_P': 'EMPTOT_P_output'}, inplace=True)
     city_parcel_manual.merge(lookup_df[['PSRC_ID', 'Jurisdiction']], left_on='PARCELID', right_on='PSRC_ID', how='left')
-    city_parcel_manual.to_csv(os.path.join(working_folder_lu, f"{city}_jobs_cross_check.csv"))
+    city_parcel_manual.to_csv(os.path.join(config.working_folder_lu, f"{city}_jobs_cross_check.csv"))
     
     city_parcel_latter = parcel_latter_df[parcel_latter_df['PARCELID'].isin(city_records['PSRC_ID'])]
     print(f"2050 job total in {city}: {city_parcel_latter['EMPTOT_P'].sum()}")
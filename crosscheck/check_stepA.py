@@ -1,13 +1,15 @@
 import pandas as pd
 import h5py
 import utility
-from config import *
+from config import load_config
+
+config = load_config() # settings file in BKR_CONFIG, if any
 
 #####
 # Check the outputs from step A is okay
 #####
-future_hdf_file = h5py.File(future_year_synpop_file, "r")
-base_hdf_file = h5py.File(base_year_synpop_file, "r")
+future_hdf_file = h5py.File(config.future_year_synpop_file, "r")
+base_hdf_file = h5py.File(config.base_year_synpop_file, "r")
 
 future_hh_df = utility.h5_to_df(future_hdf_file, 'Household')
 base_hh_df = utility.h5_to_df(base_hdf_file, 'Household')
@@ -18,7 +20,7 @@ future_hh_df['future_total_hhs'] = future_hh_df['hhexpfac']
 base_hh_df['base_total_persons'] = base_hh_df['hhexpfac'] * base_hh_df['hhsize']
 base_hh_df['base_total_hhs'] = base_hh_df['hhexpfac']
 
-parcel_df = pd.read_csv(parcel_filename, low_memory=False)
+parcel_df = pd.read_csv(config.parcel_filename, low_memory=False)
 future_hh_df = future_hh_df.merge(parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ']], how = 'left', left_on = 'hhparcel', right_on = 'PSRC_ID')
 future_hhs_by_geoid10 = future_hh_df.groupby('GEOID10')[['future_total_hhs', 'future_total_persons']].sum()
 base_hh_df = base_hh_df.merge(parcel_df, how = 'left', left_on = 'hhparcel', right_on = 'PSRC_ID')
@@ -32,7 +34,7 @@ print(f"Future total households: {future_hh_df['future_total_hhs'].sum()}")
 
 # calculate interpolation by parcel
 target_year = 2025
-target_hhs_by_parcel_output = pd.read_csv(hhs_by_parcel_filename)
+target_hhs_by_parcel_output = pd.read_csv(config.hhs_by_parcel_filename)
 future_hhs_by_parcel = future_hh_df.groupby(by='PSRC_ID')[['future_total_hhs', 'future_total_persons']].sum().reset_index()
 base_hhs_by_parcel = base_hh_df.groupby(by='PSRC_ID')[['base_total_hhs', 'base_total_persons']].sum().reset_index()
 target_hhs_by_parcel = pd.merge(base_hhs_by_parcel, future_hhs_by_parcel, on = 'PSRC_ID', how = 'outer')
@@ -50,7 +52,7 @@ assert max(abs(target_hhs_by_parcel['total_persons_by_parcel'] - target_hhs_by_p
         "Person interpolation is not correct!!"
 
 # calculate ofm interpolation
-ofm_df = pd.read_csv(ofm_estimate_template_file)
+ofm_df = pd.read_csv(config.ofm_estimate_template_file)
 ofm_df = ofm_df.merge(future_hhs_by_geoid10, how = 'left', left_on = 'GEOID10', right_index = True)
 ofm_df = ofm_df.merge(base_hhs_by_geoid10, how = 'left', left_on = 'GEOID10', right_index = True)
 ofm_df.rename(columns={'OFM_persons': 'OFM_persons_manual', 'OFM_hhs': 'OFM_hhs_manual'}, inplace=True)
@@ -58,7 +60,7 @@ ofm_df['OFM_hhs_manual'] = (ofm_df['base_total_hhs'] + \
                             (ofm_df['future_total_hhs'] - ofm_df['base_total_hhs']) * (target_year-2014) / (2050-2014)).round(0)
 ofm_df['OFM_persons_manual'] = (ofm_df['base_total_persons'] + \
                                 (ofm_df['future_total_persons'] - ofm_df['base_total_persons']) * (target_year-2014) / (2050-2014)).round(0)
-ofm_df_output = pd.read_csv(interploated_ofm_estimate_by_GEOID)
+ofm_df_output = pd.read_csv(config.interploated_ofm_estimate_by_GEOID)
 ofm_df = ofm_df.merge(ofm_df_output[['GEOID10', 'OFM_hhs', 'OFM_persons']], on='GEOID10', how='left')
 
 # cross-check number of households
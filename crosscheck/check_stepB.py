@@ -7,48 +7,48 @@ This script is modified from hh_and_person_summary.py in BKRCast_Tools-Python3
 import os
 import pandas as pd
 
-from config import *
+from config import load_config
+
+config = load_config() # settings file in BKR_CONFIG, if any
 
-lookup_file = r'I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\parcel_TAZ_2014_lookup.csv'
-TAZ_Subarea_File_Name = r'I:\Modeling and Analysis Group\07_ModelDevelopment&Upgrade\NextgenerationModel\BasicData\TAZ_subarea.csv'
 
 def check_results():
     # read King County housing units
-    kc_du = pd.read_csv(os.path.join(working_folder_lu, kc_du_file))
+    kc_du = pd.read_csv(os.path.join(config.working_folder_lu, config.kc_du_file))
     kc_du_jurisdiction = kc_du.groupby(by='Jurisdiction')[['SFUnits', 'MFUnits']].sum()
     # read Bellevue housing units
-    cob_du = pd.read_csv(os.path.join(working_folder_lu, cob_du_file))
+    cob_du = pd.read_csv(os.path.join(config.working_folder_lu, config.cob_du_file))
     cob_du_taz = cob_du.groupby(by='BKRCastTAZ')[['SFUnits', 'MFUnits']].sum()
     cob_du_jurisdiction = cob_du.groupby(by='Jurisdiction')[['SFUnits', 'MFUnits']].sum()
     kc_du_jurisdiction.update(cob_du_jurisdiction)
     # read Kikrland and Redmond housing units
     kir_du = None
     red_du = None
-    if hhs_control_total_by_TAZ_K:
-        kir_du = pd.read_csv(os.path.join(working_folder_lu, hhs_control_total_by_TAZ_R))
+    if config.hhs_control_total_by_TAZ_K:
+        kir_du = pd.read_csv(os.path.join(config.working_folder_lu, config.hhs_control_total_by_TAZ_R))
         kir_du.loc[red_du['Jurisdiction']=='Kirkland', 'Jurisdiction'] = 'KIRKLAND'
         kir_du_jurisdiction = red_du.groupby(by='Jurisdiction')[['SFUnits', 'MFUnits']].sum()
         kc_du_jurisdiction.update(kir_du_jurisdiction)
-    if hhs_control_total_by_TAZ_R:
-        red_du = pd.read_csv(os.path.join(working_folder_lu, hhs_control_total_by_TAZ_R))
+    if config.hhs_control_total_by_TAZ_R:
+        red_du = pd.read_csv(os.path.join(config.working_folder_lu, config.hhs_control_total_by_TAZ_R))
         red_du.loc[red_du['Jurisdiction']=='Redmond', 'Jurisdiction'] = 'REDMOND'
         red_du_jurisdiction = red_du.groupby(by='Jurisdiction')[['SFUnits', 'MFUnits']].sum()
         kc_du_jurisdiction.update(red_du_jurisdiction)
     kc_du_jurisdiction['HHUnits'] = kc_du_jurisdiction['SFUnits'] + kc_du_jurisdiction['MFUnits']
 
     # calculate total households using the housing unit data
-    kc_du_jurisdiction['TotalHH'] = kc_du_jurisdiction['SFUnits'] * sf_occupancy_rate + kc_du_jurisdiction['MFUnits'] * mf_occupancy_rate
-    kc_du_jurisdiction.loc['KIRKLAND', 'TotalHH'] = kc_du_jurisdiction.loc['KIRKLAND', 'SFUnits'] * sf_occupancy_rate_Kirkland + \
-                                                    kc_du_jurisdiction.loc['KIRKLAND', 'MFUnits'] * mf_occupancy_rate_Kirkland
-    kc_du_jurisdiction.loc['REDMOND', 'TotalHH'] = kc_du_jurisdiction.loc['REDMOND', 'SFUnits'] * sf_occupancy_rate_Redmond + \
-                                                   kc_du_jurisdiction.loc['REDMOND', 'MFUnits'] * mf_occupancy_rate_Redmond
+    kc_du_jurisdiction['TotalHH'] = kc_du_jurisdiction['SFUnits'] * config.sf_occupancy_rate + kc_du_jurisdiction['MFUnits'] * config.mf_occupancy_rate
+    kc_du_jurisdiction.loc['KIRKLAND', 'TotalHH'] = kc_du_jurisdiction.loc['KIRKLAND', 'SFUnits'] * config.sf_occupancy_rate_Kirkland + \
+                                                    kc_du_jurisdiction.loc['KIRKLAND', 'MFUnits'] * config.mf_occupancy_rate_Kirkland
+    kc_du_jurisdiction.loc['REDMOND', 'TotalHH'] = kc_du_jurisdiction.loc['REDMOND', 'SFUnits'] * config.sf_occupancy_rate_Redmond + \
+                                                   kc_du_jurisdiction.loc['REDMOND', 'MFUnits'] * config.mf_occupancy_rate_Redmond
     kc_du_jurisdiction['TotalHH'] = kc_du_jurisdiction['TotalHH'].round(0)
 
     # calculate Bellevue housing units
-    cob_du_taz['TotalHH'] = cob_du_taz['SFUnits'] * sf_occupancy_rate + cob_du_taz['MFUnits'] * mf_occupancy_rate
+    cob_du_taz['TotalHH'] = cob_du_taz['SFUnits'] * config.sf_occupancy_rate + cob_du_taz['MFUnits'] * config.mf_occupancy_rate
     
     # access the outcome from step B
-    summary_jurisdiction = pd.read_csv(os.path.join(working_folder_synpop,  summary_by_jurisdiction_filename))
+    summary_jurisdiction = pd.read_csv(os.path.join(config.working_folder_synpop,  config.summary_by_jurisdiction_filename))
     summary_jurisdiction = summary_jurisdiction.set_index('Jurisdiction')
     kc_du_jurisdiction = kc_du_jurisdiction.merge(summary_jurisdiction, left_on=kc_du_jurisdiction.index, right_on=summary_jurisdiction.index, how='left')
     kc_du_jurisdiction['StepB-Manual'] = kc_du_jurisdiction['adj_hhs_by_parcel'] - kc_du_jurisdiction['TotalHH']
@@ -0,0 +1,171 @@
+"""
+In-memory cross checks of the land use and synthetic population steps.
+
+The check_step*.py scripts reload every output from disk. The functions here take the frames a step already has in memory,
+so a step can verify its own outputs right after it runs. Every function returns a dataframe with one row per assertion:
+    Check, Key, Expected, Actual, Passed
+Use assert_checks() to raise on failures like the scripts do, or log_checks() to only report them.
+"""
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+import utility
+
+Check_Columns = ['Check', 'Key', 'Expected', 'Actual', 'Passed']
+
+_lookup_cache = {}
+
+def load_lookup(lookup_file) -> pd.DataFrame:
+    """
+    Reads the parcel lookup once per process, with jurisdiction names normalized. Later calls return the cached frame
+    as long as the file is unchanged, so steps and checks share one copy.
+    """
+    key = (os.path.abspath(lookup_file), os.path.getmtime(lookup_file))
+    if key not in _lookup_cache:
+        _lookup_cache.clear()
+        _lookup_cache[key] = utility.normalize_jurisdiction(pd.read_csv(lookup_file, sep = ',', low_memory = False))
+    return _lookup_cache[key]
+
+def assert_checks(checks: pd.DataFrame):
+    failed = checks.loc[~checks['Passed']]
+    if len(failed) > 0:
+        raise AssertionError('Cross check failed:\n' + failed.to_string(index = False))
+
+def log_checks(checks: pd.DataFrame, title = 'Cross check', logger = None):
+    logger = logger or logging.getLogger()
+    failed = checks.loc[~checks['Passed']]
+    logger.info(f'{title}: {len(checks) - len(failed)} of {len(checks)} checks passed.')
+    if len(failed) > 0:
+        logger.warning(f'{title} failed:\n' + failed.to_string(index = False))
+
+def _rows(check, keys, expected, actual, tolerance = 0) -> pd.DataFrame:
+    expected = np.atleast_1d(np.asarray(expected, dtype = float))
+    actual = np.atleast_1d(np.asarray(actual, dtype = float))
+    keys = np.broadcast_to(np.asarray(keys, dtype = object), expected.shape)
+    return pd.DataFrame({'Check': check, 'Key': keys, 'Expected': expected, 'Actual': actual,
+                         'Passed': np.abs(expected - actual) <= tolerance}, columns = Check_Columns)
+
+_parcel_index_cache = {}
+
+def _parcel_index(lookup_df):
+    """PSRC_ID index and jurisdiction codes of a lookup, built once per lookup frame."""
+    cached = _parcel_index_cache.get(id(lookup_df))
+    if cached is None or cached[0] is not lookup_df:
+        lookup = lookup_df.drop_duplicates('PSRC_ID')
+        codes, names = pd.factorize(lookup['Jurisdiction'])
+        cached = (lookup_df, pd.Index(lookup['PSRC_ID']), codes, list(names))
+        _parcel_index_cache.clear()
+        _parcel_index_cache[id(lookup_df)] = cached
+    return cached[1:]
+
+def _jurisdiction_codes(parcel_ids, lookup_df):
+    """jurisdiction code of each parcel id through the lookup (-1 if not in the lookup), and the jurisdiction names."""
+    index, codes, names = _parcel_index(lookup_df)
+    positions = index.get_indexer(parcel_ids)
+    return np.where(positions >= 0, codes[positions], -1), names
+
+def _sum_by_city(values, parcel_ids, lookup_df, cities) -> np.ndarray:
+    row_codes, names = _jurisdiction_codes(parcel_ids, lookup_df)
+    valid = row_codes >= 0
+    sums = np.bincount(row_codes[valid], weights = np.asarray(values, dtype = float)[valid], minlength = len(names))
+    return np.array([sums[names.index(city)] if city in names else 0.0 for city in cities])
+
+def _cities(cities) -> list:
+    return [utility.canonical_jurisdiction(city) for city in cities]
+
+def check_step1(kc_job_df, kc_sqft_df, kc_df, kc_du_df, lookup_df, cities, job_columns, sqft_columns) -> pd.DataFrame:
+    """
+    Step 1: job and square footage totals add up, and dwelling units by city survive the merge with the lookup.
+    kc_df is the King County parcel data the step started from.
+    """
+    cities = _cities(cities)
+    row_codes, names = _jurisdiction_codes(kc_df['PSRC_ID'], lookup_df)
+    in_cities = np.isin(row_codes, [names.index(city) for city in cities if city in names])
+    return pd.concat([
+        _rows('EMPTOT_P equals sum of jobs', 'total', kc_job_df[job_columns].to_numpy().sum(), kc_job_df['EMPTOT_P'].sum()),
+        _rows('SQFT_TOT equals sum of sqft', 'total', kc_sqft_df[sqft_columns].to_numpy().sum(), kc_sqft_df['SQFT_TOT'].sum()),
+        _rows('MF units kept', 'total', kc_df.loc[in_cities, 'TOTAL_UNITS_MF'].sum(), kc_du_df['MFUnits'].sum()),
+        _rows('SF units kept', 'total', kc_df.loc[in_cities, 'TOTAL_UNITS_SF'].sum(), kc_du_df['SFUnits'].sum()),
+    ], ignore_index = True)
+
+def check_step4(parcel_df, lookup_df, cities, job_columns) -> pd.DataFrame:
+    """
+    Step 4: EMPTOT_P equals the sum of the job categories by parcel, and by city EMPTOT_P is less than 10 jobs above
+    the sum of the job categories (one-sided, as the original check_step4 script asserted).
+    """
+    cities = _cities(cities)
+    job_columns = [col for col in job_columns if col != 'EMPTOT_P']
+    manual = parcel_df[job_columns].to_numpy().sum(axis = 1)
+    emptot = parcel_df['EMPTOT_P'].to_numpy()
+    by_city = _rows('EMPTOT_P equals sum of jobs by city', cities, _sum_by_city(manual, parcel_df['PARCELID'], lookup_df, cities),
+                    _sum_by_city(emptot, parcel_df['PARCELID'], lookup_df, cities))
+    by_city['Passed'] = by_city['Actual'] - by_city['Expected'] < 10
+    return pd.concat([
+        by_city,
+        _rows('parcels where EMPTOT_P differs from sum of jobs', 'parcels', 0, np.count_nonzero(manual != emptot)),
+    ], ignore_index = True)
+
+def check_step5(hh_df, parcel_df, adjusted_hhs_df, lookup_df, cities) -> pd.DataFrame:
+    """
+    Step 5: households by city agree between the step B allocation, the parcelized households (step C) and HH_P of the
+    synchronized parcel file.
+    hh_df has one row per household (hhparcel), or households already counted by parcel (hhparcel, households).
+    """
+    cities = _cities(cities)
+    step_B = _sum_by_city(adjusted_hhs_df['total_hhs'], adjusted_hhs_df['PSRC_ID'], lookup_df, cities)
+    households = hh_df['households'] if 'households' in hh_df.columns else np.ones(len(hh_df))
+    step_C = _sum_by_city(households, hh_df['hhparcel'], lookup_df, cities)
+    step_5 = _sum_by_city(parcel_df['HH_P'], parcel_df['PARCELID'], lookup_df, cities)
+    return pd.concat([
+        _rows('parcelized households (step C) equal step B households', cities, step_B, step_C),
+        _rows('HH_P (step 5) equals step B households', cities, step_B, step_5),
+    ], ignore_index = True)
+
+def check_popsim(hhs_df, persons_df, controls_df, adjusted_hhs_df, lookup_df, moved_block_groups = None) -> pd.DataFrame:
+    """
+    PopulationSim: synthetic households match the adjusted households by block group, every household has persons,
+    and synthetic households match the control totals by BKRCastTAZ and BKRTMTAZ.
+
+    :param moved_block_groups: dict of block group -> block group that received its households in the control file
+    """
+    adjusted = adjusted_hhs_df[['GEOID10', 'total_hhs']].copy()
+    if moved_block_groups:
+        for source, target in moved_block_groups.items():
+            adjusted.loc[(adjusted['GEOID10'] == source) & (adjusted['total_hhs'] > 0), 'GEOID10'] = target
+
+    synpop_by_bg = hhs_df.groupby('block_group_id')['hhexpfac'].sum()
+    adjusted_by_bg = adjusted.groupby('GEOID10')['total_hhs'].sum().reindex(synpop_by_bg.index, fill_value = 0)
+    checks = [
+        _rows('synthetic households equal adjusted households by block group', synpop_by_bg.index, adjusted_by_bg, synpop_by_bg),
+        _rows('households without persons', 'households', 0, np.count_nonzero(~hhs_df['household_id'].isin(persons_df['household_id']))),
+    ]
+
+    # a zone is compared over the block groups of its parcels
+    controls_by_bg = controls_df.groupby('block_group_id')['hh_bg_weight'].sum()
+    hhs_by_bg = hhs_df.groupby('block_group_id').size()
+    for zone in ['BKRCastTAZ', 'BKRTMTAZ']:
+        if zone not in lookup_df.columns:
+            continue
+        pairs = lookup_df[[zone, 'GEOID10']].dropna().drop_duplicates()
+        control = controls_by_bg.reindex(pairs['GEOID10'], fill_value = 0).to_numpy()
+        synpop = hhs_by_bg.reindex(pairs['GEOID10'], fill_value = 0).to_numpy()
+        by_zone = pd.DataFrame({zone: pairs[zone].to_numpy(), 'control': control, 'synpop': synpop}).groupby(zone).sum()
+        checks.append(_rows(f'synthetic households equal controls by {zone}', by_zone.index, by_zone['control'], by_zone['synpop']))
+    return pd.concat(checks, ignore_index = True)
+
+def check_stepC(hhs_df, persons_df, synthetic_hhs_df, synthetic_persons_df, adjusted_hhs_df, lookup_df, cities) -> pd.DataFrame:
+    """
+    Step C: parcelized households by city match step B, and no household, person or block group id is lost.
+    hhs_df and persons_df are the parcelized outputs; synthetic_*_df are the PopulationSim outputs.
+    """
+    cities = _cities(cities)
+    step_B = _sum_by_city(adjusted_hhs_df['total_hhs'], adjusted_hhs_df['PSRC_ID'], lookup_df, cities)
+    step_C = _sum_by_city(np.ones(len(hhs_df)), hhs_df['hhparcel'], lookup_df, cities)
+    return pd.concat([
+        _rows('parcelized households equal step B households', cities, step_B, step_C),
+        _rows('block group ids kept', 'households', synthetic_hhs_df['block_group_id'].count(), hhs_df['block_group_id'].count()),
+        _rows('households kept', 'households', len(synthetic_hhs_df), len(hhs_df)),
+        _rows('persons kept', 'persons', len(synthetic_persons_df), len(persons_df)),
+    ], ignore_index = True)
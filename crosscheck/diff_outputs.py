@@ -0,0 +1,261 @@
+"""
+Columnar diff of pipeline outputs, for regression testing a release against the previous one.
+
+Works on parcel files (space delimited txt), summary csv files, synthetic population h5 groups and dataframes. Rows are
+aligned on key columns (PARCELID, hhno/pno, ...), so row order and length may differ between the two sides.
+
+Large inputs are streamed in chunks and hash-partitioned on the keys into temporary files, then compared one partition
+at a time, so memory is bounded by the size of a partition rather than the size of the files.
+
+    python crosscheck/diff_outputs.py old_parcels.txt new_parcels.txt PARCELID
+    python crosscheck/diff_outputs.py old.h5 new.h5
+"""
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import h5py
+
+DIFF_CHUNK_SIZE = 500000 # rows read at a time
+DIFF_PARTITIONS = 16 # key partitions used when an input is larger than one chunk
+Synpop_Keys = {'Household': ['hhno'], 'Person': ['hhno', 'pno']}
+
+def _iter_chunks(source, chunk_size, sep = None, group = None, columns = None):
+    """yields dataframes of at most chunk_size rows from a dataframe, a delimited text file or an h5 group."""
+    if isinstance(source, pd.DataFrame):
+        frame = source if columns is None else source[columns]
+        for start in range(0, max(len(frame), 1), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+    elif str(source).lower().endswith(('.h5', '.hdf5')):
+        with h5py.File(source, 'r') as h5_file:
+            h5_set = h5_file[group]
+            names = list(h5_set.keys()) if columns is None else columns
+            rows = h5_set[names[0]].shape[0] if names else 0
+            for start in range(0, max(rows, 1), chunk_size):
+                yield pd.DataFrame({name: h5_set[name][start:start + chunk_size] for name in names})
+    else:
+        if sep is None:
+            sep = ' ' if str(source).lower().endswith('.txt') else ','
+        yield from pd.read_csv(source, sep = sep, usecols = columns, chunksize = chunk_size, low_memory = False)
+
+def _partition_of(chunk, keys, partitions) -> np.ndarray:
+    # numeric keys are hashed as float64, so an int key on one side matches a float key on the other
+    key_frame = pd.DataFrame({key: chunk[key].astype('float64') if pd.api.types.is_numeric_dtype(chunk[key]) else chunk[key]
+                              for key in keys})
+    return (pd.util.hash_pandas_object(key_frame, index = False).to_numpy() % partitions).astype(np.int64)
+
+def _spill(source, keys, chunk_size, partitions, folder, side, **read_args) -> list:
+    """
+    reads a source and returns its data by partition: either [dataframe] when it fits in one chunk, or a list of
+    partitions, each a list of pickle files in folder.
+    """
+    chunks = _iter_chunks(source, chunk_size, **read_args)
+    first = next(chunks)
+    second = next(chunks, None)
+    if second is None:
+        return [first]
+
+    files = [[] for _ in range(partitions)]
+    for n, chunk in enumerate(_chain(first, second, chunks)):
+        part = _partition_of(chunk, keys, partitions)
+        for p in np.unique(part):
+            path = os.path.join(folder, f'{side}_{p}_{n}.pkl')
+            chunk.loc[part == p].to_pickle(path)
+            files[p].append(path)
+    return files
+
+def _chain(first, second, rest):
+    yield first
+    yield second
+    yield from rest
+
+def _load_partition(spilled, p, keys, partitions, columns) -> pd.DataFrame:
+    if isinstance(spilled[0], pd.DataFrame):
+        frame = spilled[0]
+        if partitions > 1:
+            frame = frame.loc[_partition_of(frame, keys, partitions) == p]
+    else:
+        frame = pd.concat([pd.read_pickle(path) for path in spilled[p]], ignore_index = True) if spilled[p] else pd.DataFrame(columns = columns)
+    return frame
+
+def _top(frame, top_n) -> pd.DataFrame:
+    return frame.sort_values('Abs Diff', ascending = False, kind = 'stable').head(top_n)
+
+class _DiffAccumulator:
+    """per column mismatch counts and the top differing keys, accumulated over partitions."""
+    def __init__(self, keys, columns, top_n):
+        self.keys = keys
+        self.columns = columns
+        self.top_n = top_n
+        self.compared = 0
+        self.only_in_old = 0
+        self.only_in_new = 0
+        self.duplicated_keys = 0
+        self.mismatches = dict.fromkeys(columns, 0)
+        self.max_diff = dict.fromkeys(columns, 0.0)
+        self.top = {} # column -> top differing keys so far
+        self.samples_old = []
+        self.samples_new = []
+
+    def add(self, old, new, atol, rtol):
+        dup_old = old.duplicated(self.keys, keep = 'first').to_numpy()
+        dup_new = new.duplicated(self.keys, keep = 'first').to_numpy()
+        self.duplicated_keys += int(dup_old.sum() + dup_new.sum())
+        old = old.loc[~dup_old].set_index(self.keys)
+        new = new.loc[~dup_new].set_index(self.keys)
+
+        common = old.index.intersection(new.index)
+        only_old = old.index.difference(new.index)
+        only_new = new.index.difference(old.index)
+        self.only_in_old += len(only_old)
+        self.only_in_new += len(only_new)
+        self.samples_old.append(only_old[:self.top_n].to_frame(index = False))
+        self.samples_new.append(only_new[:self.top_n].to_frame(index = False))
+        self.compared += len(common)
+
+        old_pos = old.index.get_indexer(common)
+        new_pos = new.index.get_indexer(common)
+        for col in self.columns:
+            if pd.api.types.is_numeric_dtype(old[col]) and pd.api.types.is_numeric_dtype(new[col]):
+                # nullable columns (Int64, boolean) become float with NaN for NA
+                a = old[col].to_numpy(dtype = float, na_value = np.nan)[old_pos]
+                b = new[col].to_numpy(dtype = float, na_value = np.nan)[new_pos]
+                both_na = np.isnan(a) & np.isnan(b)
+                with np.errstate(invalid = 'ignore'):
+                    diff = np.abs(a - b)
+                    same = both_na | (diff <= atol + rtol * np.abs(b))
+                diff = np.where(np.isnan(diff), np.inf, diff)
+            else:
+                a = old[col].to_numpy()[old_pos]
+                b = new[col].to_numpy()[new_pos]
+                both_na = pd.isna(a) & pd.isna(b)
+                # compared as series, so pd.NA counts as different instead of raising
+                same = both_na | (pd.Series(a, dtype = object) == pd.Series(b, dtype = object)).to_numpy(dtype = bool)
+                diff = np.where(same, 0.0, np.inf)
+            bad = ~same
+            count = int(np.count_nonzero(bad))
+            if count == 0:
+                continue
+            self.mismatches[col] += count
+            self.max_diff[col] = max(self.max_diff[col], float(diff[bad].max()))
+            # only the largest differences of this partition can make the overall top n
+            candidates = np.flatnonzero(bad)
+            candidates = candidates[np.argsort(-diff[candidates], kind = 'stable')[:self.top_n]]
+            top = common[candidates].to_frame(index = False)
+            top.insert(0, 'Column', col)
+            top['Old'] = a[candidates]
+            top['New'] = b[candidates]
+            top['Abs Diff'] = diff[candidates]
+            self.top[col] = _top(pd.concat([self.top[col], top], ignore_index = True), self.top_n) if col in self.top else top
+
+    def result(self, old_name, new_name) -> dict:
+        summary = pd.DataFrame([
+            {'Item': 'Old', 'Value': str(old_name)},
+            {'Item': 'New', 'Value': str(new_name)},
+            {'Item': 'Keys', 'Value': ', '.join(self.keys)},
+            {'Item': 'Rows compared', 'Value': self.compared},
+            {'Item': 'Keys only in old', 'Value': self.only_in_old},
+            {'Item': 'Keys only in new', 'Value': self.only_in_new},
+            {'Item': 'Duplicated keys', 'Value': self.duplicated_keys},
+            {'Item': 'Columns with differences', 'Value': sum(1 for count in self.mismatches.values() if count > 0)},
+        ])
+        columns = pd.DataFrame({'Column': self.columns,
+                                'Mismatches': [self.mismatches[col] for col in self.columns],
+                                'Max Abs Diff': [self.max_diff[col] for col in self.columns]})
+        top_columns = ['Column'] + self.keys + ['Old', 'New', 'Abs Diff']
+        if self.top:
+            top = pd.concat([self.top[col] for col in self.columns if col in self.top], ignore_index = True)
+        else:
+            top = pd.DataFrame(columns = top_columns)
+        return {
+            'Summary': summary,
+            'Columns': columns,
+            'Top Differences': top[top_columns],
+            'Only in Old': pd.concat(self.samples_old, ignore_index = True).head(self.top_n),
+            'Only in New': pd.concat(self.samples_new, ignore_index = True).head(self.top_n)
+        }
+
+def diff_tables(old, new, keys, columns = None, atol = 0.0, rtol = 0.0, top_n = 20, chunk_size = DIFF_CHUNK_SIZE,
+                partitions = DIFF_PARTITIONS, sep = None, group = None) -> dict:
+    """
+    Compare two tables aligned on keys.
+
+    :param old, new: dataframes, or paths of delimited text files or h5 files
+    :param keys: key column(s) to align rows on
+    :param columns: columns to compare. None compares every column found on both sides.
+    :param atol, rtol: numeric values match when |old - new| <= atol + rtol * |new|. NaN on both sides matches.
+    :param top_n: differing keys reported for each column (largest differences first)
+    :param chunk_size: rows read at a time
+    :param partitions: key partitions used when an input does not fit in one chunk
+    :param sep: delimiter of text files. None uses ' ' for .txt and ',' otherwise.
+    :param group: h5 group to read, e.g. 'Household'
+    :return: a dict of dataframes
+        {
+        "Summary": rows compared, keys only on one side, duplicated keys,
+        "Columns": mismatch count and max abs diff by column,
+        "Top Differences": the top_n differing keys of each column with old and new values,
+        "Only in Old": sample keys, "Only in New": sample keys
+        }
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    read_args = {'sep': sep, 'group': group}
+    folder = tempfile.mkdtemp(prefix = 'diff_outputs_')
+    try:
+        spilled_old = _spill(old, keys, chunk_size, partitions, folder, 'old', **read_args)
+        spilled_new = _spill(new, keys, chunk_size, partitions, folder, 'new', **read_args)
+        # both sides fit in one chunk: compare them in one go
+        if isinstance(spilled_old[0], pd.DataFrame) and isinstance(spilled_new[0], pd.DataFrame):
+            partitions = 1
+
+        old_columns = _columns_of(spilled_old)
+        new_columns = _columns_of(spilled_new)
+        if columns is None:
+            columns = [col for col in old_columns if col in new_columns and col not in keys]
+        accumulator = _DiffAccumulator(keys, list(columns), top_n)
+        for p in range(partitions):
+            old_part = _load_partition(spilled_old, p, keys, partitions, old_columns)
+            new_part = _load_partition(spilled_new, p, keys, partitions, new_columns)
+            accumulator.add(old_part, new_part, atol, rtol)
+    finally:
+        shutil.rmtree(folder, ignore_errors = True)
+
+    name = lambda source: 'dataframe' if isinstance(source, pd.DataFrame) else source
+    return accumulator.result(name(old), name(new))
+
+def _columns_of(spilled) -> list:
+    if isinstance(spilled[0], pd.DataFrame):
+        return list(spilled[0].columns)
+    for files in spilled:
+        if files:
+            return list(pd.read_pickle(files[0]).columns)
+    return []
+
+def diff_parcel_files(old_file, new_file, **kwargs) -> dict:
+    """compare two parcel files (space delimited, keyed by PARCELID)"""
+    return diff_tables(old_file, new_file, ['PARCELID'], **kwargs)
+
+def diff_synpop_h5(old_file, new_file, **kwargs) -> dict:
+    """compare the Household (by hhno) and Person (by hhno, pno) groups of two synthetic population h5 files"""
+    out = {}
+    for group, keys in Synpop_Keys.items():
+        result = diff_tables(old_file, new_file, keys, group = group, **kwargs)
+        out.update({f'{group} {name}': df for name, df in result.items()})
+    return out
+
+def print_diff(result: dict):
+    for name, df in result.items():
+        print(f'\n{name}')
+        print(df.to_string(index = False) if len(df) > 0 else '(none)')
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    old_file, new_file = sys.argv[1], sys.argv[2]
+    if old_file.lower().endswith(('.h5', '.hdf5')):
+        print_diff(diff_synpop_h5(old_file, new_file))
+    else:
+        key_columns = sys.argv[3].split(',') if len(sys.argv) > 3 else ['PARCELID']
+        print_diff(diff_tables(old_file, new_file, key_columns))
@@ -5,41 +5,38 @@ sys.path.append(os.getcwd())
 import h5py
 import random
 import logging
+import numpy as np
 import pandas as pd
 
 import utility
-from config import *
-
-if not sys.warnoptions:
-    import warnings
-    warnings.simplefilter("ignore")
-
-log_fname = os.path.join(working_folder_lu, f"log_landuse_{modeller_initial}_{version}_step{step}_{timestamp}.log")
-logging.basicConfig(filename=log_fname, level=logging.INFO, format="%(asctime)s: %(levelname)s - %(message)s")
-# also log info to console
-console_handler = logging.StreamHandler()
-logger = logging.getLogger()
-logger.addHandler(console_handler)
+from config import Config
+from crosscheck import checks
 
 
 class LandUse:
-    def __init__(self, run_step, backup_folder='backup'):
+    def __init__(self, config: Config, run_step=None, backup_folder='backup'):
         """
         Initialize the class with data.
-        :param data: Dictionary containing land use data.
+        :param config: configuration of the run, see config.load_config()
+        :param run_step: step to run, default config.step
         """
-        logging.info(f'Creating LandUse object...I/O {version} by modeller: {modeller_initial}')
-        logging.info('Loading....')
-        self.run_step = run_step
+        self.config = config
+        self.run_step = config.step if run_step is None else run_step
         self.backup_folder = backup_folder
-        logging.info(f'Running step {self.run_step}...')
+        if not sys.warnoptions:
+            import warnings
+            warnings.simplefilter("ignore")
+        # logging is set up here rather than on import, so every object (scenario) writes its own log file
+        self.log_fname = os.path.join(config.working_folder_lu, f"log_landuse_{config.modeller_initial}_{config.version}_step{self.run_step}_{config.timestamp}.log")
+        self.logger = utility.scenario_logger('landuse', self.log_fname)
+        self.logger.info(f'Creating LandUse object...I/O {self.config.version} by modeller: {self.config.modeller_initial}')
+        self.logger.info('Loading....')
+        self.logger.info(f'Running step {self.run_step}...')
 
         #####
         # Step 1
         #####
-        self.lookup_df = pd.read_csv(lookup_file, sep = ',', low_memory = False)
-        # sorting the lookup file
-        self.lookup_df.loc[self.lookup_df['Jurisdiction']=='Redmond', 'Jurisdiction'] = 'REDMOND'
+        self.lookup_df = checks.load_lookup(self.config.lookup_file) # cached, shared with the cross checks
         self.kc_df = None
         self.subarea_df = None
 
@@ -60,7 +57,7 @@ class LandUse:
         self.new_parcel_data_df = None
         self.original_parcel_data_df = None
 
-        print('Logging file created: ', log_fname)
+        print('Logging file created: ', self.log_fname)
 
     
     def step_1_prepare_land_use(self):
@@ -85,58 +82,58 @@ class LandUse:
         # 5/8/2026
         # lookup_file is changed to TAZs matching with what Redmond provided
 
-        self.kc_df = pd.read_csv(os.path.join(working_folder_lu, kingcsqft), sep = ',', low_memory = False)
-        self.subarea_df = pd.read_csv(subarea_file, sep = ',')
+        self.kc_df = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.kingcsqft), sep = ',', low_memory = False)
+        self.subarea_df = pd.read_csv(self.config.subarea_file, sep = ',')
 
         # rename columns to fit modeling input format
-        self.kc_df.rename(columns = job_rename_dict, inplace = True)
-        self.kc_df.rename(columns = sqft_rename_dict, inplace = True)
-        self.kc_df.rename(columns = du_rename_dict, inplace = True)
+        self.kc_df.rename(columns = self.config.job_rename_dict, inplace = True)
+        self.kc_df.rename(columns = self.config.sqft_rename_dict, inplace = True)
+        self.kc_df.rename(columns = self.config.du_rename_dict, inplace = True)
 
-        logging.info('Exporting job file...')
+        self.logger.info('Exporting job file...')
         # kc_df dataframe may already have ['PSRC_ID', 'JURIS', 'BKRCASTTAZ'], the merge below just to ensure these features match with our BKRCast model
-        updated_jobs_kc = self.kc_df[jobs_columns_List].merge(self.lookup_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ']], left_on = 'PSRC_ID', right_on = 'PSRC_ID', how = 'inner')
+        updated_jobs_kc = self.kc_df[list(self.config.jobs_columns_List)].merge(self.lookup_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ']], left_on = 'PSRC_ID', right_on = 'PSRC_ID', how = 'inner')
         updated_jobs_kc = updated_jobs_kc.merge(self.subarea_df[['BKRCastTAZ', 'Subarea', 'SubareaName']], left_on = 'BKRCastTAZ', right_on = 'BKRCastTAZ', how = 'left')
-        if subset_area != []:
-            updated_jobs_kc = updated_jobs_kc[updated_jobs_kc['Jurisdiction'].isin(subset_area)]
+        if len(self.config.subset_area) > 0:
+            updated_jobs_kc = updated_jobs_kc[updated_jobs_kc['Jurisdiction'].isin(self.config.subset_area)]
         # calculate sum of the worker each parcel; EMPTOT_P: the total number of employees working on a parcel
-        updated_jobs_kc['EMPTOT_P'] = updated_jobs_kc[job_cat_list].sum(axis = 1)
-        updated_jobs_kc.to_csv(os.path.join(working_folder_lu, kc_job_file), sep = ',', index = False)
+        updated_jobs_kc['EMPTOT_P'] = updated_jobs_kc[list(self.config.job_cat_list)].sum(axis = 1)
+        updated_jobs_kc.to_csv(os.path.join(self.config.working_folder_lu, self.config.kc_job_file), sep = ',', index = False)
 
-        if SQFT_data_available: 
-            logging.info('Exporting sqft file...')
+        if self.config.SQFT_data_available: 
+            self.logger.info('Exporting sqft file...')
             # kc_df dataframe may already have ['PSRC_ID', 'JURIS', 'BKRCASTTAZ'], the merge below just to ensure these features match with our BKRCast model
-            updated_sqft_kc = self.kc_df[sqft_columns_list].merge(self.lookup_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ']], left_on = 'PSRC_ID', right_on = 'PSRC_ID', how = 'left')
+            updated_sqft_kc = self.kc_df[list(self.config.sqft_columns_list)].merge(self.lookup_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ']], left_on = 'PSRC_ID', right_on = 'PSRC_ID', how = 'left')
             updated_sqft_kc = updated_sqft_kc.merge(self.subarea_df[['BKRCastTAZ', 'Subarea', 'SubareaName']], left_on = 'BKRCastTAZ', right_on = 'BKRCastTAZ', how = 'left')
-            if subset_area != []:
-                updated_sqft_kc = updated_sqft_kc[updated_sqft_kc['Jurisdiction'].isin(subset_area)]
-            updated_sqft_kc['SQFT_TOT'] = updated_sqft_kc[sqft_cat_list].sum(axis = 1)       
-            updated_sqft_kc.to_csv(os.path.join(working_folder_lu, kc_SQFT_file), sep = ',', index = False)
-            logging.info(f'Sqft file exported: {os.path.join(working_folder_lu, kc_SQFT_file)}')
-
-        logging.info('Exporting King County dwelling units...')
-        du_kc = self.kc_df[dwellingunits_list].merge(self.lookup_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ']], left_on = 'PSRC_ID', right_on = 'PSRC_ID', how = 'inner')
+            if len(self.config.subset_area) > 0:
+                updated_sqft_kc = updated_sqft_kc[updated_sqft_kc['Jurisdiction'].isin(self.config.subset_area)]
+            updated_sqft_kc['SQFT_TOT'] = updated_sqft_kc[list(self.config.sqft_cat_list)].sum(axis = 1)       
+            updated_sqft_kc.to_csv(os.path.join(self.config.working_folder_lu, self.config.kc_SQFT_file), sep = ',', index = False)
+            self.logger.info(f'Sqft file exported: {os.path.join(self.config.working_folder_lu, self.config.kc_SQFT_file)}')
+
+        self.logger.info('Exporting King County dwelling units...')
+        du_kc = self.kc_df[list(self.config.dwellingunits_list)].merge(self.lookup_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ']], left_on = 'PSRC_ID', right_on = 'PSRC_ID', how = 'inner')
         du_kc = du_kc.merge(self.subarea_df[['BKRCastTAZ', 'Subarea', 'SubareaName']], left_on = 'BKRCastTAZ', right_on = 'BKRCastTAZ', how = 'left')
-        if subset_area != []:
-            du_kc = du_kc[du_kc['Jurisdiction'].isin(subset_area)]
-        du_kc.to_csv(os.path.join(working_folder_lu, kc_du_file), sep  = ',', index = False)
-        logging.info(f'King County dwelling units file exported: {os.path.join(working_folder_lu, kc_du_file)}')
+        if len(self.config.subset_area) > 0:
+            du_kc = du_kc[du_kc['Jurisdiction'].isin(self.config.subset_area)]
+        du_kc.to_csv(os.path.join(self.config.working_folder_lu, self.config.kc_du_file), sep  = ',', index = False)
+        self.logger.info(f'King County dwelling units file exported: {os.path.join(self.config.working_folder_lu, self.config.kc_du_file)}')
 
         du_cob = du_kc[du_kc['Jurisdiction'] == 'BELLEVUE']
-        du_cob.to_csv(os.path.join(working_folder_lu, cob_du_file), sep = ',', index = False)
-        logging.info(f'Bellevue dwelling units file exported: {os.path.join(working_folder_lu, cob_du_file)}')
+        du_cob.to_csv(os.path.join(self.config.working_folder_lu, self.config.cob_du_file), sep = ',', index = False)
+        self.logger.info(f'Bellevue dwelling units file exported: {os.path.join(self.config.working_folder_lu, self.config.cob_du_file)}')
 
         error_parcels = self.kc_df[~self.kc_df['PSRC_ID'].isin(self.lookup_df['PSRC_ID'])]
-        error_parcels.to_csv(os.path.join(working_folder_lu, error_parcel_file), sep = ',', index = False)
+        error_parcels.to_csv(os.path.join(self.config.working_folder_lu, self.config.error_parcel_file), sep = ',', index = False)
         if error_parcels.shape[0] > 0:
-            logging.warning('Exporting error file...')
-            logging.warning(f'Please check the error file first: {os.path.join(working_folder_lu, error_parcel_file)}')
+            self.logger.warning('Exporting error file...')
+            self.logger.warning(f'Please check the error file first: {os.path.join(self.config.working_folder_lu, self.config.error_parcel_file)}')
 
-        logging.info('Backing up the scripts for step 1...')
-        os.makedirs(os.path.join(working_folder_lu, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step 1 backup exported: {os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__))}')
-        logging.info('Step 1 done. Land use data has been prepared.\n')
+        self.logger.info('Backing up the scripts for step 1...')
+        os.makedirs(os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step 1 backup exported: {os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__))}')
+        self.logger.info('Step 1 done. Land use data has been prepared.\n')
 
     def step_2_validate_input_parcels(self):
         """
@@ -152,44 +149,44 @@ class LandUse:
         # move the paths into config.py
         # remove specifying year "2014", replace it with year_parcel
 
-        self.parcels_df = pd.read_csv(os.path.join(working_folder_lu, parcel_data_file_name), sep = ',')
+        self.parcels_df = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.parcel_data_file_name), sep = ',')
         # check if the parcel data has duplicated PSRC ids
         duplicated_parcels_df = self.parcels_df[self.parcels_df.duplicated('PSRC_ID', keep = False)]
         if duplicated_parcels_df.shape[0] != 0:
-            duplicated_parcels_df.to_csv(os.path.join(working_folder_lu, f'duplicated_parcels_{modeller_initial}_{version}.csv'))
-            logging.warning(f"Some parcels have duplicated PSRC_ID. See {os.path.join(working_folder_lu, f'duplicated_parcels_{modeller_initial}_{version}.csv')} for details.")
+            duplicated_parcels_df.to_csv(os.path.join(self.config.working_folder_lu, f'duplicated_parcels_{self.config.modeller_initial}_{self.config.version}.csv'))
+            self.logger.warning(f"Some parcels have duplicated PSRC_ID. See {os.path.join(self.config.working_folder_lu, f'duplicated_parcels_{self.config.modeller_initial}_{self.config.version}.csv')} for details.")
             # export cleaned copy, only keep the first one if duplicated.
             self.parcels_df = self.parcels_df[~self.parcels_df.duplicated('PSRC_ID', keep = 'first')]
-            self.parcels_df.to_csv(os.path.join(working_folder_lu, 'cleaned_' + parcel_data_file_name), index = False)
+            self.parcels_df.to_csv(os.path.join(self.config.working_folder_lu, 'cleaned_' + self.config.parcel_data_file_name), index = False)
         else:
-            logging.info('No parcel with duplicated PSRC_ID is found. ')
+            self.logger.info('No parcel with duplicated PSRC_ID is found. ')
 
         parcels_df = self.parcels_df.groupby('PSRC_ID').sum()
 
         # check and export parcels that are given in the parcel_data_file_name but are not included in lookup_df
         not_in_year_PSRC_parcels = parcels_df.loc[~parcels_df.index.isin(self.lookup_df['PSRC_ID'])]
         if not_in_year_PSRC_parcels.empty == False:
-            not_in_year_PSRC_parcels.to_csv(os.path.join(working_folder_lu, f'parcels_not_in_{year_parcel}_PSRC_parcels_{modeller_initial}_{version}.csv'))
-            logging.warning(f"Some parcels are not within parcel lookup file, See {os.path.join(working_folder_lu, f'parcels_not_in_{year_parcel}_PSRC_parcels_{modeller_initial}_{version}.csv')} for details.")
+            not_in_year_PSRC_parcels.to_csv(os.path.join(self.config.working_folder_lu, f'parcels_not_in_{self.config.year_parcel}_PSRC_parcels_{self.config.modeller_initial}_{self.config.version}.csv'))
+            self.logger.warning(f"Some parcels are not within parcel lookup file, See {os.path.join(self.config.working_folder_lu, f'parcels_not_in_{self.config.year_parcel}_PSRC_parcels_{self.config.modeller_initial}_{self.config.version}.csv')} for details.")
         else:
-            logging.info('All parcels given are within parcel lookup file.')
+            self.logger.info('All parcels given are within parcel lookup file.')
 
-        if Jurisdiction != None:
-            selected_parcels_lookup_df = self.lookup_df.loc[self.lookup_df['Jurisdiction'] == Jurisdiction]
+        if self.config.Jurisdiction is not None:
+            selected_parcels_lookup_df = self.lookup_df.loc[self.lookup_df['Jurisdiction'].isin(self.config.Jurisdiction)]
         else:
             selected_parcels_lookup_df = self.lookup_df
 
         # check and export parcels that are in lookup_df but not in the parcel_data_file_name.
         not_in_given_parcel_dataset = selected_parcels_lookup_df.loc[~selected_parcels_lookup_df['PSRC_ID'].isin(parcels_df.index)]
         if not_in_given_parcel_dataset.empty == False:
-            not_in_given_parcel_dataset.to_csv(os.path.join(working_folder_lu, f'{year_parcel}_PSRC_parcels_not_in_given_parcel_data_{modeller_initial}_{version}.csv'))
-            logging.warning(f'Some {year_parcel} PSRC parcels are missing from the given parcel data_{modeller_initial}_{version}.')
-            logging.warning(f"Go to {os.path.join(working_folder_lu, f'{year_parcel}_PSRC_parcels_not_in_given_parcel_data_{modeller_initial}_{version}.csv')} and check the output error file for details. ")
+            not_in_given_parcel_dataset.to_csv(os.path.join(self.config.working_folder_lu, f'{self.config.year_parcel}_PSRC_parcels_not_in_given_parcel_data_{self.config.modeller_initial}_{self.config.version}.csv'))
+            self.logger.warning(f'Some {self.config.year_parcel} PSRC parcels are missing from the given parcel data_{self.config.modeller_initial}_{self.config.version}.')
+            self.logger.warning(f"Go to {os.path.join(self.config.working_folder_lu, f'{self.config.year_parcel}_PSRC_parcels_not_in_given_parcel_data_{self.config.modeller_initial}_{self.config.version}.csv')} and check the output error file for details. ")
         else:
-            logging.info(f'No {year_parcel} PSRC parcels are missing in the given parcel dataset.')
+            self.logger.info(f'No {self.config.year_parcel} PSRC parcels are missing in the given parcel dataset.')
 
-        logging.info('Step 2 done.')
-        logging.info('Please make sure the output numbers making sense. Then continue the steps in the Synthetic Population folder.\n')
+        self.logger.info('Step 2 done.')
+        self.logger.info('Please make sure the output numbers making sense. Then continue the steps in the Synthetic Population folder.\n')
 
     def step_3_interpolate_parcel_files(self):
         """
@@ -200,54 +197,43 @@ class LandUse:
             Create a new parcel file by interpolating employment bewteen two parcel files. The newly created parcel file has other non-job values
             from parcel_file_name_ealier.
         """
-        self.parcel_earlier_df = pd.read_csv(parcel_file_name_ealier, sep = ' ')
+        self.parcel_earlier_df = pd.read_csv(self.config.parcel_file_name_ealier, sep = ' ')
         self.parcel_earlier_df.columns = [i.upper() for i in self.parcel_earlier_df.columns]
-        self.parcel_latter_df = pd.read_csv(parcel_file_name_latter, sep = ' ')
+        self.parcel_latter_df = pd.read_csv(self.config.parcel_file_name_latter, sep = ' ')
         self.parcel_latter_df.columns = [i.upper() for i in self.parcel_latter_df.columns]
 
-        logging.info('Interpolating...')
-        columns = copy.copy(job_cat_list)
-        columns.append('PARCELID')
-        job_std = copy.copy(job_cat_list)
-        job_std.extend(['STUGRD_P', 'STUHGH_P', 'STUUNI_P'])
-
-        self.parcel_latter_df.set_index('PARCELID', inplace = True)
-        parcels_from_latter_df = self.parcel_latter_df.loc[:, job_std].copy(deep=True)
-        parcels_from_latter_df.columns = [i + '_L' for i in parcels_from_latter_df.columns]
-        parcels_from_latter_df['EMPTOT_L'] = 0
-        for cat in job_cat_list:
-            parcels_from_latter_df['EMPTOT_L'] = parcels_from_latter_df[cat + '_L'] + parcels_from_latter_df['EMPTOT_L']
-
-        logging.info(f"Total jobs in year {future_year} are {parcels_from_latter_df['EMPTOT_L'].sum():,.0f}")
-        parcel_horizon_df = self.parcel_earlier_df.merge(parcels_from_latter_df.reset_index(), how = 'inner', left_on = 'PARCELID', right_on = 'PARCELID')
-
-        parcel_horizon_df['EMPTOT_E'] = 0
-        for cat in job_cat_list:
-            parcel_horizon_df['EMPTOT_E'] = parcel_horizon_df['EMPTOT_E'] + parcel_horizon_df[cat]
-        parcel_horizon_df['EMPTOT_P'] = parcel_horizon_df['EMPTOT_E']
-        logging.info(f"Total jobs in year {base_year} are {parcel_horizon_df['EMPTOT_P'].sum():,.0f}")
-
-        # interpolate number of jobs, and round to integer.
-        for cat in job_std:
-            parcel_horizon_df[cat] = parcel_horizon_df[cat] + ((target_year - base_year) * 1.0 / (future_year - base_year) * (parcel_horizon_df[cat + '_L'] - parcel_horizon_df[cat])) 
-            parcel_horizon_df[cat] = parcel_horizon_df[cat].round(0).astype(int)
-
-        parcel_horizon_df['EMPTOT_P'] = 0
-        for cat in job_cat_list:
-            parcel_horizon_df['EMPTOT_P'] = parcel_horizon_df['EMPTOT_P'] + parcel_horizon_df[cat]
-
-        parcel_horizon_df = parcel_horizon_df.drop([i + '_L' for i in job_std], axis = 1)
-        parcel_horizon_df = parcel_horizon_df.drop(['EMPTOT_L', 'EMPTOT_E'], axis = 1)
-        parcel_horizon_df.to_csv(os.path.join(working_folder_lu, new_parcel_file_name), index = False, sep = ' ')
-        logging.info(f"After interpolation, total jobs are {parcel_horizon_df['EMPTOT_P'].sum():,.0f}")
-
-        utility.backupScripts(__file__, os.path.join(working_folder_lu, os.path.basename(__file__)))
-
-        logging.info('Backing up the scripts for step 3...')
-        os.makedirs(os.path.join(working_folder_lu, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step 3 backup exported: {os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__))}')
-        logging.info('Step 3 done. Parcel files are interpolated based on the base and the future years.\n')
+        self.logger.info('Interpolating...')
+        students = ['STUGRD_P', 'STUHGH_P', 'STUUNI_P']
+        job_std = list(self.config.job_cat_list) + students
+
+        # parcels in both files, in the order of the earlier file
+        latter_pos = utility.id_positions(self.parcel_latter_df['PARCELID'], self.parcel_earlier_df['PARCELID'], self.config.parcel_file_name_latter)
+        in_both = latter_pos >= 0
+        parcel_horizon_df = self.parcel_earlier_df.loc[in_both].reset_index(drop = True)
+        latter_block = self.parcel_latter_df[job_std].to_numpy()[latter_pos[in_both]]
+        earlier_block = parcel_horizon_df[job_std].to_numpy()
+
+        n_jobs = len(self.config.job_cat_list)
+        self.logger.info(f"Total jobs in year {self.config.future_year} are {self.parcel_latter_df[list(self.config.job_cat_list)].to_numpy().sum():,.0f}")
+        self.logger.info(f"Total jobs in year {self.config.base_year} are {earlier_block[:, :n_jobs].sum():,.0f}")
+
+        # interpolate number of jobs and students in one block, and round to integer.
+        fraction = (self.config.target_year - self.config.base_year) * 1.0 / (self.config.future_year - self.config.base_year)
+        horizon_block = np.empty(earlier_block.shape, dtype = np.int64)
+        utility.interpolate_columns(earlier_block, latter_block, fraction, out = horizon_block)
+
+        parcel_horizon_df[job_std] = horizon_block
+        parcel_horizon_df['EMPTOT_P'] = horizon_block[:, :n_jobs].sum(axis = 1)
+        parcel_horizon_df.to_csv(os.path.join(self.config.working_folder_lu, self.config.new_parcel_file_name), index = False, sep = ' ')
+        self.logger.info(f"After interpolation, total jobs are {parcel_horizon_df['EMPTOT_P'].sum():,.0f}")
+
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_lu, os.path.basename(__file__)))
+
+        self.logger.info('Backing up the scripts for step 3...')
+        os.makedirs(os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step 3 backup exported: {os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__))}')
+        self.logger.info('Step 3 done. Parcel files are interpolated based on the base and the future years.\n')
 
     def step_4_update_parcel_columns(self):
         """
@@ -270,40 +256,40 @@ class LandUse:
         # 05/22/2025
         # allowed kirkland input job file to update the original interpolated parcel job data
 
-        self.subarea_df = pd.read_csv(subarea_file, sep = ',')
-        self.new_bellevue_parcel_data = pd.read_csv(os.path.join(working_folder_lu, new_bellevue_parcel_data_file_name), sep = ',', low_memory = False)
-        self.original_parcel_data_df = pd.read_csv(os.path.join(working_folder_lu, original_parcel_file_name), sep = ' ', low_memory = False)
+        self.subarea_df = pd.read_csv(self.config.subarea_file, sep = ',')
+        self.new_bellevue_parcel_data = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.new_bellevue_parcel_data_file_name), sep = ',', low_memory = False)
+        self.original_parcel_data_df = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.original_parcel_file_name), sep = ' ', low_memory = False)
         # processing Bellevue parcel-level jobs
-        logging.info('Processing Bellevue jobs...')
+        self.logger.info('Processing Bellevue jobs...')
         full_bellevue_parcels_df = self.lookup_df.loc[self.lookup_df['Jurisdiction'] == 'BELLEVUE']
         actual_bel_parcels_df = self.new_bellevue_parcel_data.loc[self.new_bellevue_parcel_data['PSRC_ID'].isin(full_bellevue_parcels_df['PSRC_ID'])]
         not_in_full_bellevue_parcels = actual_bel_parcels_df.loc[~actual_bel_parcels_df['PSRC_ID'].isin(full_bellevue_parcels_df['PSRC_ID'])]
         missing_bellevue_parcels_df = self.original_parcel_data_df.loc[self.original_parcel_data_df['PARCELID'].isin(full_bellevue_parcels_df.loc[~full_bellevue_parcels_df['PSRC_ID'].isin(self.new_bellevue_parcel_data['PSRC_ID']), 'PSRC_ID'])]
         if len(not_in_full_bellevue_parcels) > 0:
-            fname = os.path.join(working_folder_lu, f'not_valid_bellevue_parcels_{modeller_initial}_{version}.csv')
+            fname = os.path.join(self.config.working_folder_lu, f'not_valid_bellevue_parcels_{self.config.modeller_initial}_{self.config.version}.csv')
             not_in_full_bellevue_parcels.to_csv(fname, sep = ',', index = False)
-            logging.warning(f'Some parcels missing compared to the Bellevue lookup table. Exported in {fname}\n')
+            self.logger.warning(f'Some parcels missing compared to the Bellevue lookup table. Exported in {fname}\n')
         if len(missing_bellevue_parcels_df) > 0:
-            fname = os.path.join(working_folder_lu, f'missing_bellevue_parcels_{modeller_initial}_{version}.csv')
+            fname = os.path.join(self.config.working_folder_lu, f'missing_bellevue_parcels_{self.config.modeller_initial}_{self.config.version}.csv')
             missing_bellevue_parcels_df.to_csv(fname, sep = ',', index = False)
-            logging.warning(f'Some parcels are not covered in the Bellevue lookup table. Exported in {fname}\n')        
+            self.logger.warning(f'Some parcels are not covered in the Bellevue lookup table. Exported in {fname}\n')        
         # compare between the old and new job totals
         newjobs_bellevue = self.new_bellevue_parcel_data[self.new_bellevue_parcel_data['Jurisdiction']=='BELLEVUE']['EMPTOT_P'].sum() 
-        logging.info(f'New Bellevue parcel data file has {newjobs_bellevue:,.0f} jobs.\n')
+        self.logger.info(f'New Bellevue parcel data file has {newjobs_bellevue:,.0f} jobs.\n')
         new_bellevue_parcel_data = self.new_bellevue_parcel_data.set_index('PSRC_ID')
         updated_parcel_df = self.original_parcel_data_df.copy()
         updated_parcel_df = updated_parcel_df.set_index('PARCELID')
         taz_belleuve = self.subarea_df[self.subarea_df['Jurisdiction']=='BELLEVUE']['BKRCastTAZ']
         oldjobs_bellevue = updated_parcel_df.loc[updated_parcel_df['TAZ_P'].isin(taz_belleuve), 'EMPTOT_P'].sum()
-        logging.info(f'Bellevue parcels to be replaced have {oldjobs_bellevue:,.0f} jobs')
-        logging.info(f'Bellevue parcels after changing have {newjobs_bellevue:,.0f} jobs')
-        logging.info(f'Bellevue jobs gained {(newjobs_bellevue - oldjobs_bellevue):,.0f}\n')
-        updated_parcel_df.loc[updated_parcel_df.index.isin(new_bellevue_parcel_data.index), columns_list] = new_bellevue_parcel_data[columns_list]
+        self.logger.info(f'Bellevue parcels to be replaced have {oldjobs_bellevue:,.0f} jobs')
+        self.logger.info(f'Bellevue parcels after changing have {newjobs_bellevue:,.0f} jobs')
+        self.logger.info(f'Bellevue jobs gained {(newjobs_bellevue - oldjobs_bellevue):,.0f}\n')
+        updated_parcel_df.loc[updated_parcel_df.index.isin(new_bellevue_parcel_data.index), list(self.config.columns_list)] = new_bellevue_parcel_data[list(self.config.columns_list)]
         # process Kirkland parcel-level jobs
-        if new_kirkland_parcel_data_file_name != '':
-            logging.info('Processing Kirkland jobs...')
+        if self.config.new_kirkland_parcel_data_file_name != '':
+            self.logger.info('Processing Kirkland jobs...')
             # process the new parcel jobs
-            new_kirkland_parcel_data = pd.read_excel(os.path.join(working_folder_lu, new_kirkland_parcel_data_file_name), sheet_name='Employment', header=2)
+            new_kirkland_parcel_data = pd.read_excel(os.path.join(self.config.working_folder_lu, self.config.new_kirkland_parcel_data_file_name), sheet_name='Employment', header=2)
             new_kirkland_parcel_data = new_kirkland_parcel_data[['TAZ', 'Total']].copy(deep=True)
             new_kirkland_parcel_data.rename(columns={'Total': 'Control', 'TAZ': 'BKRTMTAZ'}, inplace=True)
             new_kirkland_parcel_data['Control'] = new_kirkland_parcel_data['Control'].round(0)
@@ -320,25 +306,25 @@ class LandUse:
             parcel_data_kirkland_tmtaz['scaling factor'] = parcel_data_kirkland_tmtaz['Control'] / parcel_data_kirkland_tmtaz['EMPTOT_P']
             parcel_data_kirkland_tmtaz['scaling factor'].fillna(0, inplace=True)
             # use the scaling factor to all the jobs in parcels within the corresponding travel model TAZ (TMTAZ)
-            job_columns = [i for i in columns_list if i != 'EMPTOT_P']
+            job_columns = [i for i in self.config.columns_list if i != 'EMPTOT_P']
             parcel_data_kirkland = parcel_data_kirkland.merge(parcel_data_kirkland_tmtaz[['scaling factor', 'BKRTMTAZ']], on='BKRTMTAZ', how='left')
             for job_column in job_columns:
                 parcel_data_kirkland[f"{job_column}_SCALED"] = (parcel_data_kirkland[job_column].astype('float64') * parcel_data_kirkland['scaling factor']).round(0)
-            job_columns_scaled = [f"{i}_SCALED" for i in columns_list if i != 'EMPTOT_P']
+            job_columns_scaled = [f"{i}_SCALED" for i in self.config.columns_list if i != 'EMPTOT_P']
             parcel_data_kirkland['EMPTOT_P_SCALED'] = parcel_data_kirkland[job_columns_scaled].sum(axis=1)
             # compare the scaled job number with the control (new parcel data)
             parcel_data_kirkland_scaled = parcel_data_kirkland.groupby(by='BKRTMTAZ').sum()['EMPTOT_P_SCALED'].reset_index()
             parcel_data_kirkland_scaled = parcel_data_kirkland_scaled.merge(parcel_data_kirkland_tmtaz[['Control', 'BKRTMTAZ']], how='left')
             parcel_data_kirkland_scaled['difference'] = parcel_data_kirkland_scaled['EMPTOT_P_SCALED'] - parcel_data_kirkland_scaled['Control']
-            logging.info(f"New Kirkland parcel data file has {parcel_data_kirkland_scaled['Control'].sum():,.0f} jobs.")
-            logging.info(f"Scaled Kirkland parcel data file has {parcel_data_kirkland_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
-            logging.info(f"Old parcel data file has {parcel_data_kirkland['EMPTOT_P'].sum():,.0f} jobs in Kirkland.")
+            self.logger.info(f"New Kirkland parcel data file has {parcel_data_kirkland_scaled['Control'].sum():,.0f} jobs.")
+            self.logger.info(f"Scaled Kirkland parcel data file has {parcel_data_kirkland_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
+            self.logger.info(f"Old parcel data file has {parcel_data_kirkland['EMPTOT_P'].sum():,.0f} jobs in Kirkland.")
             # merge the scaling factor to the table
             parcel_data_kirkland_scaled = parcel_data_kirkland_scaled.merge(parcel_data_kirkland_tmtaz[['scaling factor', 'BKRTMTAZ']], on='BKRTMTAZ', how='left')
             # walk through each TMTAZ and distribute the difference back to parcels
-            logging.info(f"(Scaled Kirkland job total - New Kirkland job total) = {parcel_data_kirkland['EMPTOT_P_SCALED'].sum() - new_kirkland_parcel_data['Control'].sum()}")
-            logging.info("\nFinetuning the number of jobs in each parcel in Kirkland...")
-            job_scaled_columns = [f'{i}_SCALED' for i in columns_list if i != 'EMPTOT_P']
+            self.logger.info(f"(Scaled Kirkland job total - New Kirkland job total) = {parcel_data_kirkland['EMPTOT_P_SCALED'].sum() - new_kirkland_parcel_data['Control'].sum()}")
+            self.logger.info("\nFinetuning the number of jobs in each parcel in Kirkland...")
+            job_scaled_columns = [f'{i}_SCALED' for i in self.config.columns_list if i != 'EMPTOT_P']
             for _, row in parcel_data_kirkland_scaled.iterrows():
                 tmtaz = row['BKRTMTAZ']
                 difference = row['difference']
@@ -374,31 +360,31 @@ class LandUse:
                         parcel_data_kirkland.loc[parcel_data_kirkland['PARCELID']==selected_parcel, selected_job] -= 1
                         parcel_data_kirkland['EMPTOT_P_SCALED'] = parcel_data_kirkland[job_scaled_columns].sum(axis=1)
             # compare the final scaled job number with the control
-            logging.info('Finetuning jobs in Kikrland complete! Comparing them again...')
+            self.logger.info('Finetuning jobs in Kikrland complete! Comparing them again...')
             parcel_data_kirkland_scaled = parcel_data_kirkland.groupby(by='BKRTMTAZ').sum()['EMPTOT_P_SCALED'].reset_index()
             parcel_data_kirkland_scaled = parcel_data_kirkland_scaled.merge(parcel_data_kirkland_tmtaz[['Control', 'BKRTMTAZ']], how='left')
             parcel_data_kirkland_scaled['difference'] = parcel_data_kirkland_scaled['EMPTOT_P_SCALED'] - parcel_data_kirkland_scaled['Control']
-            logging.info(f"New Kirkland parcel data file has {parcel_data_kirkland_scaled['Control'].sum():,.0f} jobs.")
-            logging.info(f"Finetuned scaled Kirkland parcel data file has {parcel_data_kirkland_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
-            logging.info(f"(Finetuned and scaled Kirkland job total - New Kirkland job total) = {parcel_data_kirkland['EMPTOT_P_SCALED'].sum() - new_kirkland_parcel_data['Control'].sum()}")
-            parcel_data_kirkland_scaled.to_csv(os.path.join(working_folder_lu, updated_parcel_file_kirkland_name.split('.')[0] + f'_{modeller_initial}_{version}.csv'))
-            logging.info(f"Exporting Kirkland parcel matching file to: {os.path.join(working_folder_lu, updated_parcel_file_kirkland_name.split('.')[0] + f'_{modeller_initial}_{version}.csv')}\n")
+            self.logger.info(f"New Kirkland parcel data file has {parcel_data_kirkland_scaled['Control'].sum():,.0f} jobs.")
+            self.logger.info(f"Finetuned scaled Kirkland parcel data file has {parcel_data_kirkland_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
+            self.logger.info(f"(Finetuned and scaled Kirkland job total - New Kirkland job total) = {parcel_data_kirkland['EMPTOT_P_SCALED'].sum() - new_kirkland_parcel_data['Control'].sum()}")
+            parcel_data_kirkland_scaled.to_csv(os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_kirkland_name.split('.')[0] + f'_{self.config.modeller_initial}_{self.config.version}.csv'))
+            self.logger.info(f"Exporting Kirkland parcel matching file to: {os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_kirkland_name.split('.')[0] + f'_{self.config.modeller_initial}_{self.config.version}.csv')}\n")
             # replace the old parcels in Kirkland with those processed parcels
-            logging.info('Replacing the old parcels in Kirkland with the parcels processed with the new numebr of jobs.')
+            self.logger.info('Replacing the old parcels in Kirkland with the parcels processed with the new numebr of jobs.')
             parcel_data_kirkland.set_index('PARCELID', inplace=True)
-            job_scaled_columns = [f'{i}_SCALED' for i in columns_list]
-            for job_column in columns_list:
+            job_scaled_columns = [f'{i}_SCALED' for i in self.config.columns_list]
+            for job_column in self.config.columns_list:
                 updated_parcel_df.loc[updated_parcel_df.index.isin(parcel_data_kirkland.index), job_column] = parcel_data_kirkland[job_column + '_SCALED']
 
         # process Redmond parcel-level jobs
-        if new_redmond_parcel_data_file_name != '':
-            logging.info('Processing Redmond jobs...')
+        if self.config.new_redmond_parcel_data_file_name != '':
+            self.logger.info('Processing Redmond jobs...')
             # process the new parcel jobs
-            new_redmond_parcel_data = pd.read_csv(os.path.join(working_folder_lu, new_redmond_parcel_data_file_name))
+            new_redmond_parcel_data = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.new_redmond_parcel_data_file_name))
             new_redmond_parcel_data = new_redmond_parcel_data[['BKRCastTAZ', 'EMPTOT_P']].copy(deep=True)
             new_redmond_parcel_data.rename(columns={'EMPTOT_P': 'Control'}, inplace=True)
             new_redmond_parcel_data['Control'] = new_redmond_parcel_data['Control'].round(0)
-            redmond_parcel_tazs = self.lookup_df[(self.lookup_df['Jurisdiction']=='Redmond') | (self.lookup_df['Jurisdiction']=='REDMOND')]
+            redmond_parcel_tazs = self.lookup_df[self.lookup_df['Jurisdiction']=='REDMOND']
             parcel_data_redmond = self.original_parcel_data_df[self.original_parcel_data_df['TAZ_P'].isin(redmond_parcel_tazs['BKRCastTAZ'])].copy(deep=True)
             parcel_data_redmond['BKRCastTAZ'] = parcel_data_redmond['TAZ_P']
             # calculate scaling factor
@@ -411,25 +397,25 @@ class LandUse:
             parcel_data_redmond_taz['scaling factor'] = parcel_data_redmond_taz['Control'] / parcel_data_redmond_taz['EMPTOT_P']
             parcel_data_redmond_taz['scaling factor'].fillna(0, inplace=True)
             # use the scaling factor to all the jobs in parcels within the corresponding travel model TAZ (TMTAZ)
-            job_columns = [i for i in columns_list if i != 'EMPTOT_P']
+            job_columns = [i for i in self.config.columns_list if i != 'EMPTOT_P']
             parcel_data_redmond = parcel_data_redmond.merge(parcel_data_redmond_taz[['scaling factor', 'BKRCastTAZ']], on='BKRCastTAZ', how='left')
             for job_column in job_columns:
                 parcel_data_redmond[f"{job_column}_SCALED"] = (parcel_data_redmond[job_column].astype('float64') * parcel_data_redmond['scaling factor']).round(0)
-            job_columns_scaled = [f"{i}_SCALED" for i in columns_list if i != 'EMPTOT_P']
+            job_columns_scaled = [f"{i}_SCALED" for i in self.config.columns_list if i != 'EMPTOT_P']
             parcel_data_redmond['EMPTOT_P_SCALED'] = parcel_data_redmond[job_columns_scaled].sum(axis=1)
             # compare the scaled job number with the control (new parcel data)
             parcel_data_redmond_scaled = parcel_data_redmond.groupby(by='BKRCastTAZ').sum()['EMPTOT_P_SCALED'].reset_index()
             parcel_data_redmond_scaled = parcel_data_redmond_scaled.merge(parcel_data_redmond_taz[['Control', 'BKRCastTAZ']], how='left')
             parcel_data_redmond_scaled['difference'] = parcel_data_redmond_scaled['EMPTOT_P_SCALED'] - parcel_data_redmond_scaled['Control']
-            logging.info(f"New Redmond parcel data file has {parcel_data_redmond_scaled['Control'].sum():,.0f} jobs.")
-            logging.info(f"Scaled Redmond parcel data file has {parcel_data_redmond_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
-            logging.info(f"Old parcel data file has {parcel_data_redmond['EMPTOT_P'].sum():,.0f} jobs in Redmond.")
+            self.logger.info(f"New Redmond parcel data file has {parcel_data_redmond_scaled['Control'].sum():,.0f} jobs.")
+            self.logger.info(f"Scaled Redmond parcel data file has {parcel_data_redmond_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
+            self.logger.info(f"Old parcel data file has {parcel_data_redmond['EMPTOT_P'].sum():,.0f} jobs in Redmond.")
             # merge the scaling factor to the table
             parcel_data_redmond_scaled = parcel_data_redmond_scaled.merge(parcel_data_redmond_taz[['scaling factor', 'BKRCastTAZ']], on='BKRCastTAZ', how='left')
             # walk through each BKRCastTAZ and distribute the difference back to parcels
-            logging.info(f"(Scaled Redmond job total - New Redmond job total) = {parcel_data_redmond['EMPTOT_P_SCALED'].sum() - new_redmond_parcel_data['Control'].sum()}")
-            logging.info("\nFinetuning the number of jobs in each parcel in Redmond...")
-            job_scaled_columns = [f'{i}_SCALED' for i in columns_list if i != 'EMPTOT_P']
+            self.logger.info(f"(Scaled Redmond job total - New Redmond job total) = {parcel_data_redmond['EMPTOT_P_SCALED'].sum() - new_redmond_parcel_data['Control'].sum()}")
+            self.logger.info("\nFinetuning the number of jobs in each parcel in Redmond...")
+            job_scaled_columns = [f'{i}_SCALED' for i in self.config.columns_list if i != 'EMPTOT_P']
             for _, row in parcel_data_redmond_scaled.iterrows():
                 tmtaz = row['BKRCastTAZ']
                 difference = row['difference']
@@ -465,48 +451,48 @@ class LandUse:
                         parcel_data_redmond.loc[parcel_data_redmond['PARCELID']==selected_parcel, selected_job] -= 1
                         parcel_data_redmond['EMPTOT_P_SCALED'] = parcel_data_redmond[job_scaled_columns].sum(axis=1)
             # compare the final scaled job number with the control
-            logging.info('Finetuning jobs in Kikrland complete! Comparing them again...')
+            self.logger.info('Finetuning jobs in Kikrland complete! Comparing them again...')
             parcel_data_redmond_scaled = parcel_data_redmond.groupby(by='BKRCastTAZ').sum()['EMPTOT_P_SCALED'].reset_index()
             parcel_data_redmond_scaled = parcel_data_redmond_scaled.merge(parcel_data_redmond_taz[['Control', 'BKRCastTAZ']], how='left')
             parcel_data_redmond_scaled['difference'] = parcel_data_redmond_scaled['EMPTOT_P_SCALED'] - parcel_data_redmond_scaled['Control']
-            logging.info(f"New Redmond parcel data file has {parcel_data_redmond_scaled['Control'].sum():,.0f} jobs.")
-            logging.info(f"Finetuned scaled Redmond parcel data file has {parcel_data_redmond_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
-            logging.info(f"(Finetuned and scaled Redmond job total - New Redmond job total) = {parcel_data_redmond['EMPTOT_P_SCALED'].sum() - new_redmond_parcel_data['Control'].sum()}")
-            parcel_data_redmond_scaled.to_csv(os.path.join(working_folder_lu, updated_parcel_file_redmond_name.split('.')[0] + f'_{modeller_initial}_{version}.csv'))
-            logging.info(f"Exporting Redmond parcel matching file to: {os.path.join(working_folder_lu, updated_parcel_file_redmond_name.split('.')[0] + f'_{modeller_initial}_{version}.csv')}\n")
+            self.logger.info(f"New Redmond parcel data file has {parcel_data_redmond_scaled['Control'].sum():,.0f} jobs.")
+            self.logger.info(f"Finetuned scaled Redmond parcel data file has {parcel_data_redmond_scaled['EMPTOT_P_SCALED'].sum():,.0f} jobs.")
+            self.logger.info(f"(Finetuned and scaled Redmond job total - New Redmond job total) = {parcel_data_redmond['EMPTOT_P_SCALED'].sum() - new_redmond_parcel_data['Control'].sum()}")
+            parcel_data_redmond_scaled.to_csv(os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_redmond_name.split('.')[0] + f'_{self.config.modeller_initial}_{self.config.version}.csv'))
+            self.logger.info(f"Exporting Redmond parcel matching file to: {os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_redmond_name.split('.')[0] + f'_{self.config.modeller_initial}_{self.config.version}.csv')}\n")
             # replace the old parcels in Redmond with those processed parcels
-            logging.info('Replacing the old parcels in Redmond with the parcels processed with the new numebr of jobs.')
+            self.logger.info('Replacing the old parcels in Redmond with the parcels processed with the new numebr of jobs.')
             parcel_data_redmond.set_index('PARCELID', inplace=True)
-            job_scaled_columns = [f'{i}_SCALED' for i in columns_list]
-            for job_column in columns_list:
+            job_scaled_columns = [f'{i}_SCALED' for i in self.config.columns_list]
+            for job_column in self.config.columns_list:
                 updated_parcel_df.loc[updated_parcel_df.index.isin(parcel_data_redmond.index), job_column] = parcel_data_redmond[job_column + '_SCALED']
 
         # update the total jobs 
         updated_parcel_df['EMPTOT_P'] = 0
-        for col in columns_list:
+        for col in self.config.columns_list:
             if col != 'EMPTOT_P':
                 updated_parcel_df['EMPTOT_P'] += updated_parcel_df[col]     
 
-        if set_Jobs_to_Zeros_All_Bel_Parcels_Not_in_New_Parcel_Data_File == True:
+        if self.config.set_Jobs_to_Zeros_All_Bel_Parcels_Not_in_New_Parcel_Data_File == True:
             jobs_to_be_zeroed_out = updated_parcel_df.loc[updated_parcel_df.index.isin(missing_bellevue_parcels_df['PARCELID']), 'EMPTOT_P'].sum()
-            updated_parcel_df.loc[updated_parcel_df.index.isin(missing_bellevue_parcels_df['PARCELID']), columns_list] = 0
-            logging.info('-----------------------------------------')
-            logging.warning('Some COB parcels are not provided in the ' + new_bellevue_parcel_data_file_name + '.')
-            logging.warning('But they exist in ' + original_parcel_file_name + '.')
-            logging.warning(f'Number of jobs in these parcels are now zeroed out: {jobs_to_be_zeroed_out:,.0f}\n')
+            updated_parcel_df.loc[updated_parcel_df.index.isin(missing_bellevue_parcels_df['PARCELID']), list(self.config.columns_list)] = 0
+            self.logger.info('-----------------------------------------')
+            self.logger.warning('Some COB parcels are not provided in the ' + self.config.new_bellevue_parcel_data_file_name + '.')
+            self.logger.warning('But they exist in ' + self.config.original_parcel_file_name + '.')
+            self.logger.warning(f'Number of jobs in these parcels are now zeroed out: {jobs_to_be_zeroed_out:,.0f}\n')
 
-        logging.info(f"Total jobs before change: {self.original_parcel_data_df['EMPTOT_P'].sum():,.0f}")
-        logging.info(f"Total jobs after change: {updated_parcel_df['EMPTOT_P'].sum():,.0f}\n")
+        self.logger.info(f"Total jobs before change: {self.original_parcel_data_df['EMPTOT_P'].sum():,.0f}")
+        self.logger.info(f"Total jobs after change: {updated_parcel_df['EMPTOT_P'].sum():,.0f}\n")
 
-        logging.info('Exporting parcel file(s)...')
-        updated_parcel_df.to_csv(os.path.join(working_folder_lu, updated_parcel_file_name), sep = ' ')
-        logging.info(f'Updated parcel file is exported in {os.path.join(working_folder_lu, updated_parcel_file_name)}.')
+        self.logger.info('Exporting parcel file(s)...')
+        updated_parcel_df.to_csv(os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_name), sep = ' ')
+        self.logger.info(f'Updated parcel file is exported in {os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_name)}.')
 
-        logging.info('Backing up the scripts for step 4...')
-        os.makedirs(os.path.join(working_folder_lu, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step 4 backup exported: {os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__))}')
-        logging.info('Step 4 done. Parcel files are updated with required columns.\n')
+        self.logger.info('Backing up the scripts for step 4...')
+        os.makedirs(os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step 4 backup exported: {os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__))}')
+        self.logger.info('Step 4 done. Parcel files are updated with required columns.\n')
 
 
     def step_5_sync_pop2parcels(self):
@@ -522,29 +508,30 @@ class LandUse:
         # 05/01/2025
         # move the paths into config.py
         
-        logging.info('\nLoading hh_and_persons.h5...')
-        hdf_file = h5py.File(os.path.join(working_folder_synpop, h5_file_name), "r")
-        hh_df = utility.h5_to_df(hdf_file, 'Household')
-
-        logging.info("Updating number of households using the synthetic population's households...")
-        hhs = hh_df.groupby('hhparcel')[['hhexpfac', 'hhsize']].sum().reset_index()
-        parcel_df = pd.read_csv(os.path.join(working_folder_lu, updated_parcel_file_name), sep = ' ')
-        parcel_df = parcel_df.merge(hhs, how = 'left', left_on = 'PARCELID', right_on = 'hhparcel')
-
-        parcel_df['HH_P']  = 0
-        parcel_df['HH_P'] = parcel_df['hhexpfac']
+        self.logger.info("Updating number of households using the synthetic population's households...")
+        parcel_df = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.updated_parcel_file_name), sep = ' ')
+        # only hhparcel and hhexpfac of hh_and_persons.h5 are read, in chunks
+        hhexpfac, households, unmatched = utility.sum_households_by_parcel(os.path.join(self.config.working_folder_synpop, self.config.h5_file_name), parcel_df['PARCELID'].to_numpy())
+        if len(unmatched) > 0:
+            self.logger.warning(f'{int(unmatched["households"].sum())} households are on {len(unmatched)} parcels not in the parcel file')
+        parcel_df['HH_P'] = np.round(hhexpfac).astype(int)
         parcel_df.fillna(0, inplace = True)
-        parcel_df.drop(['hhexpfac', 'hhsize', 'hhparcel'], axis = 1, inplace = True)
-        parcel_df['HH_P'] = parcel_df['HH_P'].round(0).astype(int)
-
-        logging.info('\nExporting future parcel file...')
-        parcel_df.to_csv(os.path.join(working_folder_lu, output_parcel_file), sep = ' ', index = False)
-        logging.info(f'Future parcel file is exported in {os.path.join(working_folder_lu, output_parcel_file)}...')
-
-        logging.info('Backing up the scripts for step 5...')
-        os.makedirs(os.path.join(working_folder_lu, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step 5 backup exported: {os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__))}')
-        logging.info('Step 5 done. Synchronizing the synthetic population to parcel file is completed\n')
-        logging.info('Land use process is complete. Please check the output numbers.\n')
-        logging.info('After checking, please replace hh_and_persons.h5 BKRCast model input\popsim with the 20xx_baseyear_hh_and_persons_xx_vx.x.h5 file in I drive.\n')  # I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\2025baseyear_TestFrom2024baseyear
\ No newline at end of file
+
+        adjusted_hhs_path = os.path.join(self.config.working_folder_synpop, self.config.adjusted_hhs_by_parcel_file)
+        if os.path.exists(adjusted_hhs_path):
+            hhs_by_parcel = pd.concat([pd.DataFrame({'hhparcel': parcel_df['PARCELID'], 'households': households}),
+                                       unmatched[['hhparcel', 'households']]], ignore_index = True)
+            step5_checks = checks.check_step5(hhs_by_parcel, parcel_df, pd.read_csv(adjusted_hhs_path), self.lookup_df, self.config.subset_area)
+            checks.log_checks(step5_checks, 'Step 5 cross check', self.logger)
+
+        self.logger.info('\nExporting future parcel file...')
+        parcel_df.to_csv(os.path.join(self.config.working_folder_lu, self.config.output_parcel_file), sep = ' ', index = False)
+        self.logger.info(f'Future parcel file is exported in {os.path.join(self.config.working_folder_lu, self.config.output_parcel_file)}...')
+
+        self.logger.info('Backing up the scripts for step 5...')
+        os.makedirs(os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step 5 backup exported: {os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__))}')
+        self.logger.info('Step 5 done. Synchronizing the synthetic population to parcel file is completed\n')
+        self.logger.info('Land use process is complete. Please check the output numbers.\n')
+        self.logger.info('After checking, please replace hh_and_persons.h5 BKRCast model input\popsim with the 20xx_baseyear_hh_and_persons_xx_vx.x.h5 file in I drive.\n')  # I:\Modeling and Analysis Group\01_BKRCast\BKRPopSim\PopulationSim_BaseData\2025baseyear_TestFrom2024baseyear
\ No newline at end of file
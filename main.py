@@ -1,6 +1,7 @@
-from config import step
+import sys
+from config import load_config
 
-def main(run_step=1, debug=False):
+def main(run_step=None, debug=False, config=None):
     """
     Run the following steps one by one. Check the output files each step to make sure the output values make sense.
     Go to *landuse process*:
@@ -16,10 +17,15 @@ def main(run_step=1, debug=False):
         run_step = 3: run LandUse step 3 - interpolate parcel files between PSRC bookends
         run_step = 4: run LandUse step 4 - replace parcel columns with required data columns
         run_step = 5: run LandUse step 5 - sync population to parcels
+    config is the configuration of the run (see config.load_config), loaded from the defaults, BKR_CONFIG and the
+    BKR_ environment variables if not given. run_step defaults to config.step.
     """
+    config = config or load_config()
+    run_step = config.step if run_step is None else run_step
+
     if run_step in [1, 2, 3, 4, 5]:
         from landuse.landuse import LandUse
-        landuse = LandUse(run_step=run_step)
+        landuse = LandUse(config, run_step=run_step)
     
     # run the first two steps of the land use process
     if run_step == 1:
@@ -36,7 +42,7 @@ def main(run_step=1, debug=False):
     # switch to the synthetic population process and run all the steps
     if run_step in ['A', 'B', 'C']:
         from synthetic_population.synthetic_population import SynPop
-        synpop = SynPop(run_step=run_step)
+        synpop = SynPop(config, run_step=run_step)
 
     if run_step == 'A':
         synpop.step_A_interpolate_hhps()
@@ -47,4 +53,5 @@ def main(run_step=1, debug=False):
     
 
 if __name__ == '__main__':
-    main(run_step=step, debug=True)
\ No newline at end of file
+    # python main.py [settings.toml]
+    main(debug=True, config=load_config(sys.argv[1] if len(sys.argv) > 1 else None))
\ No newline at end of file
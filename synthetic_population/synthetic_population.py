@@ -8,27 +8,28 @@ import pandas as pd
 import h5py
 
 import utility
-from config import *
-
-if not sys.warnoptions:
-    import warnings
-    warnings.simplefilter("ignore")
-
-log_fname = os.path.join(working_folder_synpop, f"log_synpop_{modeller_initial}_{version}_step{step}_{timestamp}.log")
-logging.basicConfig(filename=log_fname, level=logging.INFO, format="%(asctime)s: %(levelname)s - %(message)s")
-# also log info to console
-console_handler = logging.StreamHandler()
-logger = logging.getLogger()
-logger.addHandler(console_handler)
+from config import Config
+from crosscheck import checks
 
 
 class SynPop:
-    def __init__(self, run_step, backup_folder='backup'):
-        logging.info(f'Creating SynPop object...I/O {version} by modeller: {modeller_initial}')
-        logging.info('Loading synthetic populations...')
-        self.run_step = run_step
+    def __init__(self, config: Config, run_step=None, backup_folder='backup'):
+        """
+        :param config: configuration of the run, see config.load_config()
+        :param run_step: step to run, default config.step
+        """
+        self.config = config
+        self.run_step = config.step if run_step is None else run_step
         self.backup_folder = backup_folder
-        logging.info(f'Running step {self.run_step}...\n')
+        if not sys.warnoptions:
+            import warnings
+            warnings.simplefilter("ignore")
+        # logging is set up here rather than on import, so every object (scenario) writes its own log file
+        self.log_fname = os.path.join(config.working_folder_synpop, f"log_synpop_{config.modeller_initial}_{config.version}_step{self.run_step}_{config.timestamp}.log")
+        self.logger = utility.scenario_logger('synpop', self.log_fname)
+        self.logger.info(f'Creating SynPop object...I/O {self.config.version} by modeller: {self.config.modeller_initial}')
+        self.logger.info('Loading synthetic populations...')
+        self.logger.info(f'Running step {self.run_step}...\n')
     
         # step A
         self.future_hdf_file = None
@@ -49,7 +50,7 @@ class SynPop:
         # step C
         self.hhs_df = None
 
-        print('Logging file created: ', log_fname)
+        print('Logging file created: ', self.log_fname)
 
     def step_A_interpolate_hhps(self):
         """
@@ -67,8 +68,8 @@ class SynPop:
         Move the paths to config.py
         """
         # load inputs
-        self.future_hdf_file = h5py.File(future_year_synpop_file, "r")
-        self.base_hdf_file = h5py.File(base_year_synpop_file, "r")
+        self.future_hdf_file = h5py.File(self.config.future_year_synpop_file, "r")
+        self.base_hdf_file = h5py.File(self.config.base_year_synpop_file, "r")
 
         self.future_hh_df = utility.h5_to_df(self.future_hdf_file, 'Household')
         self.base_hh_df = utility.h5_to_df(self.base_hdf_file, 'Household')
@@ -79,39 +80,38 @@ class SynPop:
         self.base_hh_df['base_total_persons'] = self.base_hh_df['hhexpfac'] * self.base_hh_df['hhsize']
         self.base_hh_df['base_total_hhs'] = self.base_hh_df['hhexpfac']
 
-        self.parcel_df = pd.read_csv(parcel_filename, low_memory=False)
-        self.parcel_df.loc[self.parcel_df['Jurisdiction']=='Redmond', 'Jurisdiction'] = 'REDMOND'
+        self.parcel_df = utility.normalize_jurisdiction(pd.read_csv(self.config.parcel_filename, low_memory=False))
         self.future_hh_df = self.future_hh_df.merge(self.parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ']], how = 'left', left_on = 'hhparcel', right_on = 'PSRC_ID')
         self.future_hhs_by_geoid10 = self.future_hh_df.groupby('GEOID10')[['future_total_hhs', 'future_total_persons']].sum()
         self.base_hh_df = self.base_hh_df.merge(self.parcel_df, how = 'left', left_on = 'hhparcel', right_on = 'PSRC_ID')
         self.base_hhs_by_geoid10 = self.base_hh_df.groupby('GEOID10')[['base_total_hhs', 'base_total_persons']].sum()
 
-        logging.info(f"Future total hhs: {self.future_hh_df['future_total_hhs'].sum():,.0f}")
-        logging.info(f"Future total persons: {self.future_hh_df['future_total_persons'].sum():,.0f}\n")
-        logging.info(f"Base total hhs: {self.base_hh_df['base_total_hhs'].sum():,.0f}")
-        logging.info(f"Base total persons: {self.base_hh_df['base_total_persons'].sum():,.0f}\n")
+        self.logger.info(f"Future total hhs: {self.future_hh_df['future_total_hhs'].sum():,.0f}")
+        self.logger.info(f"Future total persons: {self.future_hh_df['future_total_persons'].sum():,.0f}\n")
+        self.logger.info(f"Base total hhs: {self.base_hh_df['base_total_hhs'].sum():,.0f}")
+        self.logger.info(f"Base total persons: {self.base_hh_df['base_total_persons'].sum():,.0f}\n")
 
-        self.ofm_df = pd.read_csv(ofm_estimate_template_file)
+        self.ofm_df = pd.read_csv(self.config.ofm_estimate_template_file)
         self.ofm_df = self.ofm_df.merge(self.future_hhs_by_geoid10, how = 'left', left_on = 'GEOID10', right_index = True)
         self.ofm_df = self.ofm_df.merge(self.base_hhs_by_geoid10, how = 'left', left_on = 'GEOID10', right_index = True)
 
         # start processing
-        if target_year <= future_year and target_year >= base_year:
+        if self.config.target_year <= self.config.future_year and self.config.target_year >= self.config.base_year:
             # right between the bookends.
-            logging.info('Interpolating...')
+            self.logger.info('Interpolating...')
         else:
-            logging.info('Extropolating...')
+            self.logger.info('Extropolating...')
         
             
         self.ofm_df.fillna(0, inplace = True)
-        ratio = (target_year - base_year) * 1.0 / (future_year - base_year)
+        ratio = (self.config.target_year - self.config.base_year) * 1.0 / (self.config.future_year - self.config.base_year)
         self.ofm_df['OFM_groupquarters'] = 0
         self.ofm_df['OFM_hhs'] = ((self.ofm_df['future_total_hhs'] - self.ofm_df['base_total_hhs']) * ratio + self.ofm_df['base_total_hhs']).round(0)
         self.ofm_df['OFM_persons'] = ((self.ofm_df['future_total_persons'] - self.ofm_df['base_total_persons']) * ratio + self.ofm_df['base_total_persons']).round(0)
 
-        logging.info(f"Estimated total hhs: {self.ofm_df['OFM_hhs'].sum():,.0f}")
-        logging.info(f"Estimated total persons: {self.ofm_df['OFM_persons'].sum():,.0f}")
-        self.ofm_df[['GEOID10', 'OFM_groupquarters', 'OFM_hhs', 'OFM_persons']].to_csv(interploated_ofm_estimate_by_GEOID, index = False)
+        self.logger.info(f"Estimated total hhs: {self.ofm_df['OFM_hhs'].sum():,.0f}")
+        self.logger.info(f"Estimated total persons: {self.ofm_df['OFM_persons'].sum():,.0f}")
+        self.ofm_df[['GEOID10', 'OFM_groupquarters', 'OFM_hhs', 'OFM_persons']].to_csv(self.config.interploated_ofm_estimate_by_GEOID, index = False)
 
         # summarize total households and persons by parcel id
         base_hhs_by_parcel = self.base_hh_df[['PSRC_ID', 'base_total_hhs', 'base_total_persons']].groupby('PSRC_ID').sum()
@@ -127,15 +127,15 @@ class SynPop:
         # merge the target table into the parcel ids and BKRCAST taz ids
         target_hhs_by_parcel = self.parcel_df[['PSRC_ID', 'Jurisdiction', 'BKRCastTAZ', 'GEOID10']].merge(target_hhs_by_parcel[['PSRC_ID', 'total_hhs_by_parcel', 'total_persons_by_parcel']], on = 'PSRC_ID', how = 'left')
         target_hhs_by_parcel.fillna(0, inplace= True)
-        target_hhs_by_parcel.to_csv(hhs_by_parcel_filename, index = False)
-        logging.info(f'Estimated households by parcel exported: {hhs_by_parcel_filename}')
+        target_hhs_by_parcel.to_csv(self.config.hhs_by_parcel_filename, index = False)
+        self.logger.info(f'Estimated households by parcel exported: {self.config.hhs_by_parcel_filename}')
 
         # calcuate the average number of persons per household by jurisdiction
         avg_person_per_hhs_df = target_hhs_by_parcel[['Jurisdiction', 'total_hhs_by_parcel', 'total_persons_by_parcel']].groupby('Jurisdiction').sum()
         avg_person_per_hhs_df['avg_persons_per_hh'] = avg_person_per_hhs_df['total_persons_by_parcel'] / avg_person_per_hhs_df['total_hhs_by_parcel']
-        logging.info('%s' % avg_person_per_hhs_df)
+        self.logger.info('%s' % avg_person_per_hhs_df)
 
-        logging.info('\nGenerating households by TAZ... ')
+        self.logger.info('\nGenerating households by TAZ... ')
         target_hhs_by_taz = target_hhs_by_parcel[['BKRCastTAZ', 'total_hhs_by_parcel']].groupby('BKRCastTAZ').sum().reset_index()
         target_hhs_by_taz = target_hhs_by_taz.loc[target_hhs_by_taz['total_hhs_by_parcel'] > 0]
         self.future_hh_df.drop(['PSRC_ID', 'future_total_persons', 'future_total_hhs', 'GEOID10', 'BKRCastTAZ'], axis = 1, inplace=True)
@@ -151,27 +151,27 @@ class SynPop:
             else:
                 # sample num_hhs_popsim households
                 target_hhs_df = pd.concat([target_hhs_df, hhs_in_taz.sample(n = num_hhs_popsim)])
-        logging.info(f"Total households: {target_hhs_df['hhexpfac'].sum():,.0f}")
-        logging.info(f"estimated_hhs_from_ofm - total_hhs_by_taz = {(self.ofm_df['OFM_hhs'].sum() - target_hhs_df['hhexpfac'].sum()):,.0f}")
+        self.logger.info(f"Total households: {target_hhs_df['hhexpfac'].sum():,.0f}")
+        self.logger.info(f"estimated_hhs_from_ofm - total_hhs_by_taz = {(self.ofm_df['OFM_hhs'].sum() - target_hhs_df['hhexpfac'].sum()):,.0f}")
 
-        logging.info('\nGenerating persons...')
+        self.logger.info('\nGenerating persons...')
         future_persons_df = utility.h5_to_df(self.future_hdf_file, 'Person')
         target_persons_df = future_persons_df.loc[future_persons_df['hhno'].isin(target_hhs_df['hhno'])]
-        logging.info(f"Total persons: {target_persons_df['psexpfac'].sum():,.0f}")
-        logging.info(f"estimated_persons_from_ofm - total_persons_by_taz = {(self.ofm_df['OFM_persons'].sum() - target_persons_df['psexpfac'].sum()):,.0f}")
-        logging.info('Exporting the estimated households and persons by TAZ into hdf5 format...')
-        output_h5_file = h5py.File(final_output_pop_file, 'w')
+        self.logger.info(f"Total persons: {target_persons_df['psexpfac'].sum():,.0f}")
+        self.logger.info(f"estimated_persons_from_ofm - total_persons_by_taz = {(self.ofm_df['OFM_persons'].sum() - target_persons_df['psexpfac'].sum()):,.0f}")
+        self.logger.info('Exporting the estimated households and persons by TAZ into hdf5 format...')
+        output_h5_file = h5py.File(self.config.final_output_pop_file, 'w')
         utility.df_to_h5(target_hhs_df, output_h5_file, 'Household')
         utility.df_to_h5(target_persons_df, output_h5_file, 'Person')
-        logging.info(f'Estimated household and persons by TAZ file exported: {output_h5_file}')
+        self.logger.info(f'Estimated household and persons by TAZ file exported: {output_h5_file}')
         output_h5_file.close()
 
-        logging.info('\nBacking up the scripts for step A...')
-        os.makedirs(os.path.join(working_folder_synpop, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_synpop, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step A backup exported: {os.path.join(working_folder_synpop, self.backup_folder, version, os.path.basename(__file__))}')
+        self.logger.info('\nBacking up the scripts for step A...')
+        os.makedirs(os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step A backup exported: {os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version, os.path.basename(__file__))}')
 
-        logging.info('\nExecuting step A...done. Households and persons estimation by GEOID is completed.\n')
+        self.logger.info('\nExecuting step A...done. Households and persons estimation by GEOID is completed.\n')
 
     def step_B_distribute_hh2parcel(self, debug=False):
         """
@@ -193,33 +193,32 @@ class SynPop:
         A control file for populationsim is generated as well. 
         """
 
-        self.lookup_df = pd.read_csv(lookup_file, low_memory = False)
-        self.lookup_df.loc[self.lookup_df['Jurisdiction']=='Redmond', 'Jurisdiction'] = 'REDMOND'
-        self.hhs_by_parcel_df = pd.read_csv(hhs_by_parcel)
-        self.cob_du_df = pd.read_csv(os.path.join(working_folder_lu, cob_du_file))
-        self.kc_du_df = pd.read_csv(os.path.join(working_folder_lu, kc_du_file))
+        self.lookup_df = checks.load_lookup(self.config.lookup_file) # cached, shared with the cross checks
+        self.hhs_by_parcel_df = utility.normalize_jurisdiction(pd.read_csv(self.config.hhs_by_parcel))
+        self.cob_du_df = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.cob_du_file))
+        self.kc_du_df = pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.kc_du_file))
         # get areas
-        areas = subset_area.copy()
+        areas = list(self.config.subset_area)
 
         # make a deep copy of hhs_by_parcel_df for number adjusting
         adjusted_hhs_by_parcel_df = self.hhs_by_parcel_df.copy(deep=True)
         adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.rename(columns = {'total_hhs_by_parcel': 'adj_hhs_by_parcel', 'total_persons_by_parcel':'adj_persons_by_parcel'})
         
         # Kirkland local estimates TODO: below includes duplicated dataframe, adjust them if we also have Kirkland's land use
-        if hhs_control_total_by_TAZ_K != '':
+        if self.config.hhs_control_total_by_TAZ_K != '':
             areas = [i for i in areas if i != 'KIRKLAND']
-            logging.info(f'A Kirkland household control file by TAZ is provided: {hhs_control_total_by_TAZ_K}')
-            hhs_control_total_by_TAZ_K_df = pd.read_csv(os.path.join(working_folder_lu, hhs_control_total_by_TAZ_K))
+            self.logger.info(f'A Kirkland household control file by TAZ is provided: {self.config.hhs_control_total_by_TAZ_K}')
+            hhs_control_total_by_TAZ_K_df = utility.normalize_jurisdiction(pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.hhs_control_total_by_TAZ_K)))
             hhs_control_total_by_TAZ_K_df['total_persons'] = 0
             hhs_control_total_by_TAZ_K_df['total_hhs'] = 0
             juris_list = hhs_control_total_by_TAZ_K_df['Jurisdiction'].unique()
-            logging.info(f'The following jurisdictions are included: {juris_list}')
+            self.logger.info(f'The following jurisdictions are included: {juris_list}')
             # calculate households and persons by the pre-defined occupancy rates
             mask = hhs_control_total_by_TAZ_K_df['Jurisdiction'].isin(juris_list)
-            hhs_control_total_by_TAZ_K_df.loc[mask, 'sfhhs'] = hhs_control_total_by_TAZ_K_df[mask]['SFUnits'] * sf_occupancy_rate_Kirkland
-            hhs_control_total_by_TAZ_K_df.loc[mask, 'mfhhs'] = hhs_control_total_by_TAZ_K_df[mask]['MFUnits'] * mf_occupancy_rate_Kirkland
+            hhs_control_total_by_TAZ_K_df.loc[mask, 'sfhhs'] = hhs_control_total_by_TAZ_K_df[mask]['SFUnits'] * self.config.sf_occupancy_rate_Kirkland
+            hhs_control_total_by_TAZ_K_df.loc[mask, 'mfhhs'] = hhs_control_total_by_TAZ_K_df[mask]['MFUnits'] * self.config.mf_occupancy_rate_Kirkland
             hhs_control_total_by_TAZ_K_df.loc[mask, 'total_hhs'] = hhs_control_total_by_TAZ_K_df[mask]['sfhhs'] + hhs_control_total_by_TAZ_K_df[mask]['mfhhs']
-            hhs_control_total_by_TAZ_K_df.loc[mask, 'total_persons'] = hhs_control_total_by_TAZ_K_df[mask]['sfhhs'] * avg_persons_per_sfhh_Kirkland + hhs_control_total_by_TAZ_K_df[mask]['mfhhs'] * avg_persons_per_mfhh_Kirkland
+            hhs_control_total_by_TAZ_K_df.loc[mask, 'total_persons'] = hhs_control_total_by_TAZ_K_df[mask]['sfhhs'] * self.config.avg_persons_per_sfhh_Kirkland + hhs_control_total_by_TAZ_K_df[mask]['mfhhs'] * self.config.avg_persons_per_mfhh_Kirkland
 
             # get parcels within trip model Redmond and Kirkland TAZ (old taz system: TMTAZ)
             parcels_in_trip_model_TAZ_df = pd.merge(self.hhs_by_parcel_df[['PSRC_ID', 'total_hhs_by_parcel', 'total_persons_by_parcel', 'BKRCastTAZ']], self.lookup_df.loc[self.lookup_df['BKRTMTAZ'].notna(), ['PSRC_ID', 'Jurisdiction', 'BKRTMTAZ']], on = 'PSRC_ID', how = 'inner')
@@ -241,27 +240,26 @@ class SynPop:
                                           'total_hhs': 'total_hhs_control', 'total_persons': 'total_persons_control'}, inplace=True)
             hhs_by_TAZ_df.fillna(value = {'total_hhs_control' : 0, 'total_persons_control' : 0}, inplace = True)
             hhs_by_TAZ_df = hhs_by_TAZ_df.reset_index()
-            hhs_by_TAZ_df.to_csv(os.path.join(working_folder_synpop, hhs_by_taz_comparison_file), index = False)
+            hhs_by_TAZ_df.to_csv(os.path.join(self.config.working_folder_synpop, self.config.hhs_by_taz_comparison_file), index = False)
 
             # start scaling the hhs of Kirkland in the PSRC's interpolated data to the Kirkland landuse data
-            logging.info("Scaling Kirkland's interpolated hhs to their local forecasts...")
+            self.logger.info("Scaling Kirkland's interpolated hhs to their local forecasts...")
             if _taz_col not in parcels_in_trip_model_TAZ_df.columns:
                 adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.merge(parcels_in_trip_model_TAZ_df[['PSRC_ID', _taz_col]], on = 'PSRC_ID', how = 'left')        
             
-            for city in juris_list:
-                # reset hhs and persons to zero in Kirkland parcels that are not included in interpolated estimates. We will use their local forecast.
-                adjusted_hhs_by_parcel_df.loc[(adjusted_hhs_by_parcel_df['Jurisdiction'].isin(city.upper(), city)) & \
-                                              adjusted_hhs_by_parcel_df[_taz_col].isna(), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
+            # reset hhs and persons to zero in Kirkland parcels that are not included in interpolated estimates. We will use their local forecast.
+            juris_mask = adjusted_hhs_by_parcel_df['Jurisdiction'].isin(juris_list).to_numpy()
+            adjusted_hhs_by_parcel_df.loc[juris_mask & adjusted_hhs_by_parcel_df[_taz_col].isna(), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
 
             # for a TAZ that has no hhs in PSRC erstimate but has hhs in local jurisdiction estimate, evenly distribute hhs to all parcels in that TAZ
             tazs_for_evenly_distri_df = hhs_by_TAZ_df.loc[hhs_by_TAZ_df['total_hhs_interpolated_psrc'] == 0]
-            logging.info('Evenly distribute hhs on parcels in the following trip model TAZs: ')
+            self.logger.info('Evenly distribute hhs on parcels in the following trip model TAZs: ')
             for row in tazs_for_evenly_distri_df.itertuples():
-                logging.info(f"\t{_taz_col}: {getattr(row, _taz_col)}, total_hhs_interpolated_psrc: {row.total_hhs_interpolated_psrc}, total_hhs_control: {row.total_hhs_control}")
+                self.logger.info(f"\t{_taz_col}: {getattr(row, _taz_col)}, total_hhs_interpolated_psrc: {row.total_hhs_interpolated_psrc}, total_hhs_control: {row.total_hhs_control}")
                 # find parcels within this taz
                 counts = adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df[_taz_col] == getattr(row, _taz_col)].shape[0]
                 if counts == 0 and row.total_hhs_control > 0:
-                    logging.info(f'TAZ {getattr(row, _taz_col)} is has no parcels but has {row.total_hhs_control} households.')
+                    self.logger.info(f'TAZ {getattr(row, _taz_col)} is has no parcels but has {row.total_hhs_control} households.')
                     continue
                 adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df[_taz_col] == getattr(row, _taz_col), 'adj_hhs_by_parcel'] = row.total_hhs_control / counts
                 adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df[_taz_col] == getattr(row, _taz_col), 'adj_persons_by_parcel'] = row.total_persons_control / counts
@@ -276,8 +274,8 @@ class SynPop:
             adjusted_hhs_by_parcel_df['adj_hhs_by_parcel_'] = adjusted_hhs_by_parcel_df['adj_hhs_by_parcel'] * adjusted_hhs_by_parcel_df['ratio_hhs']
             adjusted_hhs_by_parcel_df['adj_persons_by_parcel_'] = adjusted_hhs_by_parcel_df['adj_persons_by_parcel'] * adjusted_hhs_by_parcel_df['ratio_persons']
             # replace the interpolated hhs and persons with the local estimates
-            for city in juris_list:
-                adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'].isin(city.upper(), city), 'adj_hhs_by_parcel'] = 0
+            # the left merge above keeps the row order, so the jurisdiction mask is still valid
+            adjusted_hhs_by_parcel_df.loc[juris_mask, 'adj_hhs_by_parcel'] = 0
             mask = adjusted_hhs_by_parcel_df[_taz_col].isin(hhs_control_total_by_TAZ_K_df_.index)
             adjusted_hhs_by_parcel_df.loc[mask, 'adj_hhs_by_parcel'] = adjusted_hhs_by_parcel_df.loc[mask, 'adj_hhs_by_parcel_']
             adjusted_hhs_by_parcel_df.drop(columns = ['ratio_hhs', 'ratio_persons'], inplace = True)
@@ -285,23 +283,23 @@ class SynPop:
             hhs_by_TAZ_df = hhs_by_TAZ_df.merge(adjusted_hhs_by_parcel_df.groupby(by=_taz_col).sum()[['adj_hhs_by_parcel', 'adj_persons_by_parcel']].reset_index(),
                                                 on=_taz_col)
         else:
-            logging.info('No household estimate is provided by Kirkland.')
+            self.logger.info('No household estimate is provided by Kirkland.')
 
         # Redmond local estiamtes
-        if hhs_control_total_by_TAZ_R != '':
+        if self.config.hhs_control_total_by_TAZ_R != '':
             areas = [i for i in areas if i != 'REDMOND']
-            logging.info(f'A Redmond household control file by TAZ is provided: {hhs_control_total_by_TAZ_R}')
-            hhs_control_total_by_TAZ_R_df = pd.read_csv(os.path.join(working_folder_lu, hhs_control_total_by_TAZ_R))
+            self.logger.info(f'A Redmond household control file by TAZ is provided: {self.config.hhs_control_total_by_TAZ_R}')
+            hhs_control_total_by_TAZ_R_df = utility.normalize_jurisdiction(pd.read_csv(os.path.join(self.config.working_folder_lu, self.config.hhs_control_total_by_TAZ_R)))
             juris_list = hhs_control_total_by_TAZ_R_df['Jurisdiction'].unique()
 
             hhs_control_total_by_TAZ_R_df['total_persons'] = 0
             hhs_control_total_by_TAZ_R_df['total_hhs'] = 0
             # calculate households and persons by the pre-defined occupancy rates
             mask = hhs_control_total_by_TAZ_R_df['Jurisdiction'].isin(juris_list)
-            hhs_control_total_by_TAZ_R_df.loc[mask, 'sfhhs'] = hhs_control_total_by_TAZ_R_df[mask]['SFUnits'] * sf_occupancy_rate_Redmond
-            hhs_control_total_by_TAZ_R_df.loc[mask, 'mfhhs'] = hhs_control_total_by_TAZ_R_df[mask]['MFUnits'] * mf_occupancy_rate_Redmond
+            hhs_control_total_by_TAZ_R_df.loc[mask, 'sfhhs'] = hhs_control_total_by_TAZ_R_df[mask]['SFUnits'] * self.config.sf_occupancy_rate_Redmond
+            hhs_control_total_by_TAZ_R_df.loc[mask, 'mfhhs'] = hhs_control_total_by_TAZ_R_df[mask]['MFUnits'] * self.config.mf_occupancy_rate_Redmond
             hhs_control_total_by_TAZ_R_df.loc[mask, 'total_hhs'] = hhs_control_total_by_TAZ_R_df[mask]['sfhhs'] + hhs_control_total_by_TAZ_R_df[mask]['mfhhs']
-            hhs_control_total_by_TAZ_R_df.loc[mask, 'total_persons'] = hhs_control_total_by_TAZ_R_df[mask]['sfhhs'] * avg_persons_per_sfhh_Redmond + hhs_control_total_by_TAZ_R_df[mask]['mfhhs'] * avg_persons_per_mfhh_Redmond
+            hhs_control_total_by_TAZ_R_df.loc[mask, 'total_persons'] = hhs_control_total_by_TAZ_R_df[mask]['sfhhs'] * self.config.avg_persons_per_sfhh_Redmond + hhs_control_total_by_TAZ_R_df[mask]['mfhhs'] * self.config.avg_persons_per_mfhh_Redmond
 
             # get parcels within trip model Redmond TAZ (old taz system: TMTAZ)
             parcels_in_trip_model_TAZ_df = pd.merge(self.hhs_by_parcel_df[['PSRC_ID', 'total_hhs_by_parcel', 'total_persons_by_parcel', 'BKRCastTAZ']], self.lookup_df.loc[self.lookup_df['BKRTMTAZ'].notna(), ['PSRC_ID', 'Jurisdiction', 'BKRTMTAZ']], on = 'PSRC_ID', how = 'inner')
@@ -323,27 +321,26 @@ class SynPop:
                                           'total_hhs': 'total_hhs_control', 'total_persons': 'total_persons_control'}, inplace=True)
             hhs_by_TAZ_df.fillna(value = {'total_hhs_control' : 0, 'total_persons_control' : 0}, inplace = True)
             hhs_by_TAZ_df = hhs_by_TAZ_df.reset_index()
-            hhs_by_TAZ_df.to_csv(os.path.join(working_folder_synpop, hhs_by_taz_comparison_file), index = False)
+            hhs_by_TAZ_df.to_csv(os.path.join(self.config.working_folder_synpop, self.config.hhs_by_taz_comparison_file), index = False)
 
             # start scaling the hhs of Redmond in the PSRC's interpolated data to the Redmond landuse data
-            logging.info("Scaling Redmond's interpolated hhs to their local forecasts...")
+            self.logger.info("Scaling Redmond's interpolated hhs to their local forecasts...")
             if _taz_col not in parcels_in_trip_model_TAZ_df.columns:
                 adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.merge(parcels_in_trip_model_TAZ_df[['PSRC_ID', _taz_col]], on = 'PSRC_ID', how = 'left')        
             
-            for city in juris_list:
-                # reset hhs and persons to zero in Kirkland and Redmond parcels that are not included in interpolated estimates. We will use their local forecast.
-                adjusted_hhs_by_parcel_df.loc[(adjusted_hhs_by_parcel_df['Jurisdiction'].isin([city.upper(), city])) & \
-                                              (adjusted_hhs_by_parcel_df[_taz_col].isna()), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
+            # reset hhs and persons to zero in Kirkland and Redmond parcels that are not included in interpolated estimates. We will use their local forecast.
+            juris_mask = adjusted_hhs_by_parcel_df['Jurisdiction'].isin(juris_list).to_numpy()
+            adjusted_hhs_by_parcel_df.loc[juris_mask & adjusted_hhs_by_parcel_df[_taz_col].isna(), ['adj_hhs_by_parcel', 'adj_persons_by_parcel']] = 0
 
             # for a TAZ that has no hhs in PSRC erstimate but has hhs in local jurisdiction estimate, evenly distribute hhs to all parcels in that TAZ
             tazs_for_evenly_distri_df = hhs_by_TAZ_df.loc[hhs_by_TAZ_df['total_hhs_interpolated_psrc'] == 0]
-            logging.info('Evenly distribute hhs on parcels in the following trip model TAZs: ')
+            self.logger.info('Evenly distribute hhs on parcels in the following trip model TAZs: ')
             for row in tazs_for_evenly_distri_df.itertuples():
-                logging.info(f"\t{_taz_col}: {getattr(row, _taz_col)}, total_hhs_interpolated_psrc: {row.total_hhs_interpolated_psrc}, total_hhs_control: {row.total_hhs_control}")
+                self.logger.info(f"\t{_taz_col}: {getattr(row, _taz_col)}, total_hhs_interpolated_psrc: {row.total_hhs_interpolated_psrc}, total_hhs_control: {row.total_hhs_control}")
                 # find parcels within this taz
                 counts = adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df[_taz_col] == getattr(row, _taz_col)].shape[0]
                 if counts == 0 and row.total_hhs_control > 0:
-                    logging.info(f'TAZ {getattr(row, _taz_col)} is has no parcels but has {row.total_hhs_control} households.')
+                    self.logger.info(f'TAZ {getattr(row, _taz_col)} is has no parcels but has {row.total_hhs_control} households.')
                     continue
                 adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df[_taz_col] == getattr(row, _taz_col), 'adj_hhs_by_parcel'] = row.total_hhs_control / counts
                 adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df[_taz_col] == getattr(row, _taz_col), 'adj_persons_by_parcel'] = row.total_persons_control / counts
@@ -358,8 +355,8 @@ class SynPop:
             adjusted_hhs_by_parcel_df['adj_hhs_by_parcel_'] = adjusted_hhs_by_parcel_df['adj_hhs_by_parcel'] * adjusted_hhs_by_parcel_df['ratio_hhs']
             adjusted_hhs_by_parcel_df['adj_persons_by_parcel_'] = adjusted_hhs_by_parcel_df['adj_persons_by_parcel'] * adjusted_hhs_by_parcel_df['ratio_persons']
             # replace the interpolated hhs and persons with the local estimates
-            for city in juris_list:
-                adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'].isin([city.upper(), city]), 'adj_hhs_by_parcel'] = 0
+            # the left merge above keeps the row order, so the jurisdiction mask is still valid
+            adjusted_hhs_by_parcel_df.loc[juris_mask, 'adj_hhs_by_parcel'] = 0
             mask = adjusted_hhs_by_parcel_df[_taz_col].isin(hhs_control_total_by_TAZ_R_df_.index)
             adjusted_hhs_by_parcel_df.loc[mask, 'adj_hhs_by_parcel'] = adjusted_hhs_by_parcel_df.loc[mask, 'adj_hhs_by_parcel_']
             adjusted_hhs_by_parcel_df.drop(columns = ['ratio_hhs', 'ratio_persons'], inplace = True)
@@ -367,7 +364,7 @@ class SynPop:
             hhs_by_TAZ_df = hhs_by_TAZ_df.merge(adjusted_hhs_by_parcel_df.groupby(by=_taz_col).sum()[['adj_hhs_by_parcel', 'adj_persons_by_parcel']].reset_index(),
                                                 on=_taz_col)
         else:
-            logging.info('No household estimate is provided by Redmond.')
+            self.logger.info('No household estimate is provided by Redmond.')
 
         # replace hhs estimate with COB's forecast
         # if some parcels are missing from the cob_du_df, export them for further investigation.
@@ -378,33 +375,33 @@ class SynPop:
             missing_parcels = set()
             missing_fname = ''
             if cob_total_parcels_df.shape[0] > cob_parcels_provided:
-                logging.info('cob_total_parcels_df output from SynPop step A has a larger number of parcels')
+                self.logger.info('cob_total_parcels_df output from SynPop step A has a larger number of parcels')
                 cob_missing_parcels_df = cob_total_parcels_df.loc[~cob_total_parcels_df['PSRC_ID'].isin(self.cob_du_df['PSRC_ID'])]
-                missing_fname = f'cob_missing_parcels_{modeller_initial}_{version}'
-                cob_missing_parcels_df.to_csv(os.path.join(working_folder_synpop, f'{missing_fname}.csv'), index = False)
-                logging.warning(f'{cob_missing_parcels_df.shape[0]} parcels are missing in {os.path.join(working_folder_lu, cob_du_file)}.')
+                missing_fname = f'cob_missing_parcels_{self.config.modeller_initial}_{self.config.version}'
+                cob_missing_parcels_df.to_csv(os.path.join(self.config.working_folder_synpop, f'{missing_fname}.csv'), index = False)
+                self.logger.warning(f'{cob_missing_parcels_df.shape[0]} parcels are missing in {os.path.join(self.config.working_folder_lu, self.config.cob_du_file)}.')
                 missing_parcels = list(set(cob_missing_parcels_df['PSRC_ID']))
             elif cob_total_parcels_df.shape[0] < cob_parcels_provided:
-                logging.info('cob_parcels_provided output from LandUse step 1 has a larger number of parcels')
+                self.logger.info('cob_parcels_provided output from LandUse step 1 has a larger number of parcels')
                 lookup_missing_parcels_df = self.cob_du_df.loc[~self.cob_du_df['PSRC_ID'].isin(cob_total_parcels_df['PSRC_ID'])]
-                missing_fname = f'lookup_missing_parcels_{modeller_initial}_{version}'
-                lookup_missing_parcels_df.to_csv(os.path.join(working_folder_synpop, f'{missing_fname}.csv'), index = False)
-                logging.warning(f'{lookup_missing_parcels_df.shape[0]} parcels are missing in {os.path.join(working_folder_lu, hhs_by_parcel)}.')
+                missing_fname = f'lookup_missing_parcels_{self.config.modeller_initial}_{self.config.version}'
+                lookup_missing_parcels_df.to_csv(os.path.join(self.config.working_folder_synpop, f'{missing_fname}.csv'), index = False)
+                self.logger.warning(f'{lookup_missing_parcels_df.shape[0]} parcels are missing in {os.path.join(self.config.working_folder_lu, self.config.hhs_by_parcel)}.')
                 missing_parcels = list(set(cob_missing_parcels_df['PSRC_ID']))
-            with open(f'{os.path.join(working_folder_lu, missing_fname)}.exp', 'w') as f:
+            with open(f'{os.path.join(self.config.working_folder_lu, missing_fname)}.exp', 'w') as f:
                 missing = ''
                 for miss in missing_parcels:
                     missing += f',{miss}'
                 missing = missing.lstrip(',')
                 f.write(f'PSRC_ID IN ({missing})')
-            logging.info('The missing parcel ids into a csv file and a exp file exported for GIS investigation.\n')
-            logging.warning(f'Missing parcels are exported in {os.path.join(working_folder_synpop, f"{missing_fname}.csv and .exp")}.')
-            logging.warning('Please cehck the missing parcel files for further investigation.')
-
-        self.cob_du_df['sfhhs'] = self.cob_du_df['SFUnits'] * sf_occupancy_rate 
-        self.cob_du_df['mfhhs'] = self.cob_du_df['MFUnits'] * mf_occupancy_rate
-        self.cob_du_df['sfpersons'] = self.cob_du_df['sfhhs'] * avg_persons_per_sfhh
-        self.cob_du_df['mfpersons'] = self.cob_du_df['mfhhs'] * avg_persons_per_mfhh
+            self.logger.info('The missing parcel ids into a csv file and a exp file exported for GIS investigation.\n')
+            self.logger.warning(f'Missing parcels are exported in {os.path.join(self.config.working_folder_synpop, f"{missing_fname}.csv and .exp")}.')
+            self.logger.warning('Please cehck the missing parcel files for further investigation.')
+
+        self.cob_du_df['sfhhs'] = self.cob_du_df['SFUnits'] * self.config.sf_occupancy_rate 
+        self.cob_du_df['mfhhs'] = self.cob_du_df['MFUnits'] * self.config.mf_occupancy_rate
+        self.cob_du_df['sfpersons'] = self.cob_du_df['sfhhs'] * self.config.avg_persons_per_sfhh
+        self.cob_du_df['mfpersons'] = self.cob_du_df['mfhhs'] * self.config.avg_persons_per_mfhh
         self.cob_du_df['cobflag'] = 'cob'
 
         adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.merge(self.cob_du_df[['PSRC_ID', 'cobflag', 'sfhhs', 'mfhhs', 'sfpersons', 'mfpersons']], on = 'PSRC_ID', how = 'left')
@@ -419,10 +416,10 @@ class SynPop:
         # other subset areas, using interpolation of King County generated from step 1
         self.kc_du_df = self.kc_du_df.merge(self.cob_du_df[['PSRC_ID', 'cobflag']], on = 'PSRC_ID', how = 'left')
         mask = (adjusted_hhs_by_parcel_df['cobflag'] != 'cob') & (adjusted_hhs_by_parcel_df['Jurisdiction'].isin(areas))
-        self.kc_du_df['sfhhs'] = self.kc_du_df['SFUnits'] * sf_occupancy_rate 
-        self.kc_du_df['mfhhs'] = self.kc_du_df['MFUnits'] * mf_occupancy_rate
-        self.kc_du_df['sfpersons'] = self.kc_du_df['sfhhs'] * avg_persons_per_sfhh
-        self.kc_du_df['mfpersons'] = self.kc_du_df['mfhhs'] * avg_persons_per_mfhh
+        self.kc_du_df['sfhhs'] = self.kc_du_df['SFUnits'] * self.config.sf_occupancy_rate 
+        self.kc_du_df['mfhhs'] = self.kc_du_df['MFUnits'] * self.config.mf_occupancy_rate
+        self.kc_du_df['sfpersons'] = self.kc_du_df['sfhhs'] * self.config.avg_persons_per_sfhh
+        self.kc_du_df['mfpersons'] = self.kc_du_df['mfhhs'] * self.config.avg_persons_per_mfhh
         self.kc_du_df['kc_hhs'] = self.kc_du_df['sfhhs'] + self.kc_du_df['mfhhs']
         self.kc_du_df['kc_persons'] = self.kc_du_df['sfpersons'] + self.kc_du_df['mfpersons']
         adjusted_hhs_by_parcel_df = adjusted_hhs_by_parcel_df.merge(self.kc_du_df[['PSRC_ID', 'kc_hhs', 'kc_persons']], on='PSRC_ID', how='left')
@@ -439,20 +436,20 @@ class SynPop:
         ### to get correct number of persons by block group, instead of doing controlled rounding, we simply summarize persons by block group before controlled rounding on hhs.
         adj_persons_by_GEOID10 = adjusted_hhs_by_parcel_df[['GEOID10', 'adj_persons_by_parcel']].groupby('GEOID10').sum()
         total_hhs_before_rounding = adjusted_hhs_by_parcel_df['adj_hhs_by_parcel'].sum()
-        logging.info(f'Total number of households before rounding: {total_hhs_before_rounding:,.2f}\n')
-        logging.info(f"Total number of households in COB before rounding: {adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['cobflag'] == 'cob', 'adj_hhs_by_parcel'].sum():,.2f}\n")
+        self.logger.info(f'Total number of households before rounding: {total_hhs_before_rounding:,.2f}\n')
+        self.logger.info(f"Total number of households in COB before rounding: {adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['cobflag'] == 'cob', 'adj_hhs_by_parcel'].sum():,.2f}\n")
         # debug for crosscheck the hh numbers and the population
         if debug:
             cob_before = adjusted_hhs_by_parcel_df[adjusted_hhs_by_parcel_df['cobflag']=='cob'].copy(deep=True)
             cob_before_ = cob_before[['BKRCastTAZ', 'adj_hhs_by_parcel', 'adj_persons_by_parcel']].groupby(by='BKRCastTAZ').sum().reset_index()
-            juris_list = [city.upper() for city in juris_list]
-            if hhs_control_total_by_TAZ_R:  # TODO
+            juris_list = [utility.canonical_jurisdiction(city) for city in juris_list]
+            if self.config.hhs_control_total_by_TAZ_R:  # TODO
                 kr_tazs_before = adjusted_hhs_by_parcel_df[adjusted_hhs_by_parcel_df['Jurisdiction'].isin(juris_list)].copy(deep=True)
                 kr_tazs_before_ = kr_tazs_before[['BKRCastTAZ', 'adj_hhs_by_parcel', 'adj_persons_by_parcel']].groupby(by='BKRCastTAZ').sum().reset_index()
 
-        logging.info('Rounding households to integer. Controlled by BKRCastTAZ subtotal....')
+        self.logger.info('Rounding households to integer. Controlled by BKRCastTAZ subtotal....')
         # check if this 2016 file is 'acecon0403.csv'
-        if popsim_control_file == 'acecon0403.csv':
+        if self.config.popsim_control_file == 'acecon0403.csv':
             # in ACS 2016 there is no hhs in Census block group 530619900020, but in PSRC's future hhs forecast there are. 
             # We need to relocate these households from parcels in this blockgroup to  
             # parcels in block group 530610521042 while staying in the same BKRCastTAZ. 
@@ -512,7 +509,7 @@ class SynPop:
                         diff = 0
                 # last option, if rounding issue is still not resolved, 
                 if diff > 0:
-                    logging.info(f"TAZ {record['BKRCastTAZ']}: rounding issue is not resolved. Difference is {diff}")
+                    self.logger.info(f"TAZ {record['BKRCastTAZ']}: rounding issue is not resolved. Difference is {diff}")
             elif diff < 0:
                 # too less hhs in this TAZ after rounding. need to increase subtotal
                 if mf_parcels_count > 0:
@@ -555,9 +552,9 @@ class SynPop:
 
         adjusted_hhs_by_parcel_df['adj_hhs_by_parcel'] = adjusted_hhs_by_parcel_df['adj_hhs_by_parcel'].astype(int)
         total_hhs_after_rounding = adjusted_hhs_by_parcel_df['adj_hhs_by_parcel'].sum()
-        logging.info('Controlled rounding for households is complete. ')
-        logging.info(f'\nTotal hhs before rounding: {total_hhs_before_rounding:,.2f}, after: {total_hhs_after_rounding:,.0f}\n')
-        logging.info(f"Total number of households in COB after rounding: {adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['cobflag'] == 'cob', 'adj_hhs_by_parcel'].sum():,.0f}")
+        self.logger.info('Controlled rounding for households is complete. ')
+        self.logger.info(f'\nTotal hhs before rounding: {total_hhs_before_rounding:,.2f}, after: {total_hhs_after_rounding:,.0f}\n')
+        self.logger.info(f"Total number of households in COB after rounding: {adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['cobflag'] == 'cob', 'adj_hhs_by_parcel'].sum():,.0f}")
         
         if debug:
             # Bellevue
@@ -569,13 +566,13 @@ class SynPop:
                 if record['BKRCastTAZ'] in cob_tazs:
                     cob_after.loc[cob_after['BKRCastTAZ']==record['BKRCastTAZ'], 'controlled_hhs'] = record['adj_hhs_by_parcel']
             cob_after['cross_check_hhs'] = cob_after['adj_hhs_by_parcel'] - cob_after['controlled_hhs']
-            logging.info(f"COB hhs before control rounding: {cob_before['adj_hhs_by_parcel'].sum():,.2f}")
-            logging.info(f"COB hhs after control rounding: {cob_after['adj_hhs_by_parcel'].sum():,.0f}")
-            logging.info(f"Total hhs control rounding difference (after - before): {cob_after['cross_check_hhs'].sum():,.2f}")
-            cob_after.to_csv(os.path.join(working_folder_synpop, 'COB_population_before_after.csv'))
-            logging.info(f"Cross check table exported in: {os.path.join(working_folder_synpop, 'COB_population_before_after.csv')}")
+            self.logger.info(f"COB hhs before control rounding: {cob_before['adj_hhs_by_parcel'].sum():,.2f}")
+            self.logger.info(f"COB hhs after control rounding: {cob_after['adj_hhs_by_parcel'].sum():,.0f}")
+            self.logger.info(f"Total hhs control rounding difference (after - before): {cob_after['cross_check_hhs'].sum():,.2f}")
+            cob_after.to_csv(os.path.join(self.config.working_folder_synpop, 'COB_population_before_after.csv'))
+            self.logger.info(f"Cross check table exported in: {os.path.join(self.config.working_folder_synpop, 'COB_population_before_after.csv')}")
             # Kirkland and Redmond
-            if hhs_control_total_by_TAZ_R:  #TODO
+            if self.config.hhs_control_total_by_TAZ_R:  #TODO
                 for city in juris_list:
                     kr_tazs = list(adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'] == city]['BKRCastTAZ'])
                     kr_after_taz = adjusted_hhs_by_parcel_df[adjusted_hhs_by_parcel_df['BKRCastTAZ'].isin(kr_tazs)].copy(deep=True)
@@ -588,15 +585,15 @@ class SynPop:
                     # calculate the difference at the BKRCast TAZ level
                     kr_after_taz['cross_check_hhs'] = kr_after_taz['adj_hhs_by_parcel'] - kr_after_taz['controlled_hhs']
                     # print the comparison summary at the BKRCast TAZ level
-                    logging.info('\n')
-                    logging.info('=====')
-                    logging.info(f"Kirkland (and/or Redmond) hhs before control rounding at the BKRCast TAZ level: {kr_tazs_before['adj_hhs_by_parcel'].sum():,.2f}")
-                    logging.info(f"Kirkland (and/or Redmond) hhs after control rounding at the BKRCast TAZ level: {kr_after_taz['adj_hhs_by_parcel'].sum():,.0f}")
-                    logging.info(f"total hhs control rounding difference (after - before) at the BKRCast TAZ level: {kr_after_taz['cross_check_hhs'].sum():,.2f}")
-                    kr_after_taz.to_csv(os.path.join(working_folder_synpop, 'KirkRed_population_before_after_BKRCastTAZ.csv'))
-                    logging.info(f"cross check table exported in: {os.path.join(working_folder_synpop, 'KirkRed_population_before_after_BKRCastTAZ.csv')}")
-                    logging.info('\n')
-                    logging.info('=====')
+                    self.logger.info('\n')
+                    self.logger.info('=====')
+                    self.logger.info(f"Kirkland (and/or Redmond) hhs before control rounding at the BKRCast TAZ level: {kr_tazs_before['adj_hhs_by_parcel'].sum():,.2f}")
+                    self.logger.info(f"Kirkland (and/or Redmond) hhs after control rounding at the BKRCast TAZ level: {kr_after_taz['adj_hhs_by_parcel'].sum():,.0f}")
+                    self.logger.info(f"total hhs control rounding difference (after - before) at the BKRCast TAZ level: {kr_after_taz['cross_check_hhs'].sum():,.2f}")
+                    kr_after_taz.to_csv(os.path.join(self.config.working_folder_synpop, 'KirkRed_population_before_after_BKRCastTAZ.csv'))
+                    self.logger.info(f"cross check table exported in: {os.path.join(self.config.working_folder_synpop, 'KirkRed_population_before_after_BKRCastTAZ.csv')}")
+                    self.logger.info('\n')
+                    self.logger.info('=====')
                     # print the comparison summary at the TMTAZ level
                     if 'BKRTMTAZ' in adjusted_hhs_by_parcel_df.columns:
                         kr_tmtazs = list(adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'] == city]['BKRTMTAZ'])
@@ -609,41 +606,41 @@ class SynPop:
                         # calculate the difference at the TMTAZ level
                         kr_after_tmtaz['cross_check_hhs'] = kr_after_tmtaz['adj_hhs_by_parcel'] - kr_after_tmtaz['controlled_hhs']
                         # print
-                        logging.info(f"Kirkland (and Redmond) control hhs at the TMTAZ level: {kr_after_tmtaz['controlled_hhs'].sum():,.0f}")
-                        logging.info(f"Kirkland (and Redmond) hhs after control rounding at the TMTAZ level: {kr_after_tmtaz['adj_hhs_by_parcel'].sum():,.0f}")
-                        logging.info(f"total hhs control rounding difference (after - control) at the TMTAZ level: {kr_after_tmtaz['cross_check_hhs'].sum():,.2f}")
-                        kr_after_taz.to_csv(os.path.join(working_folder_synpop, 'KirkRed_population_before_after_TMTAZ.csv'))
-                        logging.info(f"cross check table exported in: {os.path.join(working_folder_synpop, 'KirkRed_population_before_after_TMTAZ.csv')}\n")
+                        self.logger.info(f"Kirkland (and Redmond) control hhs at the TMTAZ level: {kr_after_tmtaz['controlled_hhs'].sum():,.0f}")
+                        self.logger.info(f"Kirkland (and Redmond) hhs after control rounding at the TMTAZ level: {kr_after_tmtaz['adj_hhs_by_parcel'].sum():,.0f}")
+                        self.logger.info(f"total hhs control rounding difference (after - control) at the TMTAZ level: {kr_after_tmtaz['cross_check_hhs'].sum():,.2f}")
+                        kr_after_taz.to_csv(os.path.join(self.config.working_folder_synpop, 'KirkRed_population_before_after_TMTAZ.csv'))
+                        self.logger.info(f"cross check table exported in: {os.path.join(self.config.working_folder_synpop, 'KirkRed_population_before_after_TMTAZ.csv')}\n")
 
 
-        if  hhs_control_total_by_TAZ_K != '' or hhs_control_total_by_TAZ_R != '':
+        if  self.config.hhs_control_total_by_TAZ_K != '' or self.config.hhs_control_total_by_TAZ_R != '':
             # export adjusted hhs by parcel to file
             if 'BKRTMTAZ' in adjusted_hhs_by_parcel_df.columns:
-                adjusted_hhs_by_parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'BKRTMTAZ', 'adj_hhs_by_parcel']].rename(columns = {'adj_hhs_by_parcel':'total_hhs'}).to_csv(os.path.join(working_folder_synpop, adjusted_hhs_by_parcel_file), index = False)
+                adjusted_hhs_by_parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'BKRTMTAZ', 'adj_hhs_by_parcel']].rename(columns = {'adj_hhs_by_parcel':'total_hhs'}).to_csv(os.path.join(self.config.working_folder_synpop, self.config.adjusted_hhs_by_parcel_file), index = False)
             else:
-                adjusted_hhs_by_parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'adj_hhs_by_parcel']].rename(columns = {'adj_hhs_by_parcel':'total_hhs'}).to_csv(os.path.join(working_folder_synpop, adjusted_hhs_by_parcel_file), index = False)
+                adjusted_hhs_by_parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'adj_hhs_by_parcel']].rename(columns = {'adj_hhs_by_parcel':'total_hhs'}).to_csv(os.path.join(self.config.working_folder_synpop, self.config.adjusted_hhs_by_parcel_file), index = False)
         else:
             # export adjusted hhs by parcel to file
-            adjusted_hhs_by_parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'adj_hhs_by_parcel']].rename(columns = {'adj_hhs_by_parcel':'total_hhs'}).to_csv(os.path.join(working_folder_synpop, adjusted_hhs_by_parcel_file), index = False)
-        logging.info(f'Rounded number of households by parcel file exported: {os.path.join(working_folder_synpop, adjusted_hhs_by_parcel_file)}')
+            adjusted_hhs_by_parcel_df[['PSRC_ID', 'GEOID10', 'BKRCastTAZ', 'adj_hhs_by_parcel']].rename(columns = {'adj_hhs_by_parcel':'total_hhs'}).to_csv(os.path.join(self.config.working_folder_synpop, self.config.adjusted_hhs_by_parcel_file), index = False)
+        self.logger.info(f'Rounded number of households by parcel file exported: {os.path.join(self.config.working_folder_synpop, self.config.adjusted_hhs_by_parcel_file)}')
                 
         sum_hhs_by_jurisdiction = adjusted_hhs_by_parcel_df[['Jurisdiction', 'adj_hhs_by_parcel', 'adj_persons_by_parcel']].groupby('Jurisdiction').sum()
-        sum_hhs_by_jurisdiction.to_csv(os.path.join(working_folder_synpop,  summary_by_jurisdiction_filename))
-        logging.info(f'Rounded number of households by jurisdiction file exported: {os.path.join(working_folder_synpop, summary_by_jurisdiction_filename)}\n')
+        sum_hhs_by_jurisdiction.to_csv(os.path.join(self.config.working_folder_synpop,  self.config.summary_by_jurisdiction_filename))
+        self.logger.info(f'Rounded number of households by jurisdiction file exported: {os.path.join(self.config.working_folder_synpop, self.config.summary_by_jurisdiction_filename)}\n')
 
         ### Create control file for PopulationSim
         # note that this control file has not address control rounding for population, which will be done in PopulationSim
-        popsim_control_df = pd.read_csv(os.path.join(working_folder_synpop, popsim_control_file), sep = ',')
+        popsim_control_df = pd.read_csv(os.path.join(self.config.working_folder_synpop, self.config.popsim_control_file), sep = ',')
         hhs_by_geoid10_df = adjusted_hhs_by_parcel_df[['GEOID10', 'adj_hhs_by_parcel']].groupby('GEOID10').sum()
         hhs_by_geoid10_df = hhs_by_geoid10_df.merge(adj_persons_by_GEOID10, left_index = True, right_index = True, how = 'left')
         hhs_by_geoid10_df.fillna(0, inplace = True)
         popsim_control_df = popsim_control_df.merge(hhs_by_geoid10_df, left_on = 'block_group_id', right_on = 'GEOID10', how = 'left')
         error_blkgrps_df = popsim_control_df.loc[popsim_control_df.isna().any(axis = 1)]
         if error_blkgrps_df.shape[0] > 0:
-            logging.warning(f'Some blockgroups are missing values.')
-            logging.warning(f"Please check {os.path.join(working_folder_synpop, f'error_census_blockgroup_{modeller_initial}_{version}.csv')} for more details.")
-            logging.warning('The missing values are all replaced with zeros.\n')
-            error_blkgrps_df.to_csv(os.path.join(working_folder_synpop, f'error_census_blockgroup_{modeller_initial}_{version}.csv'), index = False)
+            self.logger.warning(f'Some blockgroups are missing values.')
+            self.logger.warning(f"Please check {os.path.join(self.config.working_folder_synpop, f'error_census_blockgroup_{self.config.modeller_initial}_{self.config.version}.csv')} for more details.")
+            self.logger.warning('The missing values are all replaced with zeros.\n')
+            error_blkgrps_df.to_csv(os.path.join(self.config.working_folder_synpop, f'error_census_blockgroup_{self.config.modeller_initial}_{self.config.version}.csv'), index = False)
 
         popsim_control_df.fillna(0, inplace = True)
         popsim_control_df['hh_bg_weight'] = popsim_control_df['adj_hhs_by_parcel'].round(0).astype(int)
@@ -651,24 +648,24 @@ class SynPop:
         popsim_control_df['pers_bg_weight'] = popsim_control_df['adj_persons_by_parcel'].round(0).astype(int)
         popsim_control_df['pers_tract_weight'] = popsim_control_df['adj_persons_by_parcel'].round(0).astype(int)
         popsim_control_df.drop(hhs_by_geoid10_df.columns, axis = 1, inplace = True)
-        popsim_control_df.to_csv(os.path.join(working_folder_synpop, popsim_control_output_file), index = False)
-        logging.info(f'PopulationSim control file exported: {os.path.join(working_folder_synpop, popsim_control_output_file)}.')
+        popsim_control_df.to_csv(os.path.join(self.config.working_folder_synpop, self.config.popsim_control_output_file), index = False)
+        self.logger.info(f'PopulationSim control file exported: {os.path.join(self.config.working_folder_synpop, self.config.popsim_control_output_file)}.')
 
         total_hhs = popsim_control_df['hh_bg_weight'].sum()
         total_persons = popsim_control_df['pers_bg_weight'].sum()
-        logging.info(f'{total_hhs:,.0f} households, {total_persons:,.0f} persons are exported in the control file.\n')
+        self.logger.info(f'{total_hhs:,.0f} households, {total_persons:,.0f} persons are exported in the control file.\n')
 
         ### generate other support files for parcelization
         bel_parcels_hhs_df = adjusted_hhs_by_parcel_df.loc[adjusted_hhs_by_parcel_df['Jurisdiction'] == 'BELLEVUE', ['PSRC_ID', 'adj_hhs_by_parcel', 'sfhhs', 'mfhhs', 'adj_persons_by_parcel', 'Jurisdiction', 'GEOID10']]
         bel_parcels_hhs_df.rename(columns = {'adj_hhs_by_parcel':'total_hhs', 'adj_persons_by_parcel':'total_persons'}, inplace = True)
-        bel_parcels_hhs_df.to_csv(os.path.join(working_folder_synpop, parcels_for_allocation_filename), index = False)
+        bel_parcels_hhs_df.to_csv(os.path.join(self.config.working_folder_synpop, self.config.parcels_for_allocation_filename), index = False)
 
-        logging.info('\nBacking up the scripts for step B...')
-        os.makedirs(os.path.join(working_folder_synpop, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_synpop, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step B backup exported: {os.path.join(working_folder_synpop, self.backup_folder, version, os.path.basename(__file__))}')
+        self.logger.info('\nBacking up the scripts for step B...')
+        os.makedirs(os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step B backup exported: {os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version, os.path.basename(__file__))}')
 
-        logging.info('Executing step B...done. Preparing households for base or future year using KR oldTAZ COB parcel forecast is completed.\n')
+        self.logger.info('Executing step B...done. Preparing households for base or future year using KR oldTAZ COB parcel forecast is completed.\n')
 
     def step_C_parcelization(self):
         """
@@ -688,18 +685,18 @@ class SynPop:
         # 05/01/2025
         # move I/O paths to config file
 
-        self.hhs_df = pd.read_csv(os.path.join(working_folder_synpop, synthetic_households_file_name))
+        self.hhs_df = pd.read_csv(os.path.join(self.config.working_folder_synpop, self.config.synthetic_households_file_name))
 
         self.hhs_df['hhparcel'] = 0
         hhs_by_GEOID10_synpop = self.hhs_df[['block_group_id', 'hhexpfac']].groupby('block_group_id').sum()
 
-        adjusted_hhs_by_parcel_df = pd.read_csv(os.path.join(working_folder_synpop, adjusted_hhs_by_parcel_file))
+        adjusted_hhs_by_parcel_df = pd.read_csv(os.path.join(self.config.working_folder_synpop, self.config.adjusted_hhs_by_parcel_file))
         # remove any blockgroup ID is Nan.
         all_blcgrp_ids = self.hhs_df['block_group_id'].unique()
         mask = np.isnan(all_blcgrp_ids)
         all_blcgrp_ids = sorted(all_blcgrp_ids[~mask])
 
-        if popsim_control_file == 'acecon0403.csv':
+        if self.config.popsim_control_file == 'acecon0403.csv':
             # special treatment on GEOID10 530619900020. Since in 2016 ACS no hhs lived in this census blockgroup, when creating popsim control file
             # we move all hhs in this blockgroup to 530610521042. We need to do the same thing when we allocate hhs to parcels.
             adjusted_hhs_by_parcel_df.loc[(adjusted_hhs_by_parcel_df['GEOID10'] == 530619900020) & (adjusted_hhs_by_parcel_df['total_hhs'] > 0), 'GEOID10'] = 530610521042
@@ -707,7 +704,7 @@ class SynPop:
         hhs_by_blkgrp_adjusted = adjusted_hhs_by_parcel_df.groupby('GEOID10')[['total_hhs']].sum()
         final_hhs_df = pd.DataFrame()
 
-        logging.info(f"Allocating households to parcels at each census block group...\nIt may take a while...\n")
+        self.logger.info(f"Allocating households to parcels at each census block group...\nIt may take a while...\n")
         for blcgrpid in all_blcgrp_ids:
             assert hhs_by_GEOID10_synpop.loc[blcgrpid, 'hhexpfac'] == hhs_by_blkgrp_adjusted.loc[blcgrpid, 'total_hhs'], \
                    '# households in the synthetic population should equal # households in the adjusted parcel file. You need to fix this issue before moving forward.'
@@ -749,15 +746,15 @@ class SynPop:
 
             final_hhs_df = pd.concat([final_hhs_df, selected_hhs_synpop_df])
 
-            logging.debug(f"Control: {total_control_hhs}, {hhs_by_GEOID10_synpop.loc[blcgrpid, 'hhexpfac']} (actual {num_hhs}) hhs allocated to GEOID10 {blcgrpid}, {num_parcels} parcels are processed")
+            self.logger.debug(f"Control: {total_control_hhs}, {hhs_by_GEOID10_synpop.loc[blcgrpid, 'hhexpfac']} (actual {num_hhs}) hhs allocated to GEOID10 {blcgrpid}, {num_parcels} parcels are processed")
 
         final_hhs_df = final_hhs_df.merge(adjusted_hhs_by_parcel_df[['PSRC_ID', 'BKRCastTAZ']], how = 'left', left_on = 'hhparcel', right_on = 'PSRC_ID')
         final_hhs_df.rename(columns = {'BKRCastTAZ': 'hhtaz'}, inplace = True)
         final_hhs_df.drop(columns = ['PSRC_ID'], axis = 1, inplace = True)
 
         ### process other attributes to match required columns
-        logging.info('Processing other column attributes...')
-        pop_df = pd.read_csv(os.path.join(working_folder_synpop, synthetic_population_file_name)) 
+        self.logger.info('Processing other column attributes...')
+        pop_df = pd.read_csv(os.path.join(self.config.working_folder_synpop, self.config.synthetic_population_file_name)) 
         pop_df.rename(columns={'household_id':'hhno', 'SEX':'pgend'}, inplace = True)
         pop_df.sort_values(by = 'hhno', inplace = True)
 
@@ -802,8 +799,8 @@ class SynPop:
         # 5=university student, 6=grade school student/child age 16+, 7=child age 5-15, 8=child age 0-4); 
         # this could be made optional and computed within DaySim for synthetic populations based on ACS PUMS; 
         # for other survey data, the coding and rules may be more variable and better done outside DaySim
-        logging.info('Processing attributes...')
-        logging.info('It may take a while as well...\n')
+        self.logger.info('Processing attributes...')
+        self.logger.info('It may take a while as well...\n')
         # assign pno within each household
         pop_df['pno'] = pop_df.groupby('hhno').cumcount() + 1
         #####
@@ -840,27 +837,31 @@ class SynPop:
         final_hhs_df.drop(['hownrent'], axis = 1, inplace = True)
         final_hhs_df = final_hhs_df.join(morecols) 
 
+        synthetic_pop_df = pop_df
         pop_df = pop_df.loc[pop_df['hhno'].isin(final_hhs_df['hhno'])]
-        output_h5_file = h5py.File(os.path.join(working_folder_synpop, h5_file_name), 'w')
+        output_h5_file = h5py.File(os.path.join(self.config.working_folder_synpop, self.config.h5_file_name), 'w')
         utility.df_to_h5(final_hhs_df, output_h5_file, 'Household')
         utility.df_to_h5(pop_df, output_h5_file, 'Person')
         output_h5_file.close()
-        logging.info(f'Parcelized household and person file is exported in hdf5 format: {os.path.join(working_folder_synpop, h5_file_name)}')
+        self.logger.info(f'Parcelized household and person file is exported in hdf5 format: {os.path.join(self.config.working_folder_synpop, self.config.h5_file_name)}')
 
-        pop_df.to_csv(os.path.join(working_folder_synpop, updated_persons_file_name), sep = ',')
-        logging.info(f'Parcelized person file is also exported in csv format: {os.path.join(working_folder_synpop, updated_persons_file_name)}')
+        pop_df.to_csv(os.path.join(self.config.working_folder_synpop, self.config.updated_persons_file_name), sep = ',')
+        self.logger.info(f'Parcelized person file is also exported in csv format: {os.path.join(self.config.working_folder_synpop, self.config.updated_persons_file_name)}')
         
-        final_hhs_df.to_csv(os.path.join(working_folder_synpop, updated_hhs_file_name), sep = ',')
-        logging.info(f'Parcelized household file is also exported in csv format: {os.path.join(working_folder_synpop, h5_file_name)}')
-
-        logging.info('Backing up the scripts for step C...')
-        os.makedirs(os.path.join(working_folder_lu, self.backup_folder, version), exist_ok=True)
-        utility.backupScripts(__file__, os.path.join(working_folder_synpop, self.backup_folder, version, os.path.basename(__file__)))
-        logging.info(f'Scripts for step C backup exported: {os.path.join(working_folder_lu, self.backup_folder, version, os.path.basename(__file__))}')
-
-        logging.info(f'Total census block groups: {len(all_blcgrp_ids):,.0f}')
-        logging.info(f'Final number of households: {final_hhs_df.shape[0]:,.0f}')
-        logging.info(f'Final number of persons: {pop_df.shape[0]:,.0f}')
-        logging.info(f'Executing step C...done. Allocating the synthetic households and persons to control parcels is completed.\n')
+        final_hhs_df.to_csv(os.path.join(self.config.working_folder_synpop, self.config.updated_hhs_file_name), sep = ',')
+        self.logger.info(f'Parcelized household file is also exported in csv format: {os.path.join(self.config.working_folder_synpop, self.config.h5_file_name)}')
+
+        stepC_checks = checks.check_stepC(final_hhs_df, pop_df, self.hhs_df, synthetic_pop_df, adjusted_hhs_by_parcel_df, checks.load_lookup(self.config.lookup_file), self.config.subset_area)
+        checks.log_checks(stepC_checks, 'Step C cross check', self.logger)
+
+        self.logger.info('Backing up the scripts for step C...')
+        os.makedirs(os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version), exist_ok=True)
+        utility.backupScripts(__file__, os.path.join(self.config.working_folder_synpop, self.backup_folder, self.config.version, os.path.basename(__file__)))
+        self.logger.info(f'Scripts for step C backup exported: {os.path.join(self.config.working_folder_lu, self.backup_folder, self.config.version, os.path.basename(__file__))}')
+
+        self.logger.info(f'Total census block groups: {len(all_blcgrp_ids):,.0f}')
+        self.logger.info(f'Final number of households: {final_hhs_df.shape[0]:,.0f}')
+        self.logger.info(f'Final number of persons: {pop_df.shape[0]:,.0f}')
+        self.logger.info(f'Executing step C...done. Allocating the synthetic households and persons to control parcels is completed.\n')
 
 
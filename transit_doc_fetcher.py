@@ -0,0 +1,173 @@
+import os
+import json
+import hashlib
+import argparse
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+## Shared fetcher for transit route maps and schedules (KC Metro, Sound Transit).
+## A manifest lists the documents to fetch: a document name and its url, usually built from route numbers and url
+## templates with build_manifest(). Documents are fetched in parallel over one keep-alive session. The ETag and
+## Last-Modified of every fetched document are kept in index.json in the download folder and sent back on the next run,
+## so documents the server reports unchanged (304) are not transferred again. A response that is not a pdf is rejected
+## instead of being saved.
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+TIMEOUT = 10
+MAX_WORKERS = 8
+CHUNK_SIZE = 8192
+INDEX_FILE = 'index.json'
+PDF_CONTENT_TYPES = ('application/pdf', 'application/x-pdf')
+PDF_SIGNATURE = b'%PDF-'
+
+def build_manifest(numbers, url_template, name_template) -> list:
+    '''
+    one manifest entry per route number.
+
+    :param numbers: route numbers or letters
+    :param url_template: document url, {num} is replaced by the route, e.g. ".../rt-{num:03}.pdf"
+    :param name_template: file name, {num} is replaced by the route, e.g. "rt-{num:03}.pdf"
+    :return: list of {'name': file name, 'url': url}
+    '''
+    return [{'name': name_template.format(num = num), 'url': url_template.format(num = num)} for num in numbers]
+
+def make_session(pool_size = MAX_WORKERS, headers = HEADERS) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def load_index(download_dir) -> dict:
+    path = os.path.join(download_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_index(download_dir, index: dict):
+    path = os.path.join(download_dir, INDEX_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(index, f, indent = 1, sort_keys = True)
+    os.replace(path + '.tmp', path)
+
+def _is_pdf(content_type, first_chunk) -> bool:
+    # some servers send pdfs as application/octet-stream, so the file signature is accepted as well
+    return content_type.split(';')[0].strip().lower() in PDF_CONTENT_TYPES or first_chunk.startswith(PDF_SIGNATURE)
+
+def fetch_document(session, url, filepath, previous = None, timeout = TIMEOUT) -> dict:
+    '''
+    fetch one document to filepath, conditionally on the ETag / Last-Modified of the previous fetch.
+    The file is written to filepath.part and renamed when complete, so a failed fetch leaves the old file untouched.
+
+    :param previous: index entry of the previous fetch, or None
+    :return: index entry: name, url, status ('downloaded', 'unchanged', 'missing', 'rejected' or 'error'), etag,
+             last_modified, content_type, size, sha256, time
+    '''
+    name = os.path.basename(filepath)
+    entry = {'name': name, 'url': url}
+    headers = {}
+    if previous and os.path.exists(filepath):
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    try:
+        with session.get(url, headers = headers, stream = True, timeout = timeout) as response:
+            if response.status_code == 304:
+                entry.update({key: previous.get(key) for key in ('etag', 'last_modified', 'content_type', 'size', 'sha256', 'time')})
+                entry['status'] = 'unchanged'
+                print(f"Unchanged: {name}")
+                return entry
+            if response.status_code != 200:
+                entry['status'] = 'missing'
+                entry['http_status'] = response.status_code
+                print(f"Skipping (not found): {url}")
+                return entry
+
+            content_type = response.headers.get('Content-Type', '')
+            chunks = response.iter_content(chunk_size = CHUNK_SIZE)
+            first_chunk = next(chunks, b'')
+            if not _is_pdf(content_type, first_chunk):
+                entry['status'] = 'rejected'
+                entry['content_type'] = content_type
+                print(f"Skipping (not PDF, {content_type}): {url}")
+                return entry
+
+            print(f"Downloading {name}")
+            digest = hashlib.sha256()
+            part_path = filepath + '.part'
+            with open(part_path, 'wb') as f:
+                for chunk in _chain(first_chunk, chunks):
+                    if chunk:  # filter keep-alive chunks
+                        f.write(chunk)
+                        digest.update(chunk)
+            os.replace(part_path, filepath)
+            entry.update({'status': 'downloaded', 'etag': response.headers.get('ETag'),
+                          'last_modified': response.headers.get('Last-Modified'), 'content_type': content_type,
+                          'size': os.path.getsize(filepath), 'sha256': digest.hexdigest(),
+                          'time': datetime.now().isoformat(timespec = 'seconds')})
+            return entry
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading {url}: {e}")
+        entry['status'] = 'error'
+        entry['error'] = str(e)
+        return entry
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+def fetch_documents(manifest, download_dir, max_workers = MAX_WORKERS, session = None, timeout = TIMEOUT) -> dict:
+    '''
+    fetch every document of a manifest into download_dir in parallel and update the index of download_dir.
+
+    :param manifest: list of {'name': file name, 'url': url}, see build_manifest()
+    :param session: requests session to use, e.g. pointed at a local test server. None makes a pooled session.
+    :return: index entries of this run by document name
+    '''
+    os.makedirs(download_dir, exist_ok = True)
+    session = session or make_session(max_workers)
+    index = load_index(download_dir)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        futures = [pool.submit(fetch_document, session, doc['url'], os.path.join(download_dir, doc['name']),
+                               index.get(doc['name']), timeout) for doc in manifest]
+        for future in as_completed(futures):
+            entry = future.result()
+            results[entry['name']] = entry
+
+    # a failed fetch keeps what the index knew about the file from earlier runs
+    for name, entry in results.items():
+        if entry['status'] in ('downloaded', 'unchanged') or name not in index:
+            index[name] = entry
+        else:
+            index[name]['last_status'] = entry['status']
+    save_index(download_dir, index)
+    return results
+
+def summarize(results: dict) -> dict:
+    counts = {}
+    for entry in results.values():
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    return counts
+
+def run(manifest, default_dir, description, argv = None) -> int:
+    '''command line entry of the downloader scripts: --output-dir and --workers override the script configuration'''
+    parser = argparse.ArgumentParser(description = description)
+    parser.add_argument('--output-dir', default = default_dir)
+    parser.add_argument('--workers', type = int, default = MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    results = fetch_documents(manifest, args.output_dir, max_workers = args.workers)
+    counts = summarize(results)
+    print(f"Done! {counts}")
+    return 0 if counts.get('error', 0) == 0 else 1
@@ -1,18 +1,44 @@
 import sys
 import os
-import gpxpy
-import geopandas as gpd
-from shapely.geometry import Point
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QFileDialog, QLabel, QMessageBox, QLineEdit, QSizePolicy
+    QTableWidget, QTableWidgetItem, QFileDialog, QLabel, QMessageBox, QLineEdit, QSizePolicy, QComboBox
 )
-from PyQt6.QtCore import Qt
-from datetime import timezone
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+import gpx_conversion
 
 # === USER SETTINGS ===
 projected_crs = "EPSG:2285"  # NAD83 / Washington North (ftUS)
 
+# output format choices: label -> output_format of gpx_conversion.convert_files
+Output_Formats = {
+    "Shapefile per GPX file": "shapefile",
+    "GeoPackage (all traces)": "gpkg",
+    "GeoParquet (all traces)": "parquet",
+}
+
+class ConversionThread(QThread):
+    """Converts GPX files in a process pool off the GUI thread and reports every finished file"""
+    file_done = pyqtSignal(int, object) # index in the file list, result of gpx_conversion.convert_file
+    finished = pyqtSignal(object)
+    error = pyqtSignal(object)
+
+    def __init__(self, gpx_files, output_folder, min_distance_ft, output_format):
+        super().__init__()
+        self.gpx_files = gpx_files
+        self.output_folder = output_folder
+        self.min_distance_ft = min_distance_ft
+        self.output_format = output_format
+
+    def run(self):
+        try:
+            results = gpx_conversion.convert_files(self.gpx_files, self.output_folder, self.min_distance_ft, projected_crs,
+                                                   progress=self.file_done.emit, output_format=self.output_format)
+        except Exception as e:
+            self.error.emit(e)
+            return
+        self.finished.emit(results)
+
 class GPXConverterGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -41,6 +67,14 @@ class GPXConverterGUI(QWidget):
         h_layout.addWidget(self.min_distance_label)
         h_layout.addWidget(self.min_distance_textbox)
 
+        # Output format
+        self.format_label = QLabel('Output Format:')
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(list(Output_Formats.keys()))
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(self.format_label)
+        format_layout.addWidget(self.format_combo)
+
         # Table to show file info
         self.table = QTableWidget()
         self.table.setColumnCount(3)
@@ -60,6 +94,7 @@ class GPXConverterGUI(QWidget):
         layout.addWidget(self.btn_select_files)
         layout.addWidget(self.btn_select_folder)
         layout.addLayout(h_layout)
+        layout.addLayout(format_layout)
         layout.addWidget(self.table)
         layout.addWidget(self.lbl_output)
         layout.addWidget(self.btn_process)
@@ -89,41 +124,7 @@ class GPXConverterGUI(QWidget):
 
     def count_points(self, gpx_path):
         """Return total points count"""
-        points = []
-        with open(gpx_path, 'r', encoding='utf-8') as f:
-            gpx = gpxpy.parse(f)
-            for track in gpx.tracks:
-                for segment in track.segments:
-                    for pt in segment.points:
-                        points.append(Point(pt.longitude, pt.latitude))
-        total = len(points)
-        return total
-
-    def filter_points(self, gdf, min_dist_ft):
-        """Filter points closer than min_dist_ft"""
-        if gdf.empty:
-            return gdf
-        filtered = [gdf.iloc[0]]
-        last_geom = gdf.iloc[0].geometry
-        for idx, row in gdf.iloc[1:].iterrows():
-            if last_geom.distance(row.geometry) >= min_dist_ft:
-                filtered.append(row)
-                last_geom = row.geometry
-        return gpd.GeoDataFrame(filtered, crs=gdf.crs)
-
-    def compute_velocity(self, gdf):
-        """Compute velocity (mph) between consecutive points"""
-        gdf = gdf.sort_values("time").reset_index(drop=True)
-        gdf["vel_mph"] = 0.0
-        for i in range(1, len(gdf)):
-            p1, p2 = gdf.loc[i-1, "geometry"], gdf.loc[i, "geometry"]
-            t1, t2 = gdf.loc[i-1, "time"], gdf.loc[i, "time"]
-            if p1 and p2 and t1 and t2:
-                dt = (t2 - t1).total_seconds()
-                if dt > 0:
-                    dist_ft = p1.distance(p2)
-                    gdf.at[i, "vel_mph"] = dist_ft / dt * 0.681818
-        return gdf
+        return gpx_conversion.count_points(gpx_path)
 
     def process_files(self):
         if not self.gpx_files:
@@ -133,9 +134,6 @@ class GPXConverterGUI(QWidget):
             QMessageBox.warning(self, "No Folder", "Please select output folder.")
             return
 
-        os.makedirs(self.output_folder, exist_ok=True)
-        processed_count = 0
-
         # Get minimum distance from textbox
         try:
             self.min_distance_ft = float(self.min_distance_textbox.text())
@@ -143,44 +141,43 @@ class GPXConverterGUI(QWidget):
             QMessageBox.warning(self, "Invalid Distance", "Please enter a valid number for minimum distance.")
             return
 
-        for row, gpx_path in enumerate(self.gpx_files):
-            points_data = []
-            base_name = os.path.splitext(os.path.basename(gpx_path))[0]
-            with open(gpx_path, 'r', encoding='utf-8') as f:
-                gpx = gpxpy.parse(f)
-                for track in gpx.tracks:
-                    for segment in track.segments:
-                        for pt in segment.points:
-                            # convert GPX time to system local timezone
-                            pt_time = pt.time
-                            if pt_time is not None:
-                                # treat naive datetimes as UTC, then convert to local
-                                if pt_time.tzinfo is None:
-                                    pt_time = pt_time.replace(tzinfo=timezone.utc).astimezone()
-                                else:
-                                    pt_time = pt_time.astimezone()
-                            points_data.append({
-                                "time": pt_time,
-                                "geometry": Point(pt.longitude, pt.latitude)
-                            })
-            if not points_data:
-                continue
-
-            gdf = gpd.GeoDataFrame(points_data, crs="EPSG:4326").to_crs(projected_crs)
-            gdf_filtered = self.filter_points(gdf, self.min_distance_ft)
-            gdf_filtered = self.compute_velocity(gdf_filtered)
-
-            # Save shapefile
-            gdf_filtered["time_str"] = gdf_filtered["time"].dt.strftime("%Y-%m-%d %H:%M:%S")
-            out_shp = os.path.join(self.output_folder, f"{base_name}.shp")
-            gdf_filtered.to_file(out_shp, driver="ESRI Shapefile")
-
-            # Update table filtered count
-            self.table.setItem(row, 2, QTableWidgetItem(str(len(gdf_filtered))))
-            processed_count += 1
-
-        QMessageBox.information(self, "Done", f"Processed {processed_count} GPX file(s).")
-        self.lbl_summary.setText(f"✅ {processed_count} files processed successfully.")
+        # the table is sorted by the user; rows are found by file name
+        self.table.setSortingEnabled(False)
+        self.btn_process.setEnabled(False)
+        self.processed_count = 0
+        self.lbl_summary.setText(f"Processing {len(self.gpx_files)} file(s)...")
+        output_format = Output_Formats[self.format_combo.currentText()]
+        self.thread = ConversionThread(self.gpx_files, self.output_folder, self.min_distance_ft, output_format)
+        self.thread.file_done.connect(self.on_file_done)
+        self.thread.finished.connect(self.on_conversion_finished)
+        self.thread.error.connect(self.on_conversion_error)
+        self.thread.start()
+
+    def on_file_done(self, index, result):
+        if result['output'] is None and 'error' not in result:
+            return
+        # Update table filtered count
+        name = os.path.basename(result['file'])
+        exported = f"Error: {result['error']}" if 'error' in result else str(result['exported'])
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).text() == name:
+                self.table.setItem(row, 2, QTableWidgetItem(exported))
+        if 'error' in result:
+            return
+        self.processed_count += 1
+        self.lbl_summary.setText(f"{self.processed_count} of {len(self.gpx_files)} file(s) processed...")
+
+    def on_conversion_finished(self, results):
+        self.table.setSortingEnabled(True)
+        self.btn_process.setEnabled(True)
+        QMessageBox.information(self, "Done", f"Processed {self.processed_count} GPX file(s).")
+        self.lbl_summary.setText(f"✅ {self.processed_count} files processed successfully.")
+
+    def on_conversion_error(self, e):
+        self.table.setSortingEnabled(True)
+        self.btn_process.setEnabled(True)
+        self.lbl_summary.setText("")
+        QMessageBox.critical(self, "Error", f"Conversion failed: {e}")
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,369 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import xml.etree.ElementTree as ET
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gpd
+from pyproj import Transformer
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+## GPX to shapefile conversion of GPX_data_processing.py without Qt, for the GUI and for batch runs:
+##
+##   python gpx_conversion.py "I:\...\GPS traces\2025-05" --output D:\gpx_shapefiles --min-distance 10
+##
+## A GPX file is streamed with iterparse into coordinate and time arrays, projected with one pyproj call, thinned and
+## given velocities with array kernels on the projected x/y coordinates in feet. Distances are sqrt(dx * dx + dy * dy),
+## the same as shapely's Point.distance, so points are kept and velocities computed exactly as with shapely geometries.
+## Files are converted in parallel processes, to one shapefile per file or appended to one GeoPackage / GeoParquet
+## dataset with a source_file column (--format gpkg / parquet).
+
+PROJECTED_CRS = "EPSG:2285"  # NAD83 / Washington North (ftUS)
+MIN_DISTANCE_FT = 10
+FPS_TO_MPH = 0.681818 # feet per second to miles per hour
+DATASET_NAME = 'gpx_traces' # combined GeoPackage / GeoParquet output
+BATCH_POINTS = 500000 # points written to a combined dataset at a time
+
+try:
+    # numba is optional: without it the thinning scan runs as a plain python loop
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _thin_scan(x, y, min_distance):
+    keep = np.zeros(len(x), dtype = np.bool_)
+    keep[0] = True
+    last_x = x[0]
+    last_y = y[0]
+    for i in range(1, len(x)):
+        dx = x[i] - last_x
+        dy = y[i] - last_y
+        if math.sqrt(dx * dx + dy * dy) >= min_distance:
+            keep[i] = True
+            last_x = x[i]
+            last_y = y[i]
+    return keep
+
+_thin_scan_compiled = njit(cache = True)(_thin_scan) if njit is not None else None
+
+def thin_points(x, y, min_distance) -> np.ndarray:
+    '''
+    keep mask of the points at least min_distance from the last kept point. The first point is always kept.
+
+    :param x, y: projected coordinates in the order of the track
+    '''
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    if len(x) == 0:
+        return np.zeros(0, dtype = bool)
+    if _thin_scan_compiled is not None:
+        return _thin_scan_compiled(x, y, float(min_distance))
+    # python floats are much faster to loop over than numpy scalars
+    return _thin_scan(x.tolist(), y.tolist(), min_distance)
+
+def velocity_mph(x, y, dt) -> np.ndarray:
+    '''
+    velocity (mph) from the previous point to every point. The first point, and points with a missing or non-positive
+    time step, get 0.
+
+    :param x, y: projected coordinates in feet
+    :param dt: seconds from every point to the next one (one less than the points), NaN if a time is missing
+    '''
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    vel = np.zeros(len(x))
+    if len(x) < 2:
+        return vel
+    dx = np.diff(x)
+    dy = np.diff(y)
+    dt = np.asarray(dt, dtype = float)
+    with np.errstate(invalid = 'ignore'):
+        moving = dt > 0
+    vel[1:][moving] = np.sqrt(dx * dx + dy * dy)[moving] / dt[moving] * FPS_TO_MPH
+    return vel
+
+def time_steps(times: pd.Series) -> np.ndarray:
+    '''seconds from every time to the next one, NaN where either time is missing. Times are compared in UTC.'''
+    return pd.to_datetime(times, utc = True).diff().dt.total_seconds().to_numpy(dtype = float)[1:]
+
+def _local_name(tag):
+    return tag.rpartition('}')[2]
+
+def count_points(gpx_path) -> int:
+    '''number of track points of a GPX file, counted while streaming it'''
+    total = 0
+    for _, elem in ET.iterparse(gpx_path, events = ('end',)):
+        name = _local_name(elem.tag)
+        if name == 'trkpt':
+            total += 1
+        elif name == 'trkseg':
+            elem.clear()
+    return total
+
+def read_gpx(gpx_path):
+    '''
+    track points of a GPX file, streamed with iterparse.
+
+    :return: lon, lat arrays and the time strings of the points (None where a point has no time)
+    '''
+    lon, lat, times = [], [], []
+    for _, elem in ET.iterparse(gpx_path, events = ('end',)):
+        name = _local_name(elem.tag)
+        if name == 'trkpt':
+            lon.append(elem.get('lon'))
+            lat.append(elem.get('lat'))
+            time_text = None
+            for child in elem:
+                if _local_name(child.tag) == 'time':
+                    time_text = child.text
+                    break
+            times.append(time_text)
+        elif name == 'trkseg':
+            # the points of a finished segment are not needed any more
+            elem.clear()
+    return np.array(lon, dtype = float), np.array(lat, dtype = float), times
+
+def utc_times(times) -> pd.Series:
+    '''GPX time strings as UTC timestamps. Times without a zone are taken as UTC, like the GUI always did.'''
+    return pd.to_datetime(pd.Series(times, dtype = object), utc = True, format = 'ISO8601').dt.as_unit('us')
+
+def local_times(utc: pd.Series) -> pd.Series:
+    '''
+    UTC timestamps in the local time zone of this machine. A trace within one UTC offset gets that fixed offset zone;
+    a trace across a daylight saving change keeps the offset of every point, as python datetimes.
+    '''
+    valid = utc.notna().to_numpy()
+    if not valid.any():
+        return pd.Series([None] * len(utc), dtype = object)
+    # utc offsets change on whole hours, so one offset per quarter hour is exact
+    seconds = utc[valid].astype('int64').to_numpy() // 10**6
+    quarters = np.unique(seconds // 900)
+    zones = {time.localtime(q * 900).tm_gmtoff: time.localtime(q * 900).tm_zone for q in quarters}
+    if len(zones) == 1:
+        offset, name = next(iter(zones.items()))
+        return utc.dt.tz_convert(timezone(timedelta(seconds = offset), name))
+    return pd.Series([t.to_pydatetime().astimezone() if not pd.isna(t) else None for t in utc], dtype = object)
+
+_transformers = {}
+
+def project(lon, lat, projected_crs = PROJECTED_CRS):
+    '''x, y of WGS84 lon/lat in projected_crs, in one vectorized transformation'''
+    if projected_crs not in _transformers:
+        _transformers[projected_crs] = Transformer.from_crs("EPSG:4326", projected_crs, always_xy = True)
+    return _transformers[projected_crs].transform(lon, lat)
+
+def track_points(lon, lat, times, min_distance_ft = MIN_DISTANCE_FT, projected_crs = PROJECTED_CRS) -> gpd.GeoDataFrame:
+    '''
+    thinned track points with velocity, as points in projected_crs with time (UTC) and vel_mph.
+    Points closer than min_distance_ft to the last kept point are dropped, then velocities are computed in time order.
+    '''
+    x, y = project(lon, lat, projected_crs)
+    keep = thin_points(x, y, min_distance_ft)
+    utc = utc_times(times)[keep].reset_index(drop = True)
+    gdf = gpd.GeoDataFrame({"time": utc}, geometry = gpd.points_from_xy(x[keep], y[keep]), crs = projected_crs)
+    gdf = gdf.sort_values("time").reset_index(drop = True)
+    gdf["vel_mph"] = velocity_mph(gdf.geometry.x.to_numpy(), gdf.geometry.y.to_numpy(), time_steps(gdf["time"]))
+    return gdf
+
+def convert_points(lon, lat, times, min_distance_ft = MIN_DISTANCE_FT, projected_crs = PROJECTED_CRS) -> gpd.GeoDataFrame:
+    '''
+    track_points with the times in the local time zone, as points in projected_crs with time, vel_mph and time_str.
+    '''
+    gdf = track_points(lon, lat, times, min_distance_ft, projected_crs)
+    gdf["time"] = local_times(gdf["time"])
+    if isinstance(gdf["time"].dtype, pd.DatetimeTZDtype):
+        gdf["time_str"] = gdf["time"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        # python datetimes of a trace across a daylight saving change
+        gdf["time_str"] = gdf["time"].map(lambda t: t.strftime("%Y-%m-%d %H:%M:%S") if t is not None else None)
+    return gdf
+
+def convert_file(gpx_path, output_folder, min_distance_ft = MIN_DISTANCE_FT, projected_crs = PROJECTED_CRS) -> dict:
+    '''
+    convert a GPX file to <output_folder>/<name>.shp. A file without track points is not written.
+
+    :return: file, points (track points in the file), exported (points written), output (shapefile or None)
+    '''
+    lon, lat, times = read_gpx(gpx_path)
+    result = {'file': gpx_path, 'points': len(lon), 'exported': 0, 'output': None}
+    if len(lon) == 0:
+        return result
+    gdf = convert_points(lon, lat, times, min_distance_ft, projected_crs)
+    base_name = os.path.splitext(os.path.basename(gpx_path))[0]
+    out_shp = os.path.join(output_folder, f"{base_name}.shp")
+    gdf.to_file(out_shp, driver="ESRI Shapefile")
+    result.update({'exported': len(gdf), 'output': out_shp})
+    return result
+
+def trace_points(gpx_path, min_distance_ft = MIN_DISTANCE_FT, projected_crs = PROJECTED_CRS):
+    '''
+    the converted points of a GPX file for a combined dataset: source_file, time (UTC timestamp), vel_mph and the point.
+
+    :return: result as of convert_file (without output), and the points (None for a file without track points)
+    '''
+    lon, lat, times = read_gpx(gpx_path)
+    result = {'file': gpx_path, 'points': len(lon), 'exported': 0, 'output': None}
+    if len(lon) == 0:
+        return result, None
+    # times stay in UTC: traces in different utc offsets only share a column type in UTC
+    gdf = track_points(lon, lat, times, min_distance_ft, projected_crs)
+    points = gpd.GeoDataFrame({'source_file': os.path.basename(gpx_path), 'time': gdf['time'], 'vel_mph': gdf['vel_mph']},
+                              geometry = gdf.geometry, crs = projected_crs)
+    result['exported'] = len(points)
+    return result, points
+
+class GeoPackageWriter:
+    '''appends points to a layer of a GeoPackage, which keeps an R-tree spatial index on the geometry'''
+    def __init__(self, path, layer = 'gpx_points'):
+        self.path = path
+        self.layer = layer
+
+    def write(self, gdf: gpd.GeoDataFrame):
+        mode = 'a' if os.path.exists(self.path) else 'w'
+        gdf.to_file(self.path, layer = self.layer, driver = 'GPKG', mode = mode, engine = 'pyogrio', SPATIAL_INDEX = 'YES')
+
+    def close(self):
+        pass
+
+class GeoParquetWriter:
+    '''
+    writes the points of a run to a new part file of a GeoParquet dataset folder, one row group per write.
+    Geometries are WKB with a bbox covering column, so readers can skip row groups outside a bounding box.
+    The part file is written under a temporary name and renamed on close.
+    '''
+    def __init__(self, folder, projected_crs = PROJECTED_CRS):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from pyproj import CRS
+        self.pa = pa
+        self.pq = pq
+        os.makedirs(folder, exist_ok = True)
+        self.path = os.path.join(folder, f'part-{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}.parquet')
+        bbox = pa.struct([('xmin', pa.float64()), ('ymin', pa.float64()), ('xmax', pa.float64()), ('ymax', pa.float64())])
+        geo = {'version': '1.1.0', 'primary_column': 'geometry',
+               'columns': {'geometry': {'encoding': 'WKB', 'geometry_types': ['Point'], 'crs': CRS(projected_crs).to_json_dict(),
+                                        'covering': {'bbox': {key: ['bbox', key] for key in ['xmin', 'ymin', 'xmax', 'ymax']}}}}}
+        self.schema = pa.schema([('source_file', pa.string()), ('time', pa.timestamp('us', tz = 'UTC')), ('vel_mph', pa.float64()),
+                                 ('geometry', pa.binary()), ('bbox', bbox)], metadata = {'geo': json.dumps(geo)})
+        self.writer = None
+
+    def write(self, gdf: gpd.GeoDataFrame):
+        pa = self.pa
+        x = gdf.geometry.x.to_numpy()
+        y = gdf.geometry.y.to_numpy()
+        table = pa.table({
+            'source_file': pa.array(gdf['source_file'].to_numpy(dtype = object), pa.string()),
+            'time': pa.array(gdf['time']),
+            'vel_mph': pa.array(gdf['vel_mph'].to_numpy(dtype = float)),
+            'geometry': pa.array(shapely.to_wkb(gdf.geometry.values), pa.binary()),
+            'bbox': pa.StructArray.from_arrays([pa.array(x), pa.array(y), pa.array(x), pa.array(y)], names = ['xmin', 'ymin', 'xmax', 'ymax']),
+        }, schema = self.schema)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path + '.tmp', self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.path + '.tmp', self.path)
+
+def dataset_writer(output_format, output_folder, name = DATASET_NAME, projected_crs = PROJECTED_CRS):
+    '''writer of a combined dataset: <output_folder>/<name>.gpkg, or the GeoParquet folder <output_folder>/<name>'''
+    if output_format == 'gpkg':
+        return GeoPackageWriter(os.path.join(output_folder, f'{name}.gpkg'))
+    if output_format == 'parquet':
+        return GeoParquetWriter(os.path.join(output_folder, name), projected_crs)
+    raise ValueError(f'Unknown output format {output_format}')
+
+def convert_files(gpx_files, output_folder, min_distance_ft = MIN_DISTANCE_FT, projected_crs = PROJECTED_CRS,
+                  max_workers = None, progress = None, output_format = 'shapefile', dataset_name = DATASET_NAME,
+                  batch_points = BATCH_POINTS) -> list:
+    '''
+    convert GPX files in parallel processes.
+
+    :param progress: called with (index of the file in gpx_files, result of convert_file) as every file finishes
+    :param output_format: 'shapefile' writes one shapefile per GPX file. 'gpkg' and 'parquet' append the points of all
+                          files, with a source_file column, to one GeoPackage or GeoParquet dataset (see dataset_writer).
+    :param batch_points: for gpkg and parquet, points collected from finished files before they are written at once
+    :return: results of convert_file in the order of gpx_files. A file that failed has an error entry.
+    '''
+    os.makedirs(output_folder, exist_ok = True)
+    results = [None] * len(gpx_files)
+    writer = None if output_format == 'shapefile' else dataset_writer(output_format, output_folder, dataset_name, projected_crs)
+    pending = []
+    pending_points = 0
+    try:
+        with ProcessPoolExecutor(max_workers = max_workers) as pool:
+            if writer is None:
+                futures = {pool.submit(convert_file, f, output_folder, min_distance_ft, projected_crs): i for i, f in enumerate(gpx_files)}
+            else:
+                futures = {pool.submit(trace_points, f, min_distance_ft, projected_crs): i for i, f in enumerate(gpx_files)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    # a file that can't be converted is reported in its result and does not stop the others
+                    outcome = {'file': gpx_files[i], 'points': 0, 'exported': 0, 'output': None, 'error': str(e)}
+                    outcome = outcome if writer is None else (outcome, None)
+                if writer is None:
+                    results[i] = outcome
+                else:
+                    results[i], points = outcome
+                    if points is not None:
+                        results[i]['output'] = writer.path
+                        pending.append(points)
+                        pending_points += len(points)
+                    if pending_points >= batch_points:
+                        writer.write(pd.concat(pending, ignore_index = True))
+                        pending, pending_points = [], 0
+                if progress is not None:
+                    progress(i, results[i])
+            if pending:
+                writer.write(pd.concat(pending, ignore_index = True))
+    finally:
+        if writer is not None:
+            writer.close()
+    return results
+
+def find_gpx_files(paths) -> list:
+    '''GPX files of the given files and folders (folders are searched recursively)'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                files += sorted(os.path.join(folder, name) for name in names if name.lower().endswith('.gpx'))
+        else:
+            files.append(path)
+    return files
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Convert GPX traces to points with velocity.')
+    parser.add_argument('inputs', nargs = '+', help = 'GPX files or folders of GPX files')
+    parser.add_argument('--output', required = True, help = 'output folder')
+    parser.add_argument('--min-distance', type = float, default = MIN_DISTANCE_FT, help = 'minimum distance between points (ft)')
+    parser.add_argument('--crs', default = PROJECTED_CRS, help = 'projected crs in feet')
+    parser.add_argument('--workers', type = int, default = None)
+    parser.add_argument('--format', choices = ['shapefile', 'gpkg', 'parquet'], default = 'shapefile',
+                        help = 'one shapefile per file, or all traces appended to one GeoPackage / GeoParquet dataset')
+    parser.add_argument('--name', default = DATASET_NAME, help = 'name of the combined dataset')
+    args = parser.parse_args(argv)
+
+    gpx_files = find_gpx_files(args.inputs)
+    print(f'Converting {len(gpx_files)} GPX files')
+    def report(i, result):
+        if 'error' in result:
+            print(f"{os.path.basename(result['file'])}: error: {result['error']}")
+        else:
+            print(f"{os.path.basename(result['file'])}: {result['exported']} of {result['points']} points exported")
+    results = convert_files(gpx_files, args.output, args.min_distance, args.crs, args.workers, report, args.format, args.name)
+    print(f"Processed {sum(1 for r in results if r['output'])} GPX file(s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
+import os
 import h5py
+import logging
 import numpy as np
 import pandas as pd
+from common_utility import (SYNC_CHUNK_SIZE, sum_households_by_parcel, interpolate_columns, round_columns,
+        id_positions, Jurisdiction_Names, canonical_jurisdiction)
 
 #2/3/2022
 # upgrade to python 3.7
@@ -40,6 +44,33 @@ def df_to_h5(df, h5_store, group_name):
             h5_store[group_name].create_dataset(col, data=df[col], dtype = 'int', compression = 'gzip')
             
 
+
+def normalize_jurisdiction(df, col = 'Jurisdiction'):
+    """
+    Replaces jurisdiction names with their canonical spelling ('Redmond' -> 'REDMOND'). Only the distinct names are mapped.
+    """
+    if col in df.columns:
+        codes, uniques = pd.factorize(df[col])
+        canonical = np.array([canonical_jurisdiction(name) for name in uniques] + [np.nan], dtype = object)
+        df[col] = canonical[codes]
+    return df
+
+def scenario_logger(name, log_file) -> logging.Logger:
+    """
+    Logger of one run, writing to log_file and to the console. It is set up on first use and does not propagate to
+    the root logger, so runs of several scenarios in one process (or in a pool) keep their logs apart.
+    """
+    logger = logging.getLogger(f'{name}.{os.path.splitext(os.path.basename(log_file))[0]}')
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(logging.Formatter("%(asctime)s: %(levelname)s - %(message)s"))
+        logger.addHandler(file_handler)
+        # also log info to console
+        logger.addHandler(logging.StreamHandler())
+    return logger
+
 def backupScripts(source, dest):
     import os
     import shutil
@@ -101,4 +132,4 @@ def controlled_rounding(data_df, attr_name, control_total, index_attr_name):
     new_data_df = pd.concat([new_data_df, updated_data_df])
     
     return new_data_df
- 
\ No newline at end of file
+ 